@@ -0,0 +1,61 @@
+const { performance } = require('perf_hooks');
+const fs = require('fs');
+const vm = require('vm');
+
+// Load js/math.js the way the browser does (it attaches to window)
+const context = { window: {}, Math, console };
+vm.createContext(context);
+vm.runInContext(fs.readFileSync(__dirname + '/js/math.js', 'utf8'), context);
+const PerlinNoise = context.window.PerlinNoise;
+
+const perlin = new PerlinNoise(1234);
+const SIZE = 16;
+const HEIGHT = 64;
+const CHUNKS = 200;
+
+// One chunk worth of terrain sampling, mirroring World.generateOverworldChunk
+const scalarChunk = (cx, cz, height, cave) => {
+    const baseX = cx * SIZE, baseZ = cz * SIZE;
+    for (let z = 0; z < SIZE; z++) {
+        for (let x = 0; x < SIZE; x++) {
+            height[x + z * SIZE] = perlin.noise((baseX + x) * 0.03, (baseZ + z) * 0.03, perlin.seed);
+        }
+    }
+    for (let y = 0; y < HEIGHT; y++) {
+        for (let z = 0; z < SIZE; z++) {
+            for (let x = 0; x < SIZE; x++) {
+                cave[x + z * SIZE + y * SIZE * SIZE] = perlin.noise((baseX + x) * 0.05, y * 0.05, (baseZ + z) * 0.05);
+            }
+        }
+    }
+};
+
+const batchChunk = (cx, cz, height, cave) => {
+    const baseX = cx * SIZE, baseZ = cz * SIZE;
+    perlin.fill2D(height, baseX * 0.03, baseZ * 0.03, SIZE, SIZE, 0.03, perlin.seed);
+    perlin.fill3D(cave, baseX * 0.05, 0, baseZ * 0.05, SIZE, HEIGHT, SIZE, 0.05);
+};
+
+const run = (fn) => {
+    const height = new Float32Array(SIZE * SIZE);
+    const cave = new Float32Array(SIZE * SIZE * HEIGHT);
+    const start = performance.now();
+    for (let i = 0; i < CHUNKS; i++) fn(i % 20, Math.floor(i / 20), height, cave);
+    return performance.now() - start;
+};
+
+console.log(`Benchmarking noise for ${CHUNKS} chunks (${SIZE}x${SIZE} columns, ${HEIGHT} cave rows)...`);
+
+// Warmup
+for (let i = 0; i < 3; i++) {
+    run(scalarChunk);
+    run(batchChunk);
+}
+
+const samples = CHUNKS * SIZE * SIZE * (HEIGHT + 1);
+const scalarTime = run(scalarChunk);
+const batchTime = run(batchChunk);
+
+console.log(`Scalar noise(): ${scalarTime.toFixed(2)}ms (${(samples / scalarTime / 1000).toFixed(2)}M samples/s)`);
+console.log(`Batch fill2D/fill3D: ${batchTime.toFixed(2)}ms (${(samples / batchTime / 1000).toFixed(2)}M samples/s)`);
+console.log(`Speedup: ${(scalarTime / batchTime).toFixed(2)}x`);
@@ -11,12 +11,37 @@ class BiomeManager {
             BIRCH_FOREST: { name: 'Birch Forest', topBlock: BLOCK.GRASS, underBlock: BLOCK.DIRT, heightOffset: 2, treeChance: 0.1 },
             JUNGLE: { name: 'Jungle', topBlock: BLOCK.GRASS, underBlock: BLOCK.DIRT, heightOffset: 4, treeChance: 0.15 }
         };
+
+        // Temperature/humidity for the last chunk asked about, filled in one batch
+        this.cacheKey = null;
+        this.cacheTemp = new Float32Array(256);
+        this.cacheHumidity = new Float32Array(256);
     }
 
     getBiome(x, z) {
         const scale = 0.005;
-        const temp = window.perlin.noise(x * scale, z * scale, this.seed);
-        const humidity = window.perlin.noise(x * scale + 1000, z * scale + 1000, this.seed);
+        const noise = window.perlin;
+        let temp, humidity;
+
+        if (noise.fill2D && Number.isInteger(x) && Number.isInteger(z)) {
+            const cx = x >> 4;
+            const cz = z >> 4;
+            // Terrain asks for every column of a chunk in turn, so sample the chunk at once
+            if (!this.cacheKey || this.cacheKey.cx !== cx || this.cacheKey.cz !== cz ||
+                this.cacheKey.perlin !== noise || this.cacheKey.seed !== noise.seed || this.cacheKey.fn !== noise.noise) {
+                const bx = cx * 16 * scale;
+                const bz = cz * 16 * scale;
+                noise.fill2D(this.cacheTemp, bx, bz, 16, 16, scale, this.seed);
+                noise.fill2D(this.cacheHumidity, bx + 1000, bz + 1000, 16, 16, scale, this.seed);
+                this.cacheKey = { cx, cz, perlin: noise, seed: noise.seed, fn: noise.noise };
+            }
+            const i = (x & 15) + (z & 15) * 16;
+            temp = this.cacheTemp[i];
+            humidity = this.cacheHumidity[i];
+        } else {
+            temp = noise.noise(x * scale, z * scale, this.seed);
+            humidity = noise.noise(x * scale + 1000, z * scale + 1000, this.seed);
+        }
 
         if (temp > 0.5) {
             if (humidity < 0) return this.biomes.DESERT;
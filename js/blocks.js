@@ -348,7 +348,7 @@ const BLOCKS = {
     [BLOCK.HAY_BLOCK]: { name: 'hay_block', color: '#DAA520', top: '#FFD700', solid: true, icon: '🌾', hardness: 0.5, tool: 'hoe', drop: { type: BLOCK.ITEM_WHEAT, count: 9 } },
     [BLOCK.FARMLAND]: { name: 'farmland', color: '#3E2723', top: '#4E342E', solid: true, icon: '🌱', hardness: 0.6, tool: 'shovel', drop: { type: BLOCK.DIRT, count: 1 } },
     [BLOCK.BED]: { name: 'bed', color: '#8B0000', top: '#F0F0F0', solid: true, icon: '🛏️', hardness: 0.2, drop: { type: BLOCK.BED, count: 1 } },
-    [BLOCK.WHEAT]: { name: 'wheat', color: '#DAA520', solid: false, transparent: true, icon: '🌾', hardness: 0.0, drop: { type: BLOCK.ITEM_WHEAT, count: 1 } }, // Drop handled specially for seeds
+    [BLOCK.WHEAT]: { name: 'wheat', color: '#DAA520', solid: false, transparent: true, icon: '🌾', hardness: 0.0, randomTick: true, drop: { type: BLOCK.ITEM_WHEAT, count: 1 } }, // Drop handled specially for seeds
 
     [BLOCK.SNOW]: { name: 'snow', color: '#F0F0F0', top: '#FFFFFF', solid: true, icon: '❄️', hardness: 0.2 },
     [BLOCK.ICE]: { name: 'ice', color: '#A5F2F3', top: '#A5F2F3', solid: true, transparent: true, icon: '🧊', hardness: 0.5 },
@@ -456,10 +456,10 @@ const BLOCKS = {
     [BLOCK.NOTE_BLOCK]: { name: 'Note Block', color: '#8B4513', top: '#A0522D', solid: true, icon: '🎵', hardness: 0.8, tool: 'axe' },
 
     // Saplings
-    [BLOCK.OAK_SAPLING]: { name: 'Oak Sapling', color: '#228B22', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, drop: { type: BLOCK.OAK_SAPLING, count: 1 } },
-    [BLOCK.BIRCH_SAPLING]: { name: 'Birch Sapling', color: '#80a755', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, drop: { type: BLOCK.BIRCH_SAPLING, count: 1 } },
-    [BLOCK.SPRUCE_SAPLING]: { name: 'Spruce Sapling', color: '#2d4c2d', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, drop: { type: BLOCK.SPRUCE_SAPLING, count: 1 } },
-    [BLOCK.JUNGLE_SAPLING]: { name: 'Jungle Sapling', color: '#30bb0b', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, drop: { type: BLOCK.JUNGLE_SAPLING, count: 1 } },
+    [BLOCK.OAK_SAPLING]: { name: 'Oak Sapling', color: '#228B22', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, randomTick: true, drop: { type: BLOCK.OAK_SAPLING, count: 1 } },
+    [BLOCK.BIRCH_SAPLING]: { name: 'Birch Sapling', color: '#80a755', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, randomTick: true, drop: { type: BLOCK.BIRCH_SAPLING, count: 1 } },
+    [BLOCK.SPRUCE_SAPLING]: { name: 'Spruce Sapling', color: '#2d4c2d', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, randomTick: true, drop: { type: BLOCK.SPRUCE_SAPLING, count: 1 } },
+    [BLOCK.JUNGLE_SAPLING]: { name: 'Jungle Sapling', color: '#30bb0b', solid: false, transparent: true, icon: '🌱', hardness: 0.0, isSapling: true, randomTick: true, drop: { type: BLOCK.JUNGLE_SAPLING, count: 1 } },
 
     // Tools Visuals
     [BLOCK.PICKAXE_WOOD]: { name: 'Wood Pickaxe', color: '#8B4513', solid: false, isItem: true, icon: '⛏️' },
@@ -513,12 +513,12 @@ const BLOCKS = {
     [BLOCK.ITEM_GOLD_INGOT]: { name: 'Gold Ingot', color: '#FFD700', solid: false, isItem: true, icon: '🟡' },
     [BLOCK.ITEM_DIAMOND]: { name: 'Diamond', color: '#00FFFF', solid: false, isItem: true, icon: '💎' },
     [BLOCK.ITEM_APPLE]: { name: 'Apple', color: '#FF0000', solid: false, isItem: true, icon: '🍎', food: 4 },
-    [BLOCK.CARROTS]: { name: 'carrots', color: '#FFA500', solid: false, transparent: true, icon: '🥕', hardness: 0.0 },
-    [BLOCK.POTATOES]: { name: 'potatoes', color: '#F4A460', solid: false, transparent: true, icon: '🥔', hardness: 0.0 },
+    [BLOCK.CARROTS]: { name: 'carrots', color: '#FFA500', solid: false, transparent: true, icon: '🥕', hardness: 0.0, randomTick: true },
+    [BLOCK.POTATOES]: { name: 'potatoes', color: '#F4A460', solid: false, transparent: true, icon: '🥔', hardness: 0.0, randomTick: true },
     [BLOCK.MELON_BLOCK]: { name: 'Melon', color: '#00FF00', top: '#00FF00', solid: true, icon: '🍉', hardness: 1.0, tool: 'axe' },
     [BLOCK.PUMPKIN]: { name: 'Pumpkin', color: '#FF8C00', top: '#FF8C00', solid: true, icon: '🎃', hardness: 1.0, tool: 'axe' },
-    [BLOCK.MELON_STEM]: { name: 'Melon Stem', color: '#32CD32', solid: false, transparent: true, icon: '🌱', hardness: 0.0 },
-    [BLOCK.PUMPKIN_STEM]: { name: 'Pumpkin Stem', color: '#32CD32', solid: false, transparent: true, icon: '🌱', hardness: 0.0 },
+    [BLOCK.MELON_STEM]: { name: 'Melon Stem', color: '#32CD32', solid: false, transparent: true, icon: '🌱', hardness: 0.0, randomTick: true },
+    [BLOCK.PUMPKIN_STEM]: { name: 'Pumpkin Stem', color: '#32CD32', solid: false, transparent: true, icon: '🌱', hardness: 0.0, randomTick: true },
     [BLOCK.TNT]: { name: 'TNT', color: '#DB7093', top: '#FF0000', solid: true, icon: '🧨', hardness: 0.0 },
     [BLOCK.SPONGE]: { name: 'Sponge', color: '#DDDD00', top: '#DDDD00', solid: true, icon: '🧽', hardness: 0.6 },
 
@@ -590,14 +590,32 @@ const BLOCKS = {
     [BLOCK.ITEM_BOOTS_DIAMOND]: { name: 'Diamond Boots', color: '#00FFFF', solid: false, isItem: true, icon: '👢' }
 };
 
+// Per-id tables derived from the registry (light, meshing, random ticks, map colours),
+// cached by name. build(defs) runs on first use and again whenever the registry has grown
+// since, as plugins can register blocks at runtime (PluginAPI.registerBlock).
+const blockTables = new Map(); // Name -> { count, table }
+
+function getBlockTable(name, build) {
+    const defs = (typeof window !== 'undefined' ? window.BLOCKS : global.BLOCKS) || {};
+    const count = Object.keys(defs).length;
+    let entry = blockTables.get(name);
+    if (!entry || entry.count !== count) {
+        entry = { count, table: build(defs) };
+        blockTables.set(name, entry);
+    }
+    return entry.table;
+}
+
 if (typeof window !== 'undefined') {
     window.BLOCK = BLOCK;
     window.BLOCKS = BLOCKS;
     window.TOOLS = TOOLS;
     window.ARMOR = ARMOR;
+    window.getBlockTable = getBlockTable;
 } else {
     global.BLOCK = BLOCK;
     global.BLOCKS = BLOCKS;
     global.TOOLS = TOOLS;
     global.ARMOR = ARMOR;
+    global.getBlockTable = getBlockTable;
 }
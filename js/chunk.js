@@ -1,3 +1,74 @@
+// One channel (blocks, metadata or light) of a 16x16x16 section in compact form.
+// A uniform section keeps just its value; up to 16 distinct values are stored as
+// 1, 2 or 4-bit indices into a palette, packed into 32-bit words; anything busier
+// keeps a plain byte copy.
+class PalettedArray {
+    constructor(values) {
+        const lookup = PalettedArray._lookup;
+        lookup.fill(-1);
+        const palette = [];
+        for (let i = 0; i < values.length && palette.length <= 16; i++) {
+            const v = values[i];
+            if (lookup[v] < 0) {
+                lookup[v] = palette.length;
+                palette.push(v);
+            }
+        }
+
+        this.value = palette[0] || 0;
+        this.bits = 0;
+        this.palette = null;
+        this.data = null;
+        this.raw = null;
+        if (palette.length <= 1) return;
+
+        if (palette.length > 16) {
+            this.bits = 8;
+            this.raw = values.slice();
+            return;
+        }
+
+        const bits = palette.length <= 2 ? 1 : palette.length <= 4 ? 2 : 4;
+        this.bits = bits;
+        this.palette = new Uint8Array(palette);
+        this.wordShift = 5 - Math.log2(bits); // log2(values per 32-bit word)
+        this.wordMask = (32 / bits) - 1;
+        this.indexMask = (1 << bits) - 1;
+        const data = new Uint32Array((values.length * bits) >> 5);
+        for (let i = 0; i < values.length; i++) {
+            data[i >>> this.wordShift] |= lookup[values[i]] << ((i & this.wordMask) * bits);
+        }
+        this.data = data;
+    }
+
+    get(i) {
+        if (this.bits === 0) return this.value;
+        if (this.raw) return this.raw[i];
+        return this.palette[(this.data[i >>> this.wordShift] >>> ((i & this.wordMask) * this.bits)) & this.indexMask];
+    }
+
+    // Writes all values into target starting at offset
+    decodeInto(target, offset) {
+        const n = PalettedArray.SIZE;
+        if (this.bits === 0) {
+            target.fill(this.value, offset, offset + n);
+        } else if (this.raw) {
+            target.set(this.raw, offset);
+        } else {
+            for (let i = 0; i < n; i++) target[offset + i] = this.get(i);
+        }
+    }
+
+    get byteLength() {
+        if (this.bits === 0) return 0;
+        if (this.raw) return this.raw.length;
+        return this.data.byteLength + this.palette.length;
+    }
+}
+
+PalettedArray.SIZE = 16 * 16 * 16;
+PalettedArray._lookup = new Int16Array(256);
+
 class Chunk {
     constructor(cx, cz) {
         this.cx = cx;
@@ -10,37 +81,194 @@ class Chunk {
         // Uint8Array is much better for memory. 16*16*64 = 16384 bytes per chunk.
         // Let's assume max height 64.
         this.maxHeight = 128;
-        this.blocks = new Uint8Array(this.size * this.size * this.maxHeight);
-        this.metadata = new Uint8Array(this.size * this.size * this.maxHeight);
-        this.light = new Uint8Array(this.size * this.size * this.maxHeight);
+        // Blocks, metadata and light are either three dense arrays (the blocks/metadata/light
+        // properties) or, for chunks nobody has touched in a while, per-section palette storage
+        // (see compact()). Reading those properties expands a compact chunk again, so direct
+        // array access keeps working; getBlock & co. read compact chunks in place.
+        const volume = this.size * this.size * this.maxHeight;
+        this.denseBlocks = new Uint8Array(volume);
+        this.denseMetadata = new Uint8Array(volume);
+        // Two light channels per block: block light (torches, lava, ...) in the low nibble,
+        // sky light in the high nibble. Filled by World.initChunkLight once the chunk is added.
+        this.denseLight = new Uint8Array(volume);
+        this.compactSections = null; // [{ blocks, metadata, light }] of PalettedArray while compact
+        this.touched = true; // Expanded or edited since the last World.compactIdleChunks sweep
+        this.lightReady = false;
         this.modified = true; // Start modified to trigger update
-        this.visibleBlocks = []; // Cache of visible blocks
+        this.unsaved = true; // Changed since it was last written to the world store
+
+        // Vertical 16x16x16 sections. Edits only flag the sections they touch,
+        // so a mesh rebuild redoes those sections instead of the whole column.
+        this.sectionCount = this.maxHeight / this.size;
+        this.allSections = (1 << this.sectionCount) - 1;
+        this.dirtySections = this.allSections;
+
+        // Cached render mesh per section (see buildMesh): { quads, quadCount, specials, specialCount }
+        this.sectionMeshes = new Array(this.sectionCount).fill(null);
+
+        // Which faces of a section can see each other through its non-opaque cells, for the
+        // renderer's cave culling: sectionVisibility[section * 6 + face] is a mask of the faces
+        // reachable from that face (Chunk.FACES order). Sections not built yet count as open.
+        this.sectionVisibility = new Uint8Array(this.sectionCount * 6).fill(63);
+
+        // Bitmask of sections that may hold blocks taking random ticks (crops, saplings), so
+        // World.randomTick skips the rest; -1 until first counted (see getRandomTickSections)
+        this.randomTickSections = -1;
+
+        // Column heights, kept up to date by setBlock once built (see buildHeightmaps):
+        // 1 + y of the highest block in each x/z column (x + z*16), 0 for an empty column.
+        // surfaceHeights counts every block; motionBlockingHeights skips water and lava, so it
+        // gives the ground (or sea floor) mobs and players stand on.
+        this.surfaceHeights = new Uint8Array(this.size * this.size);
+        this.motionBlockingHeights = new Uint8Array(this.size * this.size);
+        this.heightmapsReady = false;
+        // Bumped whenever the top block of a column may have changed (minimap tiles redraw on it)
+        this.surfaceVersion = 0;
+    }
+
+    get blocks() {
+        if (this.compactSections) this.expand();
+        return this.denseBlocks;
+    }
+
+    set blocks(value) {
+        if (this.compactSections) this.expand();
+        this.denseBlocks = value;
+        this.heightmapsReady = false;
+        this.randomTickSections = -1;
+    }
+
+    get metadata() {
+        if (this.compactSections) this.expand();
+        return this.denseMetadata;
+    }
+
+    set metadata(value) {
+        if (this.compactSections) this.expand();
+        this.denseMetadata = value;
+    }
+
+    get light() {
+        if (this.compactSections) this.expand();
+        return this.denseLight;
+    }
+
+    set light(value) {
+        if (this.compactSections) this.expand();
+        this.denseLight = value;
+    }
+
+    isCompact() {
+        return this.compactSections !== null;
+    }
+
+    // Replaces the dense arrays with palette storage per section. All-air (or otherwise
+    // uniform) sections cost nothing; typical terrain shrinks to a fraction of the 96 KB.
+    compact() {
+        if (this.compactSections) return;
+        const n = PalettedArray.SIZE;
+        const sections = new Array(this.sectionCount);
+        for (let s = 0; s < this.sectionCount; s++) {
+            const start = s * n;
+            sections[s] = {
+                blocks: new PalettedArray(this.denseBlocks.subarray(start, start + n)),
+                metadata: new PalettedArray(this.denseMetadata.subarray(start, start + n)),
+                light: new PalettedArray(this.denseLight.subarray(start, start + n))
+            };
+        }
+        this.compactSections = sections;
+        this.denseBlocks = this.denseMetadata = this.denseLight = null;
+    }
+
+    // Back to dense arrays (any direct array access does this)
+    expand() {
+        const sections = this.compactSections;
+        if (!sections) return;
+        const arrays = this.decodeSections(sections);
+        this.compactSections = null;
+        this.denseBlocks = arrays.blocks;
+        this.denseMetadata = arrays.metadata;
+        this.denseLight = arrays.light;
+        this.touched = true;
+    }
+
+    decodeSections(sections) {
+        const volume = this.size * this.size * this.maxHeight;
+        const arrays = { blocks: new Uint8Array(volume), metadata: new Uint8Array(volume), light: new Uint8Array(volume) };
+        for (let s = 0; s < sections.length; s++) {
+            const offset = s * PalettedArray.SIZE;
+            sections[s].blocks.decodeInto(arrays.blocks, offset);
+            sections[s].metadata.decodeInto(arrays.metadata, offset);
+            sections[s].light.decodeInto(arrays.light, offset);
+        }
+        return arrays;
+    }
+
+    // Fresh copies of the three arrays, without expanding a compact chunk
+    copyArrays() {
+        if (this.compactSections) return this.decodeSections(this.compactSections);
+        return { blocks: this.denseBlocks.slice(), metadata: this.denseMetadata.slice(), light: this.denseLight.slice() };
+    }
+
+    // Bytes held by block, metadata and light storage
+    byteLength() {
+        if (!this.compactSections) return this.denseBlocks.length + this.denseMetadata.length + this.denseLight.length;
+        let bytes = 0;
+        this.compactSections.forEach(s => { bytes += s.blocks.byteLength + s.metadata.byteLength + s.light.byteLength; });
+        return bytes;
     }
 
     getIndex(x, y, z) {
         return x + z * this.size + y * this.size * this.size;
     }
 
+    // Block type at a flat index (x + z*16 + y*256)
+    getBlockAtIndex(i) {
+        const sections = this.compactSections;
+        if (sections) return sections[i >> 12].blocks.get(i & 4095);
+        return this.denseBlocks[i];
+    }
+
     getBlock(x, y, z) {
         if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
             return BLOCK.AIR; // Air
         }
-        return this.blocks[this.getIndex(x, y, z)];
+        const sections = this.compactSections;
+        if (sections) return sections[y >> 4].blocks.get(x + z * 16 + (y & 15) * 256);
+        return this.denseBlocks[this.getIndex(x, y, z)];
     }
 
     getMetadata(x, y, z) {
         if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
             return 0;
         }
-        return this.metadata[this.getIndex(x, y, z)];
+        const sections = this.compactSections;
+        if (sections) return sections[y >> 4].metadata.get(x + z * 16 + (y & 15) * 256);
+        return this.denseMetadata[this.getIndex(x, y, z)];
     }
 
+    // Combined light byte (block light low nibble, sky light high nibble)
+    getLightByte(x, y, z) {
+        const sections = this.compactSections;
+        if (sections) return sections[y >> 4].light.get(x + z * 16 + (y & 15) * 256);
+        return this.denseLight[this.getIndex(x, y, z)];
+    }
+
+    // Block light level (0-15)
     getLight(x, y, z) {
         if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
             return 15; // Sunlight default for out of bounds/air for now? Or 0?
             // If it's daytime, outside is bright.
         }
-        return this.light[this.getIndex(x, y, z)];
+        return this.getLightByte(x, y, z) & 15;
+    }
+
+    // Sky light level (0-15)
+    getSkyLight(x, y, z) {
+        if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
+            return 15;
+        }
+        return this.getLightByte(x, y, z) >> 4;
     }
 
     setBlock(x, y, z, type) {
@@ -49,7 +277,13 @@ class Chunk {
         }
         this.blocks[this.getIndex(x, y, z)] = type;
         this.metadata[this.getIndex(x, y, z)] = 0; // Reset metadata on block change
-        this.modified = true;
+        this.unsaved = true;
+        this.markDirty(y);
+        if (this.heightmapsReady) this.updateHeightmaps(x, y, z, type);
+        if (this.randomTickSections >= 0) {
+            const ticks = Chunk._randomTickTypes || Chunk.getRandomTickTypes();
+            if (ticks[type]) this.randomTickSections |= 1 << (y >> 4);
+        }
     }
 
     setMetadata(x, y, z, val) {
@@ -57,14 +291,126 @@ class Chunk {
             return;
         }
         this.metadata[this.getIndex(x, y, z)] = val;
-        this.modified = true; // Metadata change might affect visuals
+        this.unsaved = true;
+        this.markDirty(y); // Metadata change might affect visuals
+    }
+
+    // Flags the section containing y (and the adjacent one when y sits on a section border,
+    // since its faces touching this block may appear or disappear)
+    markDirty(y) {
+        const section = y >> 4;
+        let bits = 1 << section;
+        const local = y & 15;
+        if (local === 0 && section > 0) bits |= 1 << (section - 1);
+        if (local === 15 && section < this.sectionCount - 1) bits |= 1 << (section + 1);
+        this.dirtySections |= bits;
+        this.modified = true;
+        this.touched = true;
+    }
+
+    markAllDirty() {
+        this.dirtySections = this.allSections;
+        this.modified = true;
+        this.touched = true;
+    }
+
+    // Fills both heightmaps from the blocks, one downward scan per column
+    buildHeightmaps() {
+        const area = this.size * this.size;
+        for (let c = 0; c < area; c++) {
+            let y = this.maxHeight - 1;
+            while (y >= 0 && this.getBlockAtIndex(c + y * area) === BLOCK.AIR) y--;
+            this.surfaceHeights[c] = y + 1;
+            // Then on through water and lava (and any air pockets under them) to the ground
+            while (y >= 0) {
+                const type = this.getBlockAtIndex(c + y * area);
+                if (type !== BLOCK.AIR && !Chunk.isFluid(type)) break;
+                y--;
+            }
+            this.motionBlockingHeights[c] = y + 1;
+        }
+        this.heightmapsReady = true;
+        this.surfaceVersion++;
+    }
+
+    // Keeps the column's heights right after type was placed at x, y, z. Raising a column is
+    // O(1); clearing its top block scans down to the next one.
+    updateHeightmaps(x, y, z, type) {
+        const area = this.size * this.size;
+        const c = x + z * this.size;
+        const surface = this.surfaceHeights;
+        if (y + 1 >= surface[c]) this.surfaceVersion++; // New, replaced or removed top block
+        if (type !== BLOCK.AIR) {
+            if (y + 1 > surface[c]) surface[c] = y + 1;
+        } else if (y + 1 === surface[c]) {
+            let h = y;
+            while (h > 0 && this.getBlockAtIndex(c + (h - 1) * area) === BLOCK.AIR) h--;
+            surface[c] = h;
+        }
+
+        const ground = this.motionBlockingHeights;
+        if (type !== BLOCK.AIR && !Chunk.isFluid(type)) {
+            if (y + 1 > ground[c]) ground[c] = y + 1;
+        } else if (y + 1 === ground[c]) {
+            let h = y;
+            while (h > 0) {
+                const below = this.getBlockAtIndex(c + (h - 1) * area);
+                if (below !== BLOCK.AIR && !Chunk.isFluid(below)) break;
+                h--;
+            }
+            ground[c] = h;
+        }
+    }
+
+    // Heightmap lookups (local x, z), building the maps on first use
+    getSurfaceHeight(x, z) {
+        if (!this.heightmapsReady) this.buildHeightmaps();
+        return this.surfaceHeights[x + z * this.size];
+    }
+
+    getMotionBlockingHeight(x, z) {
+        if (!this.heightmapsReady) this.buildHeightmaps();
+        return this.motionBlockingHeights[x + z * this.size];
+    }
+
+    // Sections that hold blocks taking random ticks, counted on first use and then kept up to
+    // date by setBlock. Bits are only ever added, so a harvested farm keeps its section in the
+    // set until the chunk is reloaded; that costs a few wasted samples per tick.
+    getRandomTickSections() {
+        if (this.randomTickSections >= 0) return this.randomTickSections;
+        const ticks = Chunk.getRandomTickTypes();
+        const n = PalettedArray.SIZE;
+        let mask = 0;
+        for (let s = 0; s < this.sectionCount; s++) {
+            if (this.compactSections) {
+                // Compact sections list their block types; no need to look at every block
+                const blocks = this.compactSections[s].blocks;
+                if (blocks.bits === 0) {
+                    if (ticks[blocks.value]) mask |= 1 << s;
+                    continue;
+                }
+                if (blocks.palette) {
+                    for (let k = 0; k < blocks.palette.length; k++) {
+                        if (ticks[blocks.palette[k]]) { mask |= 1 << s; break; }
+                    }
+                    continue;
+                }
+            }
+            const start = s * n;
+            for (let i = start; i < start + n; i++) {
+                if (ticks[this.getBlockAtIndex(i)]) { mask |= 1 << s; break; }
+            }
+        }
+        this.randomTickSections = mask;
+        return mask;
     }
 
     setLight(x, y, z, val) {
         if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
             return;
         }
-        this.light[this.getIndex(x, y, z)] = val;
+        const i = this.getIndex(x, y, z);
+        this.light[i] = (this.light[i] & 0xF0) | (val & 15);
         // Light changes don't necessarily need a full mesh rebuild if we pass light via attributes,
         // but for this simple engine we draw immediately in render(), so we don't need to flag 'modified' for geometry,
         // but we might want to flag it if we were baking light into vertices.
@@ -72,25 +418,283 @@ class Chunk {
         // Actually, render() iterates visible blocks.
     }
 
-    updateVisibleBlocks(world) {
-        if (!this.modified) return;
-        this.visibleBlocks = [];
-
-        for (let x = 0; x < this.size; x++) {
-            for (let z = 0; z < this.size; z++) {
-                for (let y = 0; y < this.maxHeight; y++) {
-                    const type = this.getBlock(x, y, z);
-                    if (type === BLOCK.AIR) continue;
-
-                    // Check neighbors
-                    // We check if ANY face is exposed.
-                    if (this.isExposed(x, y, z, world)) {
-                        this.visibleBlocks.push({ x, y, z, type });
+    setSkyLight(x, y, z, val) {
+        if (x < 0 || x >= this.size || z < 0 || z >= this.size || y < 0 || y >= this.maxHeight) {
+            return;
+        }
+        const i = this.getIndex(x, y, z);
+        this.light[i] = (this.light[i] & 0x0F) | ((val & 15) << 4);
+    }
+
+    // Rebuilds the cached render mesh of every dirty section.
+    // Full cubes are emitted as greedy-merged face quads (only faces that touch a
+    // non-opaque neighbour survive), everything else (stairs, torches, water, ...)
+    // goes into a flat list of local indices that the renderer draws as billboards.
+    // Both lists are typed arrays so a rebuild allocates two buffers, not thousands of objects.
+    buildMesh(world) {
+        // Someone flagged the chunk without saying where (e.g. chunk.modified = true)
+        if (this.dirtySections === 0) this.dirtySections = this.allSections;
+
+        for (let section = 0; section < this.sectionCount; section++) {
+            if (this.dirtySections & (1 << section)) {
+                this.sectionMeshes[section] = this.buildSectionMesh(section, world);
+                this.computeSectionVisibility(section);
+            }
+        }
+        this.dirtySections = 0;
+        this.modified = false;
+    }
+
+    buildSectionMesh(section, world) {
+        const size = this.size;
+        const maxHeight = this.maxHeight;
+        const blocks = this.blocks;
+        const kinds = Chunk.getMeshKinds();
+        const maxMerge = Chunk.MESH_MAX_MERGE;
+        const baseX = this.cx * size;
+        const baseZ = this.cz * size;
+        const y0 = section * size;
+
+        let quads = Chunk._quadScratch;
+        let quadCount = 0;
+
+        // Block type of a neighbour cell, falling back to the world across chunk borders
+        const typeAt = (x, y, z) => {
+            if (y < 0) return BLOCK.BEDROCK; // Nothing to see below the world
+            if (y >= maxHeight) return BLOCK.AIR;
+            if (x >= 0 && x < size && z >= 0 && z < size) {
+                return blocks[x + z * size + y * size * size];
+            }
+            if (!world) return BLOCK.AIR;
+            return world.getBlock(baseX + x, y, baseZ + z);
+        };
+
+        // Light a face gets from the neighbour cell it looks into (brighter of block and sky)
+        const lightAt = (x, y, z) => {
+            if (y < 0 || y >= maxHeight) return 15;
+            if (x >= 0 && x < size && z >= 0 && z < size) {
+                const light = this.getLightByte(x, y, z);
+                return Math.max(light & 15, light >> 4);
+            }
+            if (!world || !world.getLight) return 15;
+            return Math.max(world.getLight(baseX + x, y, baseZ + z), world.getSkyLight(baseX + x, y, baseZ + z));
+        };
+
+        // Sections are cubes, so every slice is a size x size mask
+        const origin = [0, y0, 0];
+        const pos = [0, 0, 0];
+        const mask = Chunk._maskScratch;
+
+        for (let face = 0; face < 6; face++) {
+            const f = Chunk.FACES[face];
+            const d = f.axis, u = f.u, v = f.v;
+
+            for (let s = 0; s < size; s++) {
+                // 1. Build the visibility mask for this slice
+                let any = false;
+                for (let j = 0; j < size; j++) {
+                    for (let i = 0; i < size; i++) {
+                        pos[d] = origin[d] + s; pos[u] = origin[u] + i; pos[v] = origin[v] + j;
+                        const type = blocks[pos[0] + pos[2] * size + pos[1] * size * size];
+                        const kind = kinds[type];
+                        let visible = 0;
+                        if (kind === Chunk.KIND_OPAQUE || kind === Chunk.KIND_TRANSLUCENT) {
+                            const n = typeAt(pos[0] + f.nx, pos[1] + f.ny, pos[2] + f.nz);
+                            const nKind = kinds[n];
+                            if (nKind !== Chunk.KIND_OPAQUE && !(kind === Chunk.KIND_TRANSLUCENT && n === type)) {
+                                // Keyed on light too, so a merged quad is lit evenly
+                                visible = type | (lightAt(pos[0] + f.nx, pos[1] + f.ny, pos[2] + f.nz) << 8);
+                                any = true;
+                            }
+                        }
+                        mask[i + j * size] = visible;
+                    }
+                }
+                if (!any) continue;
+
+                // 2. Greedily merge equal-type, equally lit runs into rectangles
+                for (let j = 0; j < size; j++) {
+                    for (let i = 0; i < size; ) {
+                        const key = mask[i + j * size];
+                        if (key === 0) { i++; continue; }
+
+                        let w = 1;
+                        while (i + w < size && w < maxMerge && mask[i + w + j * size] === key) w++;
+
+                        let h = 1;
+                        grow: while (j + h < size && h < maxMerge) {
+                            for (let k = 0; k < w; k++) {
+                                if (mask[i + k + (j + h) * size] !== key) break grow;
+                            }
+                            h++;
+                        }
+
+                        for (let hh = 0; hh < h; hh++) {
+                            for (let k = 0; k < w; k++) mask[i + k + (j + hh) * size] = 0;
+                        }
+
+                        if ((quadCount + 1) * Chunk.QUAD_STRIDE > quads.length) {
+                            const grown = new Uint16Array(quads.length * 2);
+                            grown.set(quads);
+                            quads = Chunk._quadScratch = grown;
+                        }
+
+                        pos[d] = origin[d] + (f.dir > 0 ? s + 1 : s); // Face plane
+                        pos[u] = origin[u] + i; pos[v] = origin[v] + j;
+                        const o = quadCount * Chunk.QUAD_STRIDE;
+                        quads[o] = pos[0];
+                        quads[o + 1] = pos[1];
+                        quads[o + 2] = pos[2];
+                        quads[o + 3] = face;
+                        quads[o + 4] = w;
+                        quads[o + 5] = h;
+                        quads[o + 6] = key & 255;
+                        quadCount++;
+
+                        i += w;
                     }
                 }
             }
         }
-        this.modified = false;
+
+        // Non-cube blocks that can be seen from at least one side
+        const specials = Chunk._specialScratch;
+        let specialCount = 0;
+        const end = (y0 + size) * size * size;
+        for (let idx = y0 * size * size; idx < end; idx++) {
+            const type = blocks[idx];
+            if (kinds[type] !== Chunk.KIND_SPECIAL) continue;
+            const x = idx & 15;
+            const z = (idx >> 4) & 15;
+            const y = idx >> 8;
+            if (kinds[typeAt(x + 1, y, z)] === Chunk.KIND_OPAQUE &&
+                kinds[typeAt(x - 1, y, z)] === Chunk.KIND_OPAQUE &&
+                kinds[typeAt(x, y + 1, z)] === Chunk.KIND_OPAQUE &&
+                kinds[typeAt(x, y - 1, z)] === Chunk.KIND_OPAQUE &&
+                kinds[typeAt(x, y, z + 1)] === Chunk.KIND_OPAQUE &&
+                kinds[typeAt(x, y, z - 1)] === Chunk.KIND_OPAQUE) continue;
+            specials[specialCount++] = idx;
+        }
+
+        if (quadCount === 0 && specialCount === 0) return null;
+        return {
+            quads: quads.slice(0, quadCount * Chunk.QUAD_STRIDE),
+            quadCount,
+            specials: specials.slice(0, specialCount),
+            specialCount
+        };
+    }
+
+    // Flood-fills the non-opaque cells of a section and records, for every face a pocket of
+    // air touches, the other faces touched by the same pocket. A sealed section (solid rock)
+    // connects nothing, so the renderer never looks through it.
+    computeSectionVisibility(section) {
+        const size = this.size;
+        const blocks = this.blocks;
+        const kinds = Chunk.getMeshKinds();
+        const base = section * size * size * size;
+        const volume = size * size * size;
+        const out = this.sectionVisibility;
+        const o = section * 6;
+        out.fill(0, o, o + 6);
+
+        const visited = Chunk._floodVisited;
+        const queue = Chunk._floodQueue;
+        let open = 0;
+        for (let i = 0; i < volume; i++) {
+            const closed = kinds[blocks[base + i]] === Chunk.KIND_OPAQUE;
+            visited[i] = closed ? 1 : 0;
+            if (!closed) open++;
+        }
+        if (open === 0) return;
+        if (open === volume) {
+            out.fill(63, o, o + 6);
+            return;
+        }
+
+        for (let start = 0; start < volume; start++) {
+            if (visited[start]) continue;
+            visited[start] = 1;
+            queue[0] = start;
+            let head = 0, tail = 1;
+            let faces = 0;
+            while (head < tail) {
+                const i = queue[head++];
+                const x = i & 15, z = (i >> 4) & 15, y = i >> 8;
+                // Neighbours inside the section, or the face the pocket reaches
+                if (x === 15) faces |= 1; else if (!visited[i + 1]) { visited[i + 1] = 1; queue[tail++] = i + 1; }
+                if (x === 0) faces |= 2; else if (!visited[i - 1]) { visited[i - 1] = 1; queue[tail++] = i - 1; }
+                if (y === 15) faces |= 4; else if (!visited[i + 256]) { visited[i + 256] = 1; queue[tail++] = i + 256; }
+                if (y === 0) faces |= 8; else if (!visited[i - 256]) { visited[i - 256] = 1; queue[tail++] = i - 256; }
+                if (z === 15) faces |= 16; else if (!visited[i + 16]) { visited[i + 16] = 1; queue[tail++] = i + 16; }
+                if (z === 0) faces |= 32; else if (!visited[i - 16]) { visited[i - 16] = 1; queue[tail++] = i - 16; }
+            }
+            for (let f = 0; f < 6; f++) {
+                if (faces & (1 << f)) out[o + f] |= faces;
+            }
+        }
+    }
+
+    // Kept for callers that still use the old name
+    updateVisibleBlocks(world) {
+        if (!this.modified) return;
+        this.buildMesh(world);
+    }
+
+    // Per block id: whether light passes through it (air, water, transparent blocks)
+    // and how much block light it emits
+    static getLightTables() {
+        return window.getBlockTable('light', defs => {
+            const pass = new Uint8Array(256);
+            const emit = new Uint8Array(256);
+            pass[BLOCK.AIR] = 1;
+            for (let t = 1; t < 256; t++) {
+                const def = defs[t];
+                if (!def) continue;
+                if (t === BLOCK.WATER || def.transparent) pass[t] = 1;
+                if (def.light) emit[t] = Math.min(15, def.light);
+            }
+            return { pass, emit };
+        });
+    }
+
+    static isFluid(type) {
+        return type === BLOCK.WATER || type === BLOCK.LAVA;
+    }
+
+    // Per block id: whether it takes random ticks (blocks flagged randomTick: crops, saplings).
+    // The latest table is also kept in Chunk._randomTickTypes for setBlock, which skips the
+    // registry check.
+    static getRandomTickTypes() {
+        return Chunk._randomTickTypes = window.getBlockTable('randomTick', defs => {
+            const ticks = new Uint8Array(256);
+            for (let t = 1; t < 256; t++) {
+                if (defs[t] && defs[t].randomTick) ticks[t] = 1;
+            }
+            return ticks;
+        });
+    }
+
+    // Classifies every block id for meshing: air, opaque cube, see-through cube or special shape.
+    static getMeshKinds() {
+        return window.getBlockTable('meshKinds', defs => {
+            const kinds = new Uint8Array(256);
+            for (let t = 1; t < 256; t++) {
+                const def = defs[t];
+                if (!def || def.isItem) {
+                    kinds[t] = Chunk.KIND_EMPTY; // Unknown ids were never drawn
+                    continue;
+                }
+                const shaped = def.isStair || def.isSlab || def.isFence || def.isPane || def.isDoor ||
+                    def.isTrapdoor || def.isGate || def.isSign || def.isTorch || def.isWire || def.isSapling;
+                if (!def.solid || shaped || def.liquid) {
+                    kinds[t] = Chunk.KIND_SPECIAL;
+                } else {
+                    kinds[t] = def.transparent ? Chunk.KIND_TRANSLUCENT : Chunk.KIND_OPAQUE;
+                }
+            }
+            return kinds;
+        });
     }
 
     isExposed(x, y, z, world) {
@@ -142,8 +746,9 @@ class Chunk {
             return new Uint8Array(result);
         };
 
-        const packedBlocks = runLengthEncode(this.blocks);
-        const packedMeta = runLengthEncode(this.metadata);
+        const arrays = this.isCompact() ? this.copyArrays() : this;
+        const packedBlocks = runLengthEncode(arrays.blocks);
+        const packedMeta = runLengthEncode(arrays.metadata);
 
         return {
              blocks: packedBlocks,
@@ -166,10 +771,46 @@ class Chunk {
         };
 
         if (data.blocks) runLengthDecode(data.blocks, this.blocks);
+        this.heightmapsReady = false;
+        this.randomTickSections = -1;
         if (data.metadata) runLengthDecode(data.metadata, this.metadata);
 
-        this.modified = true;
+        this.lightReady = false;
+        this.markAllDirty();
     }
 }
 
+// Mesh block kinds
+Chunk.KIND_EMPTY = 0;
+Chunk.KIND_OPAQUE = 1;
+Chunk.KIND_TRANSLUCENT = 2;
+Chunk.KIND_SPECIAL = 3;
+
+// Quad layout in meshQuads: x, y, z (local face origin), face, du, dv, type
+Chunk.QUAD_STRIDE = 7;
+
+// Largest merged quad side. The canvas renderer depth-sorts whole quads, so very
+// long quads sort badly against the blocks standing on them; 4 keeps ~16x fewer quads
+// on flat ground while sorting stays stable.
+Chunk.MESH_MAX_MERGE = 4;
+
+// Face directions: normal axis, sign and the two in-plane axes (0=x, 1=y, 2=z)
+// 0 +X, 1 -X, 2 +Y, 3 -Y, 4 +Z, 5 -Z
+Chunk.FACES = [
+    { axis: 0, dir: 1, u: 2, v: 1, nx: 1, ny: 0, nz: 0 },
+    { axis: 0, dir: -1, u: 2, v: 1, nx: -1, ny: 0, nz: 0 },
+    { axis: 1, dir: 1, u: 0, v: 2, nx: 0, ny: 1, nz: 0 },
+    { axis: 1, dir: -1, u: 0, v: 2, nx: 0, ny: -1, nz: 0 },
+    { axis: 2, dir: 1, u: 0, v: 1, nx: 0, ny: 0, nz: 1 },
+    { axis: 2, dir: -1, u: 0, v: 1, nx: 0, ny: 0, nz: -1 }
+];
+
+// Shared build buffers, reused between rebuilds
+Chunk._quadScratch = new Uint16Array(4096 * Chunk.QUAD_STRIDE);
+Chunk._specialScratch = new Uint16Array(16 * 16 * 16);
+Chunk._maskScratch = new Uint16Array(16 * 16);
+Chunk._floodVisited = new Uint8Array(16 * 16 * 16);
+Chunk._floodQueue = new Uint16Array(16 * 16 * 16);
+
+window.PalettedArray = PalettedArray;
 window.Chunk = Chunk;
@@ -0,0 +1,54 @@
+// Chunk generation worker.
+// Runs the regular World generator (terrain, caves, ores, trees, structures) and the
+// initial lighting off the main thread and posts the raw block/metadata/light buffers
+// back as transferables.
+// Driven by ChunkWorkerPool (js/workerpool.js).
+
+self.window = self;
+importScripts('math.js', 'blocks.js', 'chunk.js', 'biome.js', 'structures.js', 'village.js', 'world.js');
+
+let world = null;
+
+const setupWorld = (seed) => {
+    world = new World();
+    // Reseeds the worker's noise too, so chunks from every worker line up
+    world.setSeed(seed);
+};
+
+self.onmessage = (e) => {
+    const msg = e.data;
+
+    if (msg.type === 'init') {
+        setupWorld(msg.seed);
+        return;
+    }
+
+    if (msg.type === 'generate') {
+        if (!world || world.seed !== msg.seed) setupWorld(msg.seed);
+
+        // Every job starts from an empty world: structures that spill over the
+        // chunk border end up in pendingBlocks and are handed back as overflow
+        world.chunks.clear();
+        world.pendingBlocks.clear();
+        world.pendingSpawns = [];
+        world.dimension = msg.dimension;
+
+        world.generateChunk(msg.cx, msg.cz);
+        const chunk = world.getChunk(msg.cx, msg.cz);
+
+        const overflow = [];
+        world.pendingBlocks.forEach((blocks, key) => overflow.push({ key, blocks }));
+
+        self.postMessage({
+            type: 'chunk',
+            id: msg.id,
+            cx: msg.cx,
+            cz: msg.cz,
+            blocks: chunk.blocks,
+            metadata: chunk.metadata,
+            light: chunk.light,
+            overflow,
+            spawns: world.pendingSpawns
+        }, [chunk.blocks.buffer, chunk.metadata.buffer, chunk.light.buffer]);
+    }
+};
@@ -20,6 +20,10 @@ class Drop {
 
         // Visual rotation
         this.rotY = 0;
+
+        // Reused by update for the swept move
+        this.box = { x, y, z, width: this.width, height: this.height };
+        this.moveResult = {};
     }
 
     update(dt) {
@@ -29,35 +33,40 @@ class Drop {
         // Gravity
         this.vy -= this.gravity * dt;
 
-        // Simple Physics (Check block below)
-        const bx = Math.floor(this.x);
-        const by = Math.floor(this.y);
-        const bz = Math.floor(this.z);
+        const physics = this.game.physics;
+        if (physics) {
+            // The collision box hangs below the item, so it floats a little over the ground
+            const box = this.box;
+            box.x = this.x;
+            box.y = this.y - Drop.HOVER;
+            box.z = this.z;
+
+            // Inside a block: pop out the top
+            if (physics.checkCollision(box)) {
+                box.y = Math.floor(box.y) + 1;
+                this.vy = 0;
+            }
 
-        // Check if inside block
-        const blockIn = this.world.getBlock(bx, by, bz);
-        if (blockIn !== BLOCK.AIR && blockIn !== BLOCK.WATER && !BLOCKS[blockIn].liquid) {
-             // Push out/up
-             this.y = by + 1.2;
-             this.vy = 0;
-             this.vx *= 0.8;
-             this.vz *= 0.8;
+            const dy = this.vy * dt;
+            const hit = physics.moveBox(box, this.vx * dt, dy, this.vz * dt, this.moveResult);
+            this.x = hit.x;
+            this.y = hit.y + Drop.HOVER;
+            this.z = hit.z;
+            if (hit.hitX) this.vx = 0;
+            if (hit.hitZ) this.vz = 0;
+            if (hit.hitY) {
+                this.vy = 0;
+                if (dy < 0) {
+                    this.vx *= 0.8; // Ground friction
+                    this.vz *= 0.8;
+                }
+            }
         } else {
-             const blockBelow = this.world.getBlock(bx, by - 1, bz);
-             if (blockBelow !== BLOCK.AIR && (!BLOCKS[blockBelow] || !BLOCKS[blockBelow].liquid)) {
-                 if (this.y - by < 0.3) {
-                     this.y = by + 0.3;
-                     this.vy = 0;
-                     this.vx *= 0.8; // Ground friction
-                     this.vz *= 0.8;
-                 }
-             }
+            this.x += this.vx * dt;
+            this.y += this.vy * dt;
+            this.z += this.vz * dt;
         }
 
-        this.x += this.vx * dt;
-        this.y += this.vy * dt;
-        this.z += this.vz * dt;
-
         // Magnet to player if close
         const player = this.game.player;
         const dx = player.x - this.x;
@@ -73,4 +82,7 @@ class Drop {
     }
 }
 
+// How far the item floats above the ground
+Drop.HOVER = 0.3;
+
 window.Drop = Drop;
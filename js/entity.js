@@ -30,6 +30,18 @@ class Entity {
         if (this.y < -10) this.isDead = true;
     }
 
+    // Moves by (dx, dy, dz), colliding with blocks through the game's physics when there is one
+    move(dx, dy, dz) {
+        const physics = this.game && this.game.physics;
+        if (physics) {
+            physics.moveEntity(this, dx, dy, dz);
+        } else {
+            this.x += dx;
+            this.y += dy;
+            this.z += dz;
+        }
+    }
+
     render(ctx) {
         // Placeholder
     }
@@ -39,9 +51,160 @@ class Entity {
     }
 }
 
+// Uniform grid over the game's entity lists (mobs, vehicles, drops, projectiles).
+// Columns are cellSize x cellSize blocks in X/Z (the world is only 128 blocks tall, so
+// there is no vertical split). sync() is called once per frame: it only moves the entities
+// whose column changed and drops the ones that left their list, so the lists can keep
+// being pushed to, spliced and filtered anywhere in the code as before.
+class EntityIndex {
+    constructor(cellSize = 4) {
+        this.cellSize = cellSize;
+        this.cells = new Map(); // Column key -> entities in that column
+        this.entries = new Map(); // Entity -> { key, slot, kind, stamp }
+        this.stamp = 0;
+        // Entities may have moved since the last sync; queries look this much further out
+        this.slack = 1;
+    }
+
+    cellKey(cx, cz) {
+        return ((cx & 0xFFFF) << 16) | (cz & 0xFFFF);
+    }
+
+    // lists: { kind: array of entities }, e.g. { mobs: game.mobs, drops: game.drops }
+    sync(lists) {
+        const stamp = ++this.stamp;
+        const size = this.cellSize;
+        for (const kind in lists) {
+            const list = lists[kind];
+            if (!list) continue;
+            for (let i = 0; i < list.length; i++) {
+                const entity = list[i];
+                if (entity.isDead) continue;
+                const key = this.cellKey(Math.floor(entity.x / size), Math.floor(entity.z / size));
+                const entry = this.entries.get(entity);
+                if (!entry) {
+                    this.entries.set(entity, { key, slot: this.addToCell(key, entity), kind, stamp });
+                } else {
+                    entry.stamp = stamp;
+                    entry.kind = kind;
+                    if (entry.key !== key) {
+                        this.removeFromCell(entry);
+                        entry.key = key;
+                        entry.slot = this.addToCell(key, entity);
+                    }
+                }
+            }
+        }
+        // Whatever was not seen has died or been removed from its list
+        if (this.entries.size > 0) {
+            for (const [entity, entry] of this.entries) {
+                if (entry.stamp === stamp) continue;
+                this.removeFromCell(entry);
+                this.entries.delete(entity);
+            }
+        }
+    }
+
+    addToCell(key, entity) {
+        let cell = this.cells.get(key);
+        if (!cell) {
+            cell = [];
+            this.cells.set(key, cell);
+        }
+        cell.push(entity);
+        return cell.length - 1;
+    }
+
+    // Swap-remove, fixing the slot of the entity moved into the gap
+    removeFromCell(entry) {
+        const cell = this.cells.get(entry.key);
+        const last = cell.pop();
+        if (entry.slot < cell.length) {
+            cell[entry.slot] = last;
+            this.entries.get(last).slot = entry.slot;
+        }
+        if (cell.length === 0) this.cells.delete(entry.key);
+    }
+
+    clear() {
+        this.cells.clear();
+        this.entries.clear();
+    }
+
+    // Entities of kind (any kind if null) within radius of x, z on the X/Z plane.
+    // Distances use the entities' current positions.
+    queryRadius(x, z, radius, kind = null, out = []) {
+        const size = this.cellSize;
+        const reach = radius + this.slack;
+        const cx0 = Math.floor((x - reach) / size), cx1 = Math.floor((x + reach) / size);
+        const cz0 = Math.floor((z - reach) / size), cz1 = Math.floor((z + reach) / size);
+        const r2 = radius * radius;
+        for (let cx = cx0; cx <= cx1; cx++) {
+            for (let cz = cz0; cz <= cz1; cz++) {
+                const cell = this.cells.get(this.cellKey(cx, cz));
+                if (!cell) continue;
+                for (let i = 0; i < cell.length; i++) {
+                    const e = cell[i];
+                    if (e.isDead || (kind && this.entries.get(e).kind !== kind)) continue;
+                    const dx = e.x - x, dz = e.z - z;
+                    if (dx * dx + dz * dz <= r2) out.push(e);
+                }
+            }
+        }
+        return out;
+    }
+
+    // Entities of kind that a ray from origin along dir (unit vector) may hit within maxDist:
+    // everything in the columns the ray crosses and their neighbours, since an entity's box
+    // can stick out of its column. Callers run the exact test (Physics.raycastEntities).
+    queryRay(origin, dir, maxDist, kind = null, out = []) {
+        const size = this.cellSize;
+        const seen = new Set();
+        const visit = (cx, cz) => {
+            for (let ox = -1; ox <= 1; ox++) {
+                for (let oz = -1; oz <= 1; oz++) {
+                    const key = this.cellKey(cx + ox, cz + oz);
+                    if (seen.has(key)) continue;
+                    seen.add(key);
+                    const cell = this.cells.get(key);
+                    if (!cell) continue;
+                    for (let i = 0; i < cell.length; i++) {
+                        const e = cell[i];
+                        if (e.isDead || (kind && this.entries.get(e).kind !== kind)) continue;
+                        out.push(e);
+                    }
+                }
+            }
+        };
+
+        // 2D DDA over the columns
+        let cx = Math.floor(origin.x / size), cz = Math.floor(origin.z / size);
+        const stepX = dir.x > 0 ? 1 : -1, stepZ = dir.z > 0 ? 1 : -1;
+        const deltaX = dir.x !== 0 ? Math.abs(size / dir.x) : Infinity;
+        const deltaZ = dir.z !== 0 ? Math.abs(size / dir.z) : Infinity;
+        let tMaxX = dir.x !== 0 ? ((dir.x > 0 ? (cx + 1) * size - origin.x : origin.x - cx * size) / Math.abs(dir.x)) : Infinity;
+        let tMaxZ = dir.z !== 0 ? ((dir.z > 0 ? (cz + 1) * size - origin.z : origin.z - cz * size) / Math.abs(dir.z)) : Infinity;
+
+        visit(cx, cz);
+        while (Math.min(tMaxX, tMaxZ) <= maxDist) {
+            if (tMaxX < tMaxZ) {
+                cx += stepX;
+                tMaxX += deltaX;
+            } else {
+                cz += stepZ;
+                tMaxZ += deltaZ;
+            }
+            visit(cx, cz);
+        }
+        return out;
+    }
+}
+
 if (typeof window !== 'undefined') {
     window.Entity = Entity;
+    window.EntityIndex = EntityIndex;
 } else {
     // For Node.js tests
     global.Entity = Entity;
+    global.EntityIndex = EntityIndex;
 }
@@ -9,12 +9,24 @@ class Game {
         this.world = new World();
         this.world.game = this;
         this.physics = new Physics(this.world);
+        // Off-main-thread chunk generation (falls back to World.generateChunk when workers are unavailable)
+        this.chunkWorkers = window.ChunkWorkerPool ? new window.ChunkWorkerPool(this.world) : null;
+        // IndexedDB saves written by a worker (falls back to localStorage when unavailable)
+        const store = window.WorldStore ? new window.WorldStore() : null;
+        this.world.store = store && store.available ? store : null;
         this.player = new Player(this);
         this.mobs = [];
         this.vehicles = [];
         this.drops = [];
         this.projectiles = [];
         this.tntPrimed = [];
+        // Spatial index over the lists above (see syncEntities)
+        this.entityIndex = window.EntityIndex ? new window.EntityIndex() : null;
+        // Natural spawning stops at this many mobs; far-off mobs think less often (see MobScheduler)
+        this.mobCap = 20;
+        this.mobScheduler = window.MobScheduler ? new window.MobScheduler(this) : null;
+        // Shared route to the player for chasing mobs (see FlowField)
+        this.navigation = window.FlowField ? new window.FlowField(this) : null;
         this.network = new NetworkManager(this);
         this.crafting = new CraftingSystem(this);
         this.particles = new ParticleSystem(this); // Init Particles
@@ -23,7 +35,7 @@ class Game {
         this.chat = new ChatManager(this);
         this.ui = new UIManager(this);
         this.input = new InputManager(this);
-        this.renderer = new Renderer(this);
+        this.renderer = this.createRenderer();
         this.pluginAPI = new window.PluginAPI(this);
         this.minimap = new window.Minimap(this);
         this.achievements = new window.AchievementManager(this);
@@ -59,8 +71,9 @@ class Game {
         // Action State
         this.breaking = null; // {x, y, z, progress, limit}
 
-        // Fluid State
-        this.fluidTick = 0;
+        // Fixed-rate logic ticks (see tick())
+        this.tickAccumulator = 0;
+        this.tickCount = 0;
         this.ambienceTimer = 0;
 
         // Fishing State
@@ -84,6 +97,24 @@ class Game {
         this.updateChunks();
     }
 
+    // Canvas 2D, unless WebGL was picked in the settings and can be started
+    createRenderer() {
+        if (localStorage.getItem('voxel_renderer') === 'webgl' && window.WebGLRenderer) {
+            const renderer = window.WebGLRenderer.create(this);
+            if (renderer) return renderer;
+        }
+        return new Renderer(this);
+    }
+
+    // Switches between 'canvas' and 'webgl'; returns the mode actually in use
+    setRendererMode(mode) {
+        localStorage.setItem('voxel_renderer', mode);
+        if (this.renderer.destroy) this.renderer.destroy();
+        this.renderer = this.createRenderer();
+        this.renderer.resize();
+        return this.renderer.mode;
+    }
+
     setFOV(val) {
         this.fov = val;
         localStorage.setItem('voxel_fov', val);
@@ -183,11 +214,29 @@ class Game {
         // Unload far chunks
         this.world.unloadFarChunks(this.player.x, this.player.z, dist);
 
+        // In a server's world the terrain is streamed in (see NetworkManager.receiveChunk)
+        if (this.network && this.network.streamsChunks()) return;
+
+        const pool = this.chunkWorkers && this.chunkWorkers.available ? this.chunkWorkers : null;
+        if (pool) pool.clearQueue(); // Re-prioritise around the current position
+
         for (let cx = centerChunkX - dist; cx <= centerChunkX + dist; cx++) {
             for (let cz = centerChunkZ - dist; cz <= centerChunkZ + dist; cz++) {
-                this.world.generateChunk(cx, cz);
+                if (this.world.getChunk(cx, cz)) continue;
+                // Saved chunks are read back from the world store instead of regenerated
+                if (this.world.loadStoredChunk(cx, cz)) continue;
+                const dx = cx - centerChunkX;
+                const dz = cz - centerChunkZ;
+                // The chunks around the player are generated right away so there is always ground underfoot
+                if (!pool || (Math.abs(dx) <= 1 && Math.abs(dz) <= 1)) {
+                    this.world.generateChunk(cx, cz);
+                } else {
+                    pool.request(cx, cz, dx * dx + dz * dz);
+                }
             }
         }
+
+        if (pool) pool.pump();
     }
 
     interact(x, y, z) {
@@ -474,8 +523,8 @@ class Game {
         };
 
         // 1. Check Mobs and Vehicles
-        const hitMob = this.physics.raycastEntities(eyePos, dir, this.mobs);
-        const hitVehicle = this.physics.raycastEntities(eyePos, dir, this.vehicles);
+        const hitMob = this.physics.raycastEntities(eyePos, dir, this.getEntitiesAlongRay('mobs', eyePos, dir, 4));
+        const hitVehicle = this.physics.raycastEntities(eyePos, dir, this.getEntitiesAlongRay('vehicles', eyePos, dir, 4));
 
         let closestMob = null;
         let minMobDist = 4.0; // Melee range
@@ -1021,7 +1070,7 @@ class Game {
     }
 
     spawnMobs() {
-        if (this.mobs.length >= 20) return;
+        if (this.mobs.length >= this.mobCap) return;
 
         const range = 40;
         const minRange = 16;
@@ -1101,25 +1150,27 @@ class Game {
         if (this.particles) this.particles.spawn(x, y, z, '#FFA500', 50);
         window.soundManager.play('break', {x,y,z}); // Boom sound
         const r2 = radius * radius;
-        for (let dx = -radius; dx <= radius; dx++) {
-            for (let dy = -radius; dy <= radius; dy++) {
-                 for (let dz = -radius; dz <= radius; dz++) {
-                     if (dx*dx + dy*dy + dz*dz <= r2) {
-                         const bx = Math.floor(x + dx);
-                         const by = Math.floor(y + dy);
-                         const bz = Math.floor(z + dz);
-                         const block = this.world.getBlock(bx, by, bz);
-                         if (block !== BLOCK.AIR && block !== BLOCK.BEDROCK && block !== BLOCK.WATER) {
-                             this.world.setBlock(bx, by, bz, BLOCK.AIR);
-                             this.network.sendBlockUpdate(bx, by, bz, BLOCK.AIR);
+        this.world.batchEdit(() => {
+            for (let dx = -radius; dx <= radius; dx++) {
+                for (let dy = -radius; dy <= radius; dy++) {
+                     for (let dz = -radius; dz <= radius; dz++) {
+                         if (dx*dx + dy*dy + dz*dz <= r2) {
+                             const bx = Math.floor(x + dx);
+                             const by = Math.floor(y + dy);
+                             const bz = Math.floor(z + dz);
+                             const block = this.world.getBlock(bx, by, bz);
+                             if (block !== BLOCK.AIR && block !== BLOCK.BEDROCK && block !== BLOCK.WATER) {
+                                 this.world.setBlock(bx, by, bz, BLOCK.AIR);
+                                 this.network.sendBlockUpdate(bx, by, bz, BLOCK.AIR);
+                             }
                          }
                      }
-                 }
+                }
             }
-        }
+        });
 
         // Damage entities
-        this.mobs.forEach(mob => {
+        this.getEntitiesNear('mobs', x, z, radius * 2).forEach(mob => {
              const dist = Math.sqrt((mob.x-x)**2 + (mob.y-y)**2 + (mob.z-z)**2);
              if (dist < radius * 2) {
                  const damage = Math.floor((1 - dist/(radius*2)) * 20);
@@ -1151,7 +1202,7 @@ class Game {
         if (!ingredient || ingredient.type !== BLOCK.ITEM_NETHER_WART) {
             entity.brewTime = 0;
             if (this.ui.activeBrewingStand === entity) this.ui.updateBrewingUI();
-            return;
+            return false;
         }
 
         // Check bottles
@@ -1184,6 +1235,7 @@ class Game {
         if (this.ui.activeBrewingStand === entity) {
             this.ui.updateBrewingUI();
         }
+        return canBrew; // Still brewing (see updateBlockEntities)
     }
 
     processFurnace(entity, dt) {
@@ -1223,6 +1275,9 @@ class Game {
         if (this.ui.activeFurnace === entity) {
             this.ui.updateFurnaceUI();
         }
+
+        // Still burning, or about to light up (see updateBlockEntities)
+        return entity.burnTime > 0 || !!(entity.input && entity.fuelItem && this.canSmelt(entity));
     }
 
     canSmelt(entity) {
@@ -1295,8 +1350,11 @@ class Game {
     switchDimension(dimension) {
         if (this.world.dimension === dimension) return;
 
+        this.world.releaseChunks(Array.from(this.world.chunks.values()));
         this.world.chunks.clear();
+        this.world.loadingChunks.clear();
         this.world.dimension = dimension;
+        if (this.chunkWorkers) this.chunkWorkers.reset();
 
         if (dimension === 'nether') {
             this.player.x /= 8;
@@ -1357,13 +1415,101 @@ class Game {
         }
     }
 
+    // Fixed-rate game logic, Game.TICK_RATE times per second (driven by gameLoop):
+    // scheduled block updates (fluids, redstone), random ticks (crops, saplings) and block
+    // entities (furnaces, brewing stands)
+    tick() {
+        this.tickCount++;
+        this.world.tick();
+        this.world.randomTick((x, y, z, type) => this.randomTickBlock(x, y, z, type));
+        this.updateBlockEntities(1 / Game.TICK_RATE);
+    }
+
+    // Process the awake furnaces and brewing stands, dt in seconds. Idle ones drop off the
+    // list until a slot changes (World.wakeBlockEntity), so storage rooms cost nothing.
+    updateBlockEntities(dt) {
+        const active = this.world.activeBlockEntities;
+        for (const entity of active) {
+            const busy = entity.type === 'furnace' ? this.processFurnace(entity, dt) : this.processBrewing(entity, dt);
+            if (!busy) active.delete(entity);
+        }
+    }
+
+    // A crop or sapling got a random tick (World.randomTick): grow one stage
+    randomTickBlock(x, y, z, type) {
+        const entity = this.world.getBlockEntity(x, y, z);
+        if (!entity) return;
+        if (entity.type === 'crop') {
+            if (entity.stage < 7) {
+                entity.stage++;
+            } else if (type === BLOCK.MELON_STEM || type === BLOCK.PUMPKIN_STEM) {
+                // Spread logic for stems: try spawn fruit
+                const dirs = [{x:1,z:0}, {x:-1,z:0}, {x:0,z:1}, {x:0,z:-1}];
+                const dir = dirs[Math.floor(Math.random()*4)];
+                const target = {x: x+dir.x, y: y, z: z+dir.z};
+                if (this.world.getBlock(target.x, target.y, target.z) === BLOCK.AIR) {
+                    // Check block below is dirt/grass/farmland
+                    const below = this.world.getBlock(target.x, target.y-1, target.z);
+                    if (below === BLOCK.DIRT || below === BLOCK.GRASS || below === BLOCK.FARMLAND) {
+                        this.world.setBlock(target.x, target.y, target.z, type === BLOCK.MELON_STEM ? BLOCK.MELON_BLOCK : BLOCK.PUMPKIN);
+                    }
+                }
+            }
+        } else if (entity.type === 'sapling') {
+            if (entity.stage < 7) {
+                entity.stage++;
+            } else {
+                // Grow Tree
+                const chunk = this.world.getChunkAt(x, z);
+                if (chunk) {
+                    // Calculate local coords for StructureManager
+                    const lx = x - chunk.cx * 16;
+                    const lz = z - chunk.cz * 16;
+
+                    // Remove block entity first
+                    this.world.setBlockEntity(x, y, z, null);
+                    this.world.setBlock(x, y, z, BLOCK.AIR); // Remove sapling block (replaced by tree trunk)
+
+                    this.world.structureManager.generateTree(chunk, lx, y, lz, entity.treeType || 'oak', true);
+                }
+            }
+        }
+    }
+
+    // Refreshes the entity index from the entity lists (once per frame, before entities update)
+    syncEntities() {
+        if (this.entityIndex) {
+            this.entityIndex.sync({ mobs: this.mobs, vehicles: this.vehicles, drops: this.drops, projectiles: this.projectiles });
+        }
+    }
+
+    // Entities of one list ('mobs', 'vehicles', 'drops', 'projectiles') within radius of x, z (X/Z plane)
+    getEntitiesNear(kind, x, z, radius) {
+        if (this.entityIndex) return this.entityIndex.queryRadius(x, z, radius, kind);
+        const r2 = radius * radius;
+        return this[kind].filter(e => !e.isDead && (e.x - x) ** 2 + (e.z - z) ** 2 <= r2);
+    }
+
+    // Candidates of one list for a ray test (see Physics.raycastEntities)
+    getEntitiesAlongRay(kind, origin, dir, maxDist) {
+        if (this.entityIndex) return this.entityIndex.queryRay(origin, dir, maxDist, kind);
+        return this[kind];
+    }
+
+    removeDrop(drop) {
+        const i = this.drops.indexOf(drop);
+        if (i !== -1) this.drops.splice(i, 1);
+    }
+
     update(dt) {
         // Update Listener
         if (window.soundManager && this.player) {
             window.soundManager.updateListener(this.player.x, this.player.y + this.player.height, this.player.z, this.player.yaw, this.player.pitch);
         }
 
-        this.player.update(dt / 1000);
+        // Hold the player in place until the server has sent the ground under them
+        const waitingForTerrain = this.network && this.network.streamsChunks() && !this.world.getChunkAt(this.player.x, this.player.z);
+        if (!waitingForTerrain) this.player.update(dt / 1000);
         this.updateBobber(dt / 1000);
         if (this.particles) this.particles.update(dt / 1000);
 
@@ -1382,80 +1528,26 @@ class Game {
             this.portalTimer = 0;
         }
 
-        // Update Fluids
-        this.fluidTick += dt;
-        if (this.fluidTick > 100) { // Every 100ms
-            this.world.updateFluids();
-            this.fluidTick = 0;
-        }
-
-        if (this.minimap) this.minimap.update();
+        if (this.minimap) this.minimap.update(dt);
         if (this.achievements) this.achievements.update();
         if (this.tutorial) this.tutorial.update(dt / 1000);
 
-        // Process Block Entities (Furnaces & Crops)
-        for (const [key, entity] of this.world.blockEntities) {
-            if (entity.type === 'furnace') {
-                this.processFurnace(entity, dt / 1000);
-            } else if (entity.type === 'brewing_stand') {
-                this.processBrewing(entity, dt / 1000);
-            } else if (entity.type === 'crop') {
-                // Random growth
-                if (Math.random() < 0.001) {
-                    if (entity.stage < 7) {
-                        entity.stage++;
-                    } else {
-                        // Spread logic for stems
-                        const [x, y, z] = key.split(',').map(Number);
-                        const b = this.world.getBlock(x, y, z);
-                        if (b === BLOCK.MELON_STEM || b === BLOCK.PUMPKIN_STEM) {
-                            // Try spawn fruit
-                            const dirs = [{x:1,z:0}, {x:-1,z:0}, {x:0,z:1}, {x:0,z:-1}];
-                            const dir = dirs[Math.floor(Math.random()*4)];
-                            const target = {x: x+dir.x, y: y, z: z+dir.z};
-                            if (this.world.getBlock(target.x, target.y, target.z) === BLOCK.AIR) {
-                                // Check block below is dirt/grass/farmland
-                                const below = this.world.getBlock(target.x, target.y-1, target.z);
-                                if (below === BLOCK.DIRT || below === BLOCK.GRASS || below === BLOCK.FARMLAND) {
-                                    this.world.setBlock(target.x, target.y, target.z, b === BLOCK.MELON_STEM ? BLOCK.MELON_BLOCK : BLOCK.PUMPKIN);
-                                }
-                            }
-                        }
-                    }
-                }
-            } else if (entity.type === 'sapling') {
-                // Random growth
-                if (Math.random() < 0.001) {
-                    if (entity.stage < 7) {
-                        entity.stage++;
-                    } else {
-                        // Grow Tree
-                        const [x, y, z] = key.split(',').map(Number);
-                        const chunk = this.world.getChunkAt(x, z);
-                        if (chunk) {
-                            // Calculate local coords for StructureManager
-                            const lx = x - chunk.cx * 16;
-                            const lz = z - chunk.cz * 16;
-
-                            // Remove block entity first
-                            this.world.setBlockEntity(x, y, z, null);
-                            this.world.setBlock(x, y, z, BLOCK.AIR); // Remove sapling block (replaced by tree trunk)
-
-                            this.world.structureManager.generateTree(chunk, lx, y, lz, entity.treeType || 'oak', true);
-                        }
-                    }
-                }
-            }
-        }
+        this.syncEntities();
+
+        if (this.navigation) this.navigation.update(dt / 1000);
 
-        // Mobs
-        for (let i = this.mobs.length - 1; i >= 0; i--) {
-            const mob = this.mobs[i];
-            if (mob.isDead) {
-                this.mobs.splice(i, 1);
-                continue;
+        // Mobs (distance-based AI rates, see MobScheduler)
+        if (this.mobScheduler) {
+            this.mobScheduler.update(dt / 1000);
+        } else {
+            for (let i = this.mobs.length - 1; i >= 0; i--) {
+                const mob = this.mobs[i];
+                if (mob.isDead) {
+                    this.mobs.splice(i, 1);
+                    continue;
+                }
+                mob.update(dt / 1000);
             }
-            mob.update(dt / 1000);
         }
 
         // Vehicles
@@ -1480,10 +1572,13 @@ class Game {
 
             if (drop.lifeTime <= 0) {
                 this.drops.splice(i, 1);
-                continue;
             }
+        }
 
-            // Collection
+        // Collection (only drops next to the player)
+        const nearbyDrops = this.getEntitiesNear('drops', this.player.x, this.player.z, 1.5);
+        for (const drop of nearbyDrops) {
+            if (drop.lifeTime <= 0) continue;
             const dx = this.player.x - drop.x;
             const dy = (this.player.y + 0.5) - drop.y;
             const dz = this.player.z - drop.z;
@@ -1492,7 +1587,7 @@ class Game {
                 if (drop.type === 'xp') {
                     this.player.addXP(drop.count);
                     if (window.soundManager) window.soundManager.play('place', {x:this.player.x, y:this.player.y, z:this.player.z});
-                    this.drops.splice(i, 1);
+                    this.removeDrop(drop);
                     continue;
                 }
 
@@ -1511,7 +1606,7 @@ class Game {
                 }
 
                 if (remaining === 0) {
-                    this.drops.splice(i, 1);
+                    this.removeDrop(drop);
                 } else {
                     drop.count = remaining;
                 }
@@ -1633,7 +1728,7 @@ class Game {
         let hasTarget = false;
 
         // Check Mobs
-        for (let mob of this.mobs) {
+        for (let mob of this.getEntitiesNear('mobs', this.player.x, this.player.z, 4.0)) {
              if (mob.isDead) continue;
              const dx = mob.x - this.player.x;
              const dy = (mob.y + mob.height/2) - (this.player.y + this.player.height);
@@ -1693,7 +1788,7 @@ class Game {
         this.autoSaveTimer = (this.autoSaveTimer || 0) + (dt / 1000);
         if (this.autoSaveTimer >= 60) {
             this.autoSaveTimer = 0;
-            this.world.saveWorld('default');
+            this.world.saveWorld(this.world.saveSlot || 'default');
         }
 
         // Ambience Update
@@ -1711,14 +1806,9 @@ class Game {
 
                  // Check for water nearby
                  let waterCount = 0;
-                 for (let dx = -2; dx <= 2; dx++) {
-                     for (let dy = -2; dy <= 2; dy++) {
-                         for (let dz = -2; dz <= 2; dz++) {
-                             if (this.world.getBlock(cx+dx, cy+dy, cz+dz) === BLOCK.WATER) {
-                                 waterCount++;
-                             }
-                         }
-                     }
+                 const nearby = this.world.getBlocksInBox(cx - 2, cy - 2, cz - 2, cx + 2, cy + 2, cz + 2);
+                 for (let i = 0; i < nearby.length; i++) {
+                     if (nearby[i] === BLOCK.WATER) waterCount++;
                  }
                  waterIntensity = Math.min(1.0, waterCount / 20);
 
@@ -1738,6 +1828,7 @@ class Game {
 
     gameLoop() {
         const now = Date.now();
+        const frameStart = this.lastTime;
         let dt = now - this.lastTime;
         this.lastTime = now;
 
@@ -1752,6 +1843,17 @@ class Game {
         }
         this.frameCount++;
 
+        // Logic ticks run at a fixed rate whatever the frame rate. After a long stall at most
+        // MAX_CATCHUP_TICKS run in one frame and the rest of the backlog is dropped.
+        this.tickAccumulator += now - frameStart;
+        let ticks = 0;
+        while (this.tickAccumulator >= Game.TICK_MS && ticks < Game.MAX_CATCHUP_TICKS) {
+            this.tick();
+            this.tickAccumulator -= Game.TICK_MS;
+            ticks++;
+        }
+        if (this.tickAccumulator >= Game.TICK_MS) this.tickAccumulator = 0;
+
         this.update(dt);
         this.render();
 
@@ -1759,4 +1861,9 @@ class Game {
     }
 }
 
+// Logic tick rate (see Game.tick)
+Game.TICK_RATE = 20;
+Game.TICK_MS = 1000 / Game.TICK_RATE;
+Game.MAX_CATCHUP_TICKS = 5;
+
 window.Game = Game;
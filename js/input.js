@@ -19,7 +19,8 @@ class InputManager {
             inventory: 'KeyE',
             fly: 'KeyF',
             chat: 'KeyT',
-            crafting: 'KeyC'
+            crafting: 'KeyC',
+            minimap: 'KeyM' // Cycles the minimap zoom
         };
 
         // Load from LocalStorage
@@ -92,6 +93,7 @@ class InputManager {
             else if (e.code === this.keybinds.fly) this.game.player.flying = !this.game.player.flying;
             else if (e.code === this.keybinds.inventory) this.game.ui.toggleInventory();
             else if (e.code === this.keybinds.crafting) this.game.ui.craftingUI();
+            else if (e.code === this.keybinds.minimap && this.game.minimap) this.game.minimap.cycleZoom();
 
             // Hotbar keys 1-9
             if (e.code.startsWith('Digit')) {
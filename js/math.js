@@ -1,18 +1,38 @@
 // Math utilities and Noise generation
 
+// Small seeded PRNG (mulberry32). Returns a function producing floats in [0, 1).
+function seededRandom(seed) {
+    let a = Math.floor(seed * 1000) >>> 0;
+    return () => {
+        a = (a + 0x6D2B79F5) >>> 0;
+        let t = a;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
 class PerlinNoise {
-    constructor() {
+    constructor(seed) {
+        this.p = new Array(512);
+        this.setSeed(seed === undefined ? Math.random() * 10000 : seed);
+    }
+
+    // Rebuilds the permutation table from seed, so the same seed always gives the same noise
+    setSeed(seed) {
+        this.seed = seed;
+        const random = seededRandom(seed);
+
         this.permutation = new Array(256);
         for (let i = 0; i < 256; i++) {
             this.permutation[i] = i;
         }
         // Shuffle
         for (let i = 255; i > 0; i--) {
-            const j = Math.floor(Math.random() * (i + 1));
+            const j = Math.floor(random() * (i + 1));
             [this.permutation[i], this.permutation[j]] = [this.permutation[j], this.permutation[i]];
         }
         // Duplicate for overflow
-        this.p = new Array(512);
         for (let i = 0; i < 512; i++) {
             this.p[i] = this.permutation[i % 256];
         }
@@ -64,7 +84,126 @@ class PerlinNoise {
             )
         );
     }
+
+    // Batch sampling
+    // fill2D/fill3D evaluate a whole grid in one call. Lattice cells, fade curves and
+    // gradient hashes are computed once per axis/cell and reused by every sample that
+    // falls in the same cell, instead of being re-derived per noise() call.
+    // Results match noise() (up to Float32 rounding).
+
+    // out[i + j*nx] = noise(x0 + i*step, z0 + j*step, w)
+    fill2D(out, x0, z0, nx, nz, step, w) {
+        if (this.noise !== PerlinNoise.prototype.noise) {
+            // noise() was replaced on this instance (tests, plugins): stay consistent with it
+            for (let j = 0; j < nz; j++) {
+                for (let i = 0; i < nx; i++) out[i + j * nx] = this.noise(x0 + i * step, z0 + j * step, w);
+            }
+            return out;
+        }
+        // A 2D grid at fixed w is a 3D grid that is one sample deep along y
+        return this.sampleGrid(out, x0, z0, w, nx, nz, 1, step, step, 0, false);
+    }
+
+    // out[x + z*nx + y*nx*nz] = noise(x0 + x*step, y0 + y*step, z0 + z*step) (chunk layout)
+    fill3D(out, x0, y0, z0, nx, ny, nz, step) {
+        if (this.noise !== PerlinNoise.prototype.noise) {
+            for (let y = 0; y < ny; y++) {
+                for (let z = 0; z < nz; z++) {
+                    for (let x = 0; x < nx; x++) {
+                        out[x + z * nx + y * nx * nz] = this.noise(x0 + x * step, y0 + y * step, z0 + z * step);
+                    }
+                }
+            }
+            return out;
+        }
+        return this.sampleGrid(out, x0, y0, z0, nx, ny, nz, step, step, step, true);
+    }
+
+    // Per-axis lattice data: cell index, fractional offset and its fade value for each sample
+    latticeAxis(start, count, step) {
+        const axis = { cell: new Int32Array(count), frac: new Float64Array(count), fade: new Float64Array(count) };
+        for (let i = 0; i < count; i++) {
+            const v = start + i * step;
+            const f = Math.floor(v);
+            axis.cell[i] = f & 255;
+            axis.frac[i] = v - f;
+            axis.fade[i] = this.fade(v - f);
+        }
+        return axis;
+    }
+
+    // Core grid sampler. Axis "a" is the noise x axis, "b" the noise y axis and "c" the noise z
+    // axis. yMajor selects the output layout: chunk order (a + c*na + b*na*nc) for 3D grids,
+    // plain a + b*na rows for 2D grids (where c is the single fixed sample).
+    sampleGrid(out, a0, b0, c0, na, nb, nc, stepA, stepB, stepC, yMajor) {
+        const p = this.p;
+        const GX = PerlinNoise.GRAD_X, GY = PerlinNoise.GRAD_Y, GZ = PerlinNoise.GRAD_Z;
+        const ax = this.latticeAxis(a0, na, stepA);
+        const aCell = ax.cell, aFrac = ax.frac, aFade = ax.fade;
+        const bx = this.latticeAxis(b0, nb, stepB);
+        const bCell = bx.cell, bFrac = bx.frac, bFade = bx.fade;
+        const cx = this.latticeAxis(c0, nc, stepC);
+        const cCell = cx.cell, cFrac = cx.frac, cFade = cx.fade;
+
+        let lastA = -1, lastB = -1, lastC = -1;
+        let h000 = 0, h100 = 0, h010 = 0, h110 = 0, h001 = 0, h101 = 0, h011 = 0, h111 = 0;
+
+        for (let k = 0; k < (yMajor ? nb : nc); k++) {
+            for (let j = 0; j < (yMajor ? nc : nb); j++) {
+                const bi = yMajor ? k : j;
+                const ci = yMajor ? j : k;
+                const Y = bCell[bi], Z = cCell[ci];
+                const y = bFrac[bi], z = cFrac[ci];
+                const v = bFade[bi], w = cFade[ci];
+                const rowBase = yMajor ? (j * na + k * na * nc) : (j * na + k * na * nb);
+
+                for (let i = 0; i < na; i++) {
+                    const X = aCell[i];
+                    if (X !== lastA || Y !== lastB || Z !== lastC) {
+                        // New lattice cell: fetch the 8 corner gradients once
+                        const A = p[X] + Y, AA = p[A] + Z, AB = p[A + 1] + Z;
+                        const B = p[X + 1] + Y, BA = p[B] + Z, BB = p[B + 1] + Z;
+                        h000 = p[AA] & 15; h100 = p[BA] & 15; h010 = p[AB] & 15; h110 = p[BB] & 15;
+                        h001 = p[AA + 1] & 15; h101 = p[BA + 1] & 15; h011 = p[AB + 1] & 15; h111 = p[BB + 1] & 15;
+                        lastA = X; lastB = Y; lastC = Z;
+                    }
+                    const x = aFrac[i], u = aFade[i];
+                    const x1 = x - 1, y1 = y - 1, z1 = z - 1;
+
+                    const n000 = GX[h000] * x + GY[h000] * y + GZ[h000] * z;
+                    const n100 = GX[h100] * x1 + GY[h100] * y + GZ[h100] * z;
+                    const n010 = GX[h010] * x + GY[h010] * y1 + GZ[h010] * z;
+                    const n110 = GX[h110] * x1 + GY[h110] * y1 + GZ[h110] * z;
+                    const n001 = GX[h001] * x + GY[h001] * y + GZ[h001] * z1;
+                    const n101 = GX[h101] * x1 + GY[h101] * y + GZ[h101] * z1;
+                    const n011 = GX[h011] * x + GY[h011] * y1 + GZ[h011] * z1;
+                    const n111 = GX[h111] * x1 + GY[h111] * y1 + GZ[h111] * z1;
+
+                    const nx00 = n000 + u * (n100 - n000);
+                    const nx10 = n010 + u * (n110 - n010);
+                    const nx01 = n001 + u * (n101 - n001);
+                    const nx11 = n011 + u * (n111 - n011);
+                    const nxy0 = nx00 + v * (nx10 - nx00);
+                    const nxy1 = nx01 + v * (nx11 - nx01);
+                    out[rowBase + i] = nxy0 + w * (nxy1 - nxy0);
+                }
+            }
+        }
+        return out;
+    }
+}
+
+// grad(hash, x, y, z) is linear in x, y, z; these are its coefficients per hash
+PerlinNoise.GRAD_X = new Float64Array(16);
+PerlinNoise.GRAD_Y = new Float64Array(16);
+PerlinNoise.GRAD_Z = new Float64Array(16);
+for (let h = 0; h < 16; h++) {
+    PerlinNoise.GRAD_X[h] = PerlinNoise.prototype.grad(h, 1, 0, 0);
+    PerlinNoise.GRAD_Y[h] = PerlinNoise.prototype.grad(h, 0, 1, 0);
+    PerlinNoise.GRAD_Z[h] = PerlinNoise.prototype.grad(h, 0, 0, 1);
 }
 
 // Global instance
 window.perlin = new PerlinNoise();
+window.PerlinNoise = PerlinNoise;
+window.seededRandom = seededRandom;
@@ -17,54 +17,160 @@ class Minimap {
         const hud = document.getElementById('hud');
         if (hud) hud.appendChild(this.canvas);
         this.ctx = this.canvas.getContext('2d');
+
+        // The map is put together from one 16x16 tile per chunk (one pixel per column, coloured
+        // by its top block), drawn offscreen and kept until that chunk's surface changes
+        // (Chunk.surfaceVersion). Each refresh just composites the visible tiles, scaled by
+        // zoom and rotated with the player.
+        this.tiles = new Map(); // Chunk key -> { canvas, ctx, chunk, version, used }
+        this.frame = 0;
+
+        this.zoom = Minimap.DEFAULT_ZOOM; // Map pixels per block, one of Minimap.ZOOM_LEVELS
+        this.refreshInterval = Minimap.REFRESH_MS; // Milliseconds between redraws
+        this.sinceRefresh = Infinity;
+    }
+
+    // dt in milliseconds; without it every call redraws
+    update(dt = Infinity) {
+        this.sinceRefresh += dt;
+        if (this.sinceRefresh < this.refreshInterval) return;
+        this.sinceRefresh = 0;
+        this.draw();
     }
 
-    update() {
-        if (!this.game.player) return;
+    // Steps through Minimap.ZOOM_LEVELS (bound to the minimap key), wrapping around
+    cycleZoom() {
+        const levels = Minimap.ZOOM_LEVELS;
+        this.setZoom(levels[(levels.indexOf(this.zoom) + 1) % levels.length]);
+    }
+
+    setZoom(zoom) {
+        this.zoom = zoom;
+        this.sinceRefresh = Infinity; // Show it on the next update
+    }
+
+    draw() {
+        if (!this.game.player || !this.ctx) return;
         const ctx = this.ctx;
         const player = this.game.player;
-        const cx = Math.floor(player.x);
-        const cz = Math.floor(player.z);
-        const radius = 32;
+        const world = this.game.world;
+        const half = this.canvas.width / 2;
+        this.frame++;
 
-        ctx.clearRect(0, 0, 128, 128);
+        ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
         ctx.save();
-        ctx.translate(64, 64);
+        ctx.translate(half, half);
         ctx.rotate(-player.yaw);
-        ctx.translate(-64, -64);
-
-        // Optimization: Don't scan too deep
-        for(let z = -radius; z <= radius; z+=2) { // Skip every other block for perf
-            for(let x = -radius; x <= radius; x+=2) {
-                if (x*x + z*z > radius*radius) continue;
-
-                // Get top block
-                let y = this.game.world.getHighestBlockY(cx + x, cz + z);
-                // Simple surface map
-                let block = this.game.world.getBlock(cx + x, y - 1, cz + z);
-
-                if (block !== 0) {
-                    const color = this.getBlockColor(block);
-                    ctx.fillStyle = color;
-                    ctx.fillRect(64 + x * 2, 64 + z * 2, 4, 4);
+
+        // Tiles within the circle the map shows
+        if (world && world.getChunk) {
+            const zoom = this.zoom;
+            const reach = half / zoom + 1;
+            ctx.save();
+            ctx.imageSmoothingEnabled = false;
+            ctx.scale(zoom, zoom);
+            ctx.translate(-player.x, -player.z);
+            const c0x = Math.floor((player.x - reach) / 16), c1x = Math.floor((player.x + reach) / 16);
+            const c0z = Math.floor((player.z - reach) / 16), c1z = Math.floor((player.z + reach) / 16);
+            for (let cz = c0z; cz <= c1z; cz++) {
+                for (let cx = c0x; cx <= c1x; cx++) {
+                    const tile = this.getTile(cx, cz);
+                    if (tile) ctx.drawImage(tile.canvas, cx * 16, cz * 16);
                 }
             }
+            ctx.restore();
+            if (this.tiles.size > Minimap.MAX_TILES) this.pruneTiles();
         }
 
         // Draw Player Arrow
         ctx.fillStyle = 'red';
         ctx.beginPath();
-        ctx.moveTo(64, 60);
-        ctx.lineTo(68, 68);
-        ctx.lineTo(60, 68);
+        ctx.moveTo(0, -4);
+        ctx.lineTo(4, 4);
+        ctx.lineTo(-4, 4);
         ctx.fill();
 
         ctx.restore();
     }
 
+    // The cached tile of a loaded chunk, redrawn first if its surface changed since
+    getTile(cx, cz) {
+        const world = this.game.world;
+        const chunk = world.getChunk(cx, cz);
+        if (!chunk || !chunk.getSurfaceHeight) return null;
+        const key = world.getChunkKey(cx, cz);
+        let tile = this.tiles.get(key);
+        if (!tile || tile.chunk !== chunk) {
+            const canvas = document.createElement('canvas');
+            canvas.width = 16;
+            canvas.height = 16;
+            const tileCtx = canvas.getContext('2d');
+            if (!tileCtx) return null;
+            tile = { canvas, ctx: tileCtx, chunk, version: -1, used: 0 };
+            this.tiles.set(key, tile);
+        }
+        if (!chunk.heightmapsReady) chunk.buildHeightmaps();
+        if (tile.version !== chunk.surfaceVersion) this.renderTile(tile, chunk);
+        tile.used = this.frame;
+        return tile;
+    }
+
+    // One pixel per column in the colour of its top block; empty columns stay clear
+    renderTile(tile, chunk) {
+        const colors = this.getColorTable();
+        const img = tile.ctx.createImageData(16, 16);
+        const data = img.data;
+        for (let z = 0; z < 16; z++) {
+            for (let x = 0; x < 16; x++) {
+                const h = chunk.getSurfaceHeight(x, z);
+                if (h === 0) continue;
+                const type = chunk.getBlock(x, h - 1, z);
+                const p = (x + z * 16) * 4;
+                data[p] = colors[type * 3];
+                data[p + 1] = colors[type * 3 + 1];
+                data[p + 2] = colors[type * 3 + 2];
+                data[p + 3] = 255;
+            }
+        }
+        tile.ctx.putImageData(img, 0, 0);
+        tile.version = chunk.surfaceVersion;
+    }
+
+    // Drops tiles that were not drawn this frame (chunks out of view or unloaded)
+    pruneTiles() {
+        for (const [key, tile] of this.tiles) {
+            if (tile.used !== this.frame) this.tiles.delete(key);
+        }
+    }
+
+    // Map colour of every block id as r, g, b bytes, so tiles are filled without parsing
+    // colour strings per pixel (ids without a #rrggbb colour stay black)
+    getColorTable() {
+        return window.getBlockTable('minimapColors', () => {
+            const colors = new Uint8Array(256 * 3);
+            for (let t = 0; t < 256; t++) {
+                const hex = this.getBlockColor(t);
+                if (!/^#[0-9a-fA-F]{6}$/.test(hex)) continue;
+                colors[t * 3] = parseInt(hex.slice(1, 3), 16);
+                colors[t * 3 + 1] = parseInt(hex.slice(3, 5), 16);
+                colors[t * 3 + 2] = parseInt(hex.slice(5, 7), 16);
+            }
+            return colors;
+        });
+    }
+
     getBlockColor(type) {
         const def = window.BLOCKS[type];
         return def ? (def.top || def.color) : '#000';
     }
 }
+
+// Map scales in pixels per block; at 2 the 128 px map shows 32 blocks around the player
+Minimap.ZOOM_LEVELS = [1, 2, 4];
+Minimap.DEFAULT_ZOOM = 2;
+// Milliseconds between redraws of the visible map (tiles only redraw when their chunk changes)
+Minimap.REFRESH_MS = 100;
+// Cached tiles kept before the ones out of view are dropped
+Minimap.MAX_TILES = 128;
+
 window.Minimap = Minimap;
@@ -346,20 +346,16 @@ class Mob extends Entity {
         }
     }
 
-    update(dt) {
+    // aiDt: time to advance the AI by (MobScheduler thinks for far-off mobs less often and
+    // hands over the time saved up since); 0 skips the AI this frame but still moves the mob
+    update(dt, aiDt = dt) {
         if (this.isDead) return;
 
-        this.updateAI(dt);
+        if (aiDt > 0) this.updateAI(aiDt);
 
         // Gravity
         this.vy -= 25 * dt;
 
-        // Apply Velocity (Simplified Physics)
-        this.x += this.vx * dt;
-        this.z += this.vz * dt;
-        this.y += this.vy * dt;
-
-        // Simple Ground Collision
         // Check block at feet
         const bx = Math.floor(this.x);
         const by = Math.floor(this.y);
@@ -374,23 +370,27 @@ class Mob extends Entity {
             }
         }
 
-        // Check if stuck in block
-        const blockIn = this.world.getBlock(bx, by, bz);
-        if (blockIn !== BLOCK.AIR && blockIn !== BLOCK.WATER && !BLOCKS[blockIn].liquid) {
-             // Push up
-             this.y = by + 1;
-             this.vy = 0;
-        } else {
-            // Check block below
-             const blockBelow = this.world.getBlock(bx, by - 1, bz);
-             if (blockBelow !== BLOCK.AIR && (!BLOCKS[blockBelow] || !BLOCKS[blockBelow].liquid)) {
-                 if (this.y - by < 0.1) { // Close to ground
-                     this.y = by;
-                     this.vy = 0;
-                 }
-             }
+        // Check if stuck in a block at its feet (spawned inside terrain, or built over) and
+        // push it up onto it. Blocks higher up are left to move(), which lets it walk out of
+        // them; pushing for those would lift the mob a block every frame.
+        const physics = this.game.physics;
+        if (physics) {
+            const feet = Mob.feetBox;
+            feet.x = this.x;
+            feet.y = this.y;
+            feet.z = this.z;
+            feet.width = this.width;
+            feet.height = Math.min(this.height, by + 1 - this.y);
+            if (physics.checkCollision(feet)) {
+                 // Push up
+                 this.y = by + 1;
+                 this.vy = 0;
+            }
         }
 
+        // Apply Velocity, sliding along blocks
+        this.move(this.vx * dt, this.vy * dt, this.vz * dt);
+
         // World Bounds (Respawn if fell out)
         if (this.y < -10) {
             this.y = 50;
@@ -544,11 +544,37 @@ class Mob extends Entity {
         }
     }
 
+    // Nearest other living mob within radius (X/Z) that matches filter.
+    // Goes through the game's entity index when there is one.
+    findNearbyMob(radius, filter) {
+        const candidates = this.game.getEntitiesNear ? this.game.getEntitiesNear('mobs', this.x, this.z, radius) : this.game.mobs;
+        let best = null;
+        let bestDist = radius * radius;
+        for (const m of candidates) {
+            if (m === this || m.isDead || !filter(m)) continue;
+            const d = (m.x - this.x) ** 2 + (m.z - this.z) ** 2;
+            if (d <= bestDist) {
+                best = m;
+                bestDist = d;
+            }
+        }
+        return best;
+    }
+
+    // Heading towards the player: along the game's shared flow field when it has a route from
+    // here, straight at the player (dx, dz away) otherwise
+    chaseHeading(dx, dz) {
+        const nav = this.game.navigation;
+        if (nav && nav.sample(this.x, this.y, this.z, Mob.waypoint)) {
+            return Math.atan2(Mob.waypoint.x - this.x, Mob.waypoint.z - this.z);
+        }
+        return Math.atan2(dx, dz);
+    }
+
     updateIronGolemAI(dt) {
         // Find nearest Zombie or Skeleton or Spider
-        const target = this.game.mobs.find(m =>
-            (m.type === MOB_TYPE.ZOMBIE || m.type === MOB_TYPE.SKELETON || m.type === MOB_TYPE.SPIDER)
-            && !m.isDead
+        const target = this.findNearbyMob(10, m =>
+            m.type === MOB_TYPE.ZOMBIE || m.type === MOB_TYPE.SKELETON || m.type === MOB_TYPE.SPIDER
         );
 
         if (target) {
@@ -580,11 +606,9 @@ class Mob extends Entity {
             // Look for mate
             if (this.loveTimer > 0) {
                  // Find another mob of same type in love mode
-                 const mate = this.game.mobs.find(m =>
-                     m !== this &&
+                 const mate = this.findNearbyMob(16, m =>
                      m.type === this.type &&
                      m.loveTimer > 0 &&
-                     !m.isDead &&
                      !m.isBaby
                  );
 
@@ -671,10 +695,12 @@ class Mob extends Entity {
 
             if (this.type === MOB_TYPE.CREEPER) {
                 // Creeper Logic
-                let ocelot = this.game.mobs.find(m => m !== this && m.type === MOB_TYPE.OCELOT && Math.hypot(m.x - this.x, m.z - this.z) < 10);
+                let ocelot = this.findNearbyMob(10, m => m.type === MOB_TYPE.OCELOT);
                 if (ocelot) {
                     this.yaw = Math.atan2(this.x - ocelot.x, this.z - ocelot.z);
                     this.fuseTimer = 0; // stop fusing if running away
+                } else {
+                    this.yaw = this.chaseHeading(dx, dz);
                 }
                 this.vx = Math.sin(this.yaw) * this.speed;
                 this.vz = Math.cos(this.yaw) * this.speed;
@@ -728,8 +754,9 @@ class Mob extends Entity {
                 if (this.type === MOB_TYPE.SKELETON) {
                  if (dist > 8) {
                      // Move closer
-                     this.vx = Math.sin(this.yaw) * this.speed;
-                     this.vz = Math.cos(this.yaw) * this.speed;
+                     const heading = this.chaseHeading(dx, dz);
+                     this.vx = Math.sin(heading) * this.speed;
+                     this.vz = Math.cos(heading) * this.speed;
                  } else if (dist < 3) {
                      // Back away
                      this.vx = -Math.sin(this.yaw) * this.speed;
@@ -761,8 +788,9 @@ class Mob extends Entity {
                  }
                 } else {
                     // Zombie, Spider, Enderman move towards player
-                    this.vx = Math.sin(this.yaw) * this.speed;
-                    this.vz = Math.cos(this.yaw) * this.speed;
+                    const heading = this.chaseHeading(dx, dz);
+                    this.vx = Math.sin(heading) * this.speed;
+                    this.vz = Math.cos(heading) * this.speed;
 
                     // Jump if wall (simple)
                     const bx = Math.floor(this.x + this.vx * 0.5);
@@ -785,10 +813,98 @@ class Mob extends Entity {
     }
 }
 
+// Scratch for chaseHeading
+Mob.waypoint = { x: 0, y: 0, z: 0 };
+// Scratch box for the stuck check in update (the part of the mob inside its feet block)
+Mob.feetBox = { x: 0, y: 0, z: 0, width: 0, height: 0 };
+
+// Decides each frame which mobs get to think. Mobs close to the player run their AI every
+// frame, farther ones at the reduced rate of their distance tier (with the skipped time passed
+// on, so cooldowns and timers still add up), and mobs in unloaded chunks are frozen outright.
+// Movement still runs every frame for every mob in a loaded chunk.
+// Once the pass has used up its per-frame time budget, further AI ticks outside the nearest
+// tier wait a frame. The next pass starts at the first mob that had to wait, so the same
+// mobs do not keep missing out.
+class MobScheduler {
+    constructor(game) {
+        this.game = game;
+        this.budget = MobScheduler.BUDGET_MS;
+        this.cursor = 0;
+        // Last frame, for the debug overlay: AI ticks run, deferred by the budget, frozen mobs
+        this.stats = { thought: 0, deferred: 0, frozen: 0 };
+    }
+
+    // AI interval (seconds) for a mob, or -1 when it is frozen
+    intervalFor(mob) {
+        const world = this.game.world;
+        if (world.getChunkAt && !world.getChunkAt(mob.x, mob.z)) return -1;
+        const player = this.game.player;
+        const dx = mob.x - player.x;
+        const dz = mob.z - player.z;
+        const d2 = dx * dx + dz * dz;
+        const tiers = MobScheduler.TIERS;
+        for (let i = 0; i < tiers.length; i++) {
+            if (d2 < tiers[i].range * tiers[i].range) return tiers[i].interval;
+        }
+        return tiers[tiers.length - 1].interval;
+    }
+
+    update(dt) {
+        const mobs = this.game.mobs;
+        for (let i = mobs.length - 1; i >= 0; i--) {
+            if (mobs[i].isDead) mobs.splice(i, 1);
+        }
+
+        const stats = this.stats;
+        stats.thought = 0; stats.deferred = 0; stats.frozen = 0;
+        const count = mobs.length;
+        if (count === 0) return;
+
+        const start = performance.now();
+        const first = this.cursor % count;
+        let resume = -1;
+        for (let k = 0; k < count; k++) {
+            const i = (first + k) % count;
+            const mob = mobs[i];
+            const interval = this.intervalFor(mob);
+            if (interval < 0) {
+                stats.frozen++;
+                continue;
+            }
+
+            mob.aiElapsed = (mob.aiElapsed || 0) + dt;
+            let think = mob.aiElapsed >= interval;
+            if (think && interval > 0 && performance.now() - start > this.budget) {
+                think = false; // Over budget: keeps its saved-up time for next frame
+                stats.deferred++;
+                if (resume < 0) resume = i;
+            }
+
+            mob.update(dt, think ? mob.aiElapsed : 0);
+            if (think) {
+                mob.aiElapsed = 0;
+                stats.thought++;
+            }
+        }
+        if (resume >= 0) this.cursor = resume;
+    }
+}
+
+// Horizontal distance tiers (blocks) and how often mobs in them think (seconds, 0 = every frame)
+MobScheduler.TIERS = [
+    { range: 32, interval: 0 },
+    { range: 64, interval: 0.25 },
+    { range: Infinity, interval: 1 }
+];
+// Milliseconds per frame for AI beyond the nearest tier
+MobScheduler.BUDGET_MS = 2;
+
 if (typeof window !== 'undefined') {
     window.MOB_TYPE = MOB_TYPE;
     window.Mob = Mob;
+    window.MobScheduler = MobScheduler;
 } else {
     global.MOB_TYPE = MOB_TYPE;
     global.Mob = Mob;
+    global.MobScheduler = MobScheduler;
 }
@@ -0,0 +1,320 @@
+// Shared flow field towards the player for chasing mobs.
+// Covers the cells within RADIUS blocks (X/Z) and HEIGHT blocks (Y) of the player. A cell is a
+// spot a mob can stand in: two passable blocks above one with a collision box. One
+// breadth-first search out from the player's cell gives every reachable cell its step count
+// to the player and the neighbour to step to next, so a chasing mob just reads its own cell,
+// and fifty zombies cost one search instead of fifty.
+// Moves are to the four side neighbours, one block up (with headroom for the jump) or up to
+// MAX_DROP blocks down. Block edits inside the field are repaired in place (see repair);
+// the field is searched again from scratch only when the player moves to another cell.
+class FlowField {
+    constructor(game) {
+        this.game = game;
+        this.radius = FlowField.RADIUS;
+        this.height = FlowField.HEIGHT;
+        this.side = this.radius * 2 + 1;
+        this.layers = this.height * 2 + 1;
+        const cells = this.side * this.side * this.layers;
+
+        this.dist = new Uint16Array(cells).fill(FlowField.UNREACHED); // Steps to the player
+        this.next = new Int32Array(cells).fill(-1); // Cell to step to next
+        this.walk = new Int8Array(cells).fill(-1); // Cached standability: -1 unknown, 0 no, 1 yes
+        // Cached passability per block, one extra block below and MAX_DROP + 1 above the cells
+        this.passLayers = this.layers + FlowField.MAX_DROP + 2;
+        this.pass = new Int8Array(this.side * this.side * this.passLayers).fill(-1);
+        this.state = new Uint8Array(cells); // Scratch for repair
+        this.queue = new Int32Array(cells);
+
+        this.built = false;
+        this.originX = 0; this.originY = 0; this.originZ = 0; // Minimum corner of the cells
+        this.target = -1; // Player's cell
+        this.dimension = null;
+        this.incomplete = false; // Some columns were in unloaded chunks during the last search
+        this.age = 0; // Seconds since the last full search
+        this.idle = Infinity; // Seconds since a mob last asked for directions
+        this.pending = []; // Edited block positions (x, y, z, ...) waiting for repair
+    }
+
+    // Cell index for a world position, or -1 outside the field
+    cellIndex(x, y, z) {
+        const lx = x - this.originX, ly = y - this.originY, lz = z - this.originZ;
+        if (lx < 0 || lz < 0 || ly < 0 || lx >= this.side || lz >= this.side || ly >= this.layers) return -1;
+        return (lx + lz * this.side) * this.layers + ly;
+    }
+
+    cellX(i) { return this.originX + Math.floor(i / this.layers) % this.side; }
+    cellY(i) { return this.originY + i % this.layers; }
+    cellZ(i) { return this.originZ + Math.floor(i / (this.layers * this.side)); }
+
+    // Whether a mob's body fits through the block (no collision boxes, not lava)
+    isPassable(x, y, z) {
+        const lx = x - this.originX, lz = z - this.originZ, ly = y - this.originY + 1;
+        let slot = -1;
+        if (lx >= 0 && lz >= 0 && lx < this.side && lz < this.side && ly >= 0 && ly < this.passLayers) {
+            slot = (lx + lz * this.side) * this.passLayers + ly;
+            const cached = this.pass[slot];
+            if (cached >= 0) return cached === 1;
+        }
+
+        const world = this.game.world;
+        const type = world.getBlock(x, y, z);
+        let open = true;
+        if (type === BLOCK.LAVA) {
+            open = false;
+        } else if (type !== BLOCK.AIR) {
+            const def = BLOCKS[type];
+            if (def && def.solid) {
+                const meta = Physics.shapeUsesMetadata(def) ? world.getMetadata(x, y, z) : 0;
+                open = Physics.collisionBoxes(type, meta).length === 0;
+            }
+        }
+        if (slot >= 0) this.pass[slot] = open ? 1 : 0;
+        return open;
+    }
+
+    isWalkable(i) {
+        let w = this.walk[i];
+        if (w < 0) {
+            const x = this.cellX(i), y = this.cellY(i), z = this.cellZ(i);
+            w = (this.isPassable(x, y, z) && this.isPassable(x, y + 1, z) && !this.isPassable(x, y - 1, z)) ? 1 : 0;
+            this.walk[i] = w;
+        }
+        return w === 1;
+    }
+
+    // Whether a mob standing in cell from can move into the neighbouring cell to
+    canStep(from, to) {
+        if (!this.isWalkable(from) || !this.isWalkable(to)) return false;
+        const fy = this.cellY(from), ty = this.cellY(to);
+        if (ty > fy) {
+            // Jumping up one block: room above its head first
+            return ty === fy + 1 && this.isPassable(this.cellX(from), fy + 2, this.cellZ(from));
+        }
+        // Dropping down: the column it falls through must be clear
+        const x = this.cellX(to), z = this.cellZ(to);
+        for (let y = ty + 2; y <= fy + 1; y++) {
+            if (!this.isPassable(x, y, z)) return false;
+        }
+        return true;
+    }
+
+    // Calls fn(cell) for each cell beside i from below to above blocks higher or lower
+    forNeighbours(i, below, above, fn) {
+        const side = this.side, layers = this.layers;
+        const ly = i % layers;
+        const column = (i - ly) / layers;
+        const lx = column % side, lz = (column - lx) / side;
+        const y0 = Math.max(0, ly - below);
+        const y1 = Math.min(layers - 1, ly + above);
+        for (let d = 0; d < 4; d++) {
+            const nx = lx + (d === 0 ? 1 : d === 1 ? -1 : 0);
+            const nz = lz + (d === 2 ? 1 : d === 3 ? -1 : 0);
+            if (nx < 0 || nz < 0 || nx >= side || nz >= side) continue;
+            const base = (nx + nz * side) * layers;
+            for (let ny = y0; ny <= y1; ny++) fn(base + ny);
+        }
+    }
+
+    // Searches the whole field again around the player's cell
+    rebuild(targetX, targetY, targetZ) {
+        this.originX = targetX - this.radius;
+        this.originY = targetY - this.height;
+        this.originZ = targetZ - this.radius;
+        this.dist.fill(FlowField.UNREACHED);
+        this.next.fill(-1);
+        this.walk.fill(-1);
+        this.pass.fill(-1);
+        this.pending.length = 0;
+        this.age = 0;
+        this.dimension = this.game.world.dimension;
+
+        // Loaded chunks only; the search is redone once the rest arrive
+        const world = this.game.world;
+        this.incomplete = false;
+        if (world.getChunk) {
+            const c0x = Math.floor(this.originX / 16), c1x = Math.floor((this.originX + this.side - 1) / 16);
+            const c0z = Math.floor(this.originZ / 16), c1z = Math.floor((this.originZ + this.side - 1) / 16);
+            for (let cx = c0x; cx <= c1x && !this.incomplete; cx++) {
+                for (let cz = c0z; cz <= c1z; cz++) {
+                    if (!world.getChunk(cx, cz)) { this.incomplete = true; break; }
+                }
+            }
+        }
+
+        this.target = this.cellIndex(targetX, targetY, targetZ);
+        this.built = true;
+        if (!this.isWalkable(this.target)) {
+            this.target = -1;
+            return;
+        }
+        this.dist[this.target] = 0;
+        this.queue[0] = this.target;
+        this.propagate(1);
+    }
+
+    // Label-correcting breadth-first pass: cells in the queue have a new, shorter distance;
+    // hands it on to every neighbour that can step into them
+    propagate(tail) {
+        const dist = this.dist, next = this.next, queue = this.queue;
+        const size = queue.length;
+        let head = 0, count = tail;
+        while (count > 0) {
+            const c = queue[head];
+            head = (head + 1) % size;
+            count--;
+            const d = dist[c] + 1;
+            // Cells that can step into c: one below jumping up, or level and above dropping down
+            this.forNeighbours(c, 1, FlowField.MAX_DROP, (n) => {
+                if (d >= dist[n] || !this.canStep(n, c)) return;
+                dist[n] = d;
+                next[n] = c;
+                if (count < size) {
+                    queue[(head + count) % size] = n;
+                    count++;
+                }
+            });
+        }
+    }
+
+    // Fixes the field after block edits without searching it again: cells whose standing or
+    // moves depend on an edited block, and every cell whose route runs through one of them,
+    // lose their distance and take the best one their surviving neighbours offer, which then
+    // spreads out again. Openings shorten routes the same way.
+    repair() {
+        const pending = this.pending;
+        const state = this.state; // 0 unchecked, 1 keeps its route, 2 has to find a new one
+        const dist = this.dist, next = this.next, walk = this.walk;
+        state.fill(0);
+        const touched = [];
+
+        for (let p = 0; p < pending.length; p += 3) {
+            const x = pending[p], y = pending[p + 1], z = pending[p + 2];
+            const lx = x - this.originX, lz = z - this.originZ, ly = y - this.originY + 1;
+            if (lx < 0 || lz < 0 || lx >= this.side || lz >= this.side) continue;
+            if (ly >= 0 && ly < this.passLayers) this.pass[(lx + lz * this.side) * this.passLayers + ly] = -1;
+            // Cells standing on it (y + 1), with it as body (y) or head (y - 1), and the ones
+            // jumping (y - 2) or dropping (down to y - MAX_DROP - 1) past it
+            for (let cy = y - FlowField.MAX_DROP - 1; cy <= y + 1; cy++) {
+                const i = this.cellIndex(x, cy, z);
+                if (i < 0) continue;
+                walk[i] = -1;
+                if (state[i] !== 2) {
+                    state[i] = 2;
+                    touched.push(i);
+                }
+            }
+        }
+        pending.length = 0;
+        if (touched.length === 0) return;
+
+        // Everything routed through a touched cell goes too
+        const chain = [];
+        for (let i = 0; i < dist.length; i++) {
+            if (state[i] !== 0 || dist[i] === FlowField.UNREACHED) continue;
+            let c = i;
+            while (state[c] === 0 && next[c] >= 0) {
+                chain.push(c);
+                c = next[c];
+            }
+            const verdict = state[c] === 2 ? 2 : 1;
+            if (state[c] === 0) state[c] = 1; // The target
+            for (let k = 0; k < chain.length; k++) state[chain[k]] = verdict;
+            if (verdict === 2) for (let k = 0; k < chain.length; k++) touched.push(chain[k]);
+            chain.length = 0;
+        }
+        for (const i of touched) {
+            dist[i] = FlowField.UNREACHED;
+            next[i] = -1;
+        }
+
+        // Reseed from the neighbours that kept their routes
+        let tail = 0;
+        if (this.target >= 0 && state[this.target] === 2 && this.isWalkable(this.target)) {
+            dist[this.target] = 0;
+            this.queue[tail++] = this.target;
+        }
+        for (const i of touched) {
+            if (i === this.target || !this.isWalkable(i)) continue;
+            let best = FlowField.UNREACHED, via = -1;
+            this.forNeighbours(i, FlowField.MAX_DROP, 1, (m) => {
+                if (dist[m] + 1 < best && this.canStep(i, m)) {
+                    best = dist[m] + 1;
+                    via = m;
+                }
+            });
+            if (via >= 0 && best < dist[i]) {
+                dist[i] = best;
+                next[i] = via;
+                this.queue[tail++] = i;
+            }
+        }
+        this.propagate(tail);
+    }
+
+    // A block changed (World.setBlock / setMetadata). Only edits that can affect the field
+    // are queued. While idle nothing is repaired, so instead of queueing edits the field is
+    // dropped and searched afresh once a mob asks again.
+    blockChanged(x, y, z) {
+        if (!this.built) return;
+        if (this.idle > FlowField.IDLE_TIMEOUT) {
+            this.built = false;
+            this.pending.length = 0;
+            return;
+        }
+        const lx = x - this.originX, lz = z - this.originZ, ly = y - this.originY + 1;
+        if (lx < 0 || lz < 0 || lx >= this.side || lz >= this.side || ly < 0 || ly >= this.passLayers) return;
+        this.pending.push(x, y, z);
+    }
+
+    // Once per frame: follows the player and applies block edits, but only while mobs are chasing
+    update(dt) {
+        this.idle += dt;
+        this.age += dt;
+        if (this.idle > FlowField.IDLE_TIMEOUT) return;
+
+        const player = this.game.player;
+        const tx = Math.floor(player.x), ty = Math.floor(player.y + 0.01), tz = Math.floor(player.z);
+        const moved = !this.built || this.target < 0 || this.cellIndex(tx, ty, tz) !== this.target;
+        const stale = !this.built || this.dimension !== this.game.world.dimension ||
+            (this.incomplete && this.age > FlowField.REBUILD_INTERVAL);
+        if (stale || (moved && this.age > FlowField.REBUILD_INTERVAL)) {
+            this.rebuild(tx, ty, tz);
+        } else if (this.pending.length > 0) {
+            this.repair();
+        }
+    }
+
+    // Where a mob at (x, y, z) should head next, written to out as a cell centre.
+    // False when the mob is off the field (or already in the player's cell).
+    sample(x, y, z, out) {
+        this.idle = 0;
+        if (!this.built || this.target < 0) return false;
+        const bx = Math.floor(x), bz = Math.floor(z);
+        const by = Math.floor(y + 0.01);
+        // Its own cell, or the one above when it stands on a slab or stair (or mid-jump, below)
+        for (let k = 0; k < 3; k++) {
+            const i = this.cellIndex(bx, k === 0 ? by : k === 1 ? by + 1 : by - 1, bz);
+            if (i < 0 || this.dist[i] === FlowField.UNREACHED) continue;
+            const n = this.next[i];
+            if (n < 0) return false;
+            out.x = this.cellX(n) + 0.5;
+            out.y = this.cellY(n);
+            out.z = this.cellZ(n) + 0.5;
+            return true;
+        }
+        return false;
+    }
+}
+
+// Field extent around the player (blocks)
+FlowField.RADIUS = 24;
+FlowField.HEIGHT = 12;
+// Furthest a route may drop in one step
+FlowField.MAX_DROP = 3;
+// Seconds between full searches while the player keeps moving
+FlowField.REBUILD_INTERVAL = 0.5;
+// Stop updating when no mob has asked for this long (seconds)
+FlowField.IDLE_TIMEOUT = 2;
+FlowField.UNREACHED = 0xFFFF;
+
+window.FlowField = FlowField;
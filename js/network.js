@@ -1,5 +1,88 @@
 // Network Manager
 
+// Recent server-stamped states of one remote player. They are sampled a fixed delay
+// behind the server clock, so movement stays smooth when updates arrive late or bunched up.
+class SnapshotBuffer {
+    constructor(size = SnapshotBuffer.SIZE) {
+        this.size = size;
+        this.snapshots = []; // { t, x, y, z, yaw, pitch }, oldest first
+    }
+
+    push(t, state) {
+        const s = this.snapshots;
+        const last = s[s.length - 1];
+        if (last && t < last.t) return; // Older than what we have
+        if (last && t === last.t) s.pop();
+        s.push({ t, x: state.x, y: state.y, z: state.z, yaw: state.yaw, pitch: state.pitch });
+        if (s.length > this.size) s.shift();
+    }
+
+    // Nothing changed up to server time t
+    hold(t) {
+        const last = this.snapshots[this.snapshots.length - 1];
+        if (last && t > last.t) this.push(t, last);
+    }
+
+    // Writes the state at server time t into out (x, y, z, yaw, pitch)
+    sample(t, out) {
+        const s = this.snapshots;
+        const n = s.length;
+        if (n === 0) return out;
+
+        let i = 0;
+        while (i < n && s[i].t <= t) i++;
+
+        if (i === n) {
+            // Past the newest snapshot: carry on along the last movement for a short while
+            const b = s[n - 1];
+            SnapshotBuffer.copy(b, out);
+            if (n < 2) return out;
+            const a = s[n - 2];
+            if (SnapshotBuffer.teleported(a, b)) return out;
+            const f = Math.min(t - b.t, SnapshotBuffer.MAX_EXTRAPOLATION) / (b.t - a.t);
+            out.x = b.x + (b.x - a.x) * f;
+            out.y = b.y + (b.y - a.y) * f;
+            out.z = b.z + (b.z - a.z) * f;
+            return out;
+        }
+        if (i === 0) return SnapshotBuffer.copy(s[0], out);
+
+        const a = s[i - 1], b = s[i];
+        if (SnapshotBuffer.teleported(a, b)) return SnapshotBuffer.copy(a, out);
+        const f = (t - a.t) / (b.t - a.t);
+        out.x = a.x + (b.x - a.x) * f;
+        out.y = a.y + (b.y - a.y) * f;
+        out.z = a.z + (b.z - a.z) * f;
+        out.yaw = SnapshotBuffer.lerpAngle(a.yaw, b.yaw, f);
+        out.pitch = a.pitch + (b.pitch - a.pitch) * f;
+        return out;
+    }
+
+    static copy(s, out) {
+        out.x = s.x; out.y = s.y; out.z = s.z;
+        out.yaw = s.yaw; out.pitch = s.pitch;
+        return out;
+    }
+
+    static teleported(a, b) {
+        const dx = b.x - a.x, dy = b.y - a.y, dz = b.z - a.z;
+        return dx * dx + dy * dy + dz * dz > SnapshotBuffer.TELEPORT_DISTANCE * SnapshotBuffer.TELEPORT_DISTANCE;
+    }
+
+    static lerpAngle(start, end, t) {
+        let diff = end - start;
+        // Normalize diff to -PI to PI
+        while (diff > Math.PI) diff -= Math.PI * 2;
+        while (diff < -Math.PI) diff += Math.PI * 2;
+
+        return start + diff * t;
+    }
+}
+
+SnapshotBuffer.SIZE = 16;
+SnapshotBuffer.MAX_EXTRAPOLATION = 100; // ms
+SnapshotBuffer.TELEPORT_DISTANCE = 10; // Jumps further than this are not interpolated
+
 class NetworkManager {
     constructor(game) {
         this.game = game;
@@ -7,12 +90,33 @@ class NetworkManager {
         this.socket = null;
         this.otherPlayers = new Map();
         this.myId = null;
+
+        // Binary protocol (js/protocol.js), used once the server greets us with a HELLO record.
+        // Until then (or against an older server) messages go out as JSON.
+        this.binary = false;
+        this.outbox = window.ByteWriter ? new window.ByteWriter() : null; // Records sent on the next flush
+        this.outBlocks = []; // Block changes batched into one BLOCKS record per flush
+        this.sentState = {}; // Quantised state the server last got from us
+        this.sentProfile = null;
+        this.remoteStates = new Map(); // Player id -> quantised state last received
+        this.profiles = new Map(); // Player id -> { name, skinColor }
+        this.clockOffset = null; // Local clock minus server clock (ms), from TIME records
+
+        // Server-owned world. Once joined, overworld terrain only comes from the server,
+        // also while disconnected: on reconnect the chunks still held are resynced (SYNC).
+        this.serverWorld = false;
+        this.serverChunks = new Set(); // Keys of the chunks received from the server and still loaded
+        this.editSeq = 0; // Latest server edit included in those chunks
+        this.sentView = -1;
+        this.outDrops = []; // Unloaded server chunks, reported on the next flush
+        this.awaitingSpawn = false; // Put the player on the server's ground once it arrives
     }
 
     connect(url) {
         console.log('Connecting to server:', url);
         try {
             this.socket = new WebSocket(url);
+            this.socket.binaryType = 'arraybuffer';
 
             this.socket.onopen = () => {
                 this.connected = true;
@@ -21,6 +125,10 @@ class NetworkManager {
             };
 
             this.socket.onmessage = (event) => {
+                if (typeof event.data !== 'string') {
+                    this.handleFrame(event.data);
+                    return;
+                }
                 const data = JSON.parse(event.data);
                 this.handleMessage(data);
             };
@@ -28,6 +136,14 @@ class NetworkManager {
             this.socket.onclose = () => {
                 const wasConnected = this.connected;
                 this.connected = false;
+                this.binary = false;
+                this.remoteStates.clear();
+                // Records queued since the last flush were encoded for this connection (MOVE as a
+                // delta against sentState); the next server would get them ahead of our SYNC
+                if (this.outbox) this.outbox.reset();
+                this.outBlocks.length = 0;
+                this.outDrops.length = 0;
+                this.sentView = -1;
                 console.log('Disconnected from server');
                 if (wasConnected) {
                     this.game.chat?.addMessage("Disconnected from server");
@@ -43,6 +159,166 @@ class NetworkManager {
         }
     }
 
+    // Decodes a binary frame into the same messages handleMessage takes for JSON
+    handleFrame(buffer) {
+        const P = window.NetProtocol;
+        if (!P) return;
+        const r = new window.ByteReader(buffer);
+        let blocks = null;
+        let time = null; // Server time of the STATE records in this frame
+        const updated = new Set();
+
+        while (r.remaining > 0) {
+            const op = r.u8();
+            switch (op) {
+                case P.OP.HELLO: {
+                    const id = r.u32();
+                    const version = r.u8();
+                    this.handleMessage({ type: 'id', id });
+                    this.binary = version === P.VERSION && !!this.outbox;
+                    this.sentState = {};
+                    this.sentProfile = null;
+                    if (this.binary) this.joinServerWorld();
+                    break;
+                }
+                case P.OP.STATE: {
+                    const id = r.u32();
+                    let base = this.remoteStates.get(id);
+                    if (!base) {
+                        base = {};
+                        this.remoteStates.set(id, base);
+                    }
+                    const state = P.dequantize(P.readState(r, base));
+                    const profile = this.profiles.get(id) || {};
+                    const message = Object.assign({ type: 'player_update', id, name: profile.name, skinColor: profile.skinColor }, state);
+                    if (time !== null) message.time = time;
+                    this.handleMessage(message);
+                    updated.add(id);
+                    break;
+                }
+                case P.OP.TIME:
+                    time = r.u32();
+                    this.syncClock(time);
+                    break;
+                case P.OP.INFO: {
+                    const id = r.u32();
+                    const profile = { name: r.string(), skinColor: r.string() };
+                    this.profiles.set(id, profile);
+                    const p = this.otherPlayers.get(id);
+                    if (p) Object.assign(p, profile);
+                    break;
+                }
+                case P.OP.BLOCKS:
+                    blocks = P.readBlocks(r, blocks || []);
+                    break;
+                case P.OP.CHAT:
+                    this.handleMessage({ type: 'chat', sender: r.string(), message: r.string() });
+                    break;
+                case P.OP.CHUNK: {
+                    const data = r.raw(r.u32());
+                    this.receiveChunk(window.ChunkCodec.decode(data.slice().buffer));
+                    break;
+                }
+                case P.OP.SEQ:
+                    this.editSeq = r.u32();
+                    break;
+                case P.OP.LEAVE: {
+                    const id = r.u32();
+                    this.remoteStates.delete(id);
+                    this.profiles.delete(id);
+                    this.handleMessage({ type: 'player_leave', id });
+                    break;
+                }
+                default:
+                    console.warn('Unknown network record', op);
+                    return;
+            }
+        }
+
+        if (blocks) this.handleMessage({ type: 'block_batch', blocks });
+        // Players the frame has no state for stood still
+        if (time !== null) {
+            this.otherPlayers.forEach((p, id) => {
+                if (!updated.has(id)) p.snapshots.hold(time);
+            });
+        }
+    }
+
+    // Tracks the offset between our clock and the server's. The lowest offset seen is the
+    // one with the least network delay; it is allowed to creep up for clock drift.
+    syncClock(serverTime) {
+        const offset = performance.now() - serverTime;
+        if (this.clockOffset === null || offset < this.clockOffset) this.clockOffset = offset;
+        else this.clockOffset += (offset - this.clockOffset) * 0.01;
+    }
+
+    // Current time on the server's clock (our own clock without a server that sends TIME)
+    serverTime() {
+        return performance.now() - (this.clockOffset || 0);
+    }
+
+    // Switches to the server's world. The first time, locally generated overworld chunks
+    // are thrown away; after a reconnect the server is told what we still have.
+    joinServerWorld() {
+        const P = window.NetProtocol;
+        const world = this.game.world;
+        this.sentView = -1;
+        this.outDrops.length = 0;
+
+        if (!this.serverWorld) {
+            this.serverWorld = true;
+            this.serverChunks.clear();
+            this.editSeq = 0;
+            if (world.dimension === 'overworld') {
+                world.chunks.clear();
+                world.pendingBlocks.clear();
+                world.loadingChunks.clear();
+                if (this.game.chunkWorkers) this.game.chunkWorkers.reset();
+                this.awaitingSpawn = true;
+            }
+        }
+
+        const held = [];
+        this.serverChunks.forEach(key => held.push([world.chunkKeyX(key), world.chunkKeyZ(key)]));
+        this.outbox.u8(P.OP.SYNC);
+        this.outbox.u32(this.editSeq);
+        P.writeChunkList(this.outbox, held);
+    }
+
+    // True while terrain comes from the server instead of the local generator
+    streamsChunks() {
+        return this.serverWorld && this.game.world.dimension === 'overworld';
+    }
+
+    // Adds a chunk record streamed by the server (replacing our copy, if any)
+    receiveChunk(record) {
+        if (!this.streamsChunks()) {
+            // Arrived after leaving the overworld
+            this.outDrops.push([record.cx, record.cz]);
+            return;
+        }
+        const world = this.game.world;
+        world.addServerChunk(record);
+        this.serverChunks.add(world.getChunkKey(record.cx, record.cz));
+
+        const player = this.game.player;
+        if (this.awaitingSpawn && world.getChunkAt(player.x, player.z)) {
+            this.awaitingSpawn = false;
+            player.y = world.getSurfaceHeight(Math.floor(player.x), Math.floor(player.z)) + 1;
+            player.vy = 0;
+            player.fallDistance = 0;
+        }
+    }
+
+    // Called by World.releaseChunks for chunks being unloaded
+    dropChunks(chunks) {
+        const world = this.game.world;
+        chunks.forEach(chunk => {
+            if (!this.serverChunks.delete(world.getChunkKey(chunk.cx, chunk.cz))) return;
+            if (this.binary && this.connected) this.outDrops.push([chunk.cx, chunk.cz]);
+        });
+    }
+
     handleMessage(data) {
         switch (data.type) {
             case 'id':
@@ -52,7 +328,7 @@ class NetworkManager {
                 let p = this.otherPlayers.get(data.id);
                 if (!p) {
                     // New player, set immediately
-                    this.otherPlayers.set(data.id, {
+                    p = {
                         x: data.x,
                         y: data.y,
                         z: data.z,
@@ -60,19 +336,13 @@ class NetworkManager {
                         pitch: data.pitch,
                         name: data.name,
                         skinColor: data.skinColor,
-                        target: { x: data.x, y: data.y, z: data.z, yaw: data.yaw, pitch: data.pitch }
-                    });
-                } else {
-                    // Existing player, update target for interpolation
-                    p.target = { x: data.x, y: data.y, z: data.z, yaw: data.yaw, pitch: data.pitch };
-
-                    // If distance is too large (teleport), snap immediately
-                    const dist = Math.sqrt((p.x-data.x)**2 + (p.y-data.y)**2 + (p.z-data.z)**2);
-                    if (dist > 10) {
-                        p.x = data.x; p.y = data.y; p.z = data.z;
-                        p.yaw = data.yaw; p.pitch = data.pitch;
-                    }
+                        snapshots: new SnapshotBuffer()
+                    };
+                    this.otherPlayers.set(data.id, p);
                 }
+                // Latest state received; what is drawn is sampled from the snapshots in update()
+                p.target = { x: data.x, y: data.y, z: data.z, yaw: data.yaw, pitch: data.pitch };
+                p.snapshots.push(data.time !== undefined ? data.time : this.serverTime(), data);
                 break;
             }
             case 'chat':
@@ -84,44 +354,76 @@ class NetworkManager {
                 this.otherPlayers.delete(data.id);
                 break;
             case 'block_update':
+                // setBlock flags the touched chunk sections for a mesh rebuild
                 this.game.world.setBlock(data.x, data.y, data.z, data.blockType);
-                // Force chunk update visual
-                const cx = Math.floor(data.x / 16);
-                const cz = Math.floor(data.z / 16);
-                const chunk = this.game.world.getChunk(cx, cz);
-                if (chunk) chunk.modified = true;
                 break;
+            case 'block_batch': {
+                // One edit transaction: light and meshes are redone once for the whole batch
+                const world = this.game.world;
+                world.batchEdit(() => data.blocks.forEach(b => world.setBlock(b.x, b.y, b.z, b.type)));
+                break;
+            }
         }
     }
 
     update(dt) {
-        // Interpolate positions
-        const speed = 10; // Smoothing factor
-
-        this.otherPlayers.forEach(p => {
-             if (p.target) {
-                 p.x += (p.target.x - p.x) * speed * dt;
-                 p.y += (p.target.y - p.y) * speed * dt;
-                 p.z += (p.target.z - p.z) * speed * dt;
-
-                 // Angle interpolation (shortest path)
-                 p.yaw = this.lerpAngle(p.yaw, p.target.yaw, speed * dt);
-                 p.pitch = p.pitch + (p.target.pitch - p.pitch) * speed * dt; // Pitch doesn't wrap
-             }
-        });
+        this.flush();
+
+        // Remote players are drawn INTERPOLATION_DELAY behind the server clock, between the
+        // two snapshots around that time
+        const renderTime = this.serverTime() - NetworkManager.INTERPOLATION_DELAY;
+        this.otherPlayers.forEach(p => p.snapshots.sample(renderTime, p));
     }
 
     lerpAngle(start, end, t) {
-        let diff = end - start;
-        // Normalize diff to -PI to PI
-        while (diff > Math.PI) diff -= Math.PI * 2;
-        while (diff < -Math.PI) diff += Math.PI * 2;
+        return SnapshotBuffer.lerpAngle(start, end, t);
+    }
 
-        return start + diff * t;
+    // Sends everything queued since the last flush as one binary frame
+    flush() {
+        if (!this.binary || !this.connected || this.socket.readyState !== WebSocket.OPEN) return;
+        const P = window.NetProtocol;
+        const w = this.outbox;
+        if (this.serverWorld) {
+            const view = this.streamsChunks() ? this.game.world.renderDistance : 0;
+            if (view !== this.sentView) {
+                w.u8(P.OP.VIEW);
+                w.u8(view);
+                this.sentView = view;
+            }
+            if (this.outDrops.length > 0) {
+                w.u8(P.OP.DROP);
+                P.writeChunkList(w, this.outDrops);
+                this.outDrops.length = 0;
+            }
+        }
+        if (this.outBlocks.length > 0) {
+            P.writeBlocks(w, this.outBlocks);
+            this.outBlocks.length = 0;
+        }
+        if (w.length === 0) return;
+        this.socket.send(w.finish());
+        w.reset();
     }
 
     sendPosition(x, y, z, yaw, pitch) {
         if (!this.connected) return;
+        if (this.binary) {
+            const P = window.NetProtocol;
+            const w = this.outbox;
+            const player = this.game.player;
+            const name = player.name || '';
+            const skinColor = player.skinColor || '';
+            if (!this.sentProfile || this.sentProfile.name !== name || this.sentProfile.skinColor !== skinColor) {
+                w.u8(P.OP.PROFILE);
+                w.string(name);
+                w.string(skinColor);
+                this.sentProfile = { name, skinColor };
+            }
+            // Nothing is sent while standing still
+            P.writeState(w, P.quantize(x, y, z, yaw, pitch), this.sentState, () => w.u8(P.OP.MOVE));
+            return;
+        }
         if (this.socket.readyState === WebSocket.OPEN) {
             this.socket.send(JSON.stringify({
                 type: 'move', x, y, z, yaw, pitch,
@@ -133,6 +435,12 @@ class NetworkManager {
 
     sendChat(message) {
         if (!this.connected) return;
+        if (this.binary) {
+            this.outbox.u8(window.NetProtocol.OP.CHAT);
+            this.outbox.string(this.game.player.name || 'Player');
+            this.outbox.string(message);
+            return;
+        }
         if (this.socket.readyState === WebSocket.OPEN) {
             this.socket.send(JSON.stringify({
                 type: 'chat',
@@ -144,10 +452,19 @@ class NetworkManager {
 
     sendBlockUpdate(x, y, z, type) {
         if (!this.connected) return;
+        if (this.binary) {
+            // Batched with every other change made before the next flush (explosions, trees, ...)
+            this.outBlocks.push({ x, y, z, type });
+            return;
+        }
         if (this.socket.readyState === WebSocket.OPEN) {
             this.socket.send(JSON.stringify({ type: 'block', x, y, z, blockType: type }));
         }
     }
 }
 
+// Longer than the server's snapshot interval (100ms) plus some jitter
+NetworkManager.INTERPOLATION_DELAY = 150; // ms
+
+window.SnapshotBuffer = SnapshotBuffer;
 window.NetworkManager = NetworkManager;
@@ -1,50 +1,121 @@
+// Particles are stored as columns (structure of arrays) in preallocated Float32Arrays.
+// Live particles are always packed into [0, count): removing one moves the last particle
+// into its slot, so update() never shifts arrays. Spawns beyond the capacity are dropped.
+// Colours are kept as indices into a small palette so the renderer can batch by colour.
 class ParticleSystem {
-    constructor(game) {
+    constructor(game, capacity = ParticleSystem.MAX_PARTICLES) {
         this.game = game;
-        this.particles = [];
+        this.capacity = capacity;
+        this.count = 0;
+
+        this.x = new Float32Array(capacity);
+        this.y = new Float32Array(capacity);
+        this.z = new Float32Array(capacity);
+        this.vx = new Float32Array(capacity);
+        this.vy = new Float32Array(capacity);
+        this.vz = new Float32Array(capacity);
+        this.life = new Float32Array(capacity);
+        this.size = new Float32Array(capacity);
+        this.color = new Uint16Array(capacity);
+
+        this.palette = []; // Colour index -> CSS colour
+        this.paletteIndex = new Map(); // CSS colour -> colour index
+    }
+
+    colorIndex(color) {
+        let index = this.paletteIndex.get(color);
+        if (index === undefined) {
+            index = this.palette.length;
+            this.palette.push(color);
+            this.paletteIndex.set(color, index);
+        }
+        return index;
     }
 
     spawn(x, y, z, color, count = 5) {
-        for (let i = 0; i < count; i++) {
-            this.particles.push({
-                x: x + (Math.random() - 0.5) * 0.5,
-                y: y + (Math.random() - 0.5) * 0.5,
-                z: z + (Math.random() - 0.5) * 0.5,
-                vx: (Math.random() - 0.5) * 2.0,
-                vy: (Math.random() * 2.0),
-                vz: (Math.random() - 0.5) * 2.0,
-                life: 1.0 + Math.random(),
-                color: color,
-                size: 0.1 + Math.random() * 0.1
-            });
+        const c = this.colorIndex(color);
+        const n = Math.min(count, this.capacity - this.count);
+        for (let k = 0; k < n; k++) {
+            const i = this.count++;
+            this.x[i] = x + (Math.random() - 0.5) * 0.5;
+            this.y[i] = y + (Math.random() - 0.5) * 0.5;
+            this.z[i] = z + (Math.random() - 0.5) * 0.5;
+            this.vx[i] = (Math.random() - 0.5) * 2.0;
+            this.vy[i] = (Math.random() * 2.0);
+            this.vz[i] = (Math.random() - 0.5) * 2.0;
+            this.life[i] = 1.0 + Math.random();
+            this.color[i] = c;
+            this.size[i] = 0.1 + Math.random() * 0.1;
         }
     }
 
+    // Moves the last particle into slot i
+    remove(i) {
+        const last = --this.count;
+        if (i === last) return;
+        this.x[i] = this.x[last];
+        this.y[i] = this.y[last];
+        this.z[i] = this.z[last];
+        this.vx[i] = this.vx[last];
+        this.vy[i] = this.vy[last];
+        this.vz[i] = this.vz[last];
+        this.life[i] = this.life[last];
+        this.size[i] = this.size[last];
+        this.color[i] = this.color[last];
+    }
+
+    clear() {
+        this.count = 0;
+    }
+
     update(dt) {
-        for (let i = this.particles.length - 1; i >= 0; i--) {
-            const p = this.particles[i];
-            p.life -= dt;
-            if (p.life <= 0) {
-                this.particles.splice(i, 1);
-                continue;
+        const x = this.x, y = this.y, z = this.z, vx = this.vx, vy = this.vy, vz = this.vz, life = this.life;
+        let i = 0;
+        while (i < this.count) {
+            life[i] -= dt;
+            if (life[i] <= 0) {
+                this.remove(i);
+                continue; // Slot i now holds the former last particle
             }
 
-            p.vy -= 15.0 * dt; // Gravity
-            p.x += p.vx * dt;
-            p.y += p.vy * dt;
-            p.z += p.vz * dt;
+            vy[i] -= 15.0 * dt; // Gravity
+            x[i] += vx[i] * dt;
+            y[i] += vy[i] * dt;
+            z[i] += vz[i] * dt;
 
             // Simple collision check (floor)
-            if (p.y < 0) p.y = 0;
+            if (y[i] < 0) y[i] = 0;
+            i++;
         }
     }
 
-    render(ctx, camera) {
-        // This would require hooking into Renderer.
-        // Since Renderer uses WebGL or Canvas 2D?
-        // The game seems to be Canvas 2D based on `this.ctx = this.canvas.getContext('2d');` in `game.js`.
-        // I need to check `js/renderer.js`.
+    // Object view of the live particles ({ x, y, z, vx, vy, vz, life, size, color } backed
+    // by the columns, writable) for plugins and debugging. Allocates; not for per-frame use.
+    // A view is only valid until the next update() reorders the columns.
+    get particles() {
+        const list = [];
+        for (let i = 0; i < this.count; i++) list.push(new ParticleView(this, i));
+        return list;
     }
 }
 
+ParticleSystem.MAX_PARTICLES = 4096;
+
+class ParticleView {
+    constructor(system, index) {
+        this.system = system;
+        this.index = index;
+    }
+
+    get color() { return this.system.palette[this.system.color[this.index]]; }
+    set color(value) { this.system.color[this.index] = this.system.colorIndex(value); }
+}
+
+['x', 'y', 'z', 'vx', 'vy', 'vz', 'life', 'size'].forEach(field => {
+    Object.defineProperty(ParticleView.prototype, field, {
+        get() { return this.system[field][this.index]; },
+        set(value) { this.system[field][this.index] = value; }
+    });
+});
+
 window.ParticleSystem = ParticleSystem;
@@ -1,221 +1,218 @@
 class Physics {
     constructor(world) {
         this.world = world;
+        this.boxes = []; // Scratch for gatherBoxes
+        this.moveResult = {};
     }
 
-    checkCollision(box) {
-        // Box: {x, y, z, width, height}
-        const minX = Math.floor(box.x - box.width/2);
-        const maxX = Math.floor(box.x + box.width/2);
-        const minY = Math.floor(box.y) - 1; // Check 1 block below for tall blocks (fences)
-        const maxY = Math.floor(box.y + box.height);
-        const minZ = Math.floor(box.z - box.width/2);
-        const maxZ = Math.floor(box.z + box.width/2);
-
-        for (let x = minX; x <= maxX; x++) {
-            for (let y = minY; y <= maxY; y++) {
-                for (let z = minZ; z <= maxZ; z++) {
-                    const block = this.world.getBlock(x, y, z);
-                    const blockDef = BLOCKS[block];
-                    if (block !== BLOCK.AIR && blockDef && blockDef.solid) {
-                        // Check for Doors
-                        if (blockDef.isDoor) {
-                            const meta = this.world.getMetadata(x, y, z);
-                            if (meta & 4) {
-                                // Open Door Collision (Thin Slab)
-                                const thickness = 0.1875;
-                                const orient = meta & 3; // Bits 0-1
-
-                                let dMinX = x, dMaxX = x + 1;
-                                let dMinZ = z, dMaxZ = z + 1;
-
-                                if (orient === 0) { dMinZ = z + 1 - thickness; dMaxZ = z + 1; } // West Side -> Open to North
-                                else if (orient === 1) { dMinZ = z; dMaxZ = z + thickness; } // East Side -> Open to South
-                                else if (orient === 2) { dMinX = x + 1 - thickness; dMaxX = x + 1; } // North Side -> Open to East
-                                else if (orient === 3) { dMinX = x; dMaxX = x + thickness; } // South Side -> Open to West
-
-                                const pMinX = box.x - box.width/2;
-                                const pMaxX = box.x + box.width/2;
-                                const pMinY = box.y;
-                                const pMaxY = box.y + box.height;
-                                const pMinZ = box.z - box.width/2;
-                                const pMaxZ = box.z + box.width/2;
-
-                                if (dMinX < pMaxX && dMaxX > pMinX &&
-                                    y < pMaxY && y + 1 > pMinY &&
-                                    dMinZ < pMaxZ && dMaxZ > pMinZ) {
-                                    return true;
-                                }
-                                continue;
-                            } // proceed to next block
-
-                            // Closed Door Collision (Thin Slab)
-                            const thickness = 0.1875;
-                            const orient = meta & 3; // Bits 0-1
-
-                            // Default full block if unknown, but let's try to match orientation
-                            let dMinX = x, dMaxX = x + 1;
-                            let dMinZ = z, dMaxZ = z + 1;
-
-                            if (orient === 0) { dMinX = x; dMaxX = x + thickness; } // West Side
-                            else if (orient === 1) { dMinX = x + 1 - thickness; dMaxX = x + 1; } // East Side
-                            else if (orient === 2) { dMinZ = z; dMaxZ = z + thickness; } // North Side
-                            else if (orient === 3) { dMinZ = z + 1 - thickness; dMaxZ = z + 1; } // South Side
-
-                            const pMinX = box.x - box.width/2;
-                            const pMaxX = box.x + box.width/2;
-                            const pMinY = box.y;
-                            const pMaxY = box.y + box.height;
-                            const pMinZ = box.z - box.width/2;
-                            const pMaxZ = box.z + box.width/2;
-
-                            if (dMinX < pMaxX && dMaxX > pMinX &&
-                                y < pMaxY && y + 1 > pMinY &&
-                                dMinZ < pMaxZ && dMaxZ > pMinZ) {
-                                return true;
-                            }
-                            continue; // Processed door, move to next block
-                        }
-
-                        // Check for Stairs
-                        if (blockDef.isStair) {
-                            const meta = this.world.getMetadata(x, y, z);
-                            const pMinX = box.x - box.width/2;
-                            const pMaxX = box.x + box.width/2;
-                            const pMinY = box.y;
-                            const pMaxY = box.y + box.height;
-                            const pMinZ = box.z - box.width/2;
-                            const pMaxZ = box.z + box.width/2;
-
-                            // 1. Bottom Slab
-                            if (x < pMaxX && x + 1 > pMinX &&
-                                y < pMaxY && y + 0.5 > pMinY &&
-                                z < pMaxZ && z + 1 > pMinZ) {
-                                return true;
-                            }
-
-                            // 2. Top Half (Quadrant)
-                            let tMinX = x, tMaxX = x + 1;
-                            let tMinZ = z, tMaxZ = z + 1;
-                            const tMinY = y + 0.5;
-                            const tMaxY = y + 1.0;
-
-                            if (meta === 0) tMinX = x + 0.5; // East
-                            else if (meta === 1) tMaxX = x + 0.5; // West
-                            else if (meta === 2) tMinZ = z + 0.5; // South
-                            else if (meta === 3) tMaxZ = z + 0.5; // North
-
-                            if (tMinX < pMaxX && tMaxX > pMinX &&
-                                tMinY < pMaxY && tMaxY > pMinY &&
-                                tMinZ < pMaxZ && tMaxZ > pMinZ) {
-                                return true;
-                            }
-                            continue; // Next block
-                        }
+    // Collision boxes of a block as flat [minX, minY, minZ, maxX, maxY, maxZ, ...] local
+    // coordinates, worked out once per block type and metadata value and cached.
+    static collisionBoxes(type, meta) {
+        const key = type * 256 + (meta & 255);
+        let boxes = Physics.shapeCache.get(key);
+        if (boxes) return boxes;
+
+        const def = BLOCKS[type];
+        boxes = [];
+        if (type !== BLOCK.AIR && def && def.solid) {
+            const thickness = 0.1875;
+            if (def.isDoor) {
+                const orient = meta & 3; // Bits 0-1
+                if (meta & 4) {
+                    // Open: swung round against the neighbouring side
+                    if (orient === 0) boxes = [0, 0, 1 - thickness, 1, 1, 1]; // West Side -> Open to North
+                    else if (orient === 1) boxes = [0, 0, 0, 1, 1, thickness]; // East Side -> Open to South
+                    else if (orient === 2) boxes = [1 - thickness, 0, 0, 1, 1, 1]; // North Side -> Open to East
+                    else boxes = [0, 0, 0, thickness, 1, 1]; // South Side -> Open to West
+                } else {
+                    if (orient === 0) boxes = [0, 0, 0, thickness, 1, 1]; // West Side
+                    else if (orient === 1) boxes = [1 - thickness, 0, 0, 1, 1, 1]; // East Side
+                    else if (orient === 2) boxes = [0, 0, 0, 1, 1, thickness]; // North Side
+                    else boxes = [0, 0, 1 - thickness, 1, 1, 1]; // South Side
+                }
+            } else if (def.isStair) {
+                // Bottom half plus the raised quadrant
+                let tMinX = 0, tMaxX = 1, tMinZ = 0, tMaxZ = 1;
+                if (meta === 0) tMinX = 0.5; // East
+                else if (meta === 1) tMaxX = 0.5; // West
+                else if (meta === 2) tMinZ = 0.5; // South
+                else if (meta === 3) tMaxZ = 0.5; // North
+                boxes = [0, 0, 0, 1, 0.5, 1, tMinX, 0.5, tMinZ, tMaxX, 1, tMaxZ];
+            } else if (def.isFence || def.isPane) {
+                // Centre post, 1.5 high so nothing hops over
+                boxes = [0.375, 0, 0.375, 0.625, 1.5, 0.625];
+            } else if (def.isTrapdoor) {
+                // Open trapdoors are passable; closed ones are a thin slab at the bottom or top
+                if (!(meta & 4)) boxes = (meta & 8) ? [0, 1 - thickness, 0, 1, 1, 1] : [0, 0, 0, 1, thickness, 1];
+            } else if (def.isGate) {
+                if (!(meta & 4)) boxes = [0.375, 0, 0.375, 0.625, 1.5, 0.625];
+            } else if (def.isSlab) {
+                boxes = [0, 0, 0, 1, 0.5, 1];
+            } else {
+                boxes = [0, 0, 0, 1, 1, 1];
+            }
+        }
+        Physics.shapeCache.set(key, boxes);
+        return boxes;
+    }
 
-                        // Check for Fences / Panes
-                        if (blockDef.isFence || blockDef.isPane) {
-                            // Simplified: Center post collision
-                            // Assume 0.375 width (center 0.25 is 0.375 to 0.625)
-                            const pMinX = box.x - box.width/2;
-                            const pMaxX = box.x + box.width/2;
-                            const pMinY = box.y;
-                            const pMaxY = box.y + box.height;
-                            const pMinZ = box.z - box.width/2;
-                            const pMaxZ = box.z + box.width/2;
-
-                            const postMin = 0.375;
-                            const postMax = 0.625;
-
-                            if (x + postMin < pMaxX && x + postMax > pMinX &&
-                                y < pMaxY && y + 1.5 > pMinY && // Fences are often 1.5 high
-                                z + postMin < pMaxZ && z + postMax > pMinZ) {
-                                return true;
-                            }
-                            continue;
-                        }
+    // Whether a block's collision shape depends on its metadata
+    static shapeUsesMetadata(def) {
+        return !!(def && (def.isDoor || def.isStair || def.isTrapdoor || def.isGate));
+    }
 
-                        // Check for Trapdoors
-                        if (blockDef.isTrapdoor) {
-                            const meta = this.world.getMetadata(x, y, z);
-                            const open = (meta & 4) !== 0;
-                            const top = (meta & 8) !== 0;
-
-                            const pMinX = box.x - box.width/2;
-                            const pMaxX = box.x + box.width/2;
-                            const pMinY = box.y;
-                            const pMaxY = box.y + box.height;
-                            const pMinZ = box.z - box.width/2;
-                            const pMaxZ = box.z + box.width/2;
-
-                            if (open) {
-                                // Open: attached to side, full height (1.0), thickness 0.1875
-                                return false; // Passable when open
-                            } else {
-                                // Closed: Flat slab at bottom or top
-                                const thickness = 0.1875;
-                                let bMinY = y;
-                                let bMaxY = y + thickness;
-                                if (top) {
-                                    bMinY = y + 1.0 - thickness;
-                                    bMaxY = y + 1.0;
-                                }
-
-                                if (x < pMaxX && x + 1 > pMinX &&
-                                    bMinY < pMaxY && bMaxY > pMinY &&
-                                    z < pMaxZ && z + 1 > pMinZ) {
-                                    return true;
-                                }
-                            }
-                            continue;
-                        }
+    // Collects the world-space collision boxes of every block touching the region into
+    // this.boxes (flat, six numbers per box). Returns the number of boxes.
+    gatherBoxes(minX, minY, minZ, maxX, maxY, maxZ) {
+        const out = this.boxes;
+        let n = 0;
+        const x0 = Math.floor(minX), x1 = Math.floor(maxX);
+        const y0 = Math.floor(minY) - 1; // One block lower for tall shapes (fences)
+        const y1 = Math.floor(maxY);
+        const z0 = Math.floor(minZ), z1 = Math.floor(maxZ);
+
+        for (let x = x0; x <= x1; x++) {
+            for (let y = y0; y <= y1; y++) {
+                for (let z = z0; z <= z1; z++) {
+                    const block = this.world.getBlock(x, y, z);
+                    if (block === BLOCK.AIR) continue;
+                    const def = BLOCKS[block];
+                    if (!def || !def.solid) continue;
+                    const meta = Physics.shapeUsesMetadata(def) ? this.world.getMetadata(x, y, z) : 0;
+                    const shape = Physics.collisionBoxes(block, meta);
+                    for (let i = 0; i < shape.length; i += 6) {
+                        out[n++] = x + shape[i];
+                        out[n++] = y + shape[i + 1];
+                        out[n++] = z + shape[i + 2];
+                        out[n++] = x + shape[i + 3];
+                        out[n++] = y + shape[i + 4];
+                        out[n++] = z + shape[i + 5];
+                    }
+                }
+            }
+        }
+        return n / 6;
+    }
 
-                        // Check for Fence Gates
-                        if (blockDef.isGate) {
-                            const meta = this.world.getMetadata(x, y, z);
-                            const open = (meta & 4) !== 0;
-                            if (open) return false;
-
-                             // Closed: similar to fence
-                             const pMinX = box.x - box.width/2;
-                            const pMaxX = box.x + box.width/2;
-                            const pMinY = box.y;
-                            const pMaxY = box.y + box.height;
-                            const pMinZ = box.z - box.width/2;
-                            const pMaxZ = box.z + box.width/2;
-
-                            const postMin = 0.375;
-                            const postMax = 0.625;
-
-                            if (x + postMin < pMaxX && x + postMax > pMinX &&
-                                y < pMaxY && y + 1.5 > pMinY &&
-                                z + postMin < pMaxZ && z + postMax > pMinZ) {
-                                return true;
-                            }
-                            continue;
-                        }
+    checkCollision(box) {
+        // Box: {x, y, z, width, height}
+        const pMinX = box.x - box.width/2;
+        const pMaxX = box.x + box.width/2;
+        const pMinY = box.y;
+        const pMaxY = box.y + box.height;
+        const pMinZ = box.z - box.width/2;
+        const pMaxZ = box.z + box.width/2;
+
+        const count = this.gatherBoxes(pMinX, pMinY, pMinZ, pMaxX, pMaxY, pMaxZ);
+        const b = this.boxes;
+        for (let i = 0; i < count * 6; i += 6) {
+            if (b[i] < pMaxX && b[i + 3] > pMinX &&
+                b[i + 1] < pMaxY && b[i + 4] > pMinY &&
+                b[i + 2] < pMaxZ && b[i + 5] > pMinZ) {
+                return true;
+            }
+        }
+        return false;
+    }
 
-                        // Check for Slabs
-                        let bHeight = 1.0;
-                        if (blockDef.isSlab) bHeight = 0.5;
-
-                        const pMinX = box.x - box.width/2;
-                        const pMaxX = box.x + box.width/2;
-                        const pMinY = box.y;
-                        const pMaxY = box.y + box.height;
-                        const pMinZ = box.z - box.width/2;
-                        const pMaxZ = box.z + box.width/2;
-
-                        if (x < pMaxX && x + 1 > pMinX &&
-                            y < pMaxY && y + bHeight > pMinY &&
-                            z < pMaxZ && z + 1 > pMinZ) {
-                            return true;
-                        }
+    // Swept-AABB movement: slides box {x, y, z, width, height} (x/z centre, y feet) by
+    // (dx, dy, dz) through the world's collision boxes. Each pass finds the earliest time of
+    // impact against every box at once, moves up to it, drops the blocked axis and carries
+    // on with what is left, so fast movers cannot tunnel and corners resolve in order.
+    // Boxes the mover already overlaps are ignored so it can always walk out of them.
+    // Returns result: {x, y, z, hitX, hitY, hitZ, toi} where toi is the fraction of the
+    // move completed before the first contact (1 when nothing was hit).
+    moveBox(box, dx, dy, dz, result = {}) {
+        const half = box.width / 2;
+        let x = box.x, y = box.y, z = box.z;
+        result.hitX = false; result.hitY = false; result.hitZ = false;
+        result.toi = 1;
+
+        const count = this.gatherBoxes(
+            Math.min(x, x + dx) - half, Math.min(y, y + dy), Math.min(z, z + dz) - half,
+            Math.max(x, x + dx) + half, Math.max(y, y + dy) + box.height, Math.max(z, z + dz) + half);
+        const b = this.boxes;
+        const eps = Physics.CONTACT_EPSILON;
+
+        for (let pass = 0; pass < 3 && (dx !== 0 || dy !== 0 || dz !== 0); pass++) {
+            const minX = x - half, maxX = x + half;
+            const minY = y, maxY = y + box.height;
+            const minZ = z - half, maxZ = z + half;
+            let first = 1, axis = -1, plane = 0;
+
+            for (let i = 0; i < count * 6; i += 6) {
+                let enter = -Infinity, leave = Infinity, enterAxis = -1, enterPlane = 0;
+                let miss = false;
+                for (let a = 0; a < 3 && !miss; a++) {
+                    const d = a === 0 ? dx : a === 1 ? dy : dz;
+                    const lo = a === 0 ? minX : a === 1 ? minY : minZ;
+                    const hi = a === 0 ? maxX : a === 1 ? maxY : maxZ;
+                    const bLo = b[i + a], bHi = b[i + a + 3];
+                    if (d === 0) {
+                        // Not moving on this axis: the spans have to overlap already
+                        if (hi <= bLo + eps || lo >= bHi - eps) miss = true;
+                        continue;
+                    }
+                    // Gap to close before touching, and to cross before leaving again
+                    let gap = d > 0 ? bLo - hi : lo - bHi;
+                    if (gap < 0 && gap > -eps) gap = 0; // Resting against it
+                    const t0 = gap / Math.abs(d);
+                    const t1 = (d > 0 ? bHi - lo : hi - bLo) / Math.abs(d);
+                    if (t0 > enter) {
+                        enter = t0;
+                        enterAxis = a;
+                        enterPlane = d > 0 ? bLo : bHi;
                     }
+                    if (t1 < leave) leave = t1;
                 }
+                if (miss || enter < 0 || enter >= first || enter >= leave) continue;
+                first = enter;
+                axis = enterAxis;
+                plane = enterPlane;
+            }
+
+            if (pass === 0) result.toi = first;
+            x += dx * first;
+            y += dy * first;
+            z += dz * first;
+            if (axis < 0) break; // Moved the whole way
+
+            // Sit exactly on the face that was hit, then keep sliding along the others
+            const rest = 1 - first;
+            if (axis === 0) {
+                x = dx > 0 ? plane - half : plane + half;
+                result.hitX = true;
+                dx = 0;
+            } else if (axis === 1) {
+                y = dy > 0 ? plane - box.height : plane;
+                result.hitY = true;
+                dy = 0;
+            } else {
+                z = dz > 0 ? plane - half : plane + half;
+                result.hitZ = true;
+                dz = 0;
             }
+            dx *= rest; dy *= rest; dz *= rest;
         }
-        return false;
+
+        result.x = x;
+        result.y = y;
+        result.z = z;
+        return result;
+    }
+
+    // Moves an entity (player, mob, vehicle) by (dx, dy, dz) with moveBox: stops its velocity
+    // on whatever axis it ran into and sets onGround when it landed on something.
+    moveEntity(entity, dx, dy, dz) {
+        const result = this.moveBox(entity, dx, dy, dz, this.moveResult);
+        entity.x = result.x;
+        entity.y = result.y;
+        entity.z = result.z;
+        if (result.hitX) entity.vx = 0;
+        if (result.hitZ) entity.vz = 0;
+        if (result.hitY) entity.vy = 0;
+        entity.onGround = result.hitY && dy < 0;
+        return result;
     }
 
     raycast(origin, direction, maxDist, includeLiquids = false) {
@@ -452,4 +449,9 @@ class Physics {
     }
 }
 
+// Collision shapes per block type and metadata (see collisionBoxes)
+Physics.shapeCache = new Map();
+// Gaps smaller than this count as touching, so rounding never lets a resting box sink in
+Physics.CONTACT_EPSILON = 1e-7;
+
 window.Physics = Physics;
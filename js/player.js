@@ -479,52 +479,9 @@ class Player {
     }
 
     moveBy(dx, dy, dz) {
-        const world = this.game.world;
-        const physics = this.game.physics;
-
-        // X Axis
-        if (physics.checkCollision({x: this.x + dx, y: this.y, z: this.z, width: this.width, height: this.height})) {
-            this.vx = 0;
-        } else {
-            this.x += dx;
-        }
-
-        // Z Axis
-        if (physics.checkCollision({x: this.x, y: this.y, z: this.z + dz, width: this.width, height: this.height})) {
-            this.vz = 0;
-        } else {
-            this.z += dz;
-        }
-
-        // Y Axis
-        if (physics.checkCollision({x: this.x, y: this.y + dy, z: this.z, width: this.width, height: this.height})) {
-            if (dy < 0) {
-                this.onGround = true;
-                // Find what we hit to snap correctly (slabs vs full blocks)
-                const box = {x: this.x, y: this.y + dy, z: this.z, width: this.width, height: this.height};
-                const blocks = physics.getCollidingBlocks(box);
-
-                let maxY = -Infinity;
-                for (const b of blocks) {
-                    let top = b.y + 1;
-                    const def = window.BLOCKS[b.type];
-                    if (def && def.isSlab) top = b.y + 0.5;
-
-                    if (top > maxY) maxY = top;
-                }
-
-                if (maxY > -Infinity) {
-                    this.y = maxY;
-                } else {
-                     // Fallback
-                     this.y = Math.floor(this.y + dy) + 1;
-                }
-            }
-            this.vy = 0;
-        } else {
-            this.y += dy;
-            this.onGround = false;
-        }
+        // Swept against the blocks' collision shapes, so landing on slabs, stairs
+        // and fences puts the feet exactly on top of them
+        this.game.physics.moveEntity(this, dx, dy, dz);
 
         // World Bounds (Respawn)
         if (this.y < -10) {
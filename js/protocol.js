@@ -0,0 +1,261 @@
+// Binary multiplayer protocol shared by the client (js/network.js) and the server (server/server.js).
+// A frame (one binary WebSocket message) holds any number of records, each starting with a
+// one-byte opcode, so everything a peer has to say in one tick goes out as one message.
+// Positions travel as fixed point (1/32 block), angles as 16-bit fractions. Player state
+// records only carry the fields that changed since the last record the receiver got, as
+// 16-bit deltas when they fit.
+// The server owns the world: it streams chunks (ChunkCodec records, see js/storage.js) to
+// each client and numbers every block edit, so a client that reconnects only gets the
+// edits it missed.
+
+class ByteWriter {
+    constructor(capacity = 256) {
+        this.buffer = new ArrayBuffer(capacity);
+        this.view = new DataView(this.buffer);
+        this.bytes = new Uint8Array(this.buffer);
+        this.length = 0;
+    }
+
+    ensure(n) {
+        if (this.length + n <= this.bytes.length) return;
+        let capacity = this.bytes.length * 2;
+        while (capacity < this.length + n) capacity *= 2;
+        const bytes = new Uint8Array(capacity);
+        bytes.set(this.bytes.subarray(0, this.length));
+        this.buffer = bytes.buffer;
+        this.view = new DataView(this.buffer);
+        this.bytes = bytes;
+    }
+
+    reset() {
+        this.length = 0;
+    }
+
+    u8(v) { this.ensure(1); this.view.setUint8(this.length, v); this.length += 1; }
+    u16(v) { this.ensure(2); this.view.setUint16(this.length, v, true); this.length += 2; }
+    i16(v) { this.ensure(2); this.view.setInt16(this.length, v, true); this.length += 2; }
+    u32(v) { this.ensure(4); this.view.setUint32(this.length, v, true); this.length += 4; }
+    i32(v) { this.ensure(4); this.view.setInt32(this.length, v, true); this.length += 4; }
+
+    // u16 byte length + UTF-8
+    string(s) {
+        const encoded = NetProtocol.encodeText(String(s || ''));
+        const n = Math.min(encoded.length, 0xFFFF);
+        this.u16(n);
+        this.ensure(n);
+        this.bytes.set(encoded.subarray(0, n), this.length);
+        this.length += n;
+    }
+
+    raw(data) {
+        this.ensure(data.length);
+        this.bytes.set(data, this.length);
+        this.length += data.length;
+    }
+
+    // Copy of the written bytes (the writer is reused for the next frame)
+    finish() {
+        return this.bytes.slice(0, this.length);
+    }
+}
+
+class ByteReader {
+    constructor(data) {
+        this.bytes = data instanceof Uint8Array ? data : new Uint8Array(data);
+        this.view = new DataView(this.bytes.buffer, this.bytes.byteOffset, this.bytes.byteLength);
+        this.offset = 0;
+    }
+
+    get remaining() {
+        return this.bytes.length - this.offset;
+    }
+
+    u8() { const v = this.view.getUint8(this.offset); this.offset += 1; return v; }
+    u16() { const v = this.view.getUint16(this.offset, true); this.offset += 2; return v; }
+    i16() { const v = this.view.getInt16(this.offset, true); this.offset += 2; return v; }
+    u32() { const v = this.view.getUint32(this.offset, true); this.offset += 4; return v; }
+    i32() { const v = this.view.getInt32(this.offset, true); this.offset += 4; return v; }
+
+    string() {
+        const n = this.u16();
+        const s = NetProtocol.decodeText(this.bytes.subarray(this.offset, this.offset + n));
+        this.offset += n;
+        return s;
+    }
+
+    // View (not a copy) of the next n bytes
+    raw(n) {
+        const v = this.bytes.subarray(this.offset, this.offset + n);
+        this.offset += n;
+        return v;
+    }
+}
+
+class NetProtocol {
+    static encodeText(s) {
+        return new TextEncoder().encode(s);
+    }
+
+    static decodeText(bytes) {
+        return new TextDecoder().decode(bytes);
+    }
+
+    // Quantised player state: { x, y, z } in 1/32 blocks, yaw as a 16-bit turn fraction,
+    // pitch in 1/10000 radians
+    static quantize(x, y, z, yaw, pitch, out = {}) {
+        const turn = Math.PI * 2;
+        out.x = Math.round(x * NetProtocol.POS_SCALE);
+        out.y = Math.round(y * NetProtocol.POS_SCALE);
+        out.z = Math.round(z * NetProtocol.POS_SCALE);
+        out.yaw = Math.round((((yaw % turn) + turn) % turn) / turn * 65536) & 0xFFFF;
+        out.pitch = Math.max(-32767, Math.min(32767, Math.round(pitch * 10000)));
+        return out;
+    }
+
+    static dequantize(q) {
+        const yaw = q.yaw / 65536 * Math.PI * 2;
+        return {
+            x: q.x / NetProtocol.POS_SCALE,
+            y: q.y / NetProtocol.POS_SCALE,
+            z: q.z / NetProtocol.POS_SCALE,
+            yaw: yaw > Math.PI ? yaw - Math.PI * 2 : yaw,
+            pitch: q.pitch / 10000
+        };
+    }
+
+    // Writes the difference between quantised state and base (the last state the receiver
+    // got, updated in place). Returns false, writing nothing, when nothing changed.
+    // header() is called first so callers can prefix the opcode/id only when needed.
+    static writeState(w, state, base, header) {
+        let flags = 0;
+        const moved = !base.known || state.x !== base.x || state.y !== base.y || state.z !== base.z;
+        const turned = !base.known || state.yaw !== base.yaw || state.pitch !== base.pitch;
+        if (moved) flags |= NetProtocol.STATE_POS;
+        if (turned) flags |= NetProtocol.STATE_ROT;
+        if (flags === 0) return false;
+
+        const dx = state.x - base.x, dy = state.y - base.y, dz = state.z - base.z;
+        const small = (v) => v >= -32768 && v <= 32767;
+        if (moved && base.known && small(dx) && small(dy) && small(dz)) flags |= NetProtocol.STATE_DELTA;
+
+        header();
+        w.u8(flags);
+        if (flags & NetProtocol.STATE_DELTA) {
+            w.i16(dx); w.i16(dy); w.i16(dz);
+        } else if (moved) {
+            w.i32(state.x); w.i32(state.y); w.i32(state.z);
+        }
+        if (turned) {
+            w.u16(state.yaw);
+            w.i16(state.pitch);
+        }
+
+        base.x = state.x; base.y = state.y; base.z = state.z;
+        base.yaw = state.yaw; base.pitch = state.pitch;
+        base.known = true;
+        return true;
+    }
+
+    // Reads a state body onto base (the receiver's copy of the sender's last state)
+    static readState(r, base) {
+        const flags = r.u8();
+        if (flags & NetProtocol.STATE_DELTA) {
+            base.x += r.i16(); base.y += r.i16(); base.z += r.i16();
+        } else if (flags & NetProtocol.STATE_POS) {
+            base.x = r.i32(); base.y = r.i32(); base.z = r.i32();
+        }
+        if (flags & NetProtocol.STATE_ROT) {
+            base.yaw = r.u16();
+            base.pitch = r.i16();
+        }
+        base.known = true;
+        return base;
+    }
+
+    // BLOCKS records: an origin, then per block dx/dz relative to it. A new record starts
+    // every 65535 blocks or when a block is too far from the current origin.
+    static writeBlocks(w, blocks) {
+        let start = 0;
+        while (start < blocks.length) {
+            const ox = blocks[start].x, oz = blocks[start].z;
+            let end = start + 1;
+            while (end < blocks.length && end - start < 0xFFFF &&
+                   Math.abs(blocks[end].x - ox) < 32768 && Math.abs(blocks[end].z - oz) < 32768) end++;
+
+            w.u8(NetProtocol.OP.BLOCKS);
+            w.u16(end - start);
+            w.i32(ox);
+            w.i32(oz);
+            for (let i = start; i < end; i++) {
+                const b = blocks[i];
+                w.i16(b.x - ox);
+                w.u8(b.y);
+                w.i16(b.z - oz);
+                w.u16(b.type);
+            }
+            start = end;
+        }
+    }
+
+    // Chunk coordinate lists (SYNC, DROP): u32 count, count * (i32 cx, i32 cz)
+    static writeChunkList(w, chunks) {
+        w.u32(chunks.length);
+        chunks.forEach(([cx, cz]) => {
+            w.i32(cx);
+            w.i32(cz);
+        });
+    }
+
+    static readChunkList(r, out = []) {
+        const n = r.u32();
+        for (let i = 0; i < n; i++) out.push([r.i32(), r.i32()]);
+        return out;
+    }
+
+    static readBlocks(r, out = []) {
+        const n = r.u16();
+        const ox = r.i32();
+        const oz = r.i32();
+        for (let i = 0; i < n; i++) {
+            const x = ox + r.i16();
+            const y = r.u8();
+            const z = oz + r.i16();
+            out.push({ x, y, z, type: r.u16() });
+        }
+        return out;
+    }
+}
+
+// Record opcodes. HELLO/STATE/INFO/LEAVE/CHUNK/SEQ/TIME go server -> client,
+// MOVE/PROFILE/VIEW/SYNC/DROP client -> server, BLOCKS and CHAT both ways.
+NetProtocol.VERSION = 2;
+NetProtocol.OP = {
+    HELLO: 1,   // u32 id, u8 version
+    MOVE: 2,    // state body
+    STATE: 3,   // u32 id, state body
+    PROFILE: 4, // name, skin colour
+    INFO: 5,    // u32 id, name, skin colour
+    BLOCKS: 6,  // u16 count, i32 origin x, i32 origin z, count * (i16 dx, u8 y, i16 dz, u16 type)
+    CHAT: 7,    // sender, message
+    LEAVE: 8,   // u32 id
+    CHUNK: 9,   // u32 length, ChunkCodec record
+    VIEW: 10,   // u8 view distance in chunks (0 stops chunk streaming)
+    SYNC: 11,   // u32 last edit seen, chunk list of chunks still held (sent on reconnect)
+    SEQ: 12,    // u32 number of the latest edit included so far
+    DROP: 13,   // chunk list of chunks the client unloaded
+    TIME: 14    // u32 server clock (ms) the STATE records after it were taken at
+};
+NetProtocol.POS_SCALE = 32;
+NetProtocol.STATE_POS = 1;
+NetProtocol.STATE_ROT = 2;
+NetProtocol.STATE_DELTA = 4;
+
+if (typeof window !== 'undefined') {
+    window.NetProtocol = NetProtocol;
+    window.ByteWriter = ByteWriter;
+    window.ByteReader = ByteReader;
+}
+if (typeof module !== 'undefined' && module.exports) {
+    // Required by server/server.js
+    module.exports = { NetProtocol, ByteWriter, ByteReader };
+}
@@ -1,12 +1,13 @@
 class Renderer {
     constructor(game) {
         this.game = game;
+        this.mode = 'canvas';
         this.canvas = game.canvas;
         this.ctx = game.ctx;
         this.textureManager = null;
         if (window.TextureManager) {
             this.textureManager = new TextureManager();
-            this.textureManager.init();
+            this.textureManager.load(); // Plain colours until the atlas is ready
         }
 
         // Cache HUD elements
@@ -14,6 +15,23 @@ class Renderer {
         this.posEl = document.getElementById('position');
         this.blockEl = document.getElementById('block-count');
         this.timeEl = document.getElementById('game-time');
+
+        // Scratch buffers for chunk mesh quads (camera-space corners, projected polygons)
+        this.quadCam = new Float32Array(12);
+        this.quadScreen = new Float32Array(8192);
+        this.faceColors = {};
+        this.quadPatterns = new Map(); // (type * 6 + face) * 16 + light -> { sprite, pattern }
+        this.patternMatrix = { a: 1, b: 0, c: 0, d: 1, e: 0, f: 0 };
+
+        // Section culling state (see getVisibleSections), sized for the render distance on first use
+        this.visibleSections = [];
+        this.frustum = new Float32Array(15);
+        this.cullFrame = 0;
+        this.cullSide = 0;
+        this.cullChunks = [];
+        this.cullChunkStamps = null;
+        this.cullSectionStamps = null;
+        this.cullQueue = null;
     }
 
     resize() {
@@ -31,28 +49,29 @@ class Renderer {
         }
     }
 
+    // Releases what the renderer holds when the game switches to another one
+    destroy() {}
+
+    // Top and bottom sky colours ([r, g, b]) for the time of day
+    getSkyColors() {
+        const cycle = (this.game.gameTime % this.game.dayLength) / this.game.dayLength;
+        const b = this.game.sunBrightness;
+        if (cycle > 0.45 && cycle < 0.55) return [[20, 20, 60], [255, 100, 50]]; // Sunset
+        if (cycle > 0.95 || cycle < 0.05) return [[20, 20, 60], [255, 150, 50]]; // Sunrise
+        if (b < 0.5) return [[0, 0, 10], [0, 0, 30]]; // Night
+        return [[100, 180, 255], [200, 230, 255]]; // Day
+    }
+
     drawSky(w, h) {
         const ctx = this.ctx;
         const cycle = (this.game.gameTime % this.game.dayLength) / this.game.dayLength;
         const angle = cycle * 2 * Math.PI;
 
         // Sky Gradient
-        const b = this.game.sunBrightness;
+        const [top, bottom] = this.getSkyColors();
         const gradient = ctx.createLinearGradient(0, 0, 0, h);
-
-        if (cycle > 0.45 && cycle < 0.55) { // Sunset
-             gradient.addColorStop(0, `rgb(20, 20, 60)`);
-             gradient.addColorStop(1, `rgb(255, 100, 50)`);
-        } else if (cycle > 0.95 || cycle < 0.05) { // Sunrise
-             gradient.addColorStop(0, `rgb(20, 20, 60)`);
-             gradient.addColorStop(1, `rgb(255, 150, 50)`);
-        } else if (b < 0.5) { // Night
-             gradient.addColorStop(0, `rgb(0, 0, 10)`);
-             gradient.addColorStop(1, `rgb(0, 0, 30)`);
-        } else { // Day
-             gradient.addColorStop(0, `rgb(100, 180, 255)`);
-             gradient.addColorStop(1, `rgb(200, 230, 255)`);
-        }
+        gradient.addColorStop(0, `rgb(${top.join(', ')})`);
+        gradient.addColorStop(1, `rgb(${bottom.join(', ')})`);
 
         ctx.fillStyle = gradient;
         ctx.fillRect(0, 0, w, h);
@@ -106,163 +125,388 @@ class Renderer {
         }
     }
 
-    render() {
+    // Camera and projection shared by the drawing passes below
+    getView() {
         const w = this.canvas.width / (window.devicePixelRatio || 1);
         const h = this.canvas.height / (window.devicePixelRatio || 1);
-        const ctx = this.ctx;
+        const player = this.game.player;
+        const yaw = player.yaw;
+        const pitch = player.pitch;
+        return {
+            w, h,
+            px: player.x,
+            py: player.y + player.height - 0.2, // Camera Y
+            pz: player.z,
+            sinY: Math.sin(-yaw),
+            cosY: Math.cos(-yaw),
+            sinP: Math.sin(-pitch),
+            cosP: Math.cos(-pitch),
+            scale: (h / 2) / Math.tan(this.game.fov * Math.PI / 360),
+            renderDist: this.game.renderDistance // View distance in blocks
+        };
+    }
 
-        // Sky
-        this.drawSky(w, h);
+    // Side and near planes of the view frustum as world-space normals through the eye
+    // (x, y, z per plane), from the rotation in getView: camera right, up and forward axes.
+    updateFrustum(view) {
+        const { w, h, sinY, cosY, sinP, cosP, scale } = view;
+        const tx = (w / 2) / scale;
+        const ty = (h / 2) / scale;
+        const right = [cosY, 0, -sinY];
+        const up = [-sinP * sinY, cosP, -sinP * cosY];
+        const fwd = [cosP * sinY, sinP, cosP * cosY];
+        const planes = this.frustum;
+        const set = (i, ax, ay, az) => {
+            const len = Math.sqrt(ax * ax + ay * ay + az * az) || 1;
+            planes[i * 3] = ax / len;
+            planes[i * 3 + 1] = ay / len;
+            planes[i * 3 + 2] = az / len;
+        };
+        set(0, tx * fwd[0] + right[0], tx * fwd[1] + right[1], tx * fwd[2] + right[2]); // Left
+        set(1, tx * fwd[0] - right[0], tx * fwd[1] - right[1], tx * fwd[2] - right[2]); // Right
+        set(2, ty * fwd[0] + up[0], ty * fwd[1] + up[1], ty * fwd[2] + up[2]); // Bottom
+        set(3, ty * fwd[0] - up[0], ty * fwd[1] - up[1], ty * fwd[2] - up[2]); // Top
+        set(4, fwd[0], fwd[1], fwd[2]); // Near
+    }
 
-        // Water Overlay (Under water)
-        const headBlock = this.game.world.getBlock(Math.floor(this.game.player.x), Math.floor(this.game.player.y + this.game.player.height - 0.2), Math.floor(this.game.player.z));
-        if (headBlock === BLOCK.WATER) {
-            ctx.fillStyle = 'rgba(0, 50, 150, 0.5)';
-            ctx.fillRect(0, 0, w, h);
+    // Whether a box (min corner, edge length) reaches into the frustum of the last updateFrustum.
+    // Tests the corner furthest along each plane normal, with a block of slack for
+    // billboards and fence posts that poke out of their cell.
+    boxInFrustum(x, y, z, size, view) {
+        const planes = this.frustum;
+        const ox = x - view.px, oy = y - view.py, oz = z - view.pz;
+        for (let i = 0; i < 15; i += 3) {
+            const nx = planes[i], ny = planes[i + 1], nz = planes[i + 2];
+            const d = nx * (nx > 0 ? ox + size : ox) + ny * (ny > 0 ? oy + size : oy) + nz * (nz > 0 ? oz + size : oz);
+            if (d < -Renderer.CULL_MARGIN) return false;
         }
+        return true;
+    }
 
-        // Render Blocks
-        // Chunk-based rendering + Frustum/Distance Culling
+    // Loaded chunk at (cx, cz) if it is in render range, meshed and looked up once per frame
+    getCullChunk(cx, cz, view) {
+        const dx = cx - this.cullMinCX;
+        const dz = cz - this.cullMinCZ;
+        const side = this.cullSide;
+        if (dx < 0 || dz < 0 || dx >= side || dz >= side) return null;
+        const c = dx * side + dz;
+        if (this.cullChunkStamps[c] !== this.cullFrame) {
+            this.cullChunkStamps[c] = this.cullFrame;
+            let chunk = this.game.world.getChunk(cx, cz);
+            if (chunk) {
+                const ox = cx * 16 + 8 - view.px;
+                const oz = cz * 16 + 8 - view.pz;
+                const reach = view.renderDist + 12; // Section centre to its farthest column
+                if (ox * ox + oz * oz > reach * reach) chunk = null;
+                else if (chunk.modified) chunk.updateVisibleBlocks(this.game.world);
+            }
+            this.cullChunks[c] = chunk || null;
+        }
+        return this.cullChunks[c];
+    }
 
-        const blocksToDraw = [];
-        const px = this.game.player.x;
-        const py = this.game.player.y + this.game.player.height - 0.2; // Camera Y
-        const pz = this.game.player.z;
-        const yaw = this.game.player.yaw;
-        const pitch = this.game.player.pitch;
+    // Sections worth drawing this frame, as a flat [chunk, section, chunk, section, ...] list,
+    // nearest first. Walks outwards from the camera's section through the faces each section's
+    // visibility graph connects (Chunk.computeSectionVisibility), never turning back towards
+    // the camera, and skips sections outside the view frustum. Chunks behind the player or
+    // sealed off underground are dropped here, before any per-block work.
+    getVisibleSections(view) {
+        const out = this.visibleSections;
+        out.length = 0;
+        this.updateFrustum(view);
+
+        const chunkRad = Math.ceil(view.renderDist / 16);
+        const side = chunkRad * 2 + 1;
+        const centerCX = Math.floor(view.px / 16);
+        const centerCZ = Math.floor(view.pz / 16);
+        if (side !== this.cullSide) {
+            this.cullSide = side;
+            this.cullChunks = new Array(side * side).fill(null);
+            this.cullChunkStamps = new Uint32Array(side * side);
+            this.cullSectionStamps = null;
+        }
+        this.cullMinCX = centerCX - chunkRad;
+        this.cullMinCZ = centerCZ - chunkRad;
+        const frame = ++this.cullFrame;
+
+        const sy = Math.floor(view.py / 16);
+        const start = this.getCullChunk(centerCX, centerCZ, view);
+        if (!start || sy < 0 || sy >= start.sectionCount) {
+            // Camera above or below the world (or its chunk is not loaded): frustum test only
+            for (let dx = 0; dx < side; dx++) {
+                for (let dz = 0; dz < side; dz++) {
+                    const cx = this.cullMinCX + dx, cz = this.cullMinCZ + dz;
+                    const chunk = this.getCullChunk(cx, cz, view);
+                    if (!chunk) continue;
+                    for (let s = 0; s < chunk.sectionCount; s++) {
+                        if (chunk.sectionMeshes[s] && this.boxInFrustum(cx * 16, s * 16, cz * 16, 16, view)) out.push(chunk, s);
+                    }
+                }
+            }
+            return out;
+        }
 
-        const sinY = Math.sin(-yaw);
-        const cosY = Math.cos(-yaw);
-        const sinP = Math.sin(-pitch);
-        const cosP = Math.cos(-pitch);
-        const scale = (h / 2) / Math.tan(this.game.fov * Math.PI / 360);
+        const sectionCount = start.sectionCount;
+        if (!this.cullSectionStamps || this.cullSectionStamps.length !== side * side * sectionCount) {
+            this.cullSectionStamps = new Uint32Array(side * side * sectionCount);
+            this.cullQueue = new Int32Array(side * side * sectionCount * 5);
+        }
+        const stamps = this.cullSectionStamps;
+        const queue = this.cullQueue;
+        const faces = Chunk.FACES;
+        const key = (cx, cz, s) => ((cx - this.cullMinCX) * side + (cz - this.cullMinCZ)) * sectionCount + s;
+
+        // The camera's own section can see out of every face some pocket of it reaches
+        let startFaces = 0;
+        for (let f = 0; f < 6; f++) startFaces |= start.sectionVisibility[sy * 6 + f];
+
+        // Queue entries: cx, cz, section, face it was entered through (-1 for the camera's), directions taken
+        stamps[key(centerCX, centerCZ, sy)] = frame;
+        if (start.sectionMeshes[sy]) out.push(start, sy);
+        queue[0] = centerCX; queue[1] = centerCZ; queue[2] = sy; queue[3] = -1; queue[4] = 0;
+        let head = 0, tail = 5;
+        while (head < tail) {
+            const cx = queue[head], cz = queue[head + 1], s = queue[head + 2];
+            const from = queue[head + 3], dirs = queue[head + 4];
+            head += 5;
+            const open = from < 0 ? startFaces : this.getCullChunk(cx, cz, view).sectionVisibility[s * 6 + from];
+
+            for (let g = 0; g < 6; g++) {
+                if (!(open & (1 << g))) continue; // Nothing inside links the way in to this face
+                if (dirs & (1 << (g ^ 1))) continue; // Would head back towards the camera
+                const f = faces[g];
+                const ns = s + f.ny;
+                if (ns < 0 || ns >= sectionCount) continue;
+                const ncx = cx + f.nx, ncz = cz + f.nz;
+                const chunk = this.getCullChunk(ncx, ncz, view);
+                if (!chunk) continue;
+                const k = key(ncx, ncz, ns);
+                if (stamps[k] === frame) continue;
+                stamps[k] = frame;
+                if (!this.boxInFrustum(ncx * 16, ns * 16, ncz * 16, 16, view)) continue;
+
+                if (chunk.sectionMeshes[ns]) out.push(chunk, ns);
+                queue[tail] = ncx; queue[tail + 1] = ncz; queue[tail + 2] = ns;
+                queue[tail + 3] = g ^ 1; queue[tail + 4] = dirs | (1 << g);
+                tail += 5;
+            }
+        }
+        return out;
+    }
 
-        const renderDist = this.game.renderDistance; // View distance in blocks
+    render() {
+        const view = this.getView();
 
-        // We should iterate chunks, but for now let's iterate blocks in loaded chunks nearby
-        // Optimization: Only iterate chunks within renderDist
+        // Sky
+        this.drawSky(view.w, view.h);
+        this.drawUnderwater(view);
 
-        const centerCX = Math.floor(px / 16);
-        const centerCZ = Math.floor(pz / 16);
-        const chunkRad = Math.ceil(renderDist / 16);
+        const drawn = this.drawBlocks(view);
+        this.drawEntities(view);
+        this.drawOverlay(view, drawn);
+    }
 
-        for (let cx = centerCX - chunkRad; cx <= centerCX + chunkRad; cx++) {
-            for (let cz = centerCZ - chunkRad; cz <= centerCZ + chunkRad; cz++) {
-                const chunk = this.game.world.getChunk(cx, cz);
-                if (!chunk) continue;
+    // Water Overlay (Under water)
+    drawUnderwater(view) {
+        const player = this.game.player;
+        const headBlock = this.game.world.getBlock(Math.floor(player.x), Math.floor(player.y + player.height - 0.2), Math.floor(player.z));
+        if (headBlock === BLOCK.WATER) {
+            this.ctx.fillStyle = 'rgba(0, 50, 150, 0.5)';
+            this.ctx.fillRect(0, 0, view.w, view.h);
+        }
+    }
 
-                // Ensure chunk cache is built
-                if (chunk.modified) {
-                    chunk.updateVisibleBlocks(this.game.world);
+    // Render Blocks
+    // Chunk-based rendering + Frustum/Distance Culling. Returns the number of things drawn.
+    drawBlocks(view) {
+        const ctx = this.ctx;
+        const { w, h, px, py, pz, sinY, cosY, sinP, cosP, scale, renderDist } = view;
+        const blocksToDraw = [];
+
+        let screenOffset = 0;
+        const ChunkClass = window.Chunk;
+        const sections = this.getVisibleSections(view);
+
+        for (let v = 0; v < sections.length; v += 2) {
+            const chunk = sections[v];
+            const cx = chunk.cx, cz = chunk.cz;
+            const mesh = chunk.sectionMeshes[sections[v + 1]];
+
+            // Greedy face quads (full cubes)
+            const quads = mesh.quads;
+            for (let i = 0; i < mesh.quadCount; i++) {
+                const o = i * ChunkClass.QUAD_STRIDE;
+                const face = quads[o + 3];
+                const fx = cx * 16 + quads[o];
+                const fy = quads[o + 1];
+                const fz = cz * 16 + quads[o + 2];
+
+                // Back-face culling: the camera has to be in front of the face plane
+                if (face === 0 ? px <= fx : face === 1 ? px >= fx :
+                    face === 2 ? py <= fy : face === 3 ? py >= fy :
+                    face === 4 ? pz <= fz : pz >= fz) continue;
+
+                const F = ChunkClass.FACES[face];
+                const du = quads[o + 4];
+                const dv = quads[o + 5];
+                const ux = F.u === 0 ? du : 0, uy = F.u === 1 ? du : 0, uz = F.u === 2 ? du : 0;
+                const vx = F.v === 0 ? dv : 0, vy = F.v === 1 ? dv : 0, vz = F.v === 2 ? dv : 0;
+
+                const dx = fx + (ux + vx) / 2 - px;
+                const dy = fy + (uy + vy) / 2 - py;
+                const dz = fz + (uz + vz) / 2 - pz;
+                if (Math.abs(dx) > renderDist || Math.abs(dz) > renderDist) continue;
+                const dist = Math.sqrt(dx*dx + dy*dy + dz*dz);
+                if (dist > renderDist) continue;
+
+                // Camera-space corners: (0,0) (u) (u+v) (v)
+                const cam = this.quadCam;
+                let behind = 0;
+                for (let c = 0; c < 4; c++) {
+                    const cu = (c === 1 || c === 2) ? 1 : 0;
+                    const cv = (c >= 2) ? 1 : 0;
+                    const ddx = fx + ux * cu + vx * cv - px;
+                    const ddy = fy + uy * cu + vy * cv - py;
+                    const ddz = fz + uz * cu + vz * cv - pz;
+                    const rx = ddx * cosY - ddz * sinY;
+                    const rz = ddx * sinY + ddz * cosY;
+                    cam[c * 3] = rx;
+                    cam[c * 3 + 1] = ddy * cosP - rz * sinP;
+                    cam[c * 3 + 2] = ddy * sinP + rz * cosP;
+                    if (cam[c * 3 + 2] <= 0.1) behind++;
                 }
+                if (behind === 4) continue;
 
-                // Iterate cached visible blocks
-                for (let i = 0; i < chunk.visibleBlocks.length; i++) {
-                    const b = chunk.visibleBlocks[i];
-
-                    const wx = cx * 16 + b.x;
-                    const wy = b.y;
-                    const wz = cz * 16 + b.z;
-
-                    const dx = wx - px;
-                    const dy = wy - py;
-                    const dz = wz - pz;
-
-                    // Simple distance check before sqrt
-                    if (Math.abs(dx) > renderDist || Math.abs(dz) > renderDist) continue;
-
-                    const dist = Math.sqrt(dx*dx + dy*dy + dz*dz);
-                    if (dist > renderDist) continue;
-
-                    // Rotation
-                    const rx = dx * cosY - dz * sinY;
-                    const rz = dx * sinY + dz * cosY;
-                    const ry = dy * cosP - rz * sinP;
-                    const rz2 = dy * sinP + rz * cosP; // Depth
-
-                    if (rz2 > 0.1) {
-                        const blockDef = window.BLOCKS[b.type];
-                        if (blockDef && blockDef.isStair) {
-                            // Stairs: Push 2 parts
-                            // 1. Bottom Half (Center at y - 0.25)
-                            const dy1 = dy - 0.25;
-                            const rx1 = dx * cosY - dz * sinY;
-                            const rz1 = dx * sinY + dz * cosY;
-                            const ry1 = dy1 * cosP - rz1 * sinP;
-                            const rz1_depth = dy1 * sinP + rz1 * cosP;
-
-                            blocksToDraw.push({
-                                type: b.type,
-                                rx: rx1, ry: ry1, rz: rz1_depth,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: chunk.getMetadata(b.x, b.y, b.z),
-                                isStairPart: 'bottom'
-                            });
-
-                            // 2. Top Half (Center at y + 0.25, shifted X/Z)
-                            const meta = chunk.getMetadata(b.x, b.y, b.z);
-                            let offX = 0, offZ = 0;
-                            // 0=East (+X), 1=West (-X), 2=South (+Z), 3=North (-Z)
-                            if (meta === 0) offX = 0.25;
-                            else if (meta === 1) offX = -0.25;
-                            else if (meta === 2) offZ = 0.25;
-                            else if (meta === 3) offZ = -0.25;
-
-                            const dx2 = dx + offX;
-                            const dy2 = dy + 0.25;
-                            const dz2 = dz + offZ;
-
-                            const rx2 = dx2 * cosY - dz2 * sinY;
-                            const rz2_top = dx2 * sinY + dz2 * cosY;
-                            const ry2 = dy2 * cosP - rz2_top * sinP;
-                            const rz2_top_depth = dy2 * sinP + rz2_top * cosP;
-
-                             blocksToDraw.push({
-                                type: b.type,
-                                rx: rx2, ry: ry2, rz: rz2_top_depth,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: meta,
-                                isStairPart: 'top'
-                            });
-                        } else if (blockDef.isFence || blockDef.isPane) {
-                             blocksToDraw.push({
-                                type: b.type,
-                                rx, ry, rz: rz2,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: chunk.getMetadata(b.x, b.y, b.z),
-                                isFencePost: true
-                             });
-                        } else if (blockDef.isTrapdoor) {
-                             blocksToDraw.push({
-                                type: b.type,
-                                rx, ry, rz: rz2,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: chunk.getMetadata(b.x, b.y, b.z),
-                                isTrapdoor: true
-                             });
-                        } else if (blockDef.isGate) {
-                             blocksToDraw.push({
-                                type: b.type,
-                                rx, ry, rz: rz2,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: chunk.getMetadata(b.x, b.y, b.z),
-                                isGate: true
-                             });
-                        } else {
-                            blocksToDraw.push({
-                                type: b.type,
-                                rx, ry: ry, rz: rz2,
-                                dist,
-                                light: chunk.getLight(b.x, b.y, b.z),
-                                metadata: chunk.getMetadata(b.x, b.y, b.z),
-                                cx: cx, cz: cz, bx: b.x, by: b.y, bz: b.z
-                            });
-                        }
+                if (screenOffset + 10 > this.quadScreen.length) {
+                    const grown = new Float32Array(this.quadScreen.length * 2);
+                    grown.set(this.quadScreen);
+                    this.quadScreen = grown;
+                }
+                const n = this.projectQuad(cam, behind > 0, screenOffset, scale, w, h);
+                if (n < 3) continue;
+
+                // Lit by the cell in front of the quad's middle block. Read every frame, as
+                // light changes don't rebuild meshes; the mesh only merges equally lit faces.
+                const light = this.cellLight(chunk,
+                    quads[o] + (ux >> 1) + (vx >> 1) - (face === 1 ? 1 : 0),
+                    fy + (uy >> 1) + (vy >> 1) - (face === 3 ? 1 : 0),
+                    quads[o + 2] + (uz >> 1) + (vz >> 1) - (face === 5 ? 1 : 0));
+
+                blocksToDraw.push({ quad: true, type: quads[o + 6], face, du, dv, light, dist, offset: screenOffset, n, clipped: behind > 0 });
+                screenOffset += n * 2;
+            }
+
+            // Special-shaped blocks (billboards)
+            const specials = mesh.specials;
+            for (let i = 0; i < mesh.specialCount; i++) {
+                const idx = specials[i];
+                const b = { x: idx & 15, y: idx >> 8, z: (idx >> 4) & 15, type: chunk.getBlockAtIndex(idx) };
+
+                const wx = cx * 16 + b.x;
+                const wy = b.y;
+                const wz = cz * 16 + b.z;
+
+                const dx = wx - px;
+                const dy = wy - py;
+                const dz = wz - pz;
+
+                // Simple distance check before sqrt
+                if (Math.abs(dx) > renderDist || Math.abs(dz) > renderDist) continue;
+
+                const dist = Math.sqrt(dx*dx + dy*dy + dz*dz);
+                if (dist > renderDist) continue;
+
+                // Rotation
+                const rx = dx * cosY - dz * sinY;
+                const rz = dx * sinY + dz * cosY;
+                const ry = dy * cosP - rz * sinP;
+                const rz2 = dy * sinP + rz * cosP; // Depth
+
+                if (rz2 > 0.1) {
+                    const blockDef = window.BLOCKS[b.type];
+                    const light = Math.max(chunk.getLight(b.x, b.y, b.z), chunk.getSkyLight(b.x, b.y, b.z));
+                    // Side of the block turned towards the camera, for the face shade
+                    const face = Math.abs(dx) > Math.abs(dz) ? (dx > 0 ? 1 : 0) : (dz > 0 ? 5 : 4);
+                    if (blockDef && blockDef.isStair) {
+                        // Stairs: Push 2 parts
+                        // 1. Bottom Half (Center at y - 0.25)
+                        const dy1 = dy - 0.25;
+                        const rx1 = dx * cosY - dz * sinY;
+                        const rz1 = dx * sinY + dz * cosY;
+                        const ry1 = dy1 * cosP - rz1 * sinP;
+                        const rz1_depth = dy1 * sinP + rz1 * cosP;
+
+                        blocksToDraw.push({
+                            type: b.type,
+                            rx: rx1, ry: ry1, rz: rz1_depth,
+                            dist,
+                            light, face,
+                            metadata: chunk.getMetadata(b.x, b.y, b.z),
+                            isStairPart: 'bottom'
+                        });
+
+                        // 2. Top Half (Center at y + 0.25, shifted X/Z)
+                        const meta = chunk.getMetadata(b.x, b.y, b.z);
+                        let offX = 0, offZ = 0;
+                        // 0=East (+X), 1=West (-X), 2=South (+Z), 3=North (-Z)
+                        if (meta === 0) offX = 0.25;
+                        else if (meta === 1) offX = -0.25;
+                        else if (meta === 2) offZ = 0.25;
+                        else if (meta === 3) offZ = -0.25;
+
+                        const dx2 = dx + offX;
+                        const dy2 = dy + 0.25;
+                        const dz2 = dz + offZ;
+
+                        const rx2 = dx2 * cosY - dz2 * sinY;
+                        const rz2_top = dx2 * sinY + dz2 * cosY;
+                        const ry2 = dy2 * cosP - rz2_top * sinP;
+                        const rz2_top_depth = dy2 * sinP + rz2_top * cosP;
+
+                         blocksToDraw.push({
+                            type: b.type,
+                            rx: rx2, ry: ry2, rz: rz2_top_depth,
+                            dist,
+                            light, face,
+                            metadata: meta,
+                            isStairPart: 'top'
+                        });
+                    } else if (blockDef.isFence || blockDef.isPane) {
+                         blocksToDraw.push({
+                            type: b.type,
+                            rx, ry, rz: rz2,
+                            dist,
+                            light, face,
+                            metadata: chunk.getMetadata(b.x, b.y, b.z),
+                            isFencePost: true
+                         });
+                    } else if (blockDef.isTrapdoor) {
+                         blocksToDraw.push({
+                            type: b.type,
+                            rx, ry, rz: rz2,
+                            dist,
+                            light, face,
+                            metadata: chunk.getMetadata(b.x, b.y, b.z),
+                            isTrapdoor: true
+                         });
+                    } else if (blockDef.isGate) {
+                         blocksToDraw.push({
+                            type: b.type,
+                            rx, ry, rz: rz2,
+                            dist,
+                            light, face,
+                            metadata: chunk.getMetadata(b.x, b.y, b.z),
+                            isGate: true
+                         });
+                    } else {
+                        blocksToDraw.push({
+                            type: b.type,
+                            rx, ry: ry, rz: rz2,
+                            dist,
+                            light, face,
+                            metadata: chunk.getMetadata(b.x, b.y, b.z),
+                            cx: cx, cz: cz, bx: b.x, by: b.y, bz: b.z
+                        });
                     }
                 }
             }
@@ -272,7 +516,27 @@ class Renderer {
         blocksToDraw.sort((a, b) => b.dist - a.dist);
 
         // Draw
+        const quadScreen = this.quadScreen;
         blocksToDraw.forEach(b => {
+             if (b.quad) {
+                 // Merged cube face: one filled polygon, textured when the atlas is ready.
+                 // Quads cut by the near plane have no corners to map the texture onto.
+                 const pattern = b.clipped ? null : this.getQuadPattern(b.type, b.face, b.light);
+                 if (pattern) {
+                     this.mapQuadPattern(pattern, b);
+                     ctx.fillStyle = pattern;
+                 } else {
+                     ctx.fillStyle = this.getFaceColor(b.type, b.face, b.light);
+                 }
+                 ctx.beginPath();
+                 ctx.moveTo(quadScreen[b.offset], quadScreen[b.offset + 1]);
+                 for (let k = 1; k < b.n; k++) {
+                     ctx.lineTo(quadScreen[b.offset + k * 2], quadScreen[b.offset + k * 2 + 1]);
+                 }
+                 ctx.fill();
+                 return;
+             }
+
              const size = scale / b.rz;
              const sx = (b.rx / b.rz) * scale + w / 2;
              const sy = h / 2 - (b.ry / b.rz) * scale;
@@ -292,7 +556,7 @@ class Renderer {
 
                  if (b.type === window.BLOCK.WATER) {
                      const time = Date.now() / 500;
-                     const shift = Math.sin(time + b.x * 0.2 + b.z * 0.2) * 20;
+                     const shift = Math.sin(time + b.bx * 0.2 + b.bz * 0.2) * 20;
                      // Base #4169E1 -> 65, 105, 225
                      ctx.fillStyle = `rgb(${65 + shift/2}, ${105 + shift/2}, ${225 + shift})`;
 
@@ -449,11 +713,11 @@ class Renderer {
                          // Actually Chunk.getBlock checks bounds and returns AIR.
                          // To see across chunks we need world.getBlock but we only have 'chunk' easily here.
                          // We can compute world coords.
-                         const wx = cx * 16 + b.x;
-                         const wz = cz * 16 + b.z;
+                         const wx = b.cx * 16 + b.bx;
+                         const wz = b.cz * 16 + b.bz;
 
                          const checkConnect = (dx, dz) => {
-                             const nb = this.game.world.getBlock(wx + dx, b.y, wz + dz);
+                             const nb = this.game.world.getBlock(wx + dx, b.by, wz + dz);
                              const nd = window.BLOCKS[nb];
                              // Connect to Wire, Torch, or Power Source
                              // Simplified: Connect to anything that is Wire or Torch or Lamp
@@ -531,15 +795,12 @@ class Renderer {
                          return;
                      }
                  }
-                 // We could adjust brightness by b.light (0-15)
-                 // let lightMult = b.light / 15;
-                 // ctx.fillStyle = this.adjustColor(blockDef.color, lightMult);
-
                  const drawX = Math.floor(sx - size/2);
                  const drawY = Math.floor(drawSy - drawHeight/2);
                  const drawW = Math.ceil(size);
                  const drawH = Math.ceil(drawHeight);
-                 const tex = this.textureManager ? this.textureManager.getBlockTexture(b.type) : null;
+                 // Pre-shaded for the block's light and facing, cached by the texture manager
+                 const tex = this.textureManager ? this.textureManager.getShadedSprite(b.type, b.face, b.light) : null;
                  if (tex) {
                      ctx.drawImage(tex, drawX, drawY, drawW, drawH);
                  } else {
@@ -548,6 +809,13 @@ class Renderer {
                  ctx.globalAlpha = 1.0;
              }
         });
+        return blocksToDraw.length;
+    }
+
+    // Mobs, vehicles, drops, particles and other players, drawn over the terrain
+    drawEntities(view) {
+        const ctx = this.ctx;
+        const { w, h, px, py, pz, sinY, cosY, sinP, cosP, scale } = view;
 
         // Draw Mobs (simple billboards)
         this.game.mobs.forEach(mob => {
@@ -639,26 +907,8 @@ class Renderer {
         });
 
         // Draw Particles
-        if (this.game.particles && this.game.particles.particles) {
-            this.game.particles.particles.forEach(p => {
-                 const dx = p.x - px;
-                 const dy = p.y - py;
-                 const dz = p.z - pz;
-
-                 const rx = dx * cosY - dz * sinY;
-                 const rz = dx * sinY + dz * cosY;
-                 const ry = dy * cosP - rz * sinP;
-                 const rz2 = dy * sinP + rz * cosP;
-
-                 if (rz2 > 0.1) {
-                     const size = (scale / rz2) * p.size;
-                     const sx = (rx / rz2) * scale + w / 2;
-                     const sy = h / 2 - (ry / rz2) * scale;
-
-                     ctx.fillStyle = p.color || 'white';
-                     ctx.fillRect(sx - size/2, sy - size/2, size, size);
-                 }
-            });
+        if (this.game.particles && this.game.particles.count > 0) {
+            this.drawParticles(this.game.particles, px, py, pz, sinY, cosY, sinP, cosP, scale, w, h);
         }
 
         // Draw TNT
@@ -767,26 +1017,37 @@ class Renderer {
                  }
             });
         }
+    }
+
+    // Weather and HUD, drawn last
+    drawOverlay(view, drawn) {
+        const ctx = this.ctx;
+        const { w, h, px, py, pz } = view;
 
         // Draw Weather
         if (this.game.world.weather !== 'clear') {
             const isRain = this.game.world.weather === 'rain';
-            ctx.strokeStyle = isRain ? 'rgba(100, 100, 255, 0.6)' : 'rgba(255, 255, 255, 0.8)';
-            ctx.lineWidth = isRain ? 1 : 2;
-            ctx.beginPath();
-
-            // Simple screen-space particles (random every frame = static noise effect, better to animate)
-            // For simplicity, just random lines.
-            const count = 100;
-            for (let i = 0; i < count; i++) {
-                const x = Math.random() * w;
-                const y = Math.random() * h;
-                const len = isRain ? 20 : 5;
-
-                ctx.moveTo(x, y);
-                ctx.lineTo(x - (isRain ? 2 : 1), y + len);
+            // No rain or snow falling under a roof (heightmap lookup for the camera's column)
+            const world = this.game.world;
+            const covered = world.getHighestBlockY && world.getHighestBlockY(Math.floor(px), Math.floor(pz)) > py;
+            if (!covered) {
+                ctx.strokeStyle = isRain ? 'rgba(100, 100, 255, 0.6)' : 'rgba(255, 255, 255, 0.8)';
+                ctx.lineWidth = isRain ? 1 : 2;
+                ctx.beginPath();
+
+                // Simple screen-space particles (random every frame = static noise effect, better to animate)
+                // For simplicity, just random lines.
+                const count = 100;
+                for (let i = 0; i < count; i++) {
+                    const x = Math.random() * w;
+                    const y = Math.random() * h;
+                    const len = isRain ? 20 : 5;
+
+                    ctx.moveTo(x, y);
+                    ctx.lineTo(x - (isRain ? 2 : 1), y + len);
+                }
+                ctx.stroke();
             }
-            ctx.stroke();
 
             // Darken sky
             ctx.fillStyle = 'rgba(0, 0, 0, 0.2)';
@@ -798,7 +1059,7 @@ class Renderer {
 
         if (this.posEl) this.posEl.textContent = `${Math.floor(px)}, ${Math.floor(py)}, ${Math.floor(pz)}`;
 
-        if (this.blockEl) this.blockEl.textContent = blocksToDraw.length;
+        if (this.blockEl) this.blockEl.textContent = drawn;
 
         if (this.timeEl) {
             const cycle = (this.game.gameTime % this.game.dayLength) / this.game.dayLength;
@@ -829,6 +1090,196 @@ class Renderer {
         ctx.fillRect(cx - 1, cy - 10, 2, 20);
     }
 
+    // Draws all live particles (ParticleSystem columns) as screen-space squares. Visible
+    // particles are bucketed by palette colour with a counting sort, and each colour is
+    // filled as one path, so the canvas state only changes once per colour.
+    drawParticles(ps, px, py, pz, sinY, cosY, sinP, cosP, scale, w, h) {
+        const ctx = this.ctx;
+        const n = ps.count;
+        const colors = ps.palette.length;
+        if (!this.particleScreen || this.particleScreen.length < n * 3) {
+            this.particleScreen = new Float32Array(ps.capacity * 3);
+            this.particleOrder = new Uint32Array(ps.capacity);
+        }
+        if (!this.particleBuckets || this.particleBuckets.length < colors + 1) {
+            this.particleBuckets = new Uint32Array(colors + 16);
+        }
+        const screen = this.particleScreen;
+        const order = this.particleOrder;
+        const buckets = this.particleBuckets;
+        buckets.fill(0, 0, colors + 1);
+
+        // Project, dropping particles behind the camera or off screen
+        let visible = 0;
+        for (let i = 0; i < n; i++) {
+            const dx = ps.x[i] - px;
+            const dy = ps.y[i] - py;
+            const dz = ps.z[i] - pz;
+
+            const rx = dx * cosY - dz * sinY;
+            const rz = dx * sinY + dz * cosY;
+            const ry = dy * cosP - rz * sinP;
+            const rz2 = dy * sinP + rz * cosP;
+            screen[i * 3 + 2] = 0;
+            if (rz2 <= 0.1) continue;
+
+            const size = (scale / rz2) * ps.size[i];
+            const sx = (rx / rz2) * scale + w / 2;
+            const sy = h / 2 - (ry / rz2) * scale;
+            if (sx + size < 0 || sx - size > w || sy + size < 0 || sy - size > h) continue;
+
+            screen[i * 3] = sx - size / 2;
+            screen[i * 3 + 1] = sy - size / 2;
+            screen[i * 3 + 2] = size;
+            buckets[ps.color[i] + 1]++;
+            visible++;
+        }
+        if (visible === 0) return;
+
+        // Counting sort by colour
+        for (let c = 1; c <= colors; c++) buckets[c] += buckets[c - 1];
+        for (let i = 0; i < n; i++) {
+            if (screen[i * 3 + 2] > 0) order[buckets[ps.color[i]]++] = i;
+        }
+
+        // buckets[c] is now the end of colour c
+        let start = 0;
+        for (let c = 0; c < colors; c++) {
+            const end = buckets[c];
+            if (end === start) continue;
+            ctx.fillStyle = ps.palette[c] || 'white';
+            ctx.beginPath();
+            for (let k = start; k < end; k++) {
+                const o = order[k] * 3;
+                ctx.rect(screen[o], screen[o + 1], screen[o + 2], screen[o + 2]);
+            }
+            ctx.fill();
+            start = end;
+        }
+    }
+
+    // Clips a camera-space quad (4 corners in this.quadCam) against the near plane and
+    // writes the projected polygon into this.quadScreen at offset. Returns the vertex count.
+    projectQuad(cam, clip, offset, scale, w, h) {
+        const out = this.quadScreen;
+        const near = 0.1;
+        let n = 0;
+        let minX = Infinity, maxX = -Infinity, minY = Infinity, maxY = -Infinity;
+
+        const emit = (x, y, z) => {
+            const sx = (x / z) * scale + w / 2;
+            const sy = h / 2 - (y / z) * scale;
+            out[offset + n * 2] = sx;
+            out[offset + n * 2 + 1] = sy;
+            n++;
+            if (sx < minX) minX = sx;
+            if (sx > maxX) maxX = sx;
+            if (sy < minY) minY = sy;
+            if (sy > maxY) maxY = sy;
+        };
+
+        for (let c = 0; c < 4; c++) {
+            const ax = cam[c * 3], ay = cam[c * 3 + 1], az = cam[c * 3 + 2];
+            if (!clip) {
+                emit(ax, ay, az);
+                continue;
+            }
+            // Sutherland-Hodgman against z = near (one plane, so at most 5 vertices)
+            const nc = (c + 1) & 3;
+            const bx = cam[nc * 3], by = cam[nc * 3 + 1], bz = cam[nc * 3 + 2];
+            const aIn = az > near, bIn = bz > near;
+            if (aIn) emit(ax, ay, az);
+            if (aIn !== bIn) {
+                const t = (near - az) / (bz - az);
+                emit(ax + (bx - ax) * t, ay + (by - ay) * t, near);
+            }
+        }
+
+        if (n < 3 || maxX < 0 || minX > w || maxY < 0 || minY > h) return 0;
+
+        // Push vertices half a pixel out from the centroid to hide seams between neighbouring quads
+        let mx = 0, my = 0;
+        for (let k = 0; k < n; k++) { mx += out[offset + k * 2]; my += out[offset + k * 2 + 1]; }
+        mx /= n; my /= n;
+        for (let k = 0; k < n; k++) {
+            const ex = out[offset + k * 2] - mx;
+            const ey = out[offset + k * 2 + 1] - my;
+            const len = Math.sqrt(ex * ex + ey * ey);
+            if (len > 0) {
+                out[offset + k * 2] += (ex / len) * 0.5;
+                out[offset + k * 2 + 1] += (ey / len) * 0.5;
+            }
+        }
+        return n;
+    }
+
+    // Light level (0-15, brighter of block and sky) of a cell given in chunk-local
+    // coordinates, which may lie just across the chunk border
+    cellLight(chunk, x, y, z) {
+        if (y < 0 || y >= chunk.maxHeight) return 15;
+        if (x >= 0 && x < 16 && z >= 0 && z < 16) {
+            const light = chunk.getLightByte(x, y, z);
+            return Math.max(light & 15, light >> 4);
+        }
+        const world = this.game.world;
+        if (!world.getLight) return 15;
+        const wx = chunk.cx * 16 + x, wz = chunk.cz * 16 + z;
+        return Math.max(world.getLight(wx, y, wz), world.getSkyLight(wx, y, wz));
+    }
+
+    // Repeating fill of a block's pre-shaded sprite, cached per block type, face and light.
+    // Null until the atlas is ready (or where patterns can't be transformed).
+    getQuadPattern(type, face, light) {
+        const tm = this.textureManager;
+        if (!tm || !this.ctx.createPattern) return null;
+        const sprite = tm.getShadedSprite(type, face, light);
+        if (!sprite) return null;
+        const key = (type * 6 + face) * 16 + light;
+        let entry = this.quadPatterns.get(key);
+        if (!entry || entry.sprite !== sprite) {
+            // New sprite after the atlas was rebuilt: the old pattern is stale
+            const pattern = this.ctx.createPattern(sprite, 'repeat');
+            entry = { sprite, pattern: pattern && pattern.setTransform ? pattern : null };
+            this.quadPatterns.set(key, entry);
+        }
+        return entry.pattern;
+    }
+
+    // Stretches one texture repeat over each block of a projected quad (corners (0,0) (u)
+    // (u+v) (v) in this.quadScreen). Affine from three corners, like the billboards, so
+    // the fourth corner is only approximate; MESH_MAX_MERGE keeps quads small enough.
+    mapQuadPattern(pattern, b) {
+        const p = this.quadScreen;
+        const o = b.offset;
+        // Textures run downwards, so side faces (v is up) start from the top corner
+        const up = window.Chunk.FACES[b.face].v === 1;
+        const ox = p[o + (up ? 6 : 0)], oy = p[o + (up ? 7 : 1)];
+        const ux = p[o + (up ? 4 : 2)], uy = p[o + (up ? 5 : 3)];
+        const vx = p[o + (up ? 0 : 6)], vy = p[o + (up ? 1 : 7)];
+        const size = this.textureManager.size;
+        const m = this.patternMatrix;
+        m.a = (ux - ox) / (size * b.du);
+        m.b = (uy - oy) / (size * b.du);
+        m.c = (vx - ox) / (size * b.dv);
+        m.d = (vy - oy) / (size * b.dv);
+        m.e = ox;
+        m.f = oy;
+        pattern.setTransform(m);
+    }
+
+    // Face-shaded, lit fill colour for a mesh quad, cached per block type, face and light
+    getFaceColor(type, face, light) {
+        const key = (type * 6 + face) * 16 + light;
+        let color = this.faceColors[key];
+        if (color === undefined) {
+            const def = window.BLOCKS[type];
+            const base = def ? ((face === 2 && def.top) ? def.top : def.color) : '#FF00FF';
+            color = this.adjustColor(base, Renderer.FACE_SHADE[face] * Renderer.LIGHT_CURVE[light]);
+            this.faceColors[key] = color;
+        }
+        return color;
+    }
+
     adjustColor(color, brightness) {
         if (typeof color === 'string' && color[0] === '#') {
             let hex = color.slice(1);
@@ -847,4 +1298,12 @@ class Renderer {
     }
 }
 
+// Directional shading per mesh face: +X, -X, +Y (top), -Y (bottom), +Z, -Z
+Renderer.FACE_SHADE = [0.8, 0.8, 1.0, 0.5, 0.65, 0.65];
+// Brightness per light level, as TextureManager.LIGHT_CURVE (never fully black)
+Renderer.LIGHT_CURVE = Array.from({ length: 16 }, (_, l) => 0.2 + 0.8 * Math.pow(l / 15, 1.5));
+
+// Slack (in blocks) for the section frustum test
+Renderer.CULL_MARGIN = 1;
+
 window.Renderer = Renderer;
@@ -0,0 +1,49 @@
+// World save worker.
+// Encodes chunks into ChunkCodec records and writes them to IndexedDB (RegionDB),
+// and reads/decodes them back for on-demand loading, all off the main thread.
+// Driven by WorldStore (js/storage.js).
+
+self.window = self;
+importScripts('storage.js');
+
+const db = new RegionDB();
+
+const handlers = {
+    open(msg) {
+        return Promise.all([db.getMeta(msg.slot), db.listChunks(msg.slot)])
+            .then(([meta, chunks]) => ({ result: { meta, chunks } }));
+    },
+
+    save(msg) {
+        const records = msg.chunks.map(c => ({
+            dimension: c.dimension,
+            cx: c.cx,
+            cz: c.cz,
+            data: ChunkCodec.encode(c)
+        }));
+        return db.saveChunks(msg.slot, records, msg.meta, msg.reset, msg.copyFrom)
+            .then(() => ({ result: records.length }));
+    },
+
+    load(msg) {
+        return db.getChunk(msg.slot, msg.dimension, msg.cx, msg.cz).then(data => {
+            if (!data) return { result: null };
+            const record = ChunkCodec.decode(data);
+            record.dimension = msg.dimension;
+            const transfer = [record.blocks.buffer, record.metadata.buffer];
+            if (record.light) transfer.push(record.light.buffer);
+            return { result: record, transfer };
+        });
+    }
+};
+
+self.onmessage = (e) => {
+    const msg = e.data;
+    const handler = handlers[msg.type];
+    if (!handler) return;
+
+    handler(msg).then(
+        ({ result, transfer }) => self.postMessage({ id: msg.id, result }, transfer || []),
+        (err) => self.postMessage({ id: msg.id, error: String(err && err.message || err) })
+    );
+};
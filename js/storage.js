@@ -0,0 +1,274 @@
+// World persistence on IndexedDB.
+// Chunks are stored one record per chunk, keyed [slot, dimension, regionX, regionZ, index]
+// so a region (32x32 chunks) is one contiguous key range, like a region file. Each record
+// is a small versioned binary blob (ChunkCodec). Only chunks changed since the last save
+// are written. Encoding, decoding and all IndexedDB traffic run in js/saveworker.js;
+// WorldStore is the main-thread side that talks to it.
+
+// Binary chunk record, little endian:
+//   u32 magic 'VXC1' | u16 version | u16 flags | i32 cx | i32 cz
+//   u32 blocks length | u32 metadata length | u32 light length | u32 entities length
+//   blocks, metadata and light run-length encoded as (count, value) byte pairs,
+//   then the chunk's block entities as UTF-8 JSON: [[x, y, z, data], ...]
+class ChunkCodec {
+    static encode(record) {
+        const blocks = ChunkCodec.rleEncode(record.blocks);
+        const metadata = ChunkCodec.rleEncode(record.metadata);
+        const light = record.light ? ChunkCodec.rleEncode(record.light) : new Uint8Array(0);
+        const entities = record.entities && record.entities.length > 0
+            ? new TextEncoder().encode(JSON.stringify(record.entities))
+            : new Uint8Array(0);
+
+        const header = ChunkCodec.HEADER_SIZE;
+        const buffer = new ArrayBuffer(header + blocks.length + metadata.length + light.length + entities.length);
+        const view = new DataView(buffer);
+        view.setUint32(0, ChunkCodec.MAGIC, true);
+        view.setUint16(4, ChunkCodec.VERSION, true);
+        view.setUint16(6, 0, true);
+        view.setInt32(8, record.cx, true);
+        view.setInt32(12, record.cz, true);
+        view.setUint32(16, blocks.length, true);
+        view.setUint32(20, metadata.length, true);
+        view.setUint32(24, light.length, true);
+        view.setUint32(28, entities.length, true);
+
+        const bytes = new Uint8Array(buffer);
+        let o = header;
+        bytes.set(blocks, o); o += blocks.length;
+        bytes.set(metadata, o); o += metadata.length;
+        bytes.set(light, o); o += light.length;
+        bytes.set(entities, o);
+        return buffer;
+    }
+
+    // Returns { cx, cz, blocks, metadata, light (null if not saved), entities }
+    static decode(buffer) {
+        const view = new DataView(buffer);
+        if (view.getUint32(0, true) !== ChunkCodec.MAGIC) throw new Error("Not a chunk record");
+        const version = view.getUint16(4, true);
+        if (version > ChunkCodec.VERSION) throw new Error("Chunk record version " + version + " is newer than this game");
+
+        const bytes = new Uint8Array(buffer);
+        const volume = ChunkCodec.VOLUME;
+        const lengths = [view.getUint32(16, true), view.getUint32(20, true), view.getUint32(24, true), view.getUint32(28, true)];
+        let o = ChunkCodec.HEADER_SIZE;
+        const section = (n) => {
+            const s = bytes.subarray(o, o + n);
+            o += n;
+            return s;
+        };
+
+        const record = {
+            cx: view.getInt32(8, true),
+            cz: view.getInt32(12, true),
+            blocks: ChunkCodec.rleDecode(section(lengths[0]), new Uint8Array(volume)),
+            metadata: ChunkCodec.rleDecode(section(lengths[1]), new Uint8Array(volume)),
+            light: null,
+            entities: []
+        };
+        const light = section(lengths[2]);
+        if (light.length > 0) record.light = ChunkCodec.rleDecode(light, new Uint8Array(volume));
+        const entities = section(lengths[3]);
+        if (entities.length > 0) record.entities = JSON.parse(new TextDecoder().decode(entities));
+        return record;
+    }
+
+    static rleEncode(data) {
+        const out = new Uint8Array(data.length * 2);
+        let n = 0;
+        let i = 0;
+        while (i < data.length) {
+            const val = data[i];
+            let count = 1;
+            while (i + count < data.length && data[i + count] === val && count < 255) count++;
+            out[n++] = count;
+            out[n++] = val;
+            i += count;
+        }
+        return out.slice(0, n);
+    }
+
+    static rleDecode(packed, target) {
+        let t = 0;
+        for (let i = 0; i + 1 < packed.length && t < target.length; i += 2) {
+            const end = Math.min(target.length, t + packed[i]);
+            target.fill(packed[i + 1], t, end);
+            t = end;
+        }
+        return target;
+    }
+}
+
+ChunkCodec.MAGIC = 0x31435856; // 'VXC1'
+ChunkCodec.VERSION = 1;
+ChunkCodec.HEADER_SIZE = 32;
+ChunkCodec.VOLUME = 16 * 16 * 128;
+
+// Promise wrapper around the IndexedDB database (used inside the save worker)
+class RegionDB {
+    constructor(name = 'voxel-worlds') {
+        this.name = name;
+        this.db = null;
+    }
+
+    open() {
+        if (this.db) return Promise.resolve(this.db);
+        return new Promise((resolve, reject) => {
+            const req = indexedDB.open(this.name, RegionDB.VERSION);
+            req.onupgradeneeded = () => {
+                const db = req.result;
+                if (!db.objectStoreNames.contains('chunks')) db.createObjectStore('chunks');
+                if (!db.objectStoreNames.contains('meta')) db.createObjectStore('meta');
+            };
+            req.onsuccess = () => {
+                this.db = req.result;
+                resolve(this.db);
+            };
+            req.onerror = () => reject(req.error);
+        });
+    }
+
+    static chunkKey(slot, dimension, cx, cz) {
+        return [slot, dimension, cx >> 5, cz >> 5, (cx & 31) + (cz & 31) * 32];
+    }
+
+    // Every chunk key of a slot (any dimension)
+    static slotRange(slot) {
+        return IDBKeyRange.bound([slot], [slot, []]);
+    }
+
+    // Runs fn(stores) in one transaction and resolves when it commits
+    transaction(names, mode, fn) {
+        return this.open().then(db => new Promise((resolve, reject) => {
+            const tx = db.transaction(names, mode);
+            const stores = names.map(n => tx.objectStore(n));
+            let result;
+            Promise.resolve(fn(...stores)).then(r => { result = r; }, reject);
+            tx.oncomplete = () => resolve(result);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        }));
+    }
+
+    static request(req) {
+        return new Promise((resolve, reject) => {
+            req.onsuccess = () => resolve(req.result);
+            req.onerror = () => reject(req.error);
+        });
+    }
+
+    getMeta(slot) {
+        return this.transaction(['meta'], 'readonly', meta => RegionDB.request(meta.get(slot)));
+    }
+
+    // [[dimension, cx, cz], ...] of the chunks saved in slot
+    listChunks(slot) {
+        return this.transaction(['chunks'], 'readonly', chunks =>
+            RegionDB.request(chunks.getAllKeys(RegionDB.slotRange(slot))).then(keys =>
+                keys.map(k => [k[1], k[2] * 32 + (k[4] & 31), k[3] * 32 + (k[4] >> 5)])
+            )
+        );
+    }
+
+    getChunk(slot, dimension, cx, cz) {
+        return this.transaction(['chunks'], 'readonly', chunks =>
+            RegionDB.request(chunks.get(RegionDB.chunkKey(slot, dimension, cx, cz)))
+        );
+    }
+
+    // Writes records ({ dimension, cx, cz, data }) and the slot's meta in one transaction.
+    // reset empties the slot first; copyFrom then carries over another slot's chunks.
+    saveChunks(slot, records, meta, reset, copyFrom) {
+        const copy = reset && copyFrom
+            ? this.transaction(['chunks'], 'readonly', chunks => Promise.all([
+                RegionDB.request(chunks.getAllKeys(RegionDB.slotRange(copyFrom))),
+                RegionDB.request(chunks.getAll(RegionDB.slotRange(copyFrom)))
+            ]))
+            : Promise.resolve(null);
+
+        return copy.then(copied => this.transaction(['chunks', 'meta'], 'readwrite', (chunks, metaStore) => {
+            if (reset) chunks.delete(RegionDB.slotRange(slot));
+            if (copied) {
+                const [keys, values] = copied;
+                for (let i = 0; i < keys.length; i++) chunks.put(values[i], [slot].concat(keys[i].slice(1)));
+            }
+            for (const r of records) chunks.put(r.data, RegionDB.chunkKey(slot, r.dimension, r.cx, r.cz));
+            if (meta) metaStore.put(meta, slot);
+        }));
+    }
+}
+
+RegionDB.VERSION = 1;
+
+// Main-thread client of js/saveworker.js. available is false when IndexedDB or
+// workers cannot be used (e.g. file:// pages); World then falls back to localStorage.
+class WorldStore {
+    constructor(options = {}) {
+        this.url = options.url || 'js/saveworker.js';
+        this.pending = new Map(); // Request id -> { resolve, reject }
+        this.nextId = 1;
+        this.worker = null;
+        this.available = false;
+
+        if (typeof Worker === 'undefined' || typeof indexedDB === 'undefined') return;
+        try {
+            this.worker = new Worker(this.url);
+            this.worker.onmessage = (e) => this.handleMessage(e.data);
+            this.worker.onerror = (e) => this.handleError(e);
+            this.available = true;
+        } catch (e) {
+            console.warn("World store unavailable, saving to localStorage", e);
+        }
+    }
+
+    call(type, payload = {}, transfer = []) {
+        if (!this.available) return Promise.reject(new Error("World store unavailable"));
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            this.worker.postMessage(Object.assign({ type, id }, payload), transfer);
+        });
+    }
+
+    handleMessage(msg) {
+        const req = this.pending.get(msg.id);
+        if (!req) return;
+        this.pending.delete(msg.id);
+        if (msg.error) req.reject(new Error(msg.error));
+        else req.resolve(msg.result);
+    }
+
+    handleError(e) {
+        console.warn("World store worker failed, saving to localStorage", e);
+        this.available = false;
+        if (this.worker) this.worker.terminate();
+        this.worker = null;
+        this.pending.forEach(req => req.reject(new Error("World store worker failed")));
+        this.pending.clear();
+    }
+
+    // Resolves to { meta, chunks: [[dimension, cx, cz], ...] }; meta is undefined for an empty slot
+    open(slot) {
+        return this.call('open', { slot });
+    }
+
+    // chunks: [{ dimension, cx, cz, blocks, metadata, light, entities }]. The arrays are
+    // transferred to the worker, so pass copies.
+    save(slot, chunks, meta, options = {}) {
+        const transfer = [];
+        chunks.forEach(c => {
+            transfer.push(c.blocks.buffer, c.metadata.buffer);
+            if (c.light) transfer.push(c.light.buffer);
+        });
+        return this.call('save', { slot, chunks, meta, reset: !!options.reset, copyFrom: options.copyFrom || null }, transfer);
+    }
+
+    // Resolves to a decoded chunk record or null
+    load(slot, dimension, cx, cz) {
+        return this.call('load', { slot, dimension, cx, cz });
+    }
+}
+
+window.ChunkCodec = ChunkCodec;
+window.RegionDB = RegionDB;
+window.WorldStore = WorldStore;
@@ -3,21 +3,22 @@ class StructureManager {
         this.world = world;
     }
 
-    generateTree(chunk, x, y, z, type = 'oak', sync = false) {
+    // random: the generator's per-chunk PRNG (World.chunkRandom), Math.random for saplings
+    generateTree(chunk, x, y, z, type = 'oak', sync = false, random = Math.random) {
         const wx = chunk.cx * 16 + x;
         const wz = chunk.cz * 16 + z;
 
         if (type === 'cactus') {
-             this.generateCactus(chunk, x, y, z, sync);
+             this.generateCactus(chunk, x, y, z, sync, random);
              return;
         }
 
         let trunk = BLOCK.WOOD;
         let leaves = BLOCK.LEAVES;
-        let height = 4 + Math.floor(Math.random() * 3);
+        let height = 4 + Math.floor(random() * 3);
 
         if (type === 'spruce') {
-            height = 6 + Math.floor(Math.random() * 4);
+            height = 6 + Math.floor(random() * 4);
             trunk = BLOCK.SPRUCE_WOOD;
             leaves = BLOCK.SPRUCE_LEAVES;
         }
@@ -26,7 +27,7 @@ class StructureManager {
             leaves = BLOCK.BIRCH_LEAVES;
         }
         if (type === 'jungle') {
-            this.generateJungleTree(chunk, x, y, z, sync);
+            this.generateJungleTree(chunk, x, y, z, sync, random);
             return;
         }
 
@@ -52,10 +53,10 @@ class StructureManager {
         }
     }
 
-    generateCactus(chunk, x, y, z, sync = false) {
+    generateCactus(chunk, x, y, z, sync = false, random = Math.random) {
         const wx = chunk.cx * 16 + x;
         const wz = chunk.cz * 16 + z;
-        const h = 2 + Math.floor(Math.random() * 2);
+        const h = 2 + Math.floor(random() * 2);
         for(let i=0; i<h; i++) {
             this.world.setBlock(wx, y+i, wz, BLOCK.CACTUS);
             if (sync && this.world.game && this.world.game.network) this.world.game.network.sendBlockUpdate(wx, y+i, wz, BLOCK.CACTUS);
@@ -77,10 +78,10 @@ class StructureManager {
         }
     }
 
-    generateJungleTree(chunk, x, y, z, sync = false) {
+    generateJungleTree(chunk, x, y, z, sync = false, random = Math.random) {
         const wx = chunk.cx * 16 + x;
         const wz = chunk.cz * 16 + z;
-        const height = 12 + Math.floor(Math.random() * 8);
+        const height = 12 + Math.floor(random() * 8);
 
         // 2x2 Trunk
         for(let i=0; i<height; i++) {
@@ -97,11 +98,11 @@ class StructureManager {
              }
 
              // Cocoa
-             if (i > 3 && i < height - 3 && Math.random() < 0.2) {
+             if (i > 3 && i < height - 3 && random() < 0.2) {
                  let cx = 0, cz = 0;
-                 if (Math.random() < 0.25) { cx=wx-1; cz=wz; }
-                 else if (Math.random() < 0.5) { cx=wx+2; cz=wz; }
-                 else if (Math.random() < 0.75) { cx=wx; cz=wz-1; }
+                 if (random() < 0.25) { cx=wx-1; cz=wz; }
+                 else if (random() < 0.5) { cx=wx+2; cz=wz; }
+                 else if (random() < 0.75) { cx=wx; cz=wz-1; }
                  else { cx=wx; cz=wz+2; }
 
                  this.world.setBlock(cx, y+i, cz, BLOCK.COCOA_BLOCK);
@@ -5,12 +5,45 @@ class TextureManager {
         this.textures = {};
         this.mobTextures = {};
         this.size = 16;
+
+        // Block and item textures packed into one canvas; atlasSlots maps type -> { x, y }
+        this.atlas = null;
+        this.atlasSlots = {};
+        this.atlasKeys = [];
+        this.shadedSprites = new Map(); // (type * 6 + face) * 16 + light -> canvas
     }
 
     init() {
         this.generateBlockTextures();
         this.generateItemTextures();
         this.generateMobTextures();
+        this.buildAtlas();
+    }
+
+    // Like init(), but takes the block and item atlas from IndexedDB when an earlier session
+    // stored one, and stores it otherwise. Resolves to true when the cached atlas was used.
+    // Until then getBlockTexture() returns null and the renderer draws plain colours.
+    load() {
+        if (typeof indexedDB === 'undefined') {
+            this.init();
+            return Promise.resolve(false);
+        }
+        this.generateMobTextures();
+        const generate = () => {
+            this.generateBlockTextures();
+            this.generateItemTextures();
+            this.buildAtlas();
+        };
+        return this.readCachedAtlas().then(record => {
+            if (record && this.restoreAtlas(record)) return true;
+            generate();
+            this.writeCachedAtlas().catch(e => console.warn('Could not cache textures:', e));
+            return false;
+        }).catch(e => {
+            console.warn('Texture cache unavailable:', e);
+            if (!this.atlas) generate();
+            return false;
+        });
     }
 
     createCanvas(w, h) {
@@ -40,16 +73,20 @@ class TextureManager {
         };
     }
 
+    // Same noise as varyColor per pixel, written into one ImageData instead of a fillRect per pixel
     fillNoise(ctx, rgb, amount, w, h) {
         w = w || this.size;
         h = h || this.size;
-        for (let y = 0; y < h; y++) {
-            for (let x = 0; x < w; x++) {
-                const c = this.varyColor(rgb, amount);
-                ctx.fillStyle = `rgb(${c.r},${c.g},${c.b})`;
-                ctx.fillRect(x, y, 1, 1);
-            }
+        const img = ctx.createImageData(w, h);
+        const data = img.data; // Clamped to 0-255 on write
+        for (let i = 0; i < data.length; i += 4) {
+            const v = (Math.random() - 0.5) * amount * 2;
+            data[i] = Math.floor(rgb.r + v);
+            data[i + 1] = Math.floor(rgb.g + v);
+            data[i + 2] = Math.floor(rgb.b + v);
+            data[i + 3] = 255;
         }
+        ctx.putImageData(img, 0, 0);
     }
 
     // --- Block Texture Generators ---
@@ -2227,8 +2264,126 @@ class TextureManager {
 
     // --- Access Methods ---
 
+    // --- Atlas ---
+
+    // Copies every block and item texture into one canvas, ATLAS_COLUMNS cells per row
+    buildAtlas() {
+        const keys = Object.keys(this.textures).map(Number).sort((a, b) => a - b);
+        const size = this.size;
+        const columns = TextureManager.ATLAS_COLUMNS;
+        const atlas = this.createCanvas(columns * size, Math.max(1, Math.ceil(keys.length / columns)) * size);
+        const ctx = atlas.getContext('2d');
+
+        this.atlasSlots = {};
+        keys.forEach((key, i) => {
+            const x = (i % columns) * size;
+            const y = Math.floor(i / columns) * size;
+            ctx.drawImage(this.textures[key], x, y, size, size);
+            this.atlasSlots[key] = { x, y };
+        });
+        this.atlas = atlas;
+        this.atlasKeys = keys;
+        this.shadedSprites.clear();
+    }
+
+    // Identifies atlases that were built from the same generators and block list
+    static atlasSignature() {
+        return TextureManager.ATLAS_VERSION + ':' + Object.keys(window.BLOCK || {}).length;
+    }
+
+    // Rebuilds the atlas from a cached record; per-texture canvases are cut lazily
+    restoreAtlas(record) {
+        if (record.signature !== TextureManager.atlasSignature() || record.size !== this.size) return false;
+        const atlas = this.createCanvas(record.width, record.height);
+        const ctx = atlas.getContext('2d');
+        const img = ctx.createImageData(record.width, record.height);
+        img.data.set(new Uint8ClampedArray(record.pixels));
+        ctx.putImageData(img, 0, 0);
+
+        const columns = record.width / this.size;
+        this.atlasSlots = {};
+        record.keys.forEach((key, i) => {
+            this.atlasSlots[key] = { x: (i % columns) * this.size, y: Math.floor(i / columns) * this.size };
+        });
+        this.atlas = atlas;
+        this.atlasKeys = record.keys.slice();
+        this.textures = {};
+        this.shadedSprites.clear();
+        return true;
+    }
+
+    openCache() {
+        return new Promise((resolve, reject) => {
+            const req = indexedDB.open(TextureManager.CACHE_DB, 1);
+            req.onupgradeneeded = () => req.result.createObjectStore('atlas');
+            req.onsuccess = () => resolve(req.result);
+            req.onerror = () => reject(req.error);
+        });
+    }
+
+    readCachedAtlas() {
+        return this.openCache().then(db => new Promise((resolve, reject) => {
+            const req = db.transaction(['atlas'], 'readonly').objectStore('atlas').get('atlas');
+            req.onsuccess = () => { db.close(); resolve(req.result || null); };
+            req.onerror = () => { db.close(); reject(req.error); };
+        }));
+    }
+
+    writeCachedAtlas() {
+        const atlas = this.atlas;
+        const pixels = atlas.getContext('2d').getImageData(0, 0, atlas.width, atlas.height).data;
+        const record = {
+            signature: TextureManager.atlasSignature(),
+            size: this.size,
+            width: atlas.width,
+            height: atlas.height,
+            keys: this.atlasKeys,
+            pixels: pixels.buffer
+        };
+        return this.openCache().then(db => new Promise((resolve, reject) => {
+            const tx = db.transaction(['atlas'], 'readwrite');
+            tx.objectStore('atlas').put(record, 'atlas');
+            tx.oncomplete = () => { db.close(); resolve(); };
+            tx.onerror = () => { db.close(); reject(tx.error); };
+        }));
+    }
+
+    // Atlas cell of a texture drawn at a light level (0-15) and face shade (see FACE_SHADE),
+    // so lit blocks cost one drawImage and no colour strings per frame
+    getShadedSprite(blockType, face, light) {
+        const slot = this.atlasSlots[blockType];
+        if (!slot) return null;
+        const key = (blockType * 6 + face) * 16 + light;
+        let sprite = this.shadedSprites.get(key);
+        if (sprite) return sprite;
+
+        const size = this.size;
+        sprite = this.createCanvas(size, size);
+        const ctx = sprite.getContext('2d');
+        ctx.drawImage(this.atlas, slot.x, slot.y, size, size, 0, 0, size, size);
+        const brightness = TextureManager.FACE_SHADE[face] * TextureManager.LIGHT_CURVE[light];
+        if (brightness < 1) {
+            // Darken only the texture's own pixels
+            ctx.globalCompositeOperation = 'source-atop';
+            ctx.globalAlpha = 1 - brightness;
+            ctx.fillStyle = '#000';
+            ctx.fillRect(0, 0, size, size);
+        }
+        this.shadedSprites.set(key, sprite);
+        return sprite;
+    }
+
     getBlockTexture(blockType) {
-        return this.textures[blockType] || null;
+        let tex = this.textures[blockType];
+        if (!tex) {
+            // Restored from the cache: cut the texture out of the atlas on first use
+            const slot = this.atlasSlots[blockType];
+            if (!slot) return null;
+            tex = this.createCanvas();
+            tex.getContext('2d').drawImage(this.atlas, slot.x, slot.y, this.size, this.size, 0, 0, this.size, this.size);
+            this.textures[blockType] = tex;
+        }
+        return tex;
     }
 
     getMobTexture(mobType) {
@@ -2236,4 +2391,13 @@ class TextureManager {
     }
 }
 
+TextureManager.ATLAS_COLUMNS = 32;
+// Bump when a generator changes so cached atlases from older versions are regenerated
+TextureManager.ATLAS_VERSION = 1;
+TextureManager.CACHE_DB = 'voxel-textures';
+// Directional shading per face (+X, -X, +Y, -Y, +Z, -Z), as Renderer.FACE_SHADE
+TextureManager.FACE_SHADE = [0.8, 0.8, 1.0, 0.5, 0.65, 0.65];
+// Brightness per light level; never fully black so caves stay readable
+TextureManager.LIGHT_CURVE = Array.from({ length: 16 }, (_, l) => 0.2 + 0.8 * Math.pow(l / 15, 1.5));
+
 window.TextureManager = TextureManager;
@@ -152,6 +152,14 @@ class UIManager {
             });
         }
 
+        const rendererSelect = document.getElementById('renderer-select');
+        if (rendererSelect) {
+            rendererSelect.addEventListener('change', (e) => {
+                // Shows Canvas 2D again when WebGL could not be started
+                e.target.value = this.game.setRendererMode(e.target.value);
+            });
+        }
+
         // Controls Reset
         const resetBtn = document.getElementById('reset-controls');
         if (resetBtn) {
@@ -169,7 +177,8 @@ class UIManager {
                         inventory: 'KeyE',
                         fly: 'KeyF',
                         chat: 'KeyT',
-                        crafting: 'KeyC'
+                        crafting: 'KeyC',
+                        minimap: 'KeyM' // Cycles the minimap zoom
                     };
                     this.renderSettings();
                 }
@@ -374,6 +383,10 @@ class UIManager {
                 const rdVal = document.getElementById('render-dist-value');
                 if (rdVal) rdVal.textContent = this.game.renderDistance;
             }
+            const rendererSelect = document.getElementById('renderer-select');
+            if (rendererSelect && this.game.renderer) {
+                rendererSelect.value = this.game.renderer.mode;
+            }
             const skinPicker = document.getElementById('skin-color-picker');
             if (skinPicker && this.game.player) {
                 skinPicker.value = this.game.player.skinColor;
@@ -949,6 +962,7 @@ class UIManager {
     handleBrewingClick(slotId) {
         if (!this.activeBrewingStand) return;
         const entity = this.activeBrewingStand;
+        this.game.world.wakeBlockEntity(entity); // Slots may change, re-check it next tick
         const cursor = this.cursorItem;
         let slotName = '';
         let index = -1;
@@ -1424,6 +1438,7 @@ class UIManager {
     handleFurnaceClick(slotId) {
         if (!this.activeFurnace) return;
         const entity = this.activeFurnace;
+        this.game.world.wakeBlockEntity(entity); // Slots may change, re-check it next tick
         const cursor = this.cursorItem;
         let slotItem = null;
         let slotName = '';
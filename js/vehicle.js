@@ -118,25 +118,16 @@ class Minecart extends Vehicle {
         } else {
              // Gravity
              this.vy -= 25 * dt;
-
-             // Collision with ground
-             const ground = this.game.world.getBlock(bx, Math.floor(this.y - 0.1), bz);
-             if (ground !== window.BLOCK.AIR && ground !== window.BLOCK.WATER) {
-                 if (this.y - Math.floor(this.y) < 0.2) {
-                     this.y = Math.floor(this.y) + 0.2; // minimal height
-                     this.vy = 0;
-                     this.onGround = true;
-                     this.vx *= 0.5; // Ground friction
-                     this.vz *= 0.5;
-                 }
-             } else {
-                 this.onGround = false;
-             }
         }
 
-        this.x += this.vx * dt;
-        this.y += this.vy * dt;
-        this.z += this.vz * dt;
+        this.move(this.vx * dt, this.vy * dt, this.vz * dt);
+
+        if (isRail(railBlock)) {
+            this.onGround = true; // Riding the rail, not resting on a collision box
+        } else if (this.onGround) {
+            this.vx *= 0.5; // Ground friction
+            this.vz *= 0.5;
+        }
 
         // Sync rider
         if (this.rider) {
@@ -193,21 +184,14 @@ class Boat extends Vehicle {
             }
         } else {
             this.vy -= 25 * dt; // Gravity
-            // Ground friction
-             const ground = this.game.world.getBlock(bx, Math.floor(this.y - 0.1), bz);
-             if (ground !== window.BLOCK.AIR && ground !== window.BLOCK.WATER) {
-                 if (this.y - Math.floor(this.y) < 0.2) {
-                     this.y = Math.floor(this.y) + 0.2;
-                     this.vy = 0;
-                     this.vx *= 0.5;
-                     this.vz *= 0.5;
-                 }
-             }
         }
 
-        this.x += this.vx * dt;
-        this.y += this.vy * dt;
-        this.z += this.vz * dt;
+        this.move(this.vx * dt, this.vy * dt, this.vz * dt);
+
+        if (!inWater && this.onGround) {
+            this.vx *= 0.5; // Ground friction
+            this.vz *= 0.5;
+        }
 
         // Sync rider
         if (this.rider) {
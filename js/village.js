@@ -25,6 +25,9 @@ class VillageManager {
         if (window.Mob && this.world.game) {
              const v = new window.Mob(this.world.game, chunk.cx*16+x+2, y+1, chunk.cz*16+z+2, window.MOB_TYPE.VILLAGER);
              this.world.game.mobs.push(v);
+        } else if (this.world.pendingSpawns) {
+             // Generated off the main thread: the spawn is replayed when the chunk is added
+             this.world.pendingSpawns.push({ x: chunk.cx*16+x+2, y: y+1, z: chunk.cz*16+z+2, type: 'villager' });
         }
     }
 
@@ -0,0 +1,563 @@
+// Optional WebGL backend for Renderer (Settings > Graphics > Renderer).
+// Terrain is uploaded once per chunk section as a vertex buffer and drawn with the depth
+// buffer, so nothing is projected or sorted on the CPU. The GL canvas sits under the game
+// canvas, which stays a 2D canvas: it is cleared every frame and Renderer's entity and HUD
+// passes draw on it, so those look the same in both modes.
+
+// Growable interleaved vertex array (x, y, z, u, v, tileU, tileV, r, g, b)
+class VertexBuilder {
+    constructor() {
+        this.data = new Float32Array(6 * WebGLRenderer.VERTEX_FLOATS * 64);
+        this.length = 0;
+    }
+
+    // Two triangles over corners 0-1-2-3 (corners: 4 xyz, uvs: 4 uv)
+    quad(corners, uvs, tileU, tileV, r, g, b) {
+        const stride = WebGLRenderer.VERTEX_FLOATS;
+        if (this.length + 6 * stride > this.data.length) {
+            const grown = new Float32Array(this.data.length * 2);
+            grown.set(this.data);
+            this.data = grown;
+        }
+        const data = this.data;
+        for (let i = 0; i < 6; i++) {
+            const c = VertexBuilder.ORDER[i];
+            let o = this.length;
+            data[o++] = corners[c * 3];
+            data[o++] = corners[c * 3 + 1];
+            data[o++] = corners[c * 3 + 2];
+            data[o++] = uvs[c * 2];
+            data[o++] = uvs[c * 2 + 1];
+            data[o++] = tileU;
+            data[o++] = tileV;
+            data[o++] = r;
+            data[o++] = g;
+            data[o++] = b;
+            this.length = o;
+        }
+    }
+
+    finish() {
+        return this.data.slice(0, this.length);
+    }
+}
+
+VertexBuilder.ORDER = [0, 1, 2, 0, 2, 3];
+
+class WebGLRenderer extends Renderer {
+    // gl is the context to draw with; a canvas is created for it when left out
+    constructor(game, gl) {
+        super(game);
+        this.mode = 'webgl';
+        gl = gl || WebGLRenderer.getContext();
+        if (!gl) throw new Error('WebGL is not available');
+        this.gl = gl;
+        this.glCanvas = gl.canvas;
+
+        this.terrain = this.createProgram(WebGLRenderer.TERRAIN_VERTEX, WebGLRenderer.TERRAIN_FRAGMENT,
+            ['aPos', 'aUv', 'aTile', 'aColor'], ['uRot', 'uOffset', 'uProj', 'uAtlas', 'uTileSize', 'uAlpha']);
+        this.sky = this.createProgram(WebGLRenderer.SKY_VERTEX, WebGLRenderer.SKY_FRAGMENT,
+            ['aCorner'], ['uRot', 'uFov', 'uTop', 'uBottom', 'uSun']);
+
+        this.skyBuffer = gl.createBuffer();
+        gl.bindBuffer(gl.ARRAY_BUFFER, this.skyBuffer);
+        gl.bufferData(gl.ARRAY_BUFFER, new Float32Array([-1, -1, 3, -1, -1, 3]), gl.STATIC_DRAW); // One big triangle
+
+        this.atlasTexture = gl.createTexture();
+        this.uploadedAtlas = null;
+        this.rot = new Float32Array(9);
+
+        // chunk -> per-section { mesh, atlas, solid, liquid, quads } (buffers of the mesh they were built from)
+        this.chunkBuffers = new Map();
+        this.frame = 0;
+
+        if (this.glCanvas.style) {
+            this.glCanvas.className = 'gl-canvas';
+            const parent = this.canvas.parentNode;
+            if (parent) parent.insertBefore(this.glCanvas, this.canvas);
+        }
+    }
+
+    static getContext() {
+        const canvas = document.createElement('canvas');
+        const options = { alpha: false, antialias: false };
+        try {
+            return canvas.getContext('webgl', options) || canvas.getContext('experimental-webgl', options);
+        } catch (e) {
+            return null;
+        }
+    }
+
+    // WebGLRenderer, or null when WebGL cannot be started (the caller keeps Canvas 2D)
+    static create(game) {
+        const gl = WebGLRenderer.getContext();
+        if (!gl) return null;
+        try {
+            return new WebGLRenderer(game, gl);
+        } catch (e) {
+            console.warn('WebGL renderer unavailable, using Canvas 2D:', e.message);
+            return null;
+        }
+    }
+
+    createProgram(vertexSource, fragmentSource, attributes, uniforms) {
+        const gl = this.gl;
+        const compile = (type, source) => {
+            const shader = gl.createShader(type);
+            gl.shaderSource(shader, source);
+            gl.compileShader(shader);
+            if (!gl.getShaderParameter(shader, gl.COMPILE_STATUS)) {
+                throw new Error('Shader compile failed: ' + gl.getShaderInfoLog(shader));
+            }
+            return shader;
+        };
+        const program = gl.createProgram();
+        gl.attachShader(program, compile(gl.VERTEX_SHADER, vertexSource));
+        gl.attachShader(program, compile(gl.FRAGMENT_SHADER, fragmentSource));
+        attributes.forEach((name, i) => gl.bindAttribLocation(program, i, name));
+        gl.linkProgram(program);
+        if (!gl.getProgramParameter(program, gl.LINK_STATUS)) {
+            throw new Error('Shader link failed: ' + gl.getProgramInfoLog(program));
+        }
+        const out = { program, uniforms: {} };
+        uniforms.forEach(name => { out.uniforms[name] = gl.getUniformLocation(program, name); });
+        return out;
+    }
+
+    resize() {
+        super.resize();
+        this.glCanvas.width = this.canvas.width;
+        this.glCanvas.height = this.canvas.height;
+        this.gl.viewport(0, 0, this.glCanvas.width, this.glCanvas.height);
+    }
+
+    destroy() {
+        const gl = this.gl;
+        this.chunkBuffers.forEach(entries => entries.forEach(entry => this.deleteEntry(entry)));
+        this.chunkBuffers.clear();
+        if (this.glCanvas.parentNode) this.glCanvas.parentNode.removeChild(this.glCanvas);
+        const lose = gl.getExtension('WEBGL_lose_context');
+        if (lose) lose.loseContext();
+    }
+
+    render() {
+        // Canvas 2D (opaque, over the GL canvas) while the context is lost
+        if (this.gl.isContextLost()) {
+            super.render();
+            return;
+        }
+
+        const view = this.getView();
+        this.ctx.clearRect(0, 0, view.w, view.h);
+        this.updateRotation(view);
+        this.drawSkyGL(view);
+        const drawn = this.drawTerrain(view);
+
+        this.drawUnderwater(view);
+        this.drawEntities(view);
+        this.drawOverlay(view, drawn);
+    }
+
+    // Camera rotation of Renderer's projection (world offset -> camera x right, y up, z forward), column-major
+    updateRotation(view) {
+        const { sinY, cosY, sinP, cosP } = view;
+        const r = this.rot;
+        r[0] = cosY; r[1] = -sinP * sinY; r[2] = cosP * sinY;
+        r[3] = 0; r[4] = cosP; r[5] = sinP;
+        r[6] = -sinY; r[7] = -sinP * cosY; r[8] = cosP * cosY;
+    }
+
+    drawSkyGL(view) {
+        const gl = this.gl;
+        const u = this.sky.uniforms;
+        const f = 1 / Math.tan(this.game.fov * Math.PI / 360);
+        const angle = ((this.game.gameTime % this.game.dayLength) / this.game.dayLength) * 2 * Math.PI;
+        const [top, bottom] = this.getSkyColors();
+
+        gl.clear(gl.COLOR_BUFFER_BIT | gl.DEPTH_BUFFER_BIT);
+        gl.disable(gl.DEPTH_TEST);
+        gl.useProgram(this.sky.program);
+        gl.uniformMatrix3fv(u.uRot, false, this.rot);
+        gl.uniform2f(u.uFov, (view.w / view.h) / f, 1 / f);
+        gl.uniform3f(u.uTop, top[0] / 255, top[1] / 255, top[2] / 255);
+        gl.uniform3f(u.uBottom, bottom[0] / 255, bottom[1] / 255, bottom[2] / 255);
+        gl.uniform3f(u.uSun, Math.cos(angle), Math.sin(angle), 0);
+        gl.bindBuffer(gl.ARRAY_BUFFER, this.skyBuffer);
+        gl.enableVertexAttribArray(0);
+        for (let i = 1; i < 4; i++) gl.disableVertexAttribArray(i); // Left on by the terrain pass
+        gl.vertexAttribPointer(0, 2, gl.FLOAT, false, 0, 0);
+        gl.drawArrays(gl.TRIANGLES, 0, 3);
+    }
+
+    // Uploads the texture manager's atlas when it is (re)built
+    updateAtlas() {
+        const atlas = this.textureManager ? this.textureManager.atlas : null;
+        if (!atlas || atlas === this.uploadedAtlas) return;
+        const gl = this.gl;
+        gl.bindTexture(gl.TEXTURE_2D, this.atlasTexture);
+        gl.texImage2D(gl.TEXTURE_2D, 0, gl.RGBA, gl.RGBA, gl.UNSIGNED_BYTE, atlas);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MIN_FILTER, gl.NEAREST);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MAG_FILTER, gl.NEAREST);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_WRAP_S, gl.CLAMP_TO_EDGE);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_WRAP_T, gl.CLAMP_TO_EDGE);
+        this.uploadedAtlas = atlas;
+    }
+
+    // Draws the sections that survive culling: solid geometry first, then water blended on top.
+    // Returns the number of quads drawn.
+    drawTerrain(view) {
+        const gl = this.gl;
+        const { w, h, px, py, pz, renderDist } = view;
+        const u = this.terrain.uniforms;
+
+        this.updateAtlas();
+        const atlas = this.uploadedAtlas;
+        const f = 1 / Math.tan(this.game.fov * Math.PI / 360);
+        const near = 0.1;
+        const far = renderDist + 32;
+
+        gl.enable(gl.DEPTH_TEST);
+        gl.depthMask(true);
+        gl.disable(gl.BLEND);
+        gl.useProgram(this.terrain.program);
+        gl.uniformMatrix3fv(u.uRot, false, this.rot);
+        gl.uniform4f(u.uProj, f / (w / h), f, (far + near) / (far - near), -2 * far * near / (far - near));
+        gl.activeTexture(gl.TEXTURE0);
+        gl.bindTexture(gl.TEXTURE_2D, this.atlasTexture);
+        gl.uniform1i(u.uAtlas, 0);
+        const size = this.textureManager ? this.textureManager.size : 16;
+        gl.uniform2f(u.uTileSize, atlas ? size / atlas.width : 0, atlas ? size / atlas.height : 0);
+        gl.uniform1f(u.uAlpha, 1);
+        for (let i = 0; i < 4; i++) gl.enableVertexAttribArray(i);
+
+        const sections = this.getVisibleSections(view);
+        const liquids = [];
+        let drawn = 0;
+        let offsetChunk = null;
+
+        for (let v = 0; v < sections.length; v += 2) {
+            const chunk = sections[v];
+            const entry = this.getSectionBuffers(chunk, sections[v + 1]);
+            if (!entry) continue;
+            const ox = chunk.cx * 16 - px;
+            const oz = chunk.cz * 16 - pz;
+            if (entry.liquid) liquids.push(entry, ox, oz);
+            if (!entry.solid) continue;
+            if (chunk !== offsetChunk) {
+                gl.uniform3f(u.uOffset, ox, -py, oz);
+                offsetChunk = chunk;
+            }
+            this.drawBuffer(entry.solid);
+            drawn += entry.quads;
+        }
+
+        if (liquids.length > 0) {
+            gl.enable(gl.BLEND);
+            gl.blendFunc(gl.SRC_ALPHA, gl.ONE_MINUS_SRC_ALPHA);
+            gl.depthMask(false);
+            gl.uniform1f(u.uAlpha, WebGLRenderer.LIQUID_ALPHA);
+            for (let i = 0; i < liquids.length; i += 3) {
+                gl.uniform3f(u.uOffset, liquids[i + 1], -py, liquids[i + 2]);
+                this.drawBuffer(liquids[i].liquid);
+            }
+            gl.depthMask(true);
+            gl.disable(gl.BLEND);
+        }
+
+        if (++this.frame % WebGLRenderer.PURGE_INTERVAL === 0) this.releaseStaleBuffers();
+        return drawn;
+    }
+
+    drawBuffer(buffer) {
+        const gl = this.gl;
+        const stride = WebGLRenderer.VERTEX_FLOATS * 4;
+        gl.bindBuffer(gl.ARRAY_BUFFER, buffer.buffer);
+        gl.vertexAttribPointer(0, 3, gl.FLOAT, false, stride, 0);
+        gl.vertexAttribPointer(1, 2, gl.FLOAT, false, stride, 12);
+        gl.vertexAttribPointer(2, 2, gl.FLOAT, false, stride, 20);
+        gl.vertexAttribPointer(3, 3, gl.FLOAT, false, stride, 28);
+        gl.drawArrays(gl.TRIANGLES, 0, buffer.count);
+    }
+
+    // GPU buffers of a section, rebuilt when the chunk replaced its mesh or the atlas changed
+    getSectionBuffers(chunk, section) {
+        const mesh = chunk.sectionMeshes[section];
+        let entries = this.chunkBuffers.get(chunk);
+        let entry = entries ? entries[section] : null;
+        if (entry && entry.mesh === mesh && entry.atlas === this.uploadedAtlas) return entry;
+        if (entry) this.deleteEntry(entry);
+        if (!mesh) {
+            if (entries) entries[section] = null;
+            return null;
+        }
+        if (!entries) {
+            entries = new Array(chunk.sectionCount).fill(null);
+            this.chunkBuffers.set(chunk, entries);
+        }
+
+        const geometry = WebGLRenderer.buildSectionGeometry(chunk, mesh, this.uploadedAtlas ? this.textureManager : null);
+        entry = {
+            mesh,
+            atlas: this.uploadedAtlas,
+            solid: this.upload(geometry.solid),
+            liquid: this.upload(geometry.liquid),
+            quads: mesh.quadCount + mesh.specialCount
+        };
+        entries[section] = entry;
+        return entry;
+    }
+
+    upload(vertices) {
+        if (vertices.length === 0) return null;
+        const gl = this.gl;
+        const buffer = gl.createBuffer();
+        gl.bindBuffer(gl.ARRAY_BUFFER, buffer);
+        gl.bufferData(gl.ARRAY_BUFFER, vertices, gl.STATIC_DRAW);
+        return { buffer, count: vertices.length / WebGLRenderer.VERTEX_FLOATS };
+    }
+
+    deleteEntry(entry) {
+        if (!entry) return;
+        if (entry.solid) this.gl.deleteBuffer(entry.solid.buffer);
+        if (entry.liquid) this.gl.deleteBuffer(entry.liquid.buffer);
+    }
+
+    // Frees the buffers of chunks that were unloaded (or replaced, e.g. by a dimension change)
+    releaseStaleBuffers() {
+        const world = this.game.world;
+        for (const [chunk, entries] of Array.from(this.chunkBuffers)) {
+            if (world.getChunk(chunk.cx, chunk.cz) === chunk) continue;
+            entries.forEach(entry => this.deleteEntry(entry));
+            this.chunkBuffers.delete(chunk);
+        }
+    }
+
+    // Vertices of one section mesh in chunk-local coordinates: { solid, liquid } Float32Arrays.
+    // Greedy quads keep their size in the texture coordinates so the shader repeats the
+    // atlas cell across them. textures is the TextureManager, or null for plain colours.
+    static buildSectionGeometry(chunk, mesh, textures) {
+        const solid = new VertexBuilder();
+        const liquid = new VertexBuilder();
+        const FACES = window.Chunk.FACES;
+        const shade = Renderer.FACE_SHADE;
+        const corners = new Float32Array(12);
+        const uvs = new Float32Array(8);
+        const lo = [0, 0, 0], hi = [0, 0, 0];
+
+        const tile = (type) => {
+            const slot = textures ? textures.atlasSlots[type] : null;
+            return slot ? [slot.x / textures.atlas.width, slot.y / textures.atlas.height] : null;
+        };
+        // Fills corners/uvs for one face of the box lo..hi; v runs down the texture on side faces
+        const boxFace = (face) => {
+            const F = FACES[face];
+            const plane = F.dir > 0 ? hi[F.axis] : lo[F.axis];
+            const flip = F.v === 1 ? -1 : 1;
+            for (let c = 0; c < 4; c++) {
+                const cu = (c === 1 || c === 2) ? hi[F.u] : lo[F.u];
+                const cv = c >= 2 ? hi[F.v] : lo[F.v];
+                corners[c * 3 + F.axis] = plane;
+                corners[c * 3 + F.u] = cu;
+                corners[c * 3 + F.v] = cv;
+                uvs[c * 2] = cu;
+                uvs[c * 2 + 1] = cv * flip;
+            }
+        };
+        const emit = (out, face, color, t) => {
+            const s = shade[face];
+            if (t) out.quad(corners, uvs, t[0], t[1], s, s, s);
+            else out.quad(corners, uvs, -1, -1, color[0] * s, color[1] * s, color[2] * s);
+        };
+
+        // Full cubes: greedy quads
+        const quads = mesh.quads;
+        for (let i = 0; i < mesh.quadCount; i++) {
+            const o = i * window.Chunk.QUAD_STRIDE;
+            const face = quads[o + 3];
+            const type = quads[o + 6];
+            const F = FACES[face];
+            lo[0] = quads[o]; lo[1] = quads[o + 1]; lo[2] = quads[o + 2];
+            hi[0] = lo[0]; hi[1] = lo[1]; hi[2] = lo[2];
+            hi[F.u] += quads[o + 4];
+            hi[F.v] += quads[o + 5]; // Origin is already on the face plane
+            boxFace(face);
+            emit(solid, face, WebGLRenderer.blockColor(type, face), tile(type));
+        }
+
+        // Shaped blocks: small boxes (or crossed quads for plants)
+        const specials = mesh.specials;
+        for (let i = 0; i < mesh.specialCount; i++) {
+            const idx = specials[i];
+            const x = idx & 15, y = idx >> 8, z = (idx >> 4) & 15;
+            const type = chunk.getBlockAtIndex(idx);
+            const def = window.BLOCKS[type];
+            if (!def) continue;
+            const meta = chunk.getMetadata(x, y, z);
+            const out = def.liquid && def.transparent ? liquid : solid;
+            const t = def.isWire ? null : tile(type);
+
+            const boxes = WebGLRenderer.specialBoxes(def, type, meta);
+            if (!boxes) {
+                // Two crossed, double-sided planes
+                for (let k = 0; k < 2; k++) {
+                    const x0 = k === 0 ? 0 : 1, x1 = k === 0 ? 1 : 0;
+                    corners.set([x + x0, y, z, x + x1, y, z + 1, x + x1, y + 1, z + 1, x + x0, y + 1, z]);
+                    uvs.set([0, 0, 1, 0, 1, -1, 0, -1]);
+                    emit(out, 2, WebGLRenderer.blockColor(type, 2), t);
+                }
+                continue;
+            }
+
+            const color = def.isWire
+                ? [Math.max(60, meta * 17) / 255, 0, 0] // Brighter with power, as on the canvas
+                : null;
+            for (const box of boxes) {
+                lo[0] = x + box[0]; lo[1] = y + box[1]; lo[2] = z + box[2];
+                hi[0] = x + box[3]; hi[1] = y + box[4]; hi[2] = z + box[5];
+                for (let face = 0; face < 6; face++) {
+                    boxFace(face);
+                    emit(out, face, color || WebGLRenderer.blockColor(type, face), t);
+                }
+            }
+        }
+
+        return { solid: solid.finish(), liquid: liquid.finish() };
+    }
+
+    // Boxes ([x0, y0, z0, x1, y1, z1] within the block) drawn for a shaped block,
+    // or null for plants, which are drawn as crossed planes
+    static specialBoxes(def, type, meta) {
+        if (def.liquid) {
+            const level = meta || 8;
+            return [[0, 0, 0, 1, level >= 8 ? 0.9 : level / 9, 1]];
+        }
+        if (def.isSlab) return [[0, 0, 0, 1, 0.5, 1]];
+        if (def.isStair) {
+            // Bottom half, plus the top step on the side the stair faces (0 +X, 1 -X, 2 +Z, 3 -Z)
+            const step = [[0.5, 0.5, 0, 1, 1, 1], [0, 0.5, 0, 0.5, 1, 1], [0, 0.5, 0.5, 1, 1, 1], [0, 0.5, 0, 1, 1, 0.5]];
+            return [[0, 0, 0, 1, 0.5, 1], step[meta & 3]];
+        }
+        if (def.isDoor) {
+            // Thin panel on the side given by the orientation bits, swung round when open (bit 2)
+            const t = 0.1875;
+            const closed = [[0, 0, 0, t, 1, 1], [1 - t, 0, 0, 1, 1, 1], [0, 0, 0, 1, 1, t], [0, 0, 1 - t, 1, 1, 1]];
+            const open = [[0, 0, 1 - t, 1, 1, 1], [0, 0, 0, 1, 1, t], [1 - t, 0, 0, 1, 1, 1], [0, 0, 0, t, 1, 1]];
+            return [(meta & 4 ? open : closed)[meta & 3]];
+        }
+        if (def.isPane) return [[0, 0, 0.4375, 1, 1, 0.5625]];
+        if (def.isGate) {
+            return meta & 4 ? [[0, 0, 0.4375, 0.125, 1, 0.5625], [0.875, 0, 0.4375, 1, 1, 0.5625]]
+                : [[0, 0.375, 0.4375, 1, 0.9375, 0.5625]];
+        }
+        if (def.isFence) return [[0.375, 0, 0.375, 0.625, 1, 0.625]];
+        if (def.isTrapdoor) {
+            const t = 0.1875;
+            if (meta & 4) return [[0, 0, 0, 1, 1, t]];
+            return meta & 8 ? [[0, 1 - t, 0, 1, 1, 1]] : [[0, 0, 0, 1, t, 1]];
+        }
+        if (def.isTorch || type === window.BLOCK.TORCH) return [[0.4375, 0, 0.4375, 0.5625, 0.6, 0.5625]];
+        if (def.isWire) return [[0, 0, 0, 1, 0.0625, 1]];
+        if (def.isSign) {
+            if (type === window.BLOCK.SIGN_POST) return [[0.1, 0.5, 0.4375, 0.9, 1, 0.5625], [0.45, 0, 0.45, 0.55, 0.5, 0.55]];
+            return [[0.1, 0.25, 0.4375, 0.9, 0.75, 0.5625]];
+        }
+        if (def.solid) return [[0, 0, 0, 1, 1, 1]];
+        return null;
+    }
+
+    // Plain colour ([r, g, b], 0-1) of a face for blocks without a texture
+    static blockColor(type, face) {
+        const key = type * 6 + face;
+        let color = WebGLRenderer.colorCache[key];
+        if (color) return color;
+        const def = window.BLOCKS[type];
+        const hex = def ? ((face === 2 && def.top) ? def.top : def.color) : '#FF00FF';
+        color = [0.5, 0.5, 0.5];
+        if (typeof hex === 'string' && hex[0] === '#') {
+            let digits = hex.slice(1);
+            if (digits.length === 3) digits = digits.split('').map(c => c + c).join('');
+            if (digits.length === 6) {
+                color = [0, 2, 4].map(i => parseInt(digits.slice(i, i + 2), 16) / 255);
+            }
+        }
+        WebGLRenderer.colorCache[key] = color;
+        return color;
+    }
+}
+
+WebGLRenderer.VERTEX_FLOATS = 10;
+WebGLRenderer.LIQUID_ALPHA = 0.7;
+WebGLRenderer.PURGE_INTERVAL = 120; // Frames between sweeps for unloaded chunks' buffers
+WebGLRenderer.colorCache = {};
+
+WebGLRenderer.TERRAIN_VERTEX = `
+attribute vec3 aPos;
+attribute vec2 aUv;
+attribute vec2 aTile;
+attribute vec3 aColor;
+uniform mat3 uRot;
+uniform vec3 uOffset; // Chunk origin minus the camera
+uniform vec4 uProj;   // x scale, y scale, depth scale, depth offset
+varying vec2 vUv;
+varying vec2 vTile;
+varying vec3 vColor;
+void main() {
+    vec3 cam = uRot * (aPos + uOffset);
+    gl_Position = vec4(cam.x * uProj.x, cam.y * uProj.y, cam.z * uProj.z + uProj.w, cam.z);
+    vUv = aUv;
+    vTile = aTile;
+    vColor = aColor;
+}`;
+
+WebGLRenderer.TERRAIN_FRAGMENT = `
+precision mediump float;
+uniform sampler2D uAtlas;
+uniform vec2 uTileSize;
+uniform float uAlpha;
+varying vec2 vUv;
+varying vec2 vTile;
+varying vec3 vColor;
+void main() {
+    vec4 texel = vec4(1.0);
+    if (vTile.x >= 0.0) texel = texture2D(uAtlas, vTile + min(fract(vUv), 0.999) * uTileSize);
+    if (texel.a < 0.1) discard;
+    gl_FragColor = vec4(texel.rgb * vColor, texel.a * uAlpha);
+}`;
+
+WebGLRenderer.SKY_VERTEX = `
+attribute vec2 aCorner;
+varying vec2 vNdc;
+void main() {
+    vNdc = aCorner;
+    gl_Position = vec4(aCorner, 0.0, 1.0);
+}`;
+
+// Gradient from Renderer.getSkyColors(), sun disc with its halo and the square moon
+WebGLRenderer.SKY_FRAGMENT = `
+#ifdef GL_FRAGMENT_PRECISION_HIGH
+precision highp float;
+#else
+precision mediump float;
+#endif
+uniform mat3 uRot;
+uniform vec2 uFov; // Tangents of the half field of view
+uniform vec3 uTop;
+uniform vec3 uBottom;
+uniform vec3 uSun;
+varying vec2 vNdc;
+void main() {
+    vec3 ray = vec3(vNdc.x * uFov.x, vNdc.y * uFov.y, 1.0);
+    vec3 dir = normalize(vec3(dot(uRot[0], ray), dot(uRot[1], ray), dot(uRot[2], ray)));
+    vec3 color = mix(uTop, uBottom, (1.0 - vNdc.y) * 0.5);
+    float sun = dot(dir, uSun);
+    if (sun > 0.98894) color = vec3(1.0, 1.0, 0.0);
+    if (sun > 0.97558) color = mix(color, vec3(1.0, 0.647, 0.0), 0.2);
+    if (sun < 0.0) {
+        vec3 p = dir / -sun + uSun;
+        if (abs(p.z) < 0.15 && abs(dot(p, vec3(uSun.y, -uSun.x, 0.0))) < 0.15) color = vec3(0.941);
+    }
+    gl_FragColor = vec4(color, 1.0);
+}`;
+
+window.VertexBuilder = VertexBuilder;
+window.WebGLRenderer = WebGLRenderer;
@@ -0,0 +1,157 @@
+// Pool of chunk generation workers (see js/chunkworker.js).
+// Missing chunks are queued by squared distance to the player, at most
+// maxInFlight jobs are handed to the workers at a time, and results come back
+// as transferable Uint8Array buffers that World.addGeneratedChunk adopts as is.
+class ChunkWorkerPool {
+    constructor(world, options = {}) {
+        this.world = world;
+        this.url = options.url || 'js/chunkworker.js';
+        const cores = (typeof navigator !== 'undefined' && navigator.hardwareConcurrency) || 2;
+        this.size = options.size || Math.max(1, Math.min(4, cores - 1));
+        this.maxInFlight = options.maxInFlight || this.size * 2;
+
+        this.workers = [];
+        this.load = []; // In-flight jobs per worker
+        this.heap = []; // Min-heap of { cx, cz, priority }
+        this.queued = new Set(); // Chunk keys waiting in the heap
+        this.inFlight = new Map(); // Job id -> { key, worker, epoch }
+        this.pendingKeys = new Set(); // Chunk keys currently being generated
+        this.nextId = 1;
+        this.epoch = 0; // Bumped by reset() so stale results are dropped
+        this.available = false;
+
+        if (typeof Worker === 'undefined') return;
+
+        try {
+            for (let i = 0; i < this.size; i++) {
+                const worker = new Worker(this.url);
+                worker.onmessage = (e) => this.handleMessage(i, e.data);
+                worker.onerror = (e) => this.handleError(e);
+                worker.postMessage({ type: 'init', seed: world.seed });
+                this.workers.push(worker);
+                this.load.push(0);
+            }
+            this.available = true;
+        } catch (e) {
+            // e.g. pages opened from file:// cannot start workers
+            console.warn("Chunk workers unavailable, generating on the main thread", e);
+            this.terminate();
+        }
+    }
+
+    // Queue a chunk; lower priority values are generated first
+    request(cx, cz, priority) {
+        const key = this.world.getChunkKey(cx, cz);
+        if (this.queued.has(key) || this.pendingKeys.has(key)) return;
+        this.queued.add(key);
+        this.push({ cx, cz, priority });
+    }
+
+    // Drop queued (not yet dispatched) work, e.g. before re-prioritising around a new position
+    clearQueue() {
+        this.heap.length = 0;
+        this.queued.clear();
+    }
+
+    // Forget everything, including jobs still running (dimension switch, world load)
+    reset() {
+        this.clearQueue();
+        this.inFlight.clear();
+        this.pendingKeys.clear();
+        for (let i = 0; i < this.load.length; i++) this.load[i] = 0;
+        this.epoch++;
+    }
+
+    pump() {
+        if (!this.available) return;
+        while (this.inFlight.size < this.maxInFlight && this.heap.length > 0) {
+            const job = this.pop();
+            const key = this.world.getChunkKey(job.cx, job.cz);
+            this.queued.delete(key);
+            if (this.world.getChunk(job.cx, job.cz)) continue;
+
+            // Least loaded worker
+            let w = 0;
+            for (let i = 1; i < this.workers.length; i++) {
+                if (this.load[i] < this.load[w]) w = i;
+            }
+
+            const id = this.nextId++;
+            this.inFlight.set(id, { key, worker: w, epoch: this.epoch });
+            this.pendingKeys.add(key);
+            this.load[w]++;
+            this.workers[w].postMessage({
+                type: 'generate',
+                id,
+                cx: job.cx,
+                cz: job.cz,
+                seed: this.world.seed,
+                dimension: this.world.dimension
+            });
+        }
+    }
+
+    handleMessage(workerIndex, msg) {
+        if (msg.type !== 'chunk') return;
+        const job = this.inFlight.get(msg.id);
+        if (!job) return; // Dropped by reset()
+
+        this.inFlight.delete(msg.id);
+        this.pendingKeys.delete(job.key);
+        this.load[workerIndex] = Math.max(0, this.load[workerIndex] - 1);
+
+        if (job.epoch === this.epoch) {
+            this.world.addGeneratedChunk(msg.cx, msg.cz, msg.blocks, msg.metadata, msg.overflow, msg.spawns, msg.light);
+        }
+        this.pump();
+    }
+
+    handleError(e) {
+        console.warn("Chunk worker failed, generating on the main thread", e);
+        this.terminate();
+    }
+
+    terminate() {
+        this.workers.forEach(w => w.terminate());
+        this.workers = [];
+        this.load = [];
+        this.reset();
+        this.available = false;
+    }
+
+    // Binary heap helpers
+    push(job) {
+        const heap = this.heap;
+        heap.push(job);
+        let i = heap.length - 1;
+        while (i > 0) {
+            const parent = (i - 1) >> 1;
+            if (heap[parent].priority <= heap[i].priority) break;
+            [heap[parent], heap[i]] = [heap[i], heap[parent]];
+            i = parent;
+        }
+    }
+
+    pop() {
+        const heap = this.heap;
+        const top = heap[0];
+        const last = heap.pop();
+        if (heap.length > 0) {
+            heap[0] = last;
+            let i = 0;
+            while (true) {
+                const l = i * 2 + 1;
+                const r = l + 1;
+                let min = i;
+                if (l < heap.length && heap[l].priority < heap[min].priority) min = l;
+                if (r < heap.length && heap[r].priority < heap[min].priority) min = r;
+                if (min === i) break;
+                [heap[min], heap[i]] = [heap[i], heap[min]];
+                i = min;
+            }
+        }
+        return top;
+    }
+}
+
+window.ChunkWorkerPool = ChunkWorkerPool;
@@ -1,8 +1,367 @@
+// Growable FIFO ring buffer of packed light positions, each with an optional level
+// (the removal pass needs the level a cell had before it was cleared)
+class LightQueue {
+    constructor(capacity = 4096) {
+        this.positions = new Int32Array(capacity);
+        this.levels = new Uint8Array(capacity);
+        this.mask = capacity - 1; // capacity is a power of two
+        this.head = 0;
+        this.size = 0;
+        this.level = 0; // Level of the entry returned by the last shift()
+    }
+
+    push(pos, level = 0) {
+        if (this.size === this.positions.length) this.grow();
+        const i = (this.head + this.size) & this.mask;
+        this.positions[i] = pos;
+        this.levels[i] = level;
+        this.size++;
+    }
+
+    shift() {
+        const i = this.head;
+        this.head = (i + 1) & this.mask;
+        this.size--;
+        this.level = this.levels[i];
+        return this.positions[i];
+    }
+
+    grow() {
+        const capacity = this.positions.length * 2;
+        const positions = new Int32Array(capacity);
+        const levels = new Uint8Array(capacity);
+        for (let n = 0; n < this.size; n++) {
+            const i = (this.head + n) & this.mask;
+            positions[n] = this.positions[i];
+            levels[n] = this.levels[i];
+        }
+        this.positions = positions;
+        this.levels = levels;
+        this.mask = capacity - 1;
+        this.head = 0;
+    }
+}
+
+// Map of loaded chunks keyed by World.getChunkKey. Counts structural changes so
+// World.getChunk can keep its last-chunk cache without handing out removed chunks.
+class ChunkMap extends Map {
+    constructor() {
+        super();
+        this.version = 0;
+    }
+
+    set(key, chunk) {
+        this.version++;
+        return super.set(key, chunk);
+    }
+
+    delete(key) {
+        this.version++;
+        return super.delete(key);
+    }
+
+    clear() {
+        this.version++;
+        super.clear();
+    }
+}
+
+// Scheduled block updates of one kind (fluid, redstone, ...). Positions are packed
+// integers (World.packBlockPos); each position is scheduled at most once at a time.
+class BlockTickQueue {
+    constructor(delay, budget) {
+        this.delay = delay; // Default ticks between scheduling and running
+        this.budget = budget; // Updates run per game tick at most
+        this.buckets = new Map(); // Due tick -> positions, in scheduling order
+        this.pending = new Set(); // Positions waiting in a bucket or in ready
+        this.ready = []; // Due positions not run yet (left over when a tick ran out of budget)
+        this.readyHead = 0;
+    }
+
+    get size() {
+        return this.pending.size;
+    }
+
+    has(pos) {
+        return this.pending.has(pos);
+    }
+
+    schedule(pos, due) {
+        if (this.pending.has(pos)) return;
+        this.pending.add(pos);
+        const bucket = this.buckets.get(due);
+        if (bucket) bucket.push(pos);
+        else this.buckets.set(due, [pos]);
+    }
+
+    // Moves every bucket due by tick into the ready list
+    collect(tick) {
+        for (const [due, bucket] of this.buckets) {
+            if (due > tick) continue;
+            for (let i = 0; i < bucket.length; i++) this.ready.push(bucket[i]);
+            this.buckets.delete(due);
+        }
+    }
+
+    clear() {
+        this.buckets.clear();
+        this.pending.clear();
+        this.ready.length = 0;
+        this.readyHead = 0;
+    }
+}
+
+// Compiled redstone network.
+// Wires, redstone torches, lamps and pistons become cached nodes with their input and
+// output links resolved once. Nodes are only recompiled around setBlock edits that touch
+// a component (see invalidate). Each tick propagate() recomputes the wire networks next
+// to the edits in one pass and re-evaluates just the components fed by changed wires.
+class RedstoneGraph {
+    constructor(world) {
+        this.world = world;
+        this.nodes = new Map(); // Packed position -> node
+        this.dirty = []; // x, y, z triples edited since the last propagate()
+        this.chunkVersion = -1; // Cache is dropped when chunks are loaded/unloaded
+        this.pass = 0;
+    }
+
+    static kindOf(type) {
+        const B = window.BLOCK;
+        const def = window.BLOCKS[type];
+        if (!def) return 0;
+        if (def.isWire) return RedstoneGraph.WIRE;
+        if (type === B.REDSTONE_TORCH || type === B.REDSTONE_TORCH_OFF) return RedstoneGraph.TORCH;
+        if (type === B.REDSTONE_LAMP || type === B.REDSTONE_LAMP_ACTIVE) return RedstoneGraph.LAMP;
+        if (def.isPiston) return RedstoneGraph.PISTON;
+        return 0;
+    }
+
+    // Node for a component block, compiled on first use; null for anything else
+    getNode(x, y, z) {
+        if (y < 0 || y >= this.world.worldHeight) return null;
+        const pos = this.world.packBlockPos(x, y, z);
+        let node = this.nodes.get(pos);
+        if (node) return node;
+        const type = this.world.getBlock(x, y, z);
+        const kind = RedstoneGraph.kindOf(type);
+        if (!kind) return null;
+        node = { x, y, z, type, kind, inputs: null, outputs: null, power: 0, pass: 0 };
+        this.nodes.set(pos, node);
+        return node;
+    }
+
+    // Components that can power node: its six neighbours, except that a torch reads the
+    // six neighbours of the block it stands on and a piston ignores a torch standing on it
+    getInputs(node) {
+        if (node.inputs) return node.inputs;
+        const inputs = [];
+        const DX = World.NEIGHBOR_DX, DY = World.NEIGHBOR_DY, DZ = World.NEIGHBOR_DZ;
+        const by = node.kind === RedstoneGraph.TORCH ? node.y - 1 : node.y;
+        for (let d = 0; d < 6; d++) {
+            const n = this.getNode(node.x + DX[d], by + DY[d], node.z + DZ[d]);
+            if (!n || n === node) continue;
+            if (n.kind !== RedstoneGraph.WIRE && n.kind !== RedstoneGraph.TORCH) continue;
+            if (node.kind === RedstoneGraph.PISTON && n.kind === RedstoneGraph.TORCH && d === 2) continue;
+            inputs.push(n);
+        }
+        node.inputs = inputs;
+        return inputs;
+    }
+
+    // Components that read node (the reverse of getInputs)
+    getOutputs(node) {
+        if (node.outputs) return node.outputs;
+        const outputs = [];
+        if (node.kind === RedstoneGraph.WIRE || node.kind === RedstoneGraph.TORCH) {
+            const DX = World.NEIGHBOR_DX, DY = World.NEIGHBOR_DY, DZ = World.NEIGHBOR_DZ;
+            for (let d = 0; d < 6; d++) {
+                const n = this.getNode(node.x + DX[d], node.y + DY[d], node.z + DZ[d]);
+                if (n && n.kind !== RedstoneGraph.TORCH && this.getInputs(n).includes(node)) outputs.push(n);
+                // Torches standing on a block next to node
+                const t = this.getNode(node.x + DX[d], node.y + DY[d] + 1, node.z + DZ[d]);
+                if (t && t !== node && t.kind === RedstoneGraph.TORCH) outputs.push(t);
+            }
+        }
+        node.outputs = outputs;
+        return outputs;
+    }
+
+    isLitTorch(node) {
+        return node.kind === RedstoneGraph.TORCH && node.type === window.BLOCK.REDSTONE_TORCH;
+    }
+
+    // True if any input of node carries power
+    isPowered(node) {
+        const inputs = this.getInputs(node);
+        for (let i = 0; i < inputs.length; i++) {
+            const n = inputs[i];
+            if (n.kind === RedstoneGraph.WIRE ? this.world.getMetadata(n.x, n.y, n.z) > 0 : this.isLitTorch(n)) return true;
+        }
+        return false;
+    }
+
+    // Called for every component setBlock: drops the node at x, y, z and the cached links of
+    // every node that may point at it. Other nodes keep their identity (and their links).
+    invalidate(x, y, z) {
+        if (y < 0 || y >= this.world.worldHeight) return;
+        this.nodes.delete(this.world.packBlockPos(x, y, z));
+        const offsets = RedstoneGraph.LINK_OFFSETS;
+        for (let i = 3; i < offsets.length; i += 3) {
+            const ny = y + offsets[i + 1];
+            if (ny < 0 || ny >= this.world.worldHeight) continue;
+            const node = this.nodes.get(this.world.packBlockPos(x + offsets[i], ny, z + offsets[i + 2]));
+            if (node) {
+                node.inputs = null;
+                node.outputs = null;
+            }
+        }
+        this.dirty.push(x, y, z);
+    }
+
+    clear() {
+        this.nodes.clear();
+        this.dirty.length = 0;
+    }
+
+    // One redstone step. Wire networks touching an edit are re-solved from their sources
+    // (breadth first, so every wire gets 15 minus its distance to the nearest lit torch), then
+    // lamps, pistons and torches next to an edit or to a wire whose power changed are updated.
+    // Torches change block through setBlock, so what they feed reacts on the next step.
+    propagate() {
+        if (this.dirty.length === 0) return;
+        const world = this.world;
+        if (this.chunkVersion !== world.chunks.version) {
+            this.nodes.clear();
+            this.chunkVersion = world.chunks.version;
+        }
+        const dirty = this.dirty;
+        this.dirty = [];
+        const pass = ++this.pass;
+        const offsets = RedstoneGraph.LINK_OFFSETS;
+
+        const wires = [];
+        const consumers = new Set();
+        for (let i = 0; i < dirty.length; i += 3) {
+            for (let o = 0; o < offsets.length; o += 3) {
+                const n = this.getNode(dirty[i] + offsets[o], dirty[i + 1] + offsets[o + 1], dirty[i + 2] + offsets[o + 2]);
+                if (!n) continue;
+                if (n.kind === RedstoneGraph.WIRE) wires.push(n);
+                else consumers.add(n);
+            }
+        }
+
+        const network = [];
+        const queue = [];
+        for (const seed of wires) {
+            if (seed.pass === pass) continue;
+            // Collect the connected wires
+            network.length = 0;
+            seed.pass = pass;
+            network.push(seed);
+            for (let i = 0; i < network.length; i++) {
+                const inputs = this.getInputs(network[i]);
+                for (let j = 0; j < inputs.length; j++) {
+                    const n = inputs[j];
+                    if (n.kind === RedstoneGraph.WIRE && n.pass !== pass) {
+                        n.pass = pass;
+                        network.push(n);
+                    }
+                }
+            }
+
+            // Solve power from the torches feeding it
+            queue.length = 0;
+            for (let i = 0; i < network.length; i++) {
+                const w = network[i];
+                w.power = 0;
+                const inputs = this.getInputs(w);
+                for (let j = 0; j < inputs.length; j++) {
+                    if (this.isLitTorch(inputs[j])) {
+                        w.power = 15;
+                        queue.push(w);
+                        break;
+                    }
+                }
+            }
+            for (let i = 0; i < queue.length; i++) {
+                const w = queue[i];
+                if (w.power <= 1) continue;
+                const inputs = this.getInputs(w);
+                for (let j = 0; j < inputs.length; j++) {
+                    const n = inputs[j];
+                    if (n.kind === RedstoneGraph.WIRE && n.power < w.power - 1) {
+                        n.power = w.power - 1;
+                        queue.push(n);
+                    }
+                }
+            }
+
+            for (let i = 0; i < network.length; i++) {
+                const w = network[i];
+                if (world.getMetadata(w.x, w.y, w.z) === w.power) continue;
+                world.setMetadata(w.x, w.y, w.z, w.power);
+                const outputs = this.getOutputs(w);
+                for (let j = 0; j < outputs.length; j++) {
+                    if (outputs[j].kind !== RedstoneGraph.WIRE) consumers.add(outputs[j]);
+                }
+            }
+        }
+
+        const B = window.BLOCK;
+        for (const node of consumers) {
+            const powered = this.isPowered(node);
+            if (node.kind === RedstoneGraph.LAMP) {
+                const type = powered ? B.REDSTONE_LAMP_ACTIVE : B.REDSTONE_LAMP;
+                if (node.type !== type) world.setBlock(node.x, node.y, node.z, type);
+            } else if (node.kind === RedstoneGraph.TORCH) {
+                const type = powered ? B.REDSTONE_TORCH_OFF : B.REDSTONE_TORCH;
+                if (node.type !== type) world.setBlock(node.x, node.y, node.z, type);
+            } else if (node.kind === RedstoneGraph.PISTON) {
+                const meta = world.getMetadata(node.x, node.y, node.z);
+                const extended = (meta & 8) !== 0;
+                if (powered && !extended) world.extendPiston(node.x, node.y, node.z, meta);
+                else if (!powered && extended) world.retractPiston(node.x, node.y, node.z, meta);
+            }
+        }
+    }
+}
+
+RedstoneGraph.WIRE = 1;
+RedstoneGraph.TORCH = 2;
+RedstoneGraph.LAMP = 3;
+RedstoneGraph.PISTON = 4;
+
+// Positions (dx, dy, dz triples, the block itself first) whose nodes can link to a block: its neighbours,
+// torches standing on a block next to it, and nodes next to the block under a torch
+RedstoneGraph.LINK_OFFSETS = (() => {
+    const seen = new Set();
+    const out = [];
+    const add = (dx, dy, dz) => {
+        const k = dx + ',' + dy + ',' + dz;
+        if (seen.has(k)) return;
+        seen.add(k);
+        out.push(dx, dy, dz);
+    };
+    const dirs = [[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]];
+    add(0, 0, 0);
+    for (const [dx, dy, dz] of dirs) {
+        add(dx, dy, dz);
+        add(dx, dy + 1, dz);
+        add(dx, dy - 1, dz);
+    }
+    return out;
+})();
+
 class World {
     constructor() {
-        this.chunks = new Map();
-        this.pendingBlocks = new Map();
+        this.chunks = new ChunkMap();
+        this.pendingBlocks = new Map(); // Chunk key -> blocks waiting for that chunk to exist
+        // Last chunk returned by getChunk (valid while chunks.version is unchanged)
+        this.lastChunk = null;
+        this.lastChunkVersion = -1;
         this.blockEntities = new Map(); // Store complex data like Furnace state { "x,y,z": { ... } }
+        // Furnaces and brewing stands with work to do; the rest sleep until woken (see wakeBlockEntity)
+        this.activeBlockEntities = new Set();
         this.chunkSize = 16;
         this.renderDistance = 6;
         this.worldHeight = 128;
@@ -10,28 +369,186 @@ class World {
 
         this.biomeManager = new window.BiomeManager(this.seed);
         this.structureManager = new window.StructureManager(this);
-
-        this.activeFluids = new Set();
-        this.activeRedstone = new Set();
-        this.fluidTickTimer = 0;
+        // Terrain noise follows the world seed
+        if (window.perlin && window.perlin.setSeed) window.perlin.setSeed(this.seed);
+
+        // Edit transactions (see beginEdit/endEdit)
+        this.editDepth = 0;
+        this.editLight = null; // Map of section key -> edited bounds needing a light recalc
+        this.editChanges = null; // Block changes made during the transaction
+
+        // Light engine queues (see propagateLight/unpropagateLight)
+        this.lightAddQueue = new LightQueue();
+        this.lightRemoveQueue = new LightQueue();
+        this.lightOriginX = 0;
+        this.lightOriginZ = 0;
+        this.lightCacheChunk = null;
+        this.lightSteps = 0; // BFS steps taken by the last light update
+
+        // Scheduled block ticks (see tick())
+        this.tickCount = 0;
+        this.fluidTicks = new BlockTickQueue(2, 512); // Water moves every 2 ticks (100ms at 20 TPS)
+        this.redstoneTicks = new BlockTickQueue(1, 1024);
+        this.redstone = new RedstoneGraph(this);
+        // Random ticks per section per game tick (see randomTick)
+        this.randomTickSpeed = World.RANDOM_TICK_SPEED;
 
         this.dimension = 'overworld'; // 'overworld', 'nether'
 
+        // IndexedDB world store (see js/storage.js); null falls back to localStorage saves
+        this.store = null;
+        this.saveSlot = null; // Slot the loaded world was last saved to / loaded from
+        this.storedChunks = new Set(); // storedChunkKey of every chunk saved in saveSlot
+        this.loadingChunks = new Set(); // storedChunkKeys being read back from the store
+
         this.weather = 'clear'; // 'clear', 'rain', 'snow'
         this.weatherTimer = 0;
     }
 
+    setSeed(seed) {
+        this.seed = seed;
+        this.biomeManager = new window.BiomeManager(seed);
+        if (window.perlin && window.perlin.setSeed) window.perlin.setSeed(seed);
+    }
+
+    // Fills out[x + z*16] with noise(x0 + x*step, z0 + z*step, w) for one chunk's columns.
+    // Uses the batch sampler when the noise source has one (mocks may only provide noise()).
+    noiseGrid2D(out, x0, z0, step, w) {
+        const noise = window.perlin;
+        const size = this.chunkSize;
+        if (noise.fill2D) return noise.fill2D(out, x0, z0, size, size, step, w);
+        for (let z = 0; z < size; z++) {
+            for (let x = 0; x < size; x++) out[x + z * size] = noise.noise(x0 + x * step, z0 + z * step, w);
+        }
+        return out;
+    }
+
+    // Fills out in chunk layout (x + z*16 + y*256) with noise(x0 + x*step, y0 + y*step, z0 + z*step)
+    noiseGrid3D(out, x0, y0, z0, height, step) {
+        const noise = window.perlin;
+        const size = this.chunkSize;
+        if (noise.fill3D) return noise.fill3D(out, x0, y0, z0, size, height, size, step);
+        for (let y = 0; y < height; y++) {
+            for (let z = 0; z < size; z++) {
+                for (let x = 0; x < size; x++) {
+                    out[x + z * size + y * size * size] = noise.noise(x0 + x * step, y0 + y * step, z0 + z * step);
+                }
+            }
+        }
+        return out;
+    }
+
+    // Block positions as one integer: x and z offset by 2^20 (21 bits each), y in the low 7 bits
+    packBlockPos(x, y, z) {
+        return ((x + 1048576) * 2097152 + (z + 1048576)) * 128 + y;
+    }
+
+    // Scheduled block ticks
+    // Fluids and redstone queue their updates in BlockTickQueues instead of string sets.
+    // tick() runs whatever is due, at most queue.budget updates per queue, so a flooding
+    // cave or a big circuit spreads its work over several ticks instead of stalling a frame.
+    scheduleBlockTick(queue, x, y, z, delay = queue.delay) {
+        if (y < 0 || y >= this.worldHeight) return;
+        queue.schedule(this.packBlockPos(x, y, z), this.tickCount + delay);
+    }
+
+    scheduleFluidTick(x, y, z, delay) {
+        this.scheduleBlockTick(this.fluidTicks, x, y, z, delay);
+    }
+
+    scheduleRedstoneTick(x, y, z, delay) {
+        this.scheduleBlockTick(this.redstoneTicks, x, y, z, delay);
+    }
+
+    // Runs up to budget updates due by tick through handler(x, y, z). Only positions that
+    // were ready when it started are run; anything scheduled meanwhile waits for a later call.
+    runBlockTicks(queue, tick, budget, handler) {
+        queue.collect(tick);
+        const ready = queue.ready;
+        const end = Math.min(ready.length, queue.readyHead + budget);
+        let ran = 0;
+        while (queue.readyHead < end) {
+            const pos = ready[queue.readyHead++];
+            queue.pending.delete(pos);
+            const y = pos % 128;
+            const xz = (pos - y) / 128;
+            const z = xz % 2097152 - 1048576;
+            const x = (xz - z - 1048576) / 2097152 - 1048576;
+            handler.call(this, x, y, z);
+            ran++;
+        }
+        if (queue.readyHead === ready.length) {
+            ready.length = 0;
+            queue.readyHead = 0;
+        } else if (queue.readyHead > 4096) {
+            // Long backlog: drop the consumed front now and then
+            ready.splice(0, queue.readyHead);
+            queue.readyHead = 0;
+        }
+        return ran;
+    }
+
+    // One game tick of world simulation (Game runs this at Game.TICK_RATE)
+    tick() {
+        this.tickCount++;
+        this.runBlockTicks(this.fluidTicks, this.tickCount, this.fluidTicks.budget, this.fluidTick);
+        this.runBlockTicks(this.redstoneTicks, this.tickCount, this.redstoneTicks.budget, this.redstoneTick);
+        this.redstone.propagate();
+
+        if (this.tickCount % World.COMPACT_INTERVAL === 0 && this.game && this.game.player) {
+            const p = this.game.player;
+            this.compactIdleChunks(Math.floor(p.x / this.chunkSize), Math.floor(p.z / this.chunkSize));
+        }
+    }
+
+    // Second-chance sweep: chunks that were not expanded or edited since the previous sweep
+    // switch to compact palette storage (see Chunk.compact). The 3x3 chunks around the
+    // player stay dense since that is where edits, light and fluid updates happen.
+    compactIdleChunks(centerCX, centerCZ) {
+        let compacted = 0;
+        for (const chunk of this.chunks.values()) {
+            if (chunk.isCompact()) continue;
+            if (chunk.touched || chunk.modified || !chunk.lightReady) {
+                chunk.touched = false;
+                continue;
+            }
+            if (Math.abs(chunk.cx - centerCX) <= 1 && Math.abs(chunk.cz - centerCZ) <= 1) continue;
+            chunk.compact();
+            compacted++;
+        }
+        return compacted;
+    }
+
     setWeather(type) {
         this.weather = type;
         if (window.game && window.game.chat) window.game.chat.addMessage(`Weather changed to ${type}`);
     }
 
+    // Packs chunk coordinates into one integer (16 bits each, so +-32768 chunks per axis)
     getChunkKey(cx, cz) {
-        return `${cx},${cz}`;
+        return ((cx & 0xFFFF) << 16) | (cz & 0xFFFF);
+    }
+
+    chunkKeyX(key) {
+        return key >> 16;
+    }
+
+    chunkKeyZ(key) {
+        return (key << 16) >> 16;
     }
 
     getChunk(cx, cz) {
-        return this.chunks.get(this.getChunkKey(cx, cz));
+        // Consecutive lookups nearly always hit the same chunk
+        const last = this.lastChunk;
+        if (last && last.cx === cx && last.cz === cz && this.lastChunkVersion === this.chunks.version) {
+            return last;
+        }
+        const chunk = this.chunks.get(this.getChunkKey(cx, cz));
+        if (chunk) {
+            this.lastChunk = chunk;
+            this.lastChunkVersion = this.chunks.version;
+        }
+        return chunk;
     }
 
     getChunkAt(x, z) {
@@ -45,18 +562,56 @@ class World {
     }
 
     setBlockEntity(x, y, z, data) {
-        this.blockEntities.set(`${x},${y},${z}`, data);
+        const key = `${x},${y},${z}`;
+        const old = this.blockEntities.get(key);
+        if (old) this.activeBlockEntities.delete(old);
+        this.blockEntities.set(key, data);
+        this.wakeBlockEntity(data);
     }
 
     removeBlockEntity(x, y, z) {
-        this.blockEntities.delete(`${x},${y},${z}`);
+        const key = `${x},${y},${z}`;
+        const old = this.blockEntities.get(key);
+        if (old) this.activeBlockEntities.delete(old);
+        this.blockEntities.delete(key);
+    }
+
+    // Puts a furnace or brewing stand back on the per-tick list after its slots changed.
+    // Game.updateBlockEntities drops it again once it has nothing left to do.
+    wakeBlockEntity(data) {
+        if (data && World.TICKING_ENTITIES.has(data.type)) this.activeBlockEntities.add(data);
+    }
+
+    // Random ticks: every game tick, randomTickSpeed random positions in each section of
+    // each loaded chunk; fn(x, y, z, type) is called for the ones holding a block that takes
+    // random ticks. Sections without such blocks are skipped, so the cost follows the number
+    // of farmed sections rather than the number of crops.
+    randomTick(fn) {
+        const count = this.randomTickSpeed;
+        if (count <= 0) return;
+        const ticks = Chunk.getRandomTickTypes();
+        const size = this.chunkSize;
+        for (const chunk of this.chunks.values()) {
+            let mask = chunk.getRandomTickSections();
+            while (mask) {
+                const s = 31 - Math.clz32(mask);
+                mask &= ~(1 << s);
+                const base = s * PalettedArray.SIZE;
+                for (let k = 0; k < count; k++) {
+                    const i = base + ((Math.random() * PalettedArray.SIZE) | 0);
+                    const type = chunk.getBlockAtIndex(i);
+                    if (!ticks[type]) continue;
+                    fn(chunk.cx * size + (i & 15), i >> 8, chunk.cz * size + ((i >> 4) & 15), type);
+                }
+            }
+        }
     }
 
     setBlock(x, y, z, type) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
+        const lx = x - cx * this.chunkSize;
+        const lz = z - cz * this.chunkSize;
 
         let chunk = this.getChunk(cx, cz);
         if (!chunk) {
@@ -75,15 +630,18 @@ class World {
         // Remove old block entity if it exists
         this.removeBlockEntity(x, y, z);
 
+        if (this.editChanges) this.editChanges.push({x, y, z, type});
+        if (this.game && this.game.navigation) this.game.navigation.blockChanged(x, y, z);
+
         // Update neighbors if on edge to ensure culling is updated
-        if (lx === 0) { const c = this.getChunk(cx - 1, cz); if (c) c.modified = true; }
-        if (lx === this.chunkSize - 1) { const c = this.getChunk(cx + 1, cz); if (c) c.modified = true; }
-        if (lz === 0) { const c = this.getChunk(cx, cz - 1); if (c) c.modified = true; }
-        if (lz === this.chunkSize - 1) { const c = this.getChunk(cx, cz + 1); if (c) c.modified = true; }
+        if (lx === 0) this.markChunkDirty(this.getChunk(cx - 1, cz), y);
+        if (lx === this.chunkSize - 1) this.markChunkDirty(this.getChunk(cx + 1, cz), y);
+        if (lz === 0) this.markChunkDirty(this.getChunk(cx, cz - 1), y);
+        if (lz === this.chunkSize - 1) this.markChunkDirty(this.getChunk(cx, cz + 1), y);
 
         // Fluid Updates
         if (type === BLOCK.WATER) {
-            this.activeFluids.add(`${x},${y},${z}`);
+            this.scheduleFluidTick(x, y, z);
         } else if (oldType === BLOCK.WATER) {
              // Removed water, check neighbors to update their flow
              this.scheduleNeighborFluidUpdates(x, y, z);
@@ -96,17 +654,14 @@ class World {
         const blockDef = window.BLOCKS[type];
         const oldBlockDef = window.BLOCKS[oldType];
 
-        // If placed a light source
-        if (blockDef && blockDef.light) {
-            this.updateLighting(x, y, z);
-        }
-        // If removed a light source or placed an opaque block blocking light
-        else if ((oldBlockDef && oldBlockDef.light) || (blockDef && blockDef.solid)) {
-             this.recalcLocalLight(x, y, z);
-        }
-        // If removed an opaque block, light might flow in
-        else if (oldBlockDef && oldBlockDef.solid && (!blockDef || !blockDef.solid)) {
-             this.recalcLocalLight(x, y, z);
+        // Inside an edit transaction, lighting is redone once per touched section in endEdit
+        if (this.editDepth > 0) {
+            const { pass, emit } = Chunk.getLightTables();
+            if (pass[type] !== pass[oldType] || emit[type] !== emit[oldType]) {
+                this.queueEditLight(x, y, z);
+            }
+        } else {
+            this.updateBlockLight(x, y, z, oldType, type);
         }
 
         // Check Structural Integrity of neighbors
@@ -114,40 +669,97 @@ class World {
 
         // Sponge Logic
         if (type === window.BLOCK.SPONGE) {
-            for (let dx = -2; dx <= 2; dx++) {
-                for (let dy = -2; dy <= 2; dy++) {
-                    for (let dz = -2; dz <= 2; dz++) {
-                        // Max distance 2 (up to 5x5x5 cube = 125 blocks minus corners maybe, or just the cube)
-                        // A true Minecraft sponge absorbs water within taxicab geometry or just a 5x5x5. We'll use 5x5x5.
-                        if (Math.abs(dx) + Math.abs(dy) + Math.abs(dz) <= 7) { // Simplified
-                            const nx = x + dx;
-                            const ny = y + dy;
-                            const nz = z + dz;
-                            if (this.getBlock(nx, ny, nz) === window.BLOCK.WATER) {
-                                this.setBlock(nx, ny, nz, window.BLOCK.AIR);
-                                // Create particles here if we have reference to game, or just rely on block update.
-                                // It might be good to update network if multiplayer.
-                                if (this.game && this.game.network) {
-                                    this.game.network.sendBlockUpdate(nx, ny, nz, window.BLOCK.AIR);
+            this.batchEdit(() => {
+                // Blocks around the sponge in one read, indexed (dx+2) + (dz+2)*5 + (dy+2)*25
+                const around = this.getBlocksInBox(x - 2, y - 2, z - 2, x + 2, y + 2, z + 2);
+                for (let dx = -2; dx <= 2; dx++) {
+                    for (let dy = -2; dy <= 2; dy++) {
+                        for (let dz = -2; dz <= 2; dz++) {
+                            // Max distance 2 (up to 5x5x5 cube = 125 blocks minus corners maybe, or just the cube)
+                            // A true Minecraft sponge absorbs water within taxicab geometry or just a 5x5x5. We'll use 5x5x5.
+                            if (Math.abs(dx) + Math.abs(dy) + Math.abs(dz) <= 7) { // Simplified
+                                const nx = x + dx;
+                                const ny = y + dy;
+                                const nz = z + dz;
+                                if (around[(dx + 2) + (dz + 2) * 5 + (dy + 2) * 25] === window.BLOCK.WATER) {
+                                    this.setBlock(nx, ny, nz, window.BLOCK.AIR);
+                                    // Create particles here if we have reference to game, or just rely on block update.
+                                    // It might be good to update network if multiplayer.
+                                    if (this.game && this.game.network) {
+                                        this.game.network.sendBlockUpdate(nx, ny, nz, window.BLOCK.AIR);
+                                    }
                                 }
                             }
                         }
                     }
                 }
-            }
+            });
         }
 
         // Redstone Updates
-        // If we placed or removed something that interacts with redstone
-        if ((blockDef && (blockDef.isWire || blockDef.isTorch || blockDef.id === window.BLOCK.REDSTONE_LAMP || blockDef.id === window.BLOCK.REDSTONE_LAMP_ACTIVE)) ||
-            (oldBlockDef && (oldBlockDef.isWire || oldBlockDef.isTorch || oldBlockDef.id === window.BLOCK.REDSTONE_LAMP || oldBlockDef.id === window.BLOCK.REDSTONE_LAMP_ACTIVE))) {
-            this.scheduleNeighborRedstoneUpdates(x, y, z);
-            this.activeRedstone.add(`${x},${y},${z}`);
-        } else {
-            // Placing a block might connect/disconnect wire, or block a signal?
-            // For now, simple neighbor check
-             this.scheduleNeighborRedstoneUpdates(x, y, z);
+        // Only edits to redstone components can change the network (see RedstoneGraph)
+        if (RedstoneGraph.kindOf(type) || RedstoneGraph.kindOf(oldType)) {
+            this.scheduleRedstoneTick(x, y, z);
+        }
+    }
+
+    markChunkDirty(chunk, y) {
+        if (!chunk) return;
+        if (chunk.markDirty) chunk.markDirty(y);
+        else chunk.modified = true;
+    }
+
+    // Edit transactions: wrap bulk edits (explosions, sponges, structures) in
+    // beginEdit()/endEdit() so lighting is recalculated once per touched 16x16x16
+    // section when the outermost transaction ends, instead of once per block.
+    // Meshes already rebuild per dirty section on the next frame.
+    // endEdit() returns the list of {x, y, z, type} changes made inside the transaction.
+    beginEdit() {
+        if (this.editDepth === 0) {
+            this.editLight = new Map();
+            this.editChanges = [];
+        }
+        this.editDepth++;
+    }
+
+    endEdit() {
+        if (this.editDepth === 0) return [];
+        this.editDepth--;
+        if (this.editDepth > 0) return [];
+
+        const light = this.editLight;
+        const changes = this.editChanges;
+        this.editLight = null;
+        this.editChanges = null;
+
+        light.forEach(b => {
+            this.recalcLightBox(b.minX, b.minY, b.minZ, b.maxX, b.maxY, b.maxZ);
+        });
+        return changes;
+    }
+
+    // Runs fn inside an edit transaction and returns the changes it made
+    batchEdit(fn) {
+        let changes;
+        this.beginEdit();
+        try {
+            fn();
+        } finally {
+            changes = this.endEdit();
         }
+        return changes;
+    }
+
+    queueEditLight(x, y, z) {
+        const key = `${x >> 4},${y >> 4},${z >> 4}`;
+        const b = this.editLight.get(key);
+        if (!b) {
+            this.editLight.set(key, { minX: x, minY: y, minZ: z, maxX: x, maxY: y, maxZ: z });
+            return;
+        }
+        if (x < b.minX) b.minX = x; else if (x > b.maxX) b.maxX = x;
+        if (y < b.minY) b.minY = y; else if (y > b.maxY) b.maxY = y;
+        if (z < b.minZ) b.minZ = z; else if (z > b.maxZ) b.maxZ = z;
     }
 
     checkNeighborIntegrity(x, y, z) {
@@ -228,140 +840,15 @@ class World {
         }
     }
 
-    scheduleNeighborRedstoneUpdates(x, y, z) {
-        const neighbors = [
-            {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-            {x:x, y:y+1, z:z}, {x:x, y:y-1, z:z},
-            {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1}
-        ];
-        for (const n of neighbors) {
-            this.activeRedstone.add(`${n.x},${n.y},${n.z}`);
-        }
-    }
-
-    isBlockPowered(x, y, z) {
-        const neighbors = [
-            {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-            {x:x, y:y+1, z:z}, {x:x, y:y-1, z:z},
-            {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1}
-        ];
-        for (const n of neighbors) {
-            const type = this.getBlock(n.x, n.y, n.z);
-            const def = window.BLOCKS[type];
-            if (def) {
-                if (def.isWire && this.getMetadata(n.x, n.y, n.z) > 0) return true;
-                if (def.isTorch && def.id !== window.BLOCK.TORCH && type !== window.BLOCK.REDSTONE_TORCH_OFF) {
-                    // Torch powers neighbors EXCEPT the one it is attached to.
-                    // Assuming standing torch attached to block below (n.y - 1).
-                    // If the torch is at n.x, n.y, n.z, and we are checking x, y, z.
-                    // If n.y == y + 1, then the torch is above us, so we are the block below.
-                    if (n.y === y + 1) continue;
-                    return true;
-                }
-                if (type === window.BLOCK.REDSTONE_LAMP_ACTIVE) return false;
-            }
-        }
-        return false;
-    }
-
+    // Runs every pending redstone update now (one redstone step, ignoring due ticks and budget)
     updateRedstone() {
-        if (this.activeRedstone.size === 0) return;
-
-        // Process a batch (breadth-firstish)
-        // We iterate current set, clear it. Any new updates go to next frame/tick.
-        const processing = Array.from(this.activeRedstone);
-        this.activeRedstone.clear();
-
-        for (const key of processing) {
-            const [x, y, z] = key.split(',').map(Number);
-            const type = this.getBlock(x, y, z);
-            const blockDef = window.BLOCKS[type];
-            if (!blockDef) continue;
-
-            if (blockDef.isWire) {
-                const currentPower = this.getMetadata(x, y, z);
-                let newPower = 0;
-
-                const neighbors = [
-                    {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-                    {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1},
-                    {x:x, y:y+1, z:z}, {x:x, y:y-1, z:z}
-                ];
-
-                for (const n of neighbors) {
-                    const nType = this.getBlock(n.x, n.y, n.z);
-                    const nDef = window.BLOCKS[nType];
-                    if (!nDef) continue;
-
-                    if (nDef.isTorch && nType !== window.BLOCK.REDSTONE_TORCH_OFF) {
-                        newPower = 15;
-                    } else if (nDef.isWire) {
-                        const nPower = this.getMetadata(n.x, n.y, n.z);
-                        if (nPower - 1 > newPower) {
-                            newPower = nPower - 1;
-                        }
-                    } else if (nType === window.BLOCK.REDSTONE_LAMP_ACTIVE) {
-                         // Active lamp doesn't power wire back unless it's a source block?
-                         // In MC, Lamps are consumers.
-                    }
-                    // TODO: Levers, Buttons, etc.
-                }
-
-                if (newPower !== currentPower) {
-                    this.setMetadata(x, y, z, newPower);
-                    // Notify neighbors of change
-                    this.scheduleNeighborRedstoneUpdates(x, y, z);
-                }
-            } else if (type === window.BLOCK.REDSTONE_LAMP || type === window.BLOCK.REDSTONE_LAMP_ACTIVE) {
-                 let powered = false;
-                 const neighbors = [
-                    {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-                    {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1},
-                    {x:x, y:y+1, z:z}, {x:x, y:y-1, z:z}
-                ];
-
-                for (const n of neighbors) {
-                     const nType = this.getBlock(n.x, n.y, n.z);
-                     const nDef = window.BLOCKS[nType];
-                     if (nDef) {
-                         if (nDef.isTorch) powered = true;
-                         else if (nDef.isWire && this.getMetadata(n.x, n.y, n.z) > 0) powered = true;
-                     }
-                }
-
-                if (powered && type === window.BLOCK.REDSTONE_LAMP) {
-                    this.setBlock(x, y, z, window.BLOCK.REDSTONE_LAMP_ACTIVE);
-                    // setBlock triggers scheduleNeighborRedstoneUpdates, so neighbors will know lamp changed
-                } else if (!powered && type === window.BLOCK.REDSTONE_LAMP_ACTIVE) {
-                    this.setBlock(x, y, z, window.BLOCK.REDSTONE_LAMP);
-                }
-            } else if (blockDef.isTorch && blockDef.id !== window.BLOCK.TORCH) { // Redstone Torch
-                 // Check block below
-                 const supportPos = {x, y: y-1, z};
-                 const supportType = this.getBlock(supportPos.x, supportPos.y, supportPos.z);
-
-                 // Check if support block is receiving power
-                 const isPowered = this.isBlockPowered(supportPos.x, supportPos.y, supportPos.z);
-
-                 if (isPowered && type === window.BLOCK.REDSTONE_TORCH) {
-                     this.setBlock(x, y, z, window.BLOCK.REDSTONE_TORCH_OFF);
-                     this.scheduleNeighborRedstoneUpdates(x, y, z); // Notify neighbors (wire above/side)
-                 } else if (!isPowered && type === window.BLOCK.REDSTONE_TORCH_OFF) {
-                     this.setBlock(x, y, z, window.BLOCK.REDSTONE_TORCH);
-                     this.scheduleNeighborRedstoneUpdates(x, y, z);
-                 }
-            } else if (blockDef.isPiston) {
-                const powered = this.isBlockPowered(x, y, z);
-                const meta = this.getMetadata(x, y, z);
-                const extended = (meta & 8) !== 0;
+        this.runBlockTicks(this.redstoneTicks, Infinity, Infinity, this.redstoneTick);
+        this.redstone.propagate();
+    }
 
-                if (powered && !extended) {
-                    this.extendPiston(x, y, z, meta);
-                } else if (!powered && extended) {
-                    this.retractPiston(x, y, z, meta);
-                }
-            }
-        }
+    // A component at x, y, z was placed, removed or changed: recompile around it
+    redstoneTick(x, y, z) {
+        this.redstone.invalidate(x, y, z);
     }
 
     getDirectionVector(orientation) {
@@ -484,14 +971,13 @@ class World {
     }
 
     scheduleNeighborFluidUpdates(x, y, z) {
-        const neighbors = [
-            {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-            {x:x, y:y+1, z:z}, {x:x, y:y-1, z:z}, // Check Up too? If water is above, it flows down.
-            {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1}
-        ];
-        for (const n of neighbors) {
-            if (this.getBlock(n.x, n.y, n.z) === BLOCK.WATER) {
-                this.activeFluids.add(`${n.x},${n.y},${n.z}`);
+        // Check Up too: if water is above, it flows down.
+        for (let d = 0; d < 6; d++) {
+            const nx = x + World.NEIGHBOR_DX[d];
+            const ny = y + World.NEIGHBOR_DY[d];
+            const nz = z + World.NEIGHBOR_DZ[d];
+            if (this.getBlock(nx, ny, nz) === BLOCK.WATER) {
+                this.scheduleFluidTick(nx, ny, nz);
             }
         }
     }
@@ -506,354 +992,567 @@ class World {
         this.updateFluids();
     }
 
+    // Runs every pending fluid update now (one fluid step, ignoring due ticks and budget).
+    // Updates scheduled while it runs wait for the next step.
     updateFluids() {
-        if (this.activeFluids.size === 0) return;
+        this.runBlockTicks(this.fluidTicks, Infinity, Infinity, this.fluidTick);
+    }
 
-        // Process a batch
-        const processing = Array.from(this.activeFluids);
-        this.activeFluids.clear();
+    // Horizontal neighbours are directions 0, 1, 4, 5 of NEIGHBOR_DX/DZ (+x, -x, +z, -z)
+    fluidTick(x, y, z) {
+        const type = this.getBlock(x, y, z);
+        if (type !== BLOCK.WATER) return;
 
-        for (const key of processing) {
-            const [x, y, z] = key.split(',').map(Number);
-            const type = this.getBlock(x, y, z);
-            if (type !== BLOCK.WATER) continue;
-
-            let meta = this.getMetadata(x, y, z);
-
-            // Infinite Source Creation
-            if (meta !== 8) {
-                let sourceNeighbors = 0;
-                const horizontal = [
-                    {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-                    {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1}
-                ];
-                for (const n of horizontal) {
-                     if (this.getBlock(n.x, n.y, n.z) === BLOCK.WATER && this.getMetadata(n.x, n.y, n.z) === 8) {
-                         sourceNeighbors++;
-                     }
-                }
-                if (sourceNeighbors >= 2) {
-                    meta = 8;
-                    this.setMetadata(x, y, z, 8);
-                }
+        let meta = this.getMetadata(x, y, z);
+        const DX = World.NEIGHBOR_DX, DZ = World.NEIGHBOR_DZ, SIDES = World.HORIZONTAL_DIRS;
+
+        // Infinite Source Creation
+        if (meta !== 8) {
+            let sourceNeighbors = 0;
+            for (const d of SIDES) {
+                 if (this.getBlock(x + DX[d], y, z + DZ[d]) === BLOCK.WATER && this.getMetadata(x + DX[d], y, z + DZ[d]) === 8) {
+                     sourceNeighbors++;
+                 }
             }
+            if (sourceNeighbors >= 2) {
+                meta = 8;
+                this.setMetadata(x, y, z, 8);
+            }
+        }
 
-            const isSource = meta === 8; // Assuming 8 is source
+        const isSource = meta === 8; // Assuming 8 is source
 
-            // Flow Logic
-            // 1. Flow Down
-            const below = { x, y: y - 1, z };
-            const belowType = this.getBlock(below.x, below.y, below.z);
+        // Flow Logic
+        // 1. Flow Down
+        const belowType = this.getBlock(x, y - 1, z);
 
-            if (belowType === BLOCK.AIR || (belowType === BLOCK.WATER && this.getMetadata(below.x, below.y, below.z) !== 8)) {
-                // Flow down (set to max flow level 7, or 8 if we want falling water to be full)
-                // If below is water but source, don't overwrite source.
-                // If below is water not source, update it.
-                if (belowType !== BLOCK.WATER || this.getMetadata(below.x, below.y, below.z) !== 7) {
-                     this.setBlock(below.x, below.y, below.z, BLOCK.WATER);
-                     this.setMetadata(below.x, below.y, below.z, 7); // Falling water
-                }
-                // Don't flow sideways if falling? MC rule: if falling, doesn't spread sideways unless solid below.
-                continue;
-            } else if (window.BLOCKS[belowType] && !window.BLOCKS[belowType].solid && belowType !== BLOCK.WATER) {
-                 // Wash away non-solid blocks (like grass, torches, flowers)
-                 this.setBlock(below.x, below.y, below.z, BLOCK.WATER);
-                 this.setMetadata(below.x, below.y, below.z, 7); // Falling water
-                 continue;
+        if (belowType === BLOCK.AIR || (belowType === BLOCK.WATER && this.getMetadata(x, y - 1, z) !== 8)) {
+            // Flow down (set to max flow level 7, or 8 if we want falling water to be full)
+            // If below is water but source, don't overwrite source.
+            // If below is water not source, update it.
+            if (belowType !== BLOCK.WATER || this.getMetadata(x, y - 1, z) !== 7) {
+                 this.setBlock(x, y - 1, z, BLOCK.WATER);
+                 this.setMetadata(x, y - 1, z, 7); // Falling water
             }
+            // Don't flow sideways if falling? MC rule: if falling, doesn't spread sideways unless solid below.
+            return;
+        } else if (window.BLOCKS[belowType] && !window.BLOCKS[belowType].solid && belowType !== BLOCK.WATER) {
+             // Wash away non-solid blocks (like grass, torches, flowers)
+             this.setBlock(x, y - 1, z, BLOCK.WATER);
+             this.setMetadata(x, y - 1, z, 7); // Falling water
+             return;
+        }
 
-            // 2. Flow Sideways (if blocked below)
-            if (belowType !== BLOCK.AIR && (belowType === BLOCK.WATER || (window.BLOCKS[belowType] && window.BLOCKS[belowType].solid))) {
-                const decay = 1;
-                const newMeta = meta - decay;
-
-                if (newMeta > 0) {
-                     const neighbors = [
-                        {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-                        {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1}
-                     ];
-                     for (const n of neighbors) {
-                         const nType = this.getBlock(n.x, n.y, n.z);
-                         if (nType === BLOCK.AIR) {
-                             this.setBlock(n.x, n.y, n.z, BLOCK.WATER);
-                             this.setMetadata(n.x, n.y, n.z, newMeta);
-                         } else if (nType === BLOCK.WATER) {
-                             const nMeta = this.getMetadata(n.x, n.y, n.z);
-                             if (nMeta < newMeta && nMeta !== 8) { // Don't overwrite source or higher level
-                                 this.setMetadata(n.x, n.y, n.z, newMeta);
-                                 this.activeFluids.add(`${n.x},${n.y},${n.z}`); // Re-evaluate neighbor
-                             }
+        // 2. Flow Sideways (if blocked below)
+        if (belowType !== BLOCK.AIR && (belowType === BLOCK.WATER || (window.BLOCKS[belowType] && window.BLOCKS[belowType].solid))) {
+            const decay = 1;
+            const newMeta = meta - decay;
+
+            if (newMeta > 0) {
+                 for (const d of SIDES) {
+                     const nx = x + DX[d];
+                     const nz = z + DZ[d];
+                     const nType = this.getBlock(nx, y, nz);
+                     if (nType === BLOCK.AIR) {
+                         this.setBlock(nx, y, nz, BLOCK.WATER);
+                         this.setMetadata(nx, y, nz, newMeta);
+                     } else if (nType === BLOCK.WATER) {
+                         const nMeta = this.getMetadata(nx, y, nz);
+                         if (nMeta < newMeta && nMeta !== 8) { // Don't overwrite source or higher level
+                             this.setMetadata(nx, y, nz, newMeta);
+                             this.scheduleFluidTick(nx, y, nz); // Re-evaluate neighbor
                          }
                      }
-                }
+                 }
             }
+        }
 
-            // Check if this block should dry up (if no source)
-            // This is hard with local automata.
-            // MC uses recursions or distance maps.
-            // Simplified: We only spread. We don't dry up unless we check parents.
-            // If we implement drying, we need to check if any neighbor is level+1 or source.
-            // If not, this block turns to air.
-
-            if (!isSource) {
-                let maxNeighbor = 0;
-                // Check neighbors including Up
-                const neighbors = [
-                    {x:x+1, y:y, z:z}, {x:x-1, y:y, z:z},
-                    {x:x, y:y, z:z+1}, {x:x, y:y, z:z-1},
-                    {x:x, y:y+1, z:z} // Up
-                ];
-
-                for (const n of neighbors) {
-                    if (this.getBlock(n.x, n.y, n.z) === BLOCK.WATER) {
-                         const nm = this.getMetadata(n.x, n.y, n.z);
-                         // If neighbor is Up, it feeds us if it's any water (falling)
-                         if (n.y > y) {
-                             maxNeighbor = 8; // Fed from above
-                         } else {
-                             if (nm > maxNeighbor) maxNeighbor = nm;
-                         }
-                    }
+        // Check if this block should dry up (if no source)
+        // This is hard with local automata.
+        // MC uses recursions or distance maps.
+        // Simplified: We only spread. We don't dry up unless we check parents.
+        // If we implement drying, we need to check if any neighbor is level+1 or source.
+        // If not, this block turns to air.
+
+        if (!isSource) {
+            let maxNeighbor = 0;
+            // Check neighbors including Up
+            for (const d of SIDES) {
+                if (this.getBlock(x + DX[d], y, z + DZ[d]) === BLOCK.WATER) {
+                     const nm = this.getMetadata(x + DX[d], y, z + DZ[d]);
+                     if (nm > maxNeighbor) maxNeighbor = nm;
                 }
-
-                if (maxNeighbor === 0 || maxNeighbor - 1 <= 0) {
-                    // Dry up
-                    this.setBlock(x, y, z, BLOCK.AIR);
-                } else if (maxNeighbor === 8) {
-                    // Fed from above, stay at 7 (falling)
-                    if (meta !== 7) {
-                        this.setMetadata(x, y, z, 7);
-                        this.activeFluids.add(key);
-                    }
-                } else {
-                    // Fed from side
-                    const target = maxNeighbor - 1;
-                    if (meta !== target) {
-                        this.setMetadata(x, y, z, target);
-                        this.activeFluids.add(key);
-                    }
+            }
+            // If neighbor is Up, it feeds us if it's any water (falling)
+            if (this.getBlock(x, y + 1, z) === BLOCK.WATER) maxNeighbor = 8; // Fed from above
+
+            if (maxNeighbor === 0 || maxNeighbor - 1 <= 0) {
+                // Dry up
+                this.setBlock(x, y, z, BLOCK.AIR);
+            } else if (maxNeighbor === 8) {
+                // Fed from above, stay at 7 (falling)
+                if (meta !== 7) {
+                    this.setMetadata(x, y, z, 7);
+                    this.scheduleFluidTick(x, y, z);
+                }
+            } else {
+                // Fed from side
+                const target = maxNeighbor - 1;
+                if (meta !== target) {
+                    this.setMetadata(x, y, z, target);
+                    this.scheduleFluidTick(x, y, z);
                 }
             }
         }
     }
 
+    // y of the highest block that isn't air, water or lava (what stands out of the ground)
     getSurfaceHeight(x, z) {
-        // Check if chunk is loaded
-        const cx = Math.floor(x / 16);
-        const cz = Math.floor(z / 16);
-        const chunkId = `${cx},${cz}`;
-        if (!this.chunks.has(chunkId)) {
+        const cx = Math.floor(x / this.chunkSize);
+        const cz = Math.floor(z / this.chunkSize);
+        const chunk = this.getChunk(cx, cz);
+        if (!chunk) {
             return 100; // Safe high value for unloaded chunks
         }
-
-        for (let y = 127; y >= 0; y--) {
-            const block = this.getBlock(x, y, z);
-            if (block !== BLOCK.AIR && block !== BLOCK.WATER && block !== BLOCK.LAVA) {
-                return y;
-            }
-        }
-        return 20; // Default terrain height if no solid blocks found
+        const h = chunk.getMotionBlockingHeight(x - cx * this.chunkSize, z - cz * this.chunkSize);
+        return h > 0 ? h - 1 : 20; // Default terrain height if no solid blocks found
     }
 
+    // Per-block accessors. Local coordinates are x - cx*chunkSize, which equals the old
+    // ((x % size) + size) % size without the two modulos; the chunk comes from getChunk's cache.
     getBlock(x, y, z) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
-
-        let chunk = this.getChunk(cx, cz);
+        const chunk = this.getChunk(cx, cz);
         if (!chunk) return BLOCK.AIR;
-        return chunk.getBlock(lx, y, lz);
+        return chunk.getBlock(x - cx * this.chunkSize, y, z - cz * this.chunkSize);
     }
 
     getMetadata(x, y, z) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
-
-        let chunk = this.getChunk(cx, cz);
+        const chunk = this.getChunk(cx, cz);
         if (!chunk) return 0;
-        return chunk.getMetadata(lx, y, lz);
+        return chunk.getMetadata(x - cx * this.chunkSize, y, z - cz * this.chunkSize);
     }
 
     setMetadata(x, y, z, val) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
-
-        let chunk = this.getChunk(cx, cz);
+        const chunk = this.getChunk(cx, cz);
         if (chunk) {
+            const lx = x - cx * this.chunkSize, lz = z - cz * this.chunkSize;
             chunk.setMetadata(lx, y, lz, val);
+            // Doors, gates and trapdoors open and close through metadata (and stairs turn);
+            // fluid levels and wire power change nothing a mob can walk through
+            const nav = this.game && this.game.navigation;
+            if (nav && window.Physics && window.Physics.shapeUsesMetadata(window.BLOCKS[chunk.getBlock(lx, y, lz)])) {
+                nav.blockChanged(x, y, z);
+            }
         }
     }
 
     getLight(x, y, z) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
-
-        let chunk = this.getChunk(cx, cz);
+        const chunk = this.getChunk(cx, cz);
         if (!chunk) return 15; // Assume bright if unloaded (day) or handle properly
-        return chunk.getLight(lx, y, lz);
+        return chunk.getLight(x - cx * this.chunkSize, y, z - cz * this.chunkSize);
     }
 
     setLight(x, y, z, val) {
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const lx = ((x % this.chunkSize) + this.chunkSize) % this.chunkSize;
-        const lz = ((z % this.chunkSize) + this.chunkSize) % this.chunkSize;
-
-        let chunk = this.getChunk(cx, cz);
+        const chunk = this.getChunk(cx, cz);
         if (chunk) {
-            chunk.setLight(lx, y, lz, val);
+            chunk.setLight(x - cx * this.chunkSize, y, z - cz * this.chunkSize, val);
         }
     }
 
-    updateLighting(x, y, z) {
-        // Simple BFS light propagation from a source
-        const queue = [];
-        const visited = new Set();
+    getSkyLight(x, y, z) {
+        const cx = Math.floor(x / this.chunkSize);
+        const cz = Math.floor(z / this.chunkSize);
+        const chunk = this.getChunk(cx, cz);
+        if (!chunk) return 15;
+        return chunk.getSkyLight(x - cx * this.chunkSize, y, z - cz * this.chunkSize);
+    }
 
-        // Initial check: if we just placed a torch
-        const type = this.getBlock(x, y, z);
-        const blockDef = window.BLOCKS[type];
+    // Bulk reads: copies the blocks of the inclusive box (x0..x1, y0..y1, z0..z1) into a
+    // Uint8Array laid out like a chunk (x + z*sx + y*sx*sz, sizes sx = x1-x0+1 etc.).
+    // Unloaded chunks and rows outside the world read as 0 (air). Pass out to reuse a buffer.
+    getBlocksInBox(x0, y0, z0, x1, y1, z1, out) {
+        return this.readBox('blocks', x0, y0, z0, x1, y1, z1, out);
+    }
 
-        if (blockDef && blockDef.light) {
-            queue.push({x, y, z, level: blockDef.light});
-            this.setLight(x, y, z, blockDef.light);
-        } else {
-             this.recalcLocalLight(x, y, z);
-             return;
+    getMetadataInBox(x0, y0, z0, x1, y1, z1, out) {
+        return this.readBox('metadata', x0, y0, z0, x1, y1, z1, out);
+    }
+
+    readBox(field, x0, y0, z0, x1, y1, z1, out) {
+        const size = this.chunkSize;
+        const sx = x1 - x0 + 1;
+        const sy = y1 - y0 + 1;
+        const sz = z1 - z0 + 1;
+        const volume = sx * sy * sz;
+        if (!out || out.length < volume) out = new Uint8Array(volume);
+        else out.fill(0, 0, volume);
+
+        const yStart = Math.max(0, y0);
+        const yEnd = Math.min(this.worldHeight - 1, y1);
+
+        // Walk the box one chunk column at a time and copy x runs straight out of the chunk array
+        for (let cx = Math.floor(x0 / size); cx <= Math.floor(x1 / size); cx++) {
+            for (let cz = Math.floor(z0 / size); cz <= Math.floor(z1 / size); cz++) {
+                const chunk = this.getChunk(cx, cz);
+                if (!chunk) continue;
+                const src = chunk[field];
+                const lx0 = Math.max(x0, cx * size) - cx * size;
+                const lx1 = Math.min(x1, cx * size + size - 1) - cx * size;
+                const lz0 = Math.max(z0, cz * size) - cz * size;
+                const lz1 = Math.min(z1, cz * size + size - 1) - cz * size;
+                const outX = cx * size + lx0 - x0;
+
+                for (let y = yStart; y <= yEnd; y++) {
+                    for (let lz = lz0; lz <= lz1; lz++) {
+                        const from = lx0 + lz * size + y * size * size;
+                        const to = outX + (cz * size + lz - z0) * sx + (y - y0) * sx * sz;
+                        out.set(src.subarray(from, from + lx1 - lx0 + 1), to);
+                    }
+                }
+            }
         }
+        return out;
+    }
+
+    // Light engine
+    // Every block stores two channels in chunk.light: block light in the low nibble and sky
+    // light in the high nibble (shift 0 / shift 4 below). Changes are applied incrementally:
+    // a removal BFS clears the light that came through the changed cells and collects the
+    // brighter cells bordering the hole, then an add BFS refloods from those cells and from
+    // any new sources. Both queues are LightQueue ring buffers of packed positions.
+
+    // Starts a light update around (x, z). Queue positions are packed relative to this origin
+    // (x/z within 2048 blocks of it): y in bits 0-6, x in bits 7-18, z in bits 19-30.
+    beginLightUpdate(x, z) {
+        this.lightOriginX = x - 2048;
+        this.lightOriginZ = z - 2048;
+        this.lightCacheChunk = null;
+        this.lightSteps = 0;
+    }
 
-        let head = 0;
-        while(head < queue.length) {
-            const node = queue[head++];
-            const {x, y, z, level} = node;
+    packLightPos(x, y, z) {
+        return y | ((x - this.lightOriginX) << 7) | ((z - this.lightOriginZ) << 19);
+    }
 
+    // Chunk lookup for the BFS loops: neighbouring cells are nearly always in the same chunk
+    lightChunk(cx, cz) {
+        const cached = this.lightCacheChunk;
+        if (cached && cached.cx === cx && cached.cz === cz) return cached;
+        const chunk = this.getChunk(cx, cz);
+        if (chunk) this.lightCacheChunk = chunk;
+        return chunk;
+    }
+
+    // Queues the six neighbours of a cell for the add pass (they shine into it if it opened up)
+    pushLightNeighbors(x, y, z) {
+        const queue = this.lightAddQueue;
+        for (let d = 0; d < 6; d++) {
+            const ny = y + World.NEIGHBOR_DY[d];
+            if (ny < 0 || ny >= this.worldHeight) continue;
+            queue.push(this.packLightPos(x + World.NEIGHBOR_DX[d], ny, z + World.NEIGHBOR_DZ[d]));
+        }
+    }
+
+    // Add pass: spreads light outward from every queued cell
+    propagateLight(shift) {
+        const queue = this.lightAddQueue;
+        const pass = Chunk.getLightTables().pass;
+        const DX = World.NEIGHBOR_DX, DY = World.NEIGHBOR_DY, DZ = World.NEIGHBOR_DZ;
+        const keep = ~(15 << shift);
+        const sky = shift === 4;
+        const height = this.worldHeight;
+
+        while (queue.size > 0) {
+            const pos = queue.shift();
+            this.lightSteps++;
+            const y = pos & 127;
+            const x = ((pos >> 7) & 4095) + this.lightOriginX;
+            const z = ((pos >> 19) & 4095) + this.lightOriginZ;
+            const chunk = this.lightChunk(x >> 4, z >> 4);
+            if (!chunk) continue;
+            const level = (chunk.light[(x & 15) + (z & 15) * 16 + y * 256] >> shift) & 15;
             if (level <= 1) continue;
 
-            const neighbors = [
-                {x: x+1, y: y, z: z}, {x: x-1, y: y, z: z},
-                {x: x, y: y+1, z: z}, {x: x, y: y-1, z: z},
-                {x: x, y: y, z: z+1}, {x: x, y: y, z: z-1}
-            ];
-
-            for (const n of neighbors) {
-                const key = `${n.x},${n.y},${n.z}`;
-                if (visited.has(key)) continue;
-
-                const nType = this.getBlock(n.x, n.y, n.z);
-                const nDef = window.BLOCKS[nType];
-                if (nType === BLOCK.AIR || nType === BLOCK.WATER || (nDef && nDef.transparent)) {
-                    const currentLight = this.getLight(n.x, n.y, n.z);
-                    if (currentLight < level - 1) {
-                         this.setLight(n.x, n.y, n.z, level - 1);
-                         queue.push({x: n.x, y: n.y, z: n.z, level: level - 1});
-                         visited.add(key);
+            for (let d = 0; d < 6; d++) {
+                const ny = y + DY[d];
+                if (ny < 0 || ny >= height) continue;
+                const nx = x + DX[d];
+                const nz = z + DZ[d];
+                const nChunk = this.lightChunk(nx >> 4, nz >> 4);
+                if (!nChunk) continue;
+                const ni = (nx & 15) + (nz & 15) * 16 + ny * 256;
+                if (!pass[nChunk.blocks[ni]]) continue;
+
+                // Full sky light keeps its strength going straight down
+                const next = (sky && d === World.NEIGHBOR_DOWN && level === 15) ? 15 : level - 1;
+                if (((nChunk.light[ni] >> shift) & 15) < next) {
+                    nChunk.light[ni] = (nChunk.light[ni] & keep) | (next << shift);
+                    nChunk.unsaved = true;
+                    queue.push(this.packLightPos(nx, ny, nz));
+                }
+            }
+        }
+    }
+
+    // Removal pass: every queued cell has already been darkened and carries its old level.
+    // Neighbours that were lit through it are cleared in turn; brighter ones (lit from
+    // elsewhere) are queued for the add pass so they refill the hole.
+    unpropagateLight(shift) {
+        const removeQueue = this.lightRemoveQueue;
+        const addQueue = this.lightAddQueue;
+        const emit = Chunk.getLightTables().emit;
+        const DX = World.NEIGHBOR_DX, DY = World.NEIGHBOR_DY, DZ = World.NEIGHBOR_DZ;
+        const keep = ~(15 << shift);
+        const sky = shift === 4;
+        const height = this.worldHeight;
+
+        while (removeQueue.size > 0) {
+            const pos = removeQueue.shift();
+            const level = removeQueue.level;
+            this.lightSteps++;
+            const y = pos & 127;
+            const x = ((pos >> 7) & 4095) + this.lightOriginX;
+            const z = ((pos >> 19) & 4095) + this.lightOriginZ;
+
+            for (let d = 0; d < 6; d++) {
+                const ny = y + DY[d];
+                if (ny < 0 || ny >= height) continue;
+                const nx = x + DX[d];
+                const nz = z + DZ[d];
+                const nChunk = this.lightChunk(nx >> 4, nz >> 4);
+                if (!nChunk) continue;
+                const ni = (nx & 15) + (nz & 15) * 16 + ny * 256;
+                const current = (nChunk.light[ni] >> shift) & 15;
+                if (current === 0) continue;
+
+                const npos = this.packLightPos(nx, ny, nz);
+                if (current < level || (sky && d === World.NEIGHBOR_DOWN && level === 15)) {
+                    nChunk.light[ni] &= keep;
+                    nChunk.unsaved = true;
+                    removeQueue.push(npos, current);
+                    // Sources keep shining even when the light reaching them is gone
+                    const e = sky ? 0 : emit[nChunk.blocks[ni]];
+                    if (e) {
+                        nChunk.light[ni] |= e;
+                        addQueue.push(npos);
                     }
+                } else {
+                    addQueue.push(npos);
                 }
             }
         }
     }
 
-    recalcLocalLight(cx, cy, cz) {
-        // Reset light in a small radius and find sources
-        const rad = 15;
-        const sources = [];
+    // Applies the light changes caused by replacing oldType with type at (x, y, z)
+    updateBlockLight(x, y, z, oldType, type) {
+        const { pass, emit } = Chunk.getLightTables();
+        if (pass[oldType] === pass[type] && emit[oldType] === emit[type]) return;
+        if (y < 0 || y >= this.worldHeight) return;
+
+        this.beginLightUpdate(x, z);
+        const chunk = this.lightChunk(x >> 4, z >> 4);
+        if (!chunk) return;
+        const light = chunk.light;
+        const i = (x & 15) + (z & 15) * 16 + y * 256;
+        const pos = this.packLightPos(x, y, z);
+        const opened = pass[type] && !pass[oldType];
+
+        // Block light
+        const old = light[i] & 15;
+        if (old > 0 && (!pass[type] || emit[oldType] > emit[type])) {
+            light[i] &= 0xF0;
+            this.lightRemoveQueue.push(pos, old);
+            this.unpropagateLight(0);
+        }
+        if (emit[type] > (light[i] & 15)) {
+            light[i] = (light[i] & 0xF0) | emit[type];
+            this.lightAddQueue.push(pos);
+        }
+        if (opened) this.pushLightNeighbors(x, y, z);
+        this.propagateLight(0);
+
+        // Sky light
+        const oldSky = light[i] >> 4;
+        if (!pass[type] && oldSky > 0) {
+            light[i] &= 0x0F;
+            this.lightRemoveQueue.push(pos, oldSky);
+            this.unpropagateLight(4);
+        }
+        if (opened) {
+            if (y === this.worldHeight - 1) {
+                light[i] |= 0xF0;
+                this.lightAddQueue.push(pos);
+            }
+            this.pushLightNeighbors(x, y, z);
+        }
+        this.propagateLight(4);
+    }
 
-        // 1. Reset
-        for (let x = cx - rad; x <= cx + rad; x++) {
-            for (let y = cy - rad; y <= cy + rad; y++) {
-                for (let z = cz - rad; z <= cz + rad; z++) {
-                    const b = this.getBlock(x, y, z);
-                    const def = window.BLOCKS[b];
-                    if (def && def.light) {
-                        sources.push({x, y, z, level: def.light});
-                        this.setLight(x, y, z, def.light);
-                    } else {
-                        // Don't fully reset to 0 if we are far from the change, but for now reset in radius.
-                        // This might cause dark spots if other sources are outside radius.
-                        // Optimization for later.
-                        this.setLight(x, y, z, 0);
-                    }
+    recalcLocalLight(x, y, z) {
+        this.recalcLightBox(x, y, z, x, y, z);
+    }
 
-                    // Check boundary for external light sources to propagate back in
-                    if (x === cx - rad) {
-                         const l = this.getLight(x - 1, y, z);
-                         if (l > 0) sources.push({x: x-1, y, z, level: l});
-                    }
-                    if (x === cx + rad) {
-                         const l = this.getLight(x + 1, y, z);
-                         if (l > 0) sources.push({x: x+1, y, z, level: l});
-                    }
-                    if (y === cy - rad) {
-                         const l = this.getLight(x, y - 1, z);
-                         if (l > 0) sources.push({x, y: y-1, z, level: l});
+    // Relights every cell of a box from scratch (used after edit transactions): clears the
+    // light inside it together with everything that was lit through it, then refloods from
+    // sources inside the box and from the brighter cells around the cleared region.
+    recalcLightBox(x0, y0, z0, x1, y1, z1) {
+        const { pass, emit } = Chunk.getLightTables();
+        y0 = Math.max(0, y0);
+        y1 = Math.min(this.worldHeight - 1, y1);
+        if (y0 > y1) return;
+        this.beginLightUpdate((x0 + x1) >> 1, (z0 + z1) >> 1);
+        const removeQueue = this.lightRemoveQueue;
+        const addQueue = this.lightAddQueue;
+
+        for (let shift = 0; shift <= 4; shift += 4) {
+            const keep = ~(15 << shift);
+
+            // 1. Clear the box
+            for (let x = x0; x <= x1; x++) {
+                for (let z = z0; z <= z1; z++) {
+                    const chunk = this.lightChunk(x >> 4, z >> 4);
+                    if (!chunk) continue;
+                    for (let y = y0; y <= y1; y++) {
+                        const i = (x & 15) + (z & 15) * 16 + y * 256;
+                        const level = (chunk.light[i] >> shift) & 15;
+                        if (level === 0) continue;
+                        chunk.light[i] &= keep;
+                        chunk.unsaved = true;
+                        removeQueue.push(this.packLightPos(x, y, z), level);
                     }
-                    if (y === cy + rad) {
-                         const l = this.getLight(x, y + 1, z);
-                         if (l > 0) sources.push({x, y: y+1, z, level: l});
-                    }
-                    if (z === cz - rad) {
-                         const l = this.getLight(x, y, z - 1);
-                         if (l > 0) sources.push({x, y, z: z-1, level: l});
-                    }
-                    if (z === cz + rad) {
-                         const l = this.getLight(x, y, z + 1);
-                         if (l > 0) sources.push({x, y, z: z+1, level: l});
+                }
+            }
+            this.unpropagateLight(shift);
+
+            // 2. Reseed: sources and open sky inside the box, plus the cells around it
+            for (let x = x0; x <= x1; x++) {
+                for (let z = z0; z <= z1; z++) {
+                    const chunk = this.lightChunk(x >> 4, z >> 4);
+                    if (!chunk) continue;
+                    for (let y = y0; y <= y1; y++) {
+                        const i = (x & 15) + (z & 15) * 16 + y * 256;
+                        const type = chunk.blocks[i];
+                        const seed = shift === 0 ? emit[type] : ((y === this.worldHeight - 1 && pass[type]) ? 15 : 0);
+                        if (seed > ((chunk.light[i] >> shift) & 15)) {
+                            chunk.light[i] = (chunk.light[i] & keep) | (seed << shift);
+                            chunk.unsaved = true;
+                            addQueue.push(this.packLightPos(x, y, z));
+                        }
+                        if (x === x0 || x === x1 || y === y0 || y === y1 || z === z0 || z === z1) {
+                            this.pushLightNeighbors(x, y, z);
+                        }
                     }
                 }
             }
+            this.propagateLight(shift);
         }
+    }
 
-        // 2. Propagate all sources
-        const queue = [...sources];
-
-        let head = 0;
-        while(head < queue.length) {
-            const node = queue[head++];
-            const {x, y, z, level} = node;
-
-            if (level <= 1) continue;
+    // Lights a chunk that was just generated or loaded: sky light straight down every open
+    // column and block light at every source (skipped if the chunk arrived already lit, e.g.
+    // from a generation worker), then exchanges light with the loaded neighbours.
+    initChunkLight(chunk) {
+        const { pass, emit } = Chunk.getLightTables();
+        const size = this.chunkSize;
+        const area = size * size;
+        const blocks = chunk.blocks;
+        const light = chunk.light;
+        const baseX = chunk.cx * size;
+        const baseZ = chunk.cz * size;
+        const addQueue = this.lightAddQueue;
+        this.beginLightUpdate(baseX, baseZ);
+
+        if (!chunk.lightReady) {
+            light.fill(0);
+
+            // Block light sources
+            for (let i = 0; i < blocks.length; i++) {
+                const e = emit[blocks[i]];
+                if (!e) continue;
+                light[i] = e;
+                addQueue.push(this.packLightPos(baseX + (i & 15), i >> 8, baseZ + ((i >> 4) & 15)));
+            }
+            this.propagateLight(0);
+
+            // Sky columns. tops holds the lowest sky-lit y of each column.
+            // Everything above the surface heightmap is air, so only the rest needs looking at.
+            const tops = new Int16Array(area);
+            for (let c = 0; c < area; c++) {
+                const surface = chunk.getSurfaceHeight(c & 15, c >> 4);
+                for (let y = chunk.maxHeight - 1; y >= surface; y--) light[c + y * area] |= 0xF0;
+                let y = surface - 1;
+                while (y >= 0 && pass[blocks[c + y * area]]) {
+                    light[c + y * area] |= 0xF0;
+                    y--;
+                }
+                tops[c] = y + 1;
+            }
+            // Sunlit cells beside a taller neighbouring column spread sideways
+            for (let z = 0; z < size; z++) {
+                for (let x = 0; x < size; x++) {
+                    const c = x + z * size;
+                    let maxTop = tops[c];
+                    if (x > 0) maxTop = Math.max(maxTop, tops[c - 1]);
+                    if (x < size - 1) maxTop = Math.max(maxTop, tops[c + 1]);
+                    if (z > 0) maxTop = Math.max(maxTop, tops[c - size]);
+                    if (z < size - 1) maxTop = Math.max(maxTop, tops[c + size]);
+                    for (let y = tops[c]; y < maxTop; y++) {
+                        addQueue.push(this.packLightPos(baseX + x, y, baseZ + z));
+                    }
+                }
+            }
+            this.propagateLight(4);
+            chunk.lightReady = true;
+        }
 
-            const neighbors = [
-                {x: x+1, y: y, z: z}, {x: x-1, y: y, z: z},
-                {x: x, y: y+1, z: z}, {x: x, y: y-1, z: z},
-                {x: x, y: y, z: z+1}, {x: x, y: y, z: z-1}
-            ];
-
-            for (const n of neighbors) {
-                 const nType = this.getBlock(n.x, n.y, n.z);
-                 const nDef = window.BLOCKS[nType];
-                 if (nType === BLOCK.AIR || nType === BLOCK.WATER || (nDef && nDef.transparent)) {
-                     const currentLevel = this.getLight(n.x, n.y, n.z);
-                     if (currentLevel < level - 1) {
-                         this.setLight(n.x, n.y, n.z, level - 1);
-                         queue.push({x: n.x, y: n.y, z: n.z, level: level - 1});
-                     }
-                 }
+        // Exchange light across the borders with loaded neighbours
+        const sides = [[1, 0], [-1, 0], [0, 1], [0, -1]];
+        for (let shift = 0; shift <= 4; shift += 4) {
+            for (const [dx, dz] of sides) {
+                const other = this.getChunk(chunk.cx + dx, chunk.cz + dz);
+                if (!other) continue;
+                for (let t = 0; t < size; t++) {
+                    // Local coordinates of the facing border cells in both chunks
+                    const ax = dx === 1 ? size - 1 : dx === -1 ? 0 : t;
+                    const az = dz === 1 ? size - 1 : dz === -1 ? 0 : t;
+                    const bx = dx === 0 ? t : size - 1 - ax;
+                    const bz = dz === 0 ? t : size - 1 - az;
+                    for (let y = 0; y < chunk.maxHeight; y++) {
+                        const ai = ax + az * size + y * area;
+                        const bi = bx + bz * size + y * area;
+                        const la = (light[ai] >> shift) & 15;
+                        const lb = (other.light[bi] >> shift) & 15;
+                        if (la > lb + 1 && pass[other.blocks[bi]]) {
+                            addQueue.push(this.packLightPos(baseX + ax, y, baseZ + az));
+                        } else if (lb > la + 1 && pass[blocks[ai]]) {
+                            addQueue.push(this.packLightPos(other.cx * size + bx, y, other.cz * size + bz));
+                        }
+                    }
+                }
             }
+            this.propagateLight(shift);
         }
     }
 
+    // One above the highest non-air block, from the chunk's heightmap
     getHighestBlockY(x, z) {
-        // Check if chunk is loaded first
         const cx = Math.floor(x / this.chunkSize);
         const cz = Math.floor(z / this.chunkSize);
-        const chunkId = `${cx},${cz}`;
-        if (!this.chunks.has(chunkId)) {
+        const chunk = this.getChunk(cx, cz);
+        if (!chunk) {
             return 100; // Safe high value for unloaded chunks
         }
-        for (let y = this.worldHeight - 1; y >= 0; y--) {
-            if (this.getBlock(x, y, z) !== BLOCK.AIR) {
-                return y + 1;
-            }
-        }
-        return 0;
+        return chunk.getSurfaceHeight(x - cx * this.chunkSize, z - cz * this.chunkSize);
     }
 
     unloadFarChunks(playerX, playerZ, renderDist) {
@@ -861,15 +1560,18 @@ class World {
         const centerCZ = Math.floor(playerZ / this.chunkSize);
         const unloadDist = renderDist + 2; // Keep a buffer around render distance
 
-        for (const key of this.chunks.keys()) {
-             const [cxStr, czStr] = key.split(',');
-             const cx = parseInt(cxStr);
-             const cz = parseInt(czStr);
-
-             if (Math.abs(cx - centerCX) > unloadDist || Math.abs(cz - centerCZ) > unloadDist) {
+        const released = [];
+        for (const [key, chunk] of this.chunks) {
+             const dist = Math.max(Math.abs(chunk.cx - centerCX), Math.abs(chunk.cz - centerCZ));
+             if (dist > unloadDist) {
                  this.chunks.delete(key);
+                 released.push(chunk);
+             } else if (dist > renderDist + 1 && !chunk.modified && chunk.lightReady) {
+                 // Kept for a quick return but not drawn: no need for dense arrays
+                 chunk.compact();
              }
         }
+        if (released.length > 0) this.releaseChunks(released);
     }
 
     generateChunk(cx, cz) {
@@ -880,27 +1582,37 @@ class World {
         }
     }
 
+    // PRNG for one chunk's ores and decorations, seeded from the world seed and the chunk
+    // position so a chunk comes out the same wherever and whenever it is generated
+    chunkRandom(cx, cz) {
+        if (!window.seededRandom) return Math.random;
+        let h = Math.floor(this.seed * 1000) ^ Math.imul(cx, 0x27D4EB2F) ^ Math.imul(cz, 0x165667B1);
+        h = Math.imul(h ^ (h >>> 15), 0x85EBCA6B);
+        h = Math.imul(h ^ (h >>> 13), 0xC2B2AE35);
+        return window.seededRandom(((h ^ (h >>> 16)) >>> 0) / 1000);
+    }
+
     generateNetherChunk(cx, cz) {
-        if (this.chunks.has(this.getChunkKey(cx, cz))) return;
+        if (this.getChunk(cx, cz)) return;
 
         const chunk = new Chunk(cx, cz);
         const baseX = cx * this.chunkSize;
         const baseZ = cz * this.chunkSize;
+        const size = this.chunkSize;
+        const random = this.chunkRandom(cx, cz);
+
+        // Noise for Caves/Terrain, sampled for the whole chunk at once (rows y = 1..126)
+        const scale = 0.05;
+        const caveGrid = this.noiseGrid3D(new Float32Array(size * size * 126), baseX * scale, scale, baseZ * scale, 126, scale);
 
         for (let x = 0; x < this.chunkSize; x++) {
             for (let z = 0; z < this.chunkSize; z++) {
-                const worldX = baseX + x;
-                const worldZ = baseZ + z;
-
                 // Bedrock
                 chunk.setBlock(x, 0, z, BLOCK.BEDROCK);
                 chunk.setBlock(x, 127, z, BLOCK.BEDROCK);
 
-                // Noise for Caves/Terrain
-                const scale = 0.05;
-
                 for (let y = 1; y < 127; y++) {
-                     const noise = window.perlin.noise(worldX * scale, y * scale, worldZ * scale);
+                     const noise = caveGrid[x + z * size + (y - 1) * size * size];
 
                      // In Nether, we want solid netherrack with open caves (cheese)
                      // If noise < 0.2, solid. Else air.
@@ -908,8 +1620,8 @@ class World {
                          chunk.setBlock(x, y, z, BLOCK.NETHERRACK);
 
                          // Ores
-                         if (Math.random() < 0.005) chunk.setBlock(x, y, z, BLOCK.QUARTZ_ORE);
-                         else if (Math.random() < 0.005) chunk.setBlock(x, y, z, BLOCK.GLOWSTONE); // Clump logic simplified to random
+                         if (random() < 0.005) chunk.setBlock(x, y, z, BLOCK.QUARTZ_ORE);
+                         else if (random() < 0.005) chunk.setBlock(x, y, z, BLOCK.GLOWSTONE); // Clump logic simplified to random
                      } else {
                          // Air
                          if (y <= 32) {
@@ -923,65 +1635,73 @@ class World {
             }
         }
 
-        const key = this.getChunkKey(cx, cz);
-        this.chunks.set(key, chunk);
-
-        if (this.pendingBlocks.has(key)) {
-            const pending = this.pendingBlocks.get(key);
-            for (const b of pending) {
-                chunk.setBlock(b.x, b.y, b.z, b.type);
-            }
-            this.pendingBlocks.delete(key);
-        }
+        this.addChunk(chunk);
     }
 
     generateOverworldChunk(cx, cz) {
-        if (this.chunks.has(this.getChunkKey(cx, cz))) return;
+        if (this.getChunk(cx, cz)) return;
 
         const chunk = new Chunk(cx, cz);
         const baseX = cx * this.chunkSize;
         const baseZ = cz * this.chunkSize;
-
-        for (let x = 0; x < this.chunkSize; x++) {
-            for (let z = 0; z < this.chunkSize; z++) {
-                const worldX = baseX + x;
-                const worldZ = baseZ + z;
-
-                const biome = this.biomeManager.getBiome(worldX, worldZ);
+        const size = this.chunkSize;
+        const columns = size * size;
+        const random = this.chunkRandom(cx, cz);
+
+        // Column noise for the whole chunk in one batch per layer
+        // Terrain Height Noise
+        const scale = 0.03;
+        const heightGrid = this.noiseGrid2D(new Float32Array(columns), baseX * scale, baseZ * scale, scale, this.seed);
+        // Detail noise
+        const detailGrid = this.noiseGrid2D(new Float32Array(columns), baseX * 0.1, baseZ * 0.1, 0.1, this.seed);
+        // River Generation
+        // Use a different scale and offset for rivers
+        const riverGrid = this.noiseGrid2D(new Float32Array(columns), baseX * 0.005, baseZ * 0.005, 0.005, this.seed + 100);
+
+        const biomes = new Array(columns);
+        const heights = new Int32Array(columns);
+        let maxHeight = 1;
+        for (let z = 0; z < size; z++) {
+            for (let x = 0; x < size; x++) {
+                const i = x + z * size;
+                const biome = this.biomeManager.getBiome(baseX + x, baseZ + z);
                 const heightOffset = biome.heightOffset || 0;
 
-                // Terrain Height Noise
-                const scale = 0.03;
-                const noise = window.perlin.noise(worldX * scale, worldZ * scale, this.seed);
-                // Detail noise
-                const detail = window.perlin.noise(worldX * 0.1, worldZ * 0.1, this.seed) * 2;
-
-                let height = Math.floor(20 + heightOffset + noise * 10 + detail);
-
-                // River Generation
-                // Use a different scale and offset for rivers
-                const riverNoise = window.perlin.noise(worldX * 0.005, worldZ * 0.005, this.seed + 100);
-                let isRiver = false;
-                if (Math.abs(riverNoise) < 0.06) {
-                    isRiver = true;
+                let height = Math.floor(20 + heightOffset + heightGrid[i] * 10 + detailGrid[i] * 2);
+                if (Math.abs(riverGrid[i]) < 0.06) {
                     // Clamp height for riverbed (below water level 16)
                     if (height > 12) height = 12;
                 }
 
+                biomes[i] = biome;
+                heights[i] = height;
+                if (height > maxHeight) maxHeight = height;
+            }
+        }
+
+        // Cave generation (3D noise), only up to the tallest column
+        const caveRows = Math.min(maxHeight, this.worldHeight);
+        const caveGrid = this.noiseGrid3D(new Float32Array(columns * caveRows), baseX * 0.05, 0, baseZ * 0.05, caveRows, 0.05);
+
+        for (let x = 0; x < this.chunkSize; x++) {
+            for (let z = 0; z < this.chunkSize; z++) {
+                const biome = biomes[x + z * size];
+                const height = heights[x + z * size];
+
                 // Bedrock
                 chunk.setBlock(x, 0, z, BLOCK.BEDROCK);
 
                 // Underground
                 for (let y = 1; y < height; y++) {
                     // Cave generation (3D noise)
-                    const caveNoise = window.perlin.noise(worldX * 0.05, y * 0.05, worldZ * 0.05);
+                    const caveNoise = caveGrid[x + z * size + y * columns];
                     if (caveNoise > 0.4) {
                         chunk.setBlock(x, y, z, BLOCK.AIR);
                     } else {
                         // Ores
-                        if (Math.random() < 0.01) chunk.setBlock(x, y, z, BLOCK.ORE_COAL);
-                        else if (y < 20 && Math.random() < 0.005) chunk.setBlock(x, y, z, BLOCK.ORE_IRON);
-                        else if (y < 10 && Math.random() < 0.002) chunk.setBlock(x, y, z, BLOCK.ORE_DIAMOND);
+                        if (random() < 0.01) chunk.setBlock(x, y, z, BLOCK.ORE_COAL);
+                        else if (y < 20 && random() < 0.005) chunk.setBlock(x, y, z, BLOCK.ORE_IRON);
+                        else if (y < 10 && random() < 0.002) chunk.setBlock(x, y, z, BLOCK.ORE_DIAMOND);
                         else chunk.setBlock(x, y, z, BLOCK.STONE);
                     }
                 }
@@ -1020,17 +1740,17 @@ class World {
 
                 // Structures
                 if (height > 18) {
-                    if (biome.treeChance && Math.random() < biome.treeChance) {
+                    if (biome.treeChance && random() < biome.treeChance) {
                         let type = 'oak';
                         if (biome.snow) type = 'spruce';
 
-                        else if (biome.name === 'Forest' && Math.random() < 0.2) type = 'birch';
+                        else if (biome.name === 'Forest' && random() < 0.2) type = 'birch';
                         else if (biome.name === 'Birch Forest') type = 'birch';
 
-                        if (biome.name === 'Jungle') { this.structureManager.generateJungleTree(chunk, x, height + 1, z); } else { this.structureManager.generateTree(chunk, x, height + 1, z, type); }
+                        if (biome.name === 'Jungle') { this.structureManager.generateJungleTree(chunk, x, height + 1, z, false, random); } else { this.structureManager.generateTree(chunk, x, height + 1, z, type, false, random); }
                     }
-                    if (biome.cactusChance && Math.random() < biome.cactusChance) {
-                        this.structureManager.generateCactus(chunk, x, height + 1, z);
+                    if (biome.cactusChance && random() < biome.cactusChance) {
+                        this.structureManager.generateCactus(chunk, x, height + 1, z, false, random);
                     }
 
                     // Village Check
@@ -1044,9 +1764,9 @@ class World {
                          }
                     }
 
-                    if (!spawnedVillage && biome.structureChance && Math.random() < biome.structureChance) {
+                    if (!spawnedVillage && biome.structureChance && random() < biome.structureChance) {
                          // Random structure
-                         const r = Math.random();
+                         const r = random();
                          if (r < 0.5) this.structureManager.generateStructure(chunk, x, height+1, z, 'well');
                          else this.structureManager.generateStructure(chunk, x, height+1, z, 'house');
                     }
@@ -1054,7 +1774,13 @@ class World {
             }
         }
 
-        const key = this.getChunkKey(cx, cz);
+        this.addChunk(chunk);
+    }
+
+    // Registers a freshly generated chunk and applies blocks that neighbouring
+    // structures queued for it before it existed
+    addChunk(chunk) {
+        const key = this.getChunkKey(chunk.cx, chunk.cz);
         this.chunks.set(key, chunk);
 
         // Apply pending blocks
@@ -1064,10 +1790,186 @@ class World {
                 chunk.setBlock(b.x, b.y, b.z, b.type);
             }
             this.pendingBlocks.delete(key);
+            chunk.lightReady = false; // Light precomputed without these blocks is stale
+        }
+
+        // From here on setBlock keeps the heightmaps current
+        chunk.buildHeightmaps();
+        this.initChunkLight(chunk);
+
+        // Border faces of already meshed neighbours may now be hidden
+        const neighbors = [[1, 0], [-1, 0], [0, 1], [0, -1]];
+        for (const [dx, dz] of neighbors) {
+            const n = this.getChunk(chunk.cx + dx, chunk.cz + dz);
+            if (n && n.markAllDirty) n.markAllDirty();
+        }
+    }
+
+    // Adds a chunk produced by the worker pool (see ChunkWorkerPool).
+    // overflow holds structure blocks that spilled into other chunks, keyed like pendingBlocks.
+    addGeneratedChunk(cx, cz, blocks, metadata, overflow, spawns, light) {
+        if (this.getChunk(cx, cz)) return null;
+
+        const chunk = new Chunk(cx, cz);
+        chunk.blocks = blocks;
+        chunk.metadata = metadata;
+        if (light) {
+            // Lit by the worker; only the borders still need to be joined up
+            chunk.light = light;
+            chunk.lightReady = true;
+        }
+        chunk.markAllDirty();
+
+        if (overflow) {
+            overflow.forEach(group => {
+                const target = this.getChunk(this.chunkKeyX(group.key), this.chunkKeyZ(group.key));
+                group.blocks.forEach(b => {
+                    if (target) {
+                        target.setBlock(b.x, b.y, b.z, b.type);
+                    } else {
+                        if (!this.pendingBlocks.has(group.key)) this.pendingBlocks.set(group.key, []);
+                        this.pendingBlocks.get(group.key).push(b);
+                    }
+                });
+            });
+        }
+
+        this.addChunk(chunk);
+
+        if (spawns && this.game && window.Mob) {
+            spawns.forEach(s => {
+                if (s.type === 'villager') {
+                    this.game.mobs.push(new window.Mob(this.game, s.x, s.y, s.z, window.MOB_TYPE.VILLAGER));
+                }
+            });
+        }
+        return chunk;
+    }
+
+    storedChunkKey(dimension, cx, cz) {
+        return `${dimension}/${cx},${cz}`;
+    }
+
+    hasWorldStore() {
+        return !!(this.store && this.store.available);
+    }
+
+    // Block entities grouped by the chunk they sit in: chunk key -> [[x, y, z, data], ...]
+    groupBlockEntities() {
+        const groups = new Map();
+        for (const [key, data] of this.blockEntities) {
+            const [x, y, z] = key.split(',').map(Number);
+            const chunkKey = this.getChunkKey(Math.floor(x / this.chunkSize), Math.floor(z / this.chunkSize));
+            if (!groups.has(chunkKey)) groups.set(chunkKey, []);
+            groups.get(chunkKey).push([x, y, z, data]);
         }
+        return groups;
+    }
+
+    // Copies a chunk for WorldStore.save (the copies are transferred to the save worker)
+    chunkRecord(chunk, entities) {
+        const arrays = chunk.copyArrays();
+        return {
+            dimension: this.dimension,
+            cx: chunk.cx,
+            cz: chunk.cz,
+            blocks: arrays.blocks,
+            metadata: arrays.metadata,
+            light: chunk.lightReady ? arrays.light : null,
+            entities: entities || []
+        };
+    }
+
+    // Writes the changed chunks among `chunks` (and those holding block entities, whose
+    // state changes without touching blocks) to the current save slot, if there is one.
+    // Returns a promise, or null when nothing was written.
+    storeChunks(chunks, meta = null, options = {}) {
+        if (!this.saveSlot || !this.hasWorldStore()) return null;
+
+        const entities = this.groupBlockEntities();
+        const records = [];
+        const written = [];
+        chunks.forEach(chunk => {
+            const chunkEntities = entities.get(this.getChunkKey(chunk.cx, chunk.cz));
+            if (!options.all && !chunk.unsaved && !chunkEntities) return;
+            records.push(this.chunkRecord(chunk, chunkEntities));
+            written.push(chunk);
+            chunk.unsaved = false;
+            this.storedChunks.add(this.storedChunkKey(this.dimension, chunk.cx, chunk.cz));
+        });
+        if (records.length === 0 && !meta) return null;
+
+        return this.store.save(this.saveSlot, records, meta, options).then(count => count, (e) => {
+            written.forEach(chunk => { chunk.unsaved = true; }); // Retried by the next save
+            throw e;
+        });
+    }
+
+    // Writes out the changed ones among chunks that are being dropped from memory
+    releaseChunks(chunks) {
+        if (this.game && this.game.network) this.game.network.dropChunks(chunks);
+        const saving = this.storeChunks(chunks);
+        if (saving) saving.catch(e => console.warn("Could not save unloaded chunks", e));
+    }
+
+    playerSaveData() {
+        if (!this.game || !this.game.player) return undefined;
+        const p = this.game.player;
+        return {
+            x: p.x, y: p.y, z: p.z,
+            yaw: p.yaw, pitch: p.pitch,
+            health: p.health, hunger: p.hunger,
+            xp: p.xp, level: p.level,
+            inventory: p.inventory,
+            unlockedRecipes: Array.from(p.unlockedRecipes)
+        };
+    }
+
+    restorePlayer(dp) {
+        if (!dp || !this.game || !this.game.player) return;
+        const p = this.game.player;
+        p.x = dp.x; p.y = dp.y; p.z = dp.z;
+        p.yaw = dp.yaw; p.pitch = dp.pitch;
+        p.health = dp.health; p.hunger = dp.hunger;
+        p.xp = dp.xp; p.level = dp.level;
+        if (dp.inventory) p.inventory = dp.inventory;
+        if (dp.unlockedRecipes) p.unlockedRecipes = new Set(dp.unlockedRecipes);
+
+        if (this.game.updateHealthUI) this.game.updateHealthUI();
+        if (this.game.updateHotbarUI) this.game.updateHotbarUI();
     }
 
     saveWorld(slotName = 'default') {
+        if (this.hasWorldStore()) return this.saveWorldToStore(slotName);
+        this.saveWorldToLocalStorage(slotName);
+    }
+
+    // Incremental save: only chunks changed since the last save to this slot are encoded
+    // and written (off the main thread). Saving to a different slot copies the old slot's
+    // chunks over first, so chunks that are no longer loaded are kept.
+    saveWorldToStore(slotName) {
+        const full = slotName !== this.saveSlot;
+        const copyFrom = full ? this.saveSlot : null;
+        if (full && !copyFrom) this.storedChunks = new Set();
+        this.saveSlot = slotName;
+
+        const meta = {
+            version: ChunkCodec.VERSION,
+            seed: this.seed,
+            dimension: this.dimension,
+            player: this.playerSaveData()
+        };
+        const chunks = Array.from(this.chunks.values());
+        return this.storeChunks(chunks, meta, { all: full, reset: full, copyFrom }).then(count => {
+            console.log("World saved to slot:", slotName, count, "chunks written");
+            if (this.game) this.game.chat?.addMessage("World Saved!");
+        }, (e) => {
+            console.error("Save failed", e);
+            if (this.game) this.game.chat?.addMessage("Save failed");
+        });
+    }
+
+    saveWorldToLocalStorage(slotName) {
         // Limit number of chunks to save to avoid quota limit
         // We only really need to save chunks that might have been modified?
         // Or just save all current chunks. 16KB * 20 = 320KB. Safe.
@@ -1106,17 +2008,8 @@ class World {
             blockEntities: blockEntitiesData
         };
 
-        if (this.game && this.game.player) {
-            const p = this.game.player;
-            data.player = {
-                x: p.x, y: p.y, z: p.z,
-                yaw: p.yaw, pitch: p.pitch,
-                health: p.health, hunger: p.hunger,
-                xp: p.xp, level: p.level,
-                inventory: p.inventory,
-                unlockedRecipes: Array.from(p.unlockedRecipes)
-            };
-        }
+        const player = this.playerSaveData();
+        if (player) data.player = player;
 
         try {
             localStorage.setItem('voxelWorldSave_' + slotName, JSON.stringify(data));
@@ -1131,12 +2024,123 @@ class World {
     }
 
     loadWorld(slotName = 'default') {
+        if (this.hasWorldStore()) return this.loadWorldFromStore(slotName);
+        this.loadWorldFromLocalStorage(slotName);
+    }
+
+    // Reads back the chunks around the saved player position; the rest are loaded on
+    // demand by updateChunks (see loadStoredChunk). Slots that only exist in
+    // localStorage (saved before the store existed) still load the old way.
+    loadWorldFromStore(slotName) {
+        const store = this.store;
+        return store.open(slotName).then(({ meta, chunks }) => {
+            if (!meta) {
+                this.loadWorldFromLocalStorage(slotName);
+                return;
+            }
+
+            const dimension = meta.dimension || 'overworld';
+            const stored = new Set(chunks.map(([d, cx, cz]) => this.storedChunkKey(d, cx, cz)));
+            const pcx = meta.player ? Math.floor(meta.player.x / this.chunkSize) : 0;
+            const pcz = meta.player ? Math.floor(meta.player.z / this.chunkSize) : 0;
+            const nearby = [];
+            for (let cx = pcx - 1; cx <= pcx + 1; cx++) {
+                for (let cz = pcz - 1; cz <= pcz + 1; cz++) {
+                    if (stored.has(this.storedChunkKey(dimension, cx, cz))) nearby.push(store.load(slotName, dimension, cx, cz));
+                }
+            }
+
+            return Promise.all(nearby).then(records => {
+                this.setSeed(meta.seed);
+                this.dimension = dimension;
+                this.chunks.clear();
+                this.pendingBlocks.clear();
+                this.blockEntities.clear();
+                this.activeBlockEntities.clear();
+                this.loadingChunks.clear();
+                if (this.game && this.game.chunkWorkers) this.game.chunkWorkers.reset();
+                this.saveSlot = slotName;
+                this.storedChunks = stored;
+
+                records.forEach(record => { if (record) this.addStoredChunk(record); });
+                this.restorePlayer(meta.player);
+                if (this.game && this.game.updateChunks) this.game.updateChunks();
+
+                console.log("World loaded from slot:", slotName);
+                if (this.game) this.game.chat?.addMessage("World Loaded: " + slotName);
+            });
+        }).catch(e => {
+            console.error("Load failed", e);
+            alert("Load Failed");
+        });
+    }
+
+    // Starts reading a saved chunk of the current slot/dimension back from the store.
+    // Returns false when the chunk was never saved (the caller generates it instead).
+    loadStoredChunk(cx, cz) {
+        if (!this.saveSlot || !this.hasWorldStore()) return false;
+        const key = this.storedChunkKey(this.dimension, cx, cz);
+        if (!this.storedChunks.has(key)) return false;
+        if (this.loadingChunks.has(key)) return true;
+
+        this.loadingChunks.add(key);
+        const slot = this.saveSlot;
+        const dimension = this.dimension;
+        this.store.load(slot, dimension, cx, cz).then(record => {
+            // Dropped by a world load or dimension switch meanwhile
+            if (!this.loadingChunks.delete(key) || slot !== this.saveSlot || dimension !== this.dimension) return;
+            if (record) this.addStoredChunk(record);
+            else this.storedChunks.delete(key);
+        }, (e) => {
+            console.warn("Could not load saved chunk", cx, cz, e);
+            this.loadingChunks.delete(key);
+            this.storedChunks.delete(key); // Generate it instead
+        });
+        return true;
+    }
+
+    // Adds a chunk decoded by the save worker ({ cx, cz, blocks, metadata, light, entities })
+    addStoredChunk(record) {
+        if (this.getChunk(record.cx, record.cz)) return null;
+
+        const chunk = new Chunk(record.cx, record.cz);
+        chunk.blocks = record.blocks;
+        chunk.metadata = record.metadata;
+        if (record.light) {
+            chunk.light = record.light;
+            chunk.lightReady = true;
+        }
+        chunk.markAllDirty();
+        if (record.entities) {
+            record.entities.forEach(([x, y, z, data]) => {
+                if (!this.blockEntities.has(`${x},${y},${z}`)) this.setBlockEntity(x, y, z, data);
+            });
+        }
+
+        // Anything addChunk changes (pending structure blocks, border light) is a real change
+        chunk.unsaved = false;
+        this.addChunk(chunk);
+        return chunk;
+    }
+
+    // Adds a chunk streamed by the multiplayer server; it replaces our copy when resent in full
+    addServerChunk(record) {
+        this.chunks.delete(this.getChunkKey(record.cx, record.cz));
+        return this.addStoredChunk(record);
+    }
+
+    loadWorldFromLocalStorage(slotName) {
         const dataStr = localStorage.getItem('voxelWorldSave_' + slotName);
         if (dataStr) {
             try {
                 const data = JSON.parse(dataStr);
-                this.seed = data.seed;
+                this.setSeed(data.seed);
                 this.chunks.clear();
+                if (this.game && this.game.chunkWorkers) this.game.chunkWorkers.reset();
+                // Not bound to a store slot: the next save writes every chunk
+                this.saveSlot = null;
+                this.storedChunks = new Set();
+                this.loadingChunks.clear();
 
                 if (data.chunks) {
                     data.chunks.forEach(cData => {
@@ -1157,27 +2161,17 @@ class World {
                         });
 
                         chunk.modified = true; // Force visual update
-                        this.chunks.set(this.getChunkKey(cData.cx, cData.cz), chunk);
+                        this.addChunk(chunk);
                     });
                 }
 
                 if (data.blockEntities) {
                     this.blockEntities = new Map(Object.entries(data.blockEntities));
+                    this.activeBlockEntities = new Set();
+                    for (const entity of this.blockEntities.values()) this.wakeBlockEntity(entity);
                 }
 
-                if (data.player && this.game && this.game.player) {
-                    const p = this.game.player;
-                    const dp = data.player;
-                    p.x = dp.x; p.y = dp.y; p.z = dp.z;
-                    p.yaw = dp.yaw; p.pitch = dp.pitch;
-                    p.health = dp.health; p.hunger = dp.hunger;
-                    p.xp = dp.xp; p.level = dp.level;
-                    if (dp.inventory) p.inventory = dp.inventory;
-                    if (dp.unlockedRecipes) p.unlockedRecipes = new Set(dp.unlockedRecipes);
-
-                    if (this.game.updateHealthUI) this.game.updateHealthUI();
-                    if (this.game.updateHotbarUI) this.game.updateHotbarUI();
-                }
+                this.restorePlayer(data.player);
 
                 console.log("World loaded from slot:", slotName);
                 alert("World Loaded: " + slotName);
@@ -1191,4 +2185,20 @@ class World {
     }
 }
 
+// Ticks between compactIdleChunks sweeps (5 s at 20 TPS)
+World.COMPACT_INTERVAL = 100;
+
+// Random ticks per 16x16x16 section per game tick. Crops and saplings advance one stage per
+// random tick, so 12 of 4096 blocks gives each one about the old 0.003 chance per tick.
+World.RANDOM_TICK_SPEED = 12;
+// Block entity types processed every tick while they have work (see activeBlockEntities)
+World.TICKING_ENTITIES = new Set(['furnace', 'brewing_stand']);
+
+// Face neighbour offsets (light BFS, block ticks): +x, -x, +y, -y, +z, -z
+World.NEIGHBOR_DX = [1, -1, 0, 0, 0, 0];
+World.NEIGHBOR_DY = [0, 0, 1, -1, 0, 0];
+World.NEIGHBOR_DZ = [0, 0, 0, 0, 1, -1];
+World.NEIGHBOR_DOWN = 3;
+World.HORIZONTAL_DIRS = [0, 1, 4, 5];
+
 window.World = World;
@@ -0,0 +1,366 @@
+// Load test for the multiplayer server.
+// Starts a server (or targets --url) and ramps up headless bots that speak the same binary
+// protocol as js/network.js: they walk around, chat and edit blocks at the given rates.
+// Each step reports messages/s, chat broadcast latency (p50/p99, from a bot sending a chat
+// line to every other bot receiving it), and the server's CPU, memory and tick time. The
+// ramp stops at the first step that fails. Results are written as JSON for comparing runs.
+//
+//   node loadtest.js --start 10 --step 10 --max 200 --out results.json
+const { spawn } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const WebSocket = require('ws');
+const { NetProtocol, ByteWriter, ByteReader } = require('../js/protocol.js');
+
+const DEFAULTS = {
+    url: null, // Existing server to test; by default one is started on --port
+    port: 8090,
+    start: 10, // Bots in the first step
+    step: 10, // Bots added per step
+    max: 200,
+    stepSeconds: 10,
+    moveRate: 20, // Position updates per bot per second
+    chatRate: 0.5, // Chat lines per bot per second
+    editRate: 1, // Block edits per bot per second
+    view: 2, // Chunk view distance the bots ask for (0: no chunk streaming)
+    spread: 256, // Bots walk around points spread over this many blocks
+    maxP99: 500, // ms; a step with a slower p99 broadcast latency fails
+    maxTickMs: 50, // A step where the server's average tick takes longer fails
+    out: 'loadtest-results.json'
+};
+
+const OP = NetProtocol.OP;
+const BOT_TICK_MS = 50;
+
+function parseArgs(argv) {
+    const options = Object.assign({}, DEFAULTS);
+    for (let i = 0; i < argv.length; i++) {
+        const arg = argv[i];
+        if (!arg.startsWith('--')) continue;
+        const key = arg.slice(2).replace(/-([a-z])/g, (m, c) => c.toUpperCase());
+        if (!(key in DEFAULTS)) throw new Error(`Unknown option ${arg}`);
+        const value = argv[++i];
+        options[key] = typeof DEFAULTS[key] === 'number' ? Number(value) : value;
+    }
+    return options;
+}
+
+function percentile(sorted, p) {
+    if (sorted.length === 0) return null;
+    return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+// Counters shared by all bots, reset every step
+class Metrics {
+    constructor() {
+        this.reset();
+    }
+
+    reset() {
+        this.started = performance.now();
+        this.framesIn = 0;
+        this.recordsIn = 0;
+        this.bytesIn = 0;
+        this.framesOut = 0;
+        this.bytesOut = 0;
+        this.chunks = 0;
+        this.latencies = [];
+    }
+}
+
+class Bot {
+    constructor(index, options, metrics) {
+        this.index = index;
+        this.options = options;
+        this.metrics = metrics;
+        this.id = null;
+        this.open = false;
+        this.closed = false;
+        this.error = null;
+        this.out = new ByteWriter(1024);
+        this.sentState = {};
+
+        // Circles around a random point
+        this.cx = (Math.random() - 0.5) * options.spread;
+        this.cz = (Math.random() - 0.5) * options.spread;
+        this.angle = Math.random() * Math.PI * 2;
+        this.radius = 4 + Math.random() * 12;
+        this.moveTimer = 0;
+        this.chatTimer = Math.random();
+        this.editTimer = Math.random();
+        this.placed = false;
+    }
+
+    connect(url) {
+        return new Promise((resolve, reject) => {
+            const ws = new WebSocket(url);
+            ws.binaryType = 'arraybuffer';
+            this.ws = ws;
+            ws.on('open', () => {
+                this.open = true;
+                this.out.u8(OP.VIEW);
+                this.out.u8(this.options.view);
+                this.out.u8(OP.PROFILE);
+                this.out.string(`bot${this.index}`);
+                this.out.string('#888888');
+                resolve();
+            });
+            ws.on('message', (data) => this.receive(data));
+            ws.on('error', (e) => {
+                this.error = e.message;
+                if (!this.open) reject(e);
+            });
+            ws.on('close', () => {
+                this.open = false;
+                this.closed = true;
+            });
+        });
+    }
+
+    receive(data) {
+        const m = this.metrics;
+        const bytes = new Uint8Array(data);
+        m.framesIn++;
+        m.bytesIn += bytes.length;
+        const r = new ByteReader(bytes);
+        while (r.remaining > 0) {
+            const op = r.u8();
+            m.recordsIn++;
+            switch (op) {
+                case OP.HELLO: this.id = r.u32(); r.u8(); break;
+                case OP.STATE: r.u32(); NetProtocol.readState(r, {}); break;
+                case OP.INFO: r.u32(); r.string(); r.string(); break;
+                case OP.BLOCKS: NetProtocol.readBlocks(r); break;
+                case OP.CHAT: {
+                    r.string();
+                    const message = r.string();
+                    // Lines from other bots carry their send time
+                    const [tag, from, time] = message.split(':');
+                    if (tag === 'lt' && Number(from) !== this.index) m.latencies.push(performance.now() - Number(time));
+                    break;
+                }
+                case OP.LEAVE: r.u32(); break;
+                case OP.CHUNK: r.raw(r.u32()); m.chunks++; break;
+                case OP.SEQ: r.u32(); break;
+                case OP.TIME: r.u32(); break;
+                default:
+                    throw new Error(`Unknown record ${op}`);
+            }
+        }
+    }
+
+    // Called every BOT_TICK_MS; queues this tick's activity and flushes it as one frame
+    update(dt) {
+        if (!this.open) return;
+        const o = this.options;
+        const w = this.out;
+
+        this.moveTimer += dt * o.moveRate;
+        if (this.moveTimer >= 1) {
+            this.moveTimer %= 1;
+            this.angle += 0.05;
+            const x = this.cx + Math.cos(this.angle) * this.radius;
+            const z = this.cz + Math.sin(this.angle) * this.radius;
+            NetProtocol.writeState(w, NetProtocol.quantize(x, 80, z, this.angle, 0), this.sentState, () => w.u8(OP.MOVE));
+        }
+
+        this.chatTimer += dt * o.chatRate;
+        if (this.chatTimer >= 1) {
+            this.chatTimer %= 1;
+            w.u8(OP.CHAT);
+            w.string(`bot${this.index}`);
+            w.string(`lt:${this.index}:${performance.now()}`);
+        }
+
+        this.editTimer += dt * o.editRate;
+        if (this.editTimer >= 1) {
+            this.editTimer %= 1;
+            // Toggles one block high above the bot's circle
+            this.placed = !this.placed;
+            const type = this.placed ? 1 : 0;
+            NetProtocol.writeBlocks(w, [{ x: Math.floor(this.cx), y: 120, z: Math.floor(this.cz), type }]);
+        }
+
+        if (w.length > 0) {
+            const frame = w.finish();
+            this.ws.send(frame);
+            this.metrics.framesOut++;
+            this.metrics.bytesOut += frame.length;
+            w.reset();
+        }
+    }
+
+    close() {
+        if (this.ws) this.ws.terminate();
+    }
+}
+
+// Runs server.js as a child process with STATS lines enabled
+function startServer(options) {
+    return new Promise((resolve, reject) => {
+        const worldDir = fs.mkdtempSync(path.join(os.tmpdir(), 'voxel-loadtest-'));
+        const child = spawn(process.execPath, [path.join(__dirname, 'server.js')], {
+            env: Object.assign({}, process.env, { PORT: String(options.port), WORLD_DIR: worldDir, STATS_INTERVAL: '1000' }),
+            stdio: ['ignore', 'pipe', 'inherit']
+        });
+        const server = { child, worldDir, stats: [], exited: false };
+
+        let buffered = '';
+        child.stdout.on('data', (data) => {
+            buffered += data;
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            lines.forEach(line => {
+                if (line.startsWith('STATS ')) server.stats.push(JSON.parse(line.slice(6)));
+                else if (line.startsWith('Server started')) resolve(server);
+            });
+        });
+        child.on('exit', (code) => {
+            server.exited = true;
+            server.exitCode = code;
+            reject(new Error(`Server exited with code ${code}`));
+        });
+    });
+}
+
+function stopServer(server) {
+    return new Promise(resolve => {
+        if (server.exited) return resolve();
+        server.child.on('exit', resolve);
+        server.child.kill('SIGTERM');
+    }).then(() => fs.rmSync(server.worldDir, { recursive: true, force: true }));
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+function summarizeStep(clients, bots, metrics, server, options) {
+    const seconds = (performance.now() - metrics.started) / 1000;
+    const latencies = metrics.latencies.sort((a, b) => a - b);
+    const step = {
+        clients,
+        connected: bots.filter(b => b.open).length,
+        seconds,
+        framesInPerSec: metrics.framesIn / seconds,
+        recordsInPerSec: metrics.recordsIn / seconds,
+        bytesInPerSec: metrics.bytesIn / seconds,
+        framesOutPerSec: metrics.framesOut / seconds,
+        bytesOutPerSec: metrics.bytesOut / seconds,
+        chunksPerSec: metrics.chunks / seconds,
+        latencySamples: latencies.length,
+        p50Ms: percentile(latencies, 0.5),
+        p99Ms: percentile(latencies, 0.99),
+        server: null,
+        failure: null
+    };
+
+    if (server) {
+        // STATS lines printed during this step
+        const samples = server.stats.splice(0);
+        if (samples.length > 0) {
+            const avg = (key) => samples.reduce((sum, s) => sum + s[key], 0) / samples.length;
+            step.server = {
+                cpu: avg('cpu'),
+                rssMax: Math.max(...samples.map(s => s.rss)),
+                heapUsedMax: Math.max(...samples.map(s => s.heapUsed)),
+                chunks: samples[samples.length - 1].chunks,
+                tickAvgMs: avg('tickAvgMs'),
+                tickMaxMs: Math.max(...samples.map(s => s.tickMaxMs))
+            };
+        }
+    }
+
+    if (server && server.exited) step.failure = `server exited (${server.exitCode})`;
+    else if (step.connected < clients) step.failure = `${clients - step.connected} bots disconnected`;
+    else if (step.p99Ms !== null && step.p99Ms > options.maxP99) step.failure = `p99 latency ${step.p99Ms.toFixed(0)}ms > ${options.maxP99}ms`;
+    else if (step.server && step.server.tickAvgMs > options.maxTickMs) step.failure = `average tick ${step.server.tickAvgMs.toFixed(1)}ms > ${options.maxTickMs}ms`;
+    return step;
+}
+
+function printStep(s) {
+    const fmt = (v, digits = 0) => v === null || v === undefined ? '-' : v.toFixed(digits);
+    const srv = s.server || {};
+    console.log([
+        `clients ${String(s.clients).padStart(4)}`,
+        `in ${fmt(s.recordsInPerSec).padStart(7)} rec/s`,
+        `${fmt(s.bytesInPerSec / 1024).padStart(6)} KB/s`,
+        `p50 ${fmt(s.p50Ms, 1).padStart(6)}ms`,
+        `p99 ${fmt(s.p99Ms, 1).padStart(6)}ms`,
+        `cpu ${fmt(srv.cpu).padStart(3)}%`,
+        `rss ${fmt(srv.rssMax / 1048576).padStart(4)}MB`,
+        `tick ${fmt(srv.tickAvgMs, 1)}/${fmt(srv.tickMaxMs, 1)}ms`,
+        s.failure ? `FAIL: ${s.failure}` : 'ok'
+    ].join('  '));
+}
+
+async function run(options) {
+    const server = options.url ? null : await startServer(options);
+    const url = options.url || `ws://localhost:${options.port}`;
+    const metrics = new Metrics();
+    const bots = [];
+
+    let last = performance.now();
+    const driver = setInterval(() => {
+        const now = performance.now();
+        const dt = (now - last) / 1000;
+        last = now;
+        bots.forEach(bot => bot.update(dt));
+    }, BOT_TICK_MS);
+
+    const result = {
+        date: new Date().toISOString(),
+        node: process.version,
+        cpus: os.cpus().length,
+        options,
+        steps: [],
+        maxHealthyClients: 0,
+        failedAt: null,
+        failure: null
+    };
+
+    try {
+        let target = options.start;
+        while (target <= options.max) {
+            while (bots.length < target) {
+                const bot = new Bot(bots.length, options, metrics);
+                bots.push(bot);
+                await bot.connect(url).catch(() => {}); // Counted as disconnected below
+            }
+            if (server) server.stats.length = 0;
+            metrics.reset();
+            await sleep(options.stepSeconds * 1000);
+
+            const step = summarizeStep(target, bots, metrics, server, options);
+            result.steps.push(step);
+            printStep(step);
+            if (step.failure) {
+                result.failedAt = target;
+                result.failure = step.failure;
+                break;
+            }
+            result.maxHealthyClients = target;
+            target += options.step;
+        }
+    } finally {
+        clearInterval(driver);
+        bots.forEach(bot => bot.close());
+        if (server) await stopServer(server);
+    }
+
+    fs.writeFileSync(options.out, JSON.stringify(result, null, 2));
+    console.log(`Max healthy clients: ${result.maxHealthyClients}` +
+        (result.failedAt ? `, failed at ${result.failedAt} (${result.failure})` : '') +
+        `. Results written to ${options.out}`);
+    return result;
+}
+
+if (require.main === module) {
+    run(parseArgs(process.argv.slice(2))).catch(e => {
+        console.error(e);
+        process.exit(1);
+    });
+}
+
+module.exports = { run, parseArgs, percentile, Bot, Metrics };
@@ -1,61 +1,157 @@
+const path = require('path');
 const WebSocket = require('ws');
+const { NetProtocol, ByteWriter, ByteReader } = require('../js/protocol.js');
+const { ServerWorld } = require('./world.js');
 
-const wss = new WebSocket.Server({ port: 8080 });
+const PORT = parseInt(process.env.PORT) || 8080;
+const TICK_MS = 50; // Outgoing traffic is coalesced into one frame per client per tick (20 TPS)
+const SNAPSHOT_TICKS = 2; // Player states go out every other tick (10 Hz); clients interpolate between them
+const CELL_SIZE = 64; // Interest grid cell, in blocks
+const VIEW_DISTANCE = 160; // Players further away than this are not sent
+const HIGH_WATER = 64 * 1024; // Socket backlog (bytes) above which position updates are skipped
+const MAX_BACKLOG = 4 * 1024 * 1024; // Queued reliable data after which a client is dropped
+const MAX_VIEW = 16; // Largest chunk view distance a client can ask for
+const CHUNKS_PER_TICK = 4; // Chunks sent to one client per tick
+const LOADS_PER_TICK = 2; // Chunks generated or read from disk per tick, all clients together
+const EDITS_PER_TICK = 4096; // Block edits accepted from one client per tick, the rest are ignored
+const MAX_HELD = (2 * MAX_VIEW + 1) * (2 * MAX_VIEW + 1); // Chunks a reconnecting client can list
+const UNLOAD_INTERVAL = 100; // Ticks between sweeps for chunks no client needs
+const SAVE_INTERVAL = 600; // Ticks between saves (30s)
+const WORLD_DIR = process.env.WORLD_DIR || path.join(__dirname, 'world');
+const STATS_INTERVAL = parseInt(process.env.STATS_INTERVAL) || 0; // ms between STATS lines on stdout (read by loadtest.js)
+
+// Players bucketed by CELL_SIZE x CELL_SIZE columns, so each tick only looks at the
+// players around a client instead of all of them
+class InterestGrid {
+    constructor(cellSize) {
+        this.cellSize = cellSize;
+        this.cells = new Map(); // Cell key -> Set of players
+    }
+
+    key(cx, cz) {
+        return `${cx},${cz}`;
+    }
+
+    cellOf(x, z) {
+        return this.key(Math.floor(x / this.cellSize), Math.floor(z / this.cellSize));
+    }
+
+    // Moves a player to the cell of its current position
+    update(player, x, z) {
+        const key = this.cellOf(x, z);
+        if (key === player.cell) return;
+        this.remove(player);
+        if (!this.cells.has(key)) this.cells.set(key, new Set());
+        this.cells.get(key).add(player);
+        player.cell = key;
+    }
+
+    remove(player) {
+        if (player.cell === null) return;
+        const cell = this.cells.get(player.cell);
+        if (cell) {
+            cell.delete(player);
+            if (cell.size === 0) this.cells.delete(player.cell);
+        }
+        player.cell = null;
+    }
+
+    // Calls fn(key) for every cell overlapping the square of radius around x, z
+    forEachCell(x, z, radius, fn) {
+        const size = this.cellSize;
+        const x0 = Math.floor((x - radius) / size), x1 = Math.floor((x + radius) / size);
+        const z0 = Math.floor((z - radius) / size), z1 = Math.floor((z + radius) / size);
+        for (let cx = x0; cx <= x1; cx++) {
+            for (let cz = z0; cz <= z1; cz++) fn(this.key(cx, cz));
+        }
+    }
+
+    // Players within radius (horizontal distance) of x, z
+    query(x, z, radius, out = []) {
+        const r2 = radius * radius;
+        this.forEachCell(x, z, radius, key => {
+            const cell = this.cells.get(key);
+            if (!cell) return;
+            cell.forEach(p => {
+                const dx = p.x - x, dz = p.z - z;
+                if (dx * dx + dz * dz <= r2) out.push(p);
+            });
+        });
+        return out;
+    }
+}
+
+// Chunk offsets within a view distance, nearest first (cached per distance)
+const viewOrders = new Map();
+function viewOrder(view) {
+    if (!viewOrders.has(view)) {
+        const offsets = [];
+        for (let dx = -view; dx <= view; dx++) {
+            for (let dz = -view; dz <= view; dz++) offsets.push([dx, dz]);
+        }
+        offsets.sort((a, b) => (a[0] * a[0] + a[1] * a[1]) - (b[0] * b[0] + b[1] * b[1]));
+        viewOrders.set(view, offsets);
+    }
+    return viewOrders.get(view);
+}
+
+let world = null; // ServerWorld, opened when this file is run (see the end)
 
 const players = new Map();
+const grid = new InterestGrid(CELL_SIZE);
+let nextId = 1;
+
+// Events collected during the current tick, sent out by tick() (block edits come from world.takeChanges())
+const tickChat = []; // { sender, message }
+const tickLeaves = []; // Player ids
 
-console.log('Server started on port 8080');
+let tickCount = 0;
+const startTime = performance.now(); // Server clock origin for TIME records
+
+// Connection state of one client
+function createPlayer(id, ws) {
+    return {
+        id,
+        ws,
+        state: { x: 0, y: 0, z: 0, yaw: 0, pitch: 0, known: false }, // Quantised, see NetProtocol.quantize
+        x: 0, // Position in blocks (for the interest grid)
+        z: 0,
+        cell: null,
+        name: '',
+        skinColor: '',
+        profileVersion: 0,
+        known: new Map(), // Other player id -> { state last sent to this client, profileVersion }
+        view: 0, // Chunk view distance; nothing is streamed until the client sends VIEW
+        chunks: new Set(), // Keys of the chunks the client holds
+        held: new Map(), // Chunks listed on reconnect, not confirmed yet: key -> log edits since heldSeq, or null
+        heldSeq: 0, // Edit seq the client had when it reconnected
+        syncSeq: 0, // Edit seq when it did (the held edit lists go up to here)
+        editBudget: EDITS_PER_TICK,
+        streamed: null, // Chunk the client was in when everything in view had been sent
+        // Outgoing frame. Records that must arrive (leaves, profiles, blocks, chat) stay queued here
+        // while the socket is backed up; position updates are simply skipped until it drains.
+        out: new ByteWriter(1024)
+    };
+}
 
-wss.on('connection', (ws) => {
-    const id = Date.now(); // Simple ID
-    players.set(id, { ws, x: 0, y: 0, z: 0, yaw: 0, pitch: 0 });
+function onConnection(ws) {
+    const id = nextId++;
+    const player = createPlayer(id, ws);
+    players.set(id, player);
 
     console.log(`Player ${id} connected`);
 
-    // Send ID to player
-    ws.send(JSON.stringify({ type: 'id', id }));
+    // Greet with our id; the client switches to the binary protocol on this record
+    const hello = new ByteWriter(8);
+    hello.u8(NetProtocol.OP.HELLO);
+    hello.u32(id);
+    hello.u8(NetProtocol.VERSION);
+    ws.send(hello.finish());
 
-    ws.on('message', (message) => {
+    ws.on('message', (message, isBinary) => {
+        if (!isBinary) return; // Pre-binary clients are not supported
         try {
-            const data = JSON.parse(message);
-
-            if (data.type === 'move') {
-                const player = players.get(id);
-                if (player) {
-                    player.x = data.x;
-                    player.y = data.y;
-                    player.z = data.z;
-                    player.yaw = data.yaw;
-                    player.pitch = data.pitch;
-
-                    // Broadcast to others
-                    broadcast({
-                        type: 'player_update',
-                        id: id,
-                        x: player.x,
-                        y: player.y,
-                        z: player.z,
-                        yaw: player.yaw,
-                        pitch: player.pitch
-                    }, id);
-                }
-            } else if (data.type === 'block') {
-                // Broadcast block update
-                broadcast({
-                    type: 'block_update',
-                    x: data.x,
-                    y: data.y,
-                    z: data.z,
-                    blockType: data.blockType
-                }, id);
-            } else if (data.type === 'chat') {
-                // Broadcast chat to ALL players (including sender usually, or handle sender locally)
-                broadcast({
-                    type: 'chat',
-                    sender: data.sender,
-                    message: data.message
-                }, -1); // -1 to not exclude anyone, or just id if we want to exclude sender
-            }
+            handleFrame(player, new ByteReader(new Uint8Array(message.buffer, message.byteOffset, message.byteLength)));
         } catch (e) {
             console.error('Error processing message', e);
         }
@@ -64,15 +160,319 @@ wss.on('connection', (ws) => {
     ws.on('close', () => {
         console.log(`Player ${id} disconnected`);
         players.delete(id);
-        broadcast({ type: 'player_leave', id }, id);
+        grid.remove(player);
+        tickLeaves.push(id);
+    });
+}
+
+function handleFrame(player, r) {
+    const OP = NetProtocol.OP;
+    while (r.remaining > 0) {
+        const op = r.u8();
+        switch (op) {
+            case OP.MOVE:
+                NetProtocol.readState(r, player.state);
+                player.x = player.state.x / NetProtocol.POS_SCALE;
+                player.z = player.state.z / NetProtocol.POS_SCALE;
+                grid.update(player, player.x, player.z);
+                break;
+            case OP.PROFILE:
+                player.name = r.string();
+                player.skinColor = r.string();
+                player.profileVersion++;
+                break;
+            case OP.BLOCKS: {
+                // Only in chunks the client was sent (so nothing far away gets loaded for it)
+                const blocks = NetProtocol.readBlocks(r).filter(b => b.y >= 0 && b.y < 128 &&
+                    player.chunks.has(world.chunkKey(Math.floor(b.x / 16), Math.floor(b.z / 16))));
+                if (blocks.length > player.editBudget) blocks.length = player.editBudget;
+                player.editBudget -= blocks.length;
+                world.applyEdits(blocks, player.id);
+                break;
+            }
+            case OP.VIEW:
+                player.view = Math.min(r.u8(), MAX_VIEW);
+                player.streamed = null;
+                break;
+            case OP.SYNC:
+                resync(player, r.u32(), NetProtocol.readChunkList(r));
+                break;
+            case OP.DROP:
+                NetProtocol.readChunkList(r).forEach(([cx, cz]) => {
+                    const key = world.chunkKey(cx, cz);
+                    player.chunks.delete(key);
+                    player.held.delete(key);
+                });
+                player.streamed = null;
+                break;
+            case OP.CHAT:
+                // Chat goes to all players, the sender included
+                tickChat.push({ sender: r.string(), message: r.string() });
+                break;
+            default:
+                throw new Error(`Unknown record ${op}`);
+        }
+    }
+}
+
+// A reconnecting client still holds chunks as of edit seq. Nothing is loaded here: the
+// chunks are only noted, and confirmed by streamChunks once they are in view (see there).
+// The edits since seq are picked from the log now, while it still reaches back that far.
+function resync(player, seq, held) {
+    player.held.clear();
+    player.heldSeq = seq;
+    player.syncSeq = world.editSeq;
+    player.streamed = null;
+    if (seq > world.editSeq) return; // Edits the server lost (e.g. crashed before saving): resend everything
+
+    const keys = new Set();
+    held.slice(0, MAX_HELD).forEach(([cx, cz]) => keys.add(world.chunkKey(cx, cz)));
+    const edits = world.editsSince(seq, keys);
+    keys.forEach(key => player.held.set(key, edits ? [] : null));
+    if (edits) {
+        edits.forEach(e => player.held.get(world.chunkKey(Math.floor(e.x / 16), Math.floor(e.z / 16))).push(e));
+    }
+}
+
+// Sends the nearest chunks in view the client does not have yet; returns how many were
+// sent or confirmed. Chunks the client listed on reconnect are kept when they were not
+// edited since, brought up to date from the log when it reached back far enough, and
+// sent again in full otherwise (the client replaces its copy).
+function streamChunks(world, player, w, budget) {
+    if (player.view === 0 || player.cell === null) return 0;
+    const pcx = Math.floor(player.x / 16);
+    const pcz = Math.floor(player.z / 16);
+    const center = world.chunkKey(pcx, pcz);
+    if (player.streamed === center) return 0;
+
+    let sent = 0, confirmed = 0;
+    for (const [dx, dz] of viewOrder(player.view)) {
+        const cx = pcx + dx, cz = pcz + dz;
+        const key = world.chunkKey(cx, cz);
+        if (player.chunks.has(key)) continue;
+        if (!world.getChunk(cx, cz)) {
+            if (budget.loads === 0) return sent + confirmed;
+            budget.loads--;
+        }
+        const chunk = world.loadChunk(cx, cz);
+        const edits = player.held.get(key);
+        if (edits !== undefined) {
+            player.held.delete(key);
+            if (chunk.editSeq <= player.heldSeq || (edits && chunk.editSeq <= player.syncSeq)) {
+                if (edits && edits.length > 0) NetProtocol.writeBlocks(w, edits);
+                player.chunks.add(key);
+                confirmed++;
+                continue;
+            }
+        }
+        const data = world.encodeChunk(chunk);
+        w.u8(NetProtocol.OP.CHUNK);
+        w.u32(data.length);
+        w.raw(data);
+        player.chunks.add(key);
+        if (++sent === CHUNKS_PER_TICK) return sent + confirmed;
+    }
+    player.streamed = center; // Nothing left until the client moves, drops chunks or changes view
+    return sent + confirmed;
+}
+
+// Saves and unloads chunks no client holds or is about to need
+function unloadChunks() {
+    const keep = new Set();
+    players.forEach(player => {
+        player.chunks.forEach(key => keep.add(key));
+        if (player.cell === null) return;
+        const pcx = Math.floor(player.x / 16), pcz = Math.floor(player.z / 16);
+        viewOrder(player.view + 1).forEach(([dx, dz]) => keep.add(world.chunkKey(pcx + dx, pcz + dz)));
+    });
+    world.unloadChunks(keep);
+}
+
+// Queues everything that changed this tick within the player's view on its outgoing frame
+// and sends it, unless the socket is backed up. t holds what is shared by every client's
+// frame this tick: { world, grid, changes, changedChunks, seq, leaves, chat, snapshot, time, budget }.
+function writeFrame(player, t) {
+    const OP = NetProtocol.OP;
+    const w = player.out;
+    player.editBudget = EDITS_PER_TICK;
+
+    t.leaves.forEach(id => {
+        if (!player.known.delete(id)) return;
+        w.u8(OP.LEAVE);
+        w.u32(id);
+    });
+
+    const nearby = player.cell === null ? [] : t.grid.query(player.x, player.z, VIEW_DISTANCE);
+    const inView = new Set();
+    nearby.forEach(other => {
+        if (other !== player) inView.add(other.id);
+    });
+
+    // Players that walked out of view are removed on the client, and re-announced on return
+    player.known.forEach((entry, id) => {
+        if (inView.has(id)) return;
+        player.known.delete(id);
+        w.u8(OP.LEAVE);
+        w.u32(id);
     });
-});
 
-function broadcast(data, excludeId) {
-    const msg = JSON.stringify(data);
-    players.forEach((player, id) => {
-        if (id !== excludeId && player.ws.readyState === WebSocket.OPEN) {
-            player.ws.send(msg);
+    nearby.forEach(other => {
+        if (other === player) return;
+        let entry = player.known.get(other.id);
+        if (!entry) {
+            entry = { base: {}, profileVersion: -1 };
+            player.known.set(other.id, entry);
         }
+        if (entry.profileVersion !== other.profileVersion) {
+            w.u8(OP.INFO);
+            w.u32(other.id);
+            w.string(other.name);
+            w.string(other.skinColor);
+            entry.profileVersion = other.profileVersion;
+        }
+    });
+
+    if (t.changes.length > 0) {
+        // Edits to chunks the client holds (chunks it gets later already include them)
+        const blocks = [];
+        t.changedChunks.forEach((list, key) => {
+            if (!player.chunks.has(key)) return;
+            list.forEach(b => { if (b.from !== player.id) blocks.push(b); });
+        });
+        if (blocks.length > 0) NetProtocol.writeBlocks(w, blocks);
+        // Not while listed chunks wait for confirmation: they are not up to date yet
+        if (player.held.size === 0) {
+            w.u8(OP.SEQ);
+            w.u32(t.seq);
+        }
+    }
+
+    t.chat.forEach(c => {
+        w.u8(OP.CHAT);
+        w.string(c.sender);
+        w.string(c.message);
     });
+
+    if (player.ws.readyState !== WebSocket.OPEN) return;
+
+    if (player.ws.bufferedAmount > HIGH_WATER) {
+        // Backed up: keep the queued records, drop this tick's positions (the next
+        // state record is a diff against what the client last got, so nothing is lost)
+        if (w.length > MAX_BACKLOG) {
+            console.log(`Player ${player.id} is too far behind, disconnecting`);
+            player.ws.terminate();
+        }
+        return;
+    }
+
+    if (streamChunks(t.world, player, w, t.budget) > 0 && t.changes.length === 0 && player.held.size === 0) {
+        w.u8(OP.SEQ);
+        w.u32(t.seq);
+    }
+
+    // Only players that moved or turned since this client last heard of them. The
+    // time goes out even when none did, so the client knows they stood still until then.
+    if (t.snapshot && player.known.size > 0) {
+        w.u8(OP.TIME);
+        w.u32(t.time);
+        nearby.forEach(other => {
+            if (other === player) return;
+            NetProtocol.writeState(w, other.state, player.known.get(other.id).base, () => {
+                w.u8(OP.STATE);
+                w.u32(other.id);
+            });
+        });
+    }
+
+    if (w.length > 0) {
+        player.ws.send(w.finish());
+        w.reset();
+    }
+}
+
+// Builds and sends one frame per client
+function tick() {
+    // Block edits bucketed by chunk
+    const changes = world.takeChanges();
+    const changedChunks = new Map();
+    changes.forEach(b => {
+        const key = world.chunkKey(Math.floor(b.x / 16), Math.floor(b.z / 16));
+        if (!changedChunks.has(key)) changedChunks.set(key, []);
+        changedChunks.get(key).push(b);
+    });
+
+    const t = {
+        world,
+        grid,
+        changes,
+        changedChunks,
+        seq: world.editSeq, // Every client has all edits up to here in the chunks it holds after this tick
+        leaves: tickLeaves,
+        chat: tickChat,
+        snapshot: tickCount % SNAPSHOT_TICKS === 0,
+        time: Math.floor(performance.now() - startTime) >>> 0,
+        budget: { loads: LOADS_PER_TICK }
+    };
+    players.forEach(player => writeFrame(player, t));
+
+    tickChat.length = 0;
+    tickLeaves.length = 0;
+
+    tickCount++;
+    if (tickCount % UNLOAD_INTERVAL === 0) unloadChunks();
+    if (tickCount % SAVE_INTERVAL === 0) world.save();
+}
+
+// Run as the server (the tests load this file for InterestGrid and writeFrame)
+if (require.main === module) {
+    world = new ServerWorld(WORLD_DIR);
+    const wss = new WebSocket.Server({ port: PORT });
+    console.log(`Server started on port ${PORT}, world in ${WORLD_DIR}`);
+    wss.on('connection', onConnection);
+
+    // Tick cost since the last STATS line
+    const tickStats = { count: 0, total: 0, max: 0 };
+
+    setInterval(() => {
+        const start = performance.now();
+        tick();
+        const ms = performance.now() - start;
+        tickStats.count++;
+        tickStats.total += ms;
+        if (ms > tickStats.max) tickStats.max = ms;
+    }, TICK_MS);
+
+    if (STATS_INTERVAL > 0) {
+        let lastCpu = process.cpuUsage();
+        let lastTime = performance.now();
+        setInterval(() => {
+            const cpu = process.cpuUsage(lastCpu);
+            const now = performance.now();
+            const memory = process.memoryUsage();
+            console.log('STATS ' + JSON.stringify({
+                players: players.size,
+                cpu: (cpu.user + cpu.system) / 1000 / (now - lastTime) * 100, // % of one core
+                rss: memory.rss,
+                heapUsed: memory.heapUsed,
+                chunks: world.world.chunks.size,
+                tickAvgMs: tickStats.count > 0 ? tickStats.total / tickStats.count : 0,
+                tickMaxMs: tickStats.max
+            }));
+            lastCpu = process.cpuUsage();
+            lastTime = now;
+            tickStats.count = 0;
+            tickStats.total = 0;
+            tickStats.max = 0;
+        }, STATS_INTERVAL);
+    }
+
+    const shutdown = () => {
+        console.log('Saving world...');
+        world.save();
+        process.exit(0);
+    };
+    process.on('SIGINT', shutdown);
+    process.on('SIGTERM', shutdown);
 }
+
+module.exports = { InterestGrid, createPlayer, writeFrame, HIGH_WATER, VIEW_DISTANCE };
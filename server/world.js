@@ -0,0 +1,199 @@
+// Authoritative world for the multiplayer server.
+// Runs the game's own generator (js/world.js and friends) in a sandbox, the same way
+// js/chunkworker.js runs it in a worker, keeps chunks on disk as ChunkCodec records
+// (js/storage.js) and numbers every block edit so reconnecting clients can be sent only
+// what they missed (see server.js).
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const SCRIPTS = ['math.js', 'blocks.js', 'chunk.js', 'biome.js', 'structures.js', 'village.js', 'world.js', 'storage.js'];
+
+class ServerWorld {
+    constructor(dir, options = {}) {
+        this.dir = dir;
+        this.logSize = options.logSize || ServerWorld.LOG_SIZE;
+
+        // The scripts expect a browser-like global object
+        const sandbox = { console, TextEncoder, TextDecoder };
+        sandbox.window = sandbox;
+        sandbox.self = sandbox;
+        vm.createContext(sandbox);
+        const jsDir = path.join(__dirname, '..', 'js');
+        SCRIPTS.forEach(file => {
+            vm.runInContext(fs.readFileSync(path.join(jsDir, file), 'utf8'), sandbox, { filename: file });
+        });
+        this.ChunkCodec = sandbox.ChunkCodec;
+        this.BLOCK = sandbox.BLOCK;
+        this.BLOCKS = sandbox.BLOCKS;
+        this.world = new sandbox.World();
+
+        this.editSeq = 0; // Number of the latest edit
+        this.log = []; // Recent edits { seq, x, y, z, type, from }, consecutive seqs, oldest first
+        this.changes = []; // Edits not handed out by takeChanges() yet
+
+        fs.mkdirSync(dir, { recursive: true });
+        const level = this.readLevel();
+        if (level) {
+            this.world.setSeed(level.seed);
+            this.editSeq = level.editSeq;
+        }
+    }
+
+    levelFile() {
+        return path.join(this.dir, 'level.json');
+    }
+
+    chunkFile(cx, cz) {
+        return path.join(this.dir, `c.${cx}.${cz}.bin`);
+    }
+
+    readLevel() {
+        try {
+            return JSON.parse(fs.readFileSync(this.levelFile(), 'utf8'));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    chunkKey(cx, cz) {
+        return this.world.getChunkKey(cx, cz);
+    }
+
+    getChunk(cx, cz) {
+        return this.world.getChunk(cx, cz);
+    }
+
+    // Returns the chunk, reading it from disk or generating it when it is not loaded.
+    // Blocks a new chunk's structures place in already loaded neighbours count as edits.
+    loadChunk(cx, cz) {
+        const loaded = this.world.getChunk(cx, cz);
+        if (loaded) return loaded;
+
+        let data = null;
+        try {
+            data = fs.readFileSync(this.chunkFile(cx, cz));
+        } catch (e) {
+            // Not saved yet
+        }
+
+        if (data) {
+            // File: u32 seq of the chunk's last edit, then the ChunkCodec record
+            const bytes = new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+            const seq = new DataView(bytes.buffer, bytes.byteOffset, 4).getUint32(0, true);
+            const chunk = this.world.addStoredChunk(this.ChunkCodec.decode(bytes.slice(4).buffer));
+            chunk.editSeq = seq;
+            return chunk;
+        }
+
+        const spill = this.world.batchEdit(() => this.world.generateChunk(cx, cz));
+        const chunk = this.world.getChunk(cx, cz);
+        chunk.editSeq = 0;
+        this.record(spill, 0);
+        return chunk;
+    }
+
+    // Numbers changes ({ x, y, z, type } from World edit transactions) and logs them
+    record(changes, from) {
+        changes.forEach(c => {
+            const edit = { seq: ++this.editSeq, x: c.x, y: c.y, z: c.z, type: c.type, from };
+            this.log.push(edit);
+            this.changes.push(edit);
+            const chunk = this.world.getChunkAt(c.x, c.z);
+            if (chunk) chunk.editSeq = edit.seq;
+        });
+        // Trimmed in steps so the log is not spliced on every edit
+        if (this.log.length > this.logSize * 2) this.log.splice(0, this.log.length - this.logSize);
+    }
+
+    // True for ids a chunk can hold: air and registered blocks (items share BLOCKS but
+    // are 256 and up, which the byte-per-block arrays would wrap into other blocks)
+    isBlockType(type) {
+        return type === this.BLOCK.AIR || (type < 256 && this.BLOCKS[type] !== undefined);
+    }
+
+    // Applies a client's block changes ({ x, y, z, type }) as one edit transaction.
+    // Edits with unknown types or outside loaded chunks are ignored (nothing is loaded here;
+    // the caller only passes edits to chunks the client was sent). Returns the number applied.
+    applyEdits(blocks, from) {
+        const changes = this.world.batchEdit(() => {
+            blocks.forEach(b => {
+                if (b.y < 0 || b.y >= 128 || !this.isBlockType(b.type)) return;
+                if (!this.world.getChunk(Math.floor(b.x / 16), Math.floor(b.z / 16))) return;
+                this.world.setBlock(b.x, b.y, b.z, b.type);
+            });
+        });
+        // Water and redstone are simulated by the clients; the server only keeps the edits
+        this.world.fluidTicks.clear();
+        this.world.redstoneTicks.clear();
+        this.record(changes, from);
+        return changes.length;
+    }
+
+    // Edits recorded since the previous call
+    takeChanges() {
+        const changes = this.changes;
+        this.changes = [];
+        return changes;
+    }
+
+    // Logged edits after seq that fall in the chunks with the given keys,
+    // or null when the log no longer reaches back that far
+    editsSince(seq, keys) {
+        if (seq > this.editSeq) return null; // Edits the server lost (e.g. crashed before saving)
+        const first = this.log.length > 0 ? this.log[0].seq : this.editSeq + 1;
+        if (seq + 1 < first) return null;
+
+        const out = [];
+        for (let i = seq + 1 - first; i < this.log.length; i++) {
+            const e = this.log[i];
+            if (keys.has(this.chunkKey(Math.floor(e.x / 16), Math.floor(e.z / 16)))) out.push(e);
+        }
+        return out;
+    }
+
+    // ChunkCodec record of a loaded chunk, as sent to clients
+    encodeChunk(chunk) {
+        return new Uint8Array(this.ChunkCodec.encode(this.world.chunkRecord(chunk)));
+    }
+
+    saveChunk(chunk) {
+        const record = this.encodeChunk(chunk);
+        const data = Buffer.alloc(4 + record.length);
+        data.writeUInt32LE(chunk.editSeq || 0, 0);
+        data.set(record, 4);
+        const file = this.chunkFile(chunk.cx, chunk.cz);
+        fs.writeFileSync(file + '.tmp', data);
+        fs.renameSync(file + '.tmp', file);
+        chunk.unsaved = false;
+    }
+
+    // Writes every changed chunk and the level file; returns the number of chunks written
+    save() {
+        let count = 0;
+        for (const chunk of this.world.chunks.values()) {
+            if (!chunk.unsaved) continue;
+            this.saveChunk(chunk);
+            count++;
+        }
+        fs.writeFileSync(this.levelFile(), JSON.stringify({ seed: this.world.seed, editSeq: this.editSeq }));
+        return count;
+    }
+
+    // Saves and drops loaded chunks whose keys are not in keep
+    unloadChunks(keep) {
+        const chunks = this.world.chunks;
+        let count = 0;
+        for (const [key, chunk] of Array.from(chunks)) {
+            if (keep.has(key)) continue;
+            if (chunk.unsaved) this.saveChunk(chunk);
+            chunks.delete(key);
+            count++;
+        }
+        return count;
+    }
+}
+
+ServerWorld.LOG_SIZE = 65536; // Edits kept for resyncing reconnecting clients
+
+module.exports = { ServerWorld };
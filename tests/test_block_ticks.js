@@ -0,0 +1,153 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('Scheduled Block Ticks', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        for (let cx = -1; cx <= 0; cx++) {
+            for (let cz = -1; cz <= 0; cz++) {
+                world.chunks.set(world.getChunkKey(cx, cz), new dom.window.Chunk(cx, cz));
+            }
+        }
+        // Floor so placed blocks have support
+        for (let x = -16; x < 16; x++) {
+            for (let z = -16; z < 16; z++) world.setBlock(x, 0, z, BLOCK.STONE);
+        }
+        world.fluidTicks.clear();
+        world.redstoneTicks.clear();
+    });
+
+    it('should pack positions, including negative ones, and hand them back unchanged', () => {
+        const seen = [];
+        world.scheduleFluidTick(-5, 7, -300000, 0);
+        world.scheduleFluidTick(123456, 127, 9, 0);
+        world.runBlockTicks(world.fluidTicks, 0, Infinity, (x, y, z) => seen.push([x, y, z]));
+        assert.strictEqual(JSON.stringify(seen), JSON.stringify([[-5, 7, -300000], [123456, 127, 9]]));
+    });
+
+    it('should schedule a position only once until it runs', () => {
+        world.scheduleFluidTick(1, 5, 1);
+        world.scheduleFluidTick(1, 5, 1);
+        world.scheduleFluidTick(1, 5, 1, 10);
+        world.scheduleFluidTick(1, 200, 1); // Outside the world
+        assert.strictEqual(world.fluidTicks.size, 1);
+    });
+
+    it('should run fluid ticks after their delay', () => {
+        world.setBlock(2, 1, 2, BLOCK.WATER);
+        world.setMetadata(2, 1, 2, 8); // Source
+        assert.ok(world.fluidTicks.has(world.packBlockPos(2, 1, 2)));
+
+        world.tick();
+        assert.strictEqual(world.getBlock(3, 1, 2), BLOCK.AIR);
+        world.tick();
+        assert.strictEqual(world.getBlock(3, 1, 2), BLOCK.WATER);
+    });
+
+    it('should carry work over the budget into the next tick', () => {
+        world.fluidTicks.budget = 3;
+        let ran = 0;
+        world.fluidTick = () => { ran++; };
+        for (let i = 0; i < 7; i++) world.scheduleFluidTick(i, 5, 0, 1);
+
+        world.tick();
+        assert.strictEqual(ran, 3);
+        assert.strictEqual(world.fluidTicks.size, 4);
+        world.tick();
+        world.tick();
+        assert.strictEqual(ran, 7);
+        assert.strictEqual(world.fluidTicks.size, 0);
+    });
+
+    it('should power redstone wire through world ticks', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        world.setBlock(1, 1, 0, BLOCK.REDSTONE_WIRE);
+        world.setBlock(2, 1, 0, BLOCK.REDSTONE_WIRE);
+
+        for (let i = 0; i < 5; i++) world.tick();
+        assert.strictEqual(world.getMetadata(1, 1, 0), 15);
+        assert.strictEqual(world.getMetadata(2, 1, 0), 14);
+    });
+});
+
+describe('Random Ticks', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        for (let cx = -1; cx <= 0; cx++) {
+            for (let cz = -1; cz <= 0; cz++) {
+                world.chunks.set(world.getChunkKey(cx, cz), new dom.window.Chunk(cx, cz));
+            }
+        }
+        for (let x = -16; x < 16; x++) {
+            for (let z = -16; z < 16; z++) world.setBlock(x, 0, z, BLOCK.STONE);
+        }
+        world.setBlock(3, 20, 3, BLOCK.WHEAT);
+        world.setBlock(-5, 1, -7, BLOCK.OAK_SAPLING);
+    });
+
+    it('should only sample sections that hold random-ticking blocks', () => {
+        const chunk = world.getChunk(0, 0);
+        assert.strictEqual(chunk.getRandomTickSections(), 1 << 1);
+        assert.strictEqual(world.getChunk(-1, -1).getRandomTickSections(), 1 << 0);
+        assert.strictEqual(world.getChunk(-1, 0).getRandomTickSections(), 0);
+
+        // Kept up to date by setBlock, and found again in compact storage
+        chunk.setBlock(1, 100, 1, BLOCK.CARROTS);
+        assert.strictEqual(chunk.getRandomTickSections(), (1 << 1) | (1 << 6));
+        chunk.compact();
+        chunk.randomTickSections = -1;
+        assert.strictEqual(chunk.getRandomTickSections(), (1 << 1) | (1 << 6));
+    });
+
+    it('should hand out ticks at the configured rate to the right positions', () => {
+        const hits = new Map();
+        world.randomTickSpeed = 4096;
+        for (let i = 0; i < 20; i++) {
+            world.randomTick((x, y, z, type) => {
+                const key = `${x},${y},${z},${type}`;
+                hits.set(key, (hits.get(key) || 0) + 1);
+            });
+        }
+        // 20 ticks x 4096 samples over 4096 blocks: about 20 hits each
+        assert.deepStrictEqual(Array.from(hits.keys()).sort(), [`-5,1,-7,${BLOCK.OAK_SAPLING}`, `3,20,3,${BLOCK.WHEAT}`]);
+        for (const count of hits.values()) assert.ok(count > 5 && count < 40, `${count} ticks`);
+
+        world.randomTickSpeed = 0;
+        world.randomTick(() => assert.fail('Random ticks are off'));
+    });
+
+    it('should keep furnaces and brewing stands on the active list until removed', () => {
+        const furnace = { type: 'furnace', burnTime: 0 };
+        world.setBlockEntity(1, 1, 1, furnace);
+        world.setBlockEntity(2, 1, 1, { type: 'chest', items: [] });
+        assert.deepStrictEqual(Array.from(world.activeBlockEntities), [furnace]);
+
+        world.activeBlockEntities.clear(); // Asleep
+        world.wakeBlockEntity(furnace);
+        assert.ok(world.activeBlockEntities.has(furnace));
+
+        world.removeBlockEntity(1, 1, 1);
+        assert.strictEqual(world.activeBlockEntities.size, 0);
+    });
+});
@@ -0,0 +1,372 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    url: "http://localhost/",
+    runScripts: "dangerously",
+    resources: "usable"
+});
+global.window = dom.window;
+global.document = dom.window.document;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/renderer.js', 'utf8'));
+
+describe('Chunk Mesh', () => {
+    let BLOCK, Chunk;
+
+    before(() => {
+        BLOCK = dom.window.BLOCK;
+        Chunk = dom.window.Chunk;
+    });
+
+    const quadsOf = (chunk) => {
+        const list = [];
+        chunk.sectionMeshes.forEach(mesh => {
+            if (!mesh) return;
+            for (let i = 0; i < mesh.quadCount; i++) {
+                const o = i * Chunk.QUAD_STRIDE;
+                list.push({
+                    x: mesh.quads[o], y: mesh.quads[o + 1], z: mesh.quads[o + 2],
+                    face: mesh.quads[o + 3], du: mesh.quads[o + 4], dv: mesh.quads[o + 5],
+                    type: mesh.quads[o + 6]
+                });
+            }
+        });
+        return list;
+    };
+
+    const specialsOf = (chunk) => {
+        const list = [];
+        chunk.sectionMeshes.forEach(mesh => {
+            if (mesh) list.push(...mesh.specials);
+        });
+        return list;
+    };
+
+    it('should emit six quads for a single cube', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(5, 10, 5, BLOCK.STONE);
+        chunk.buildMesh(null);
+
+        const quads = quadsOf(chunk);
+        assert.strictEqual(quads.length, 6);
+        assert.deepStrictEqual(quads.map(q => q.face).sort(), [0, 1, 2, 3, 4, 5]);
+        const top = quads.find(q => q.face === 2);
+        assert.deepStrictEqual([top.x, top.y, top.z, top.du, top.dv], [5, 11, 5, 1, 1]);
+        assert.strictEqual(chunk.modified, false);
+    });
+
+    it('should cull faces shared between opaque cubes', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(5, 10, 5, BLOCK.STONE);
+        chunk.setBlock(6, 10, 5, BLOCK.STONE);
+        chunk.buildMesh(null);
+
+        const quads = quadsOf(chunk);
+        // The two inner X faces are hidden, the rest merge into 2x1 quads
+        assert.strictEqual(quads.filter(q => q.face === 0 || q.face === 1).length, 2);
+        const top = quads.find(q => q.face === 2);
+        assert.strictEqual(top.du * top.dv, 2);
+    });
+
+    it('should greedily merge a flat floor into capped quads', () => {
+        const chunk = new Chunk(0, 0);
+        for (let x = 0; x < 16; x++) {
+            for (let z = 0; z < 16; z++) chunk.setBlock(x, 0, z, BLOCK.GRASS);
+        }
+        chunk.buildMesh(null);
+
+        const tops = quadsOf(chunk).filter(q => q.face === 2);
+        const m = Chunk.MESH_MAX_MERGE;
+        assert.strictEqual(tops.length, (16 / m) * (16 / m));
+        assert.strictEqual(tops.reduce((sum, q) => sum + q.du * q.dv, 0), 256);
+        // Bottom of the world is never visible
+        assert.strictEqual(quadsOf(chunk).filter(q => q.face === 3).length, 0);
+    });
+
+    it('should not merge different block types', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(0, 0, 0, BLOCK.STONE);
+        chunk.setBlock(1, 0, 0, BLOCK.DIRT);
+        chunk.buildMesh(null);
+
+        const tops = quadsOf(chunk).filter(q => q.face === 2);
+        assert.strictEqual(tops.length, 2);
+        assert.ok(tops.every(q => q.du * q.dv === 1));
+    });
+
+    it('should not merge faces that are lit differently', () => {
+        const chunk = new Chunk(0, 0);
+        for (let x = 0; x < 4; x++) {
+            for (let z = 0; z < 4; z++) {
+                chunk.setBlock(x, 0, z, BLOCK.STONE);
+                chunk.setSkyLight(x, 1, z, 15);
+            }
+        }
+        chunk.setSkyLight(0, 1, 0, 4); // Shade over one corner
+        chunk.setLight(0, 1, 0, 9);    // Partly lit by a torch
+        chunk.buildMesh(null);
+
+        const tops = quadsOf(chunk).filter(q => q.face === 2);
+        assert.ok(tops.length > 1);
+        assert.strictEqual(tops.reduce((sum, q) => sum + q.du * q.dv, 0), 16);
+        assert.ok(tops.every(q => q.type === BLOCK.STONE));
+        const corner = tops.find(q => q.x === 0 && q.z === 0);
+        assert.strictEqual(corner.du * corner.dv, 1);
+    });
+
+    it('should list special shapes separately', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(3, 5, 4, BLOCK.TORCH);
+        chunk.setBlock(2, 5, 4, BLOCK.WATER);
+        chunk.buildMesh(null);
+
+        assert.strictEqual(quadsOf(chunk).length, 0);
+        const indices = specialsOf(chunk).sort((a, b) => a - b);
+        assert.deepStrictEqual(indices, [chunk.getIndex(2, 5, 4), chunk.getIndex(3, 5, 4)]);
+    });
+
+    it('should consult the world across chunk borders', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(15, 10, 5, BLOCK.STONE);
+        const world = {
+            getBlock: (x, y, z) => (x === 16 && y === 10 && z === 5) ? BLOCK.STONE : BLOCK.AIR
+        };
+        chunk.buildMesh(world);
+
+        assert.strictEqual(quadsOf(chunk).filter(q => q.face === 0).length, 0);
+    });
+
+    it('should only rebuild through updateVisibleBlocks when modified', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(1, 1, 1, BLOCK.STONE);
+        chunk.updateVisibleBlocks(null);
+        const mesh = chunk.sectionMeshes[0];
+
+        chunk.updateVisibleBlocks(null);
+        assert.strictEqual(chunk.sectionMeshes[0], mesh);
+
+        chunk.setBlock(1, 1, 1, BLOCK.AIR);
+        chunk.updateVisibleBlocks(null);
+        assert.strictEqual(quadsOf(chunk).length, 0);
+    });
+
+    it('should only rebuild dirty sections', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.setBlock(1, 5, 1, BLOCK.STONE);
+        chunk.setBlock(1, 40, 1, BLOCK.STONE);
+        chunk.buildMesh(null);
+        const low = chunk.sectionMeshes[0];
+        const high = chunk.sectionMeshes[2];
+        assert.strictEqual(chunk.dirtySections, 0);
+
+        chunk.setBlock(2, 40, 1, BLOCK.STONE);
+        assert.strictEqual(chunk.dirtySections, 1 << 2);
+        chunk.buildMesh(null);
+        assert.strictEqual(chunk.sectionMeshes[0], low);
+        assert.notStrictEqual(chunk.sectionMeshes[2], high);
+    });
+
+    it('should flag the neighbouring section on a section border', () => {
+        const chunk = new Chunk(0, 0);
+        chunk.buildMesh(null);
+        chunk.setBlock(0, 16, 0, BLOCK.STONE);
+        assert.strictEqual(chunk.dirtySections, (1 << 0) | (1 << 1));
+        chunk.buildMesh(null);
+        chunk.setMetadata(0, 31, 0, 1);
+        assert.strictEqual(chunk.dirtySections, (1 << 1) | (1 << 2));
+    });
+
+    it('should record which section faces see each other', () => {
+        const chunk = new Chunk(0, 0);
+        // Section 1 is solid rock with one vertical shaft through it
+        for (let y = 16; y < 32; y++) {
+            for (let x = 0; x < 16; x++) {
+                for (let z = 0; z < 16; z++) {
+                    if (x !== 5 || z !== 5) chunk.setBlock(x, y, z, BLOCK.STONE);
+                }
+            }
+        }
+        chunk.buildMesh(null);
+        const vis = chunk.sectionVisibility;
+        assert.strictEqual(vis[1 * 6 + 2], (1 << 2) | (1 << 3), 'Shaft links top and bottom');
+        assert.strictEqual(vis[1 * 6 + 3], (1 << 2) | (1 << 3));
+        assert.strictEqual(vis[1 * 6 + 0], 0, 'Sides see nothing');
+        assert.strictEqual(vis[3 * 6 + 4], 63, 'Empty sections are open');
+
+        chunk.setBlock(5, 20, 5, BLOCK.STONE);
+        chunk.buildMesh(null);
+        assert.strictEqual(vis[1 * 6 + 2], 1 << 2, 'Plugged shaft');
+        assert.strictEqual(vis[1 * 6 + 3], 1 << 3);
+    });
+
+    describe('Section Culling', () => {
+        const chunks = new Map();
+        let game, renderer;
+
+        // Rock up to y = 32 with a cave in the bottom section, open air above
+        const makeChunk = (cx, cz) => {
+            const chunk = new Chunk(cx, cz);
+            for (let y = 0; y < 32; y++) {
+                for (let x = 0; x < 16; x++) {
+                    for (let z = 0; z < 16; z++) {
+                        const cave = y >= 4 && y < 12 && x >= 4 && x < 12 && z >= 4 && z < 12;
+                        if (!cave) chunk.setBlock(x, y, z, BLOCK.STONE);
+                    }
+                }
+            }
+            chunk.buildMesh(null);
+            return chunk;
+        };
+
+        before(() => {
+            for (let cx = -2; cx <= 2; cx++) {
+                for (let cz = -2; cz <= 2; cz++) chunks.set(cx + ',' + cz, makeChunk(cx, cz));
+            }
+        });
+
+        beforeEach(() => {
+            const canvas = dom.window.document.createElement('canvas');
+            game = {
+                canvas,
+                ctx: canvas.getContext('2d'),
+                world: { getChunk: (cx, cz) => chunks.get(cx + ',' + cz) || null },
+                player: { x: 8, y: 40, z: 8, height: 1.8, yaw: 0, pitch: 0 },
+                fov: 60,
+                renderDistance: 32
+            };
+            renderer = new dom.window.Renderer(game);
+        });
+
+        const visible = () => {
+            const list = renderer.getVisibleSections(renderer.getView());
+            const out = [];
+            for (let i = 0; i < list.length; i += 2) out.push([list[i].cx, list[i].cz, list[i + 1]]);
+            return out;
+        };
+
+        it('should skip chunks behind the camera', () => {
+            // Looking down +Z at the ground
+            game.player.pitch = 0.5;
+            const list = visible();
+            assert.ok(list.some(([cx, cz]) => cz === 1), 'Chunks ahead are drawn');
+            assert.ok(!list.some(([cx, cz]) => cz === -2), 'Chunks behind are not');
+        });
+
+        it('should not look through solid rock into sealed caves', () => {
+            game.player.pitch = 1.2;
+            const list = visible();
+            assert.ok(list.some(([cx, cz, s]) => cx === 0 && cz === 0 && s === 1), 'Ground surface is drawn');
+            assert.ok(!list.some(([cx, cz, s]) => s === 0), 'Caves under the rock are not');
+
+            // From inside the cave it is the only thing to see
+            game.player.y = 6;
+            const inside = visible();
+            assert.deepStrictEqual(inside, [[0, 0, 0]]);
+        });
+    });
+
+    describe('Quad Textures', () => {
+        let game, renderer, fills, patterns;
+
+        // Records what each polygon is filled with
+        const mockContext = () => ({
+            fillStyle: null,
+            globalAlpha: 1,
+            beginPath() {}, moveTo() {}, lineTo() {}, fillRect() {}, drawImage() {},
+            fill() { fills.push(this.fillStyle); },
+            createPattern(sprite) {
+                const pattern = { sprite, setTransform(m) { this.m = Object.assign({}, m); } };
+                patterns.push(pattern);
+                return pattern;
+            }
+        });
+
+        beforeEach(() => {
+            fills = [];
+            patterns = [];
+            const chunk = new Chunk(0, 0);
+            for (let x = 0; x < 16; x++) {
+                for (let z = 0; z < 16; z++) {
+                    chunk.setBlock(x, 10, z, BLOCK.STONE);
+                    chunk.setSkyLight(x, 11, z, 15);
+                }
+            }
+            chunk.buildMesh(null);
+            const canvas = dom.window.document.createElement('canvas');
+            game = {
+                canvas,
+                ctx: mockContext(),
+                world: { getChunk: (cx, cz) => (cx === 0 && cz === 0) ? chunk : null },
+                player: { x: 8, y: 14, z: 2, height: 1.8, yaw: 0, pitch: 0.8 },
+                fov: 60,
+                renderDistance: 32
+            };
+            renderer = new dom.window.Renderer(game);
+            renderer.textureManager = {
+                size: 16,
+                sprites: new Map(),
+                getShadedSprite(type, face, light) {
+                    const key = (type * 6 + face) * 16 + light;
+                    if (!this.sprites.has(key)) this.sprites.set(key, { type, face, light });
+                    return this.sprites.get(key);
+                }
+            };
+        });
+
+        it('should fill cube faces with cached, mapped texture patterns', () => {
+            renderer.drawBlocks(renderer.getView());
+            renderer.drawBlocks(renderer.getView());
+            const tops = fills.filter(f => f.sprite && f.sprite.face === 2);
+            assert.ok(tops.length > 0, 'Floor drawn with its texture');
+            assert.strictEqual(fills.filter(f => typeof f === 'string').length, 0);
+            assert.strictEqual(patterns.filter(p => p.sprite.face === 2).length, 1, 'One pattern per type, face and light');
+        });
+
+        it('should draw each quad from the sprite shaded for its current light', () => {
+            const lit = (light) => fills.filter(f => f.sprite && f.sprite.face === 2 && f.sprite.light === light).length;
+            renderer.drawBlocks(renderer.getView());
+            assert.ok(lit(15) > 0);
+            assert.strictEqual(lit(7), 0);
+
+            // Light changes don't rebuild the mesh but still show up on the next frame
+            const chunk = game.world.getChunk(0, 0);
+            for (let x = 0; x < 16; x++) {
+                for (let z = 0; z < 16; z++) chunk.setSkyLight(x, 11, z, 7);
+            }
+            fills.length = 0;
+            renderer.drawBlocks(renderer.getView());
+            assert.strictEqual(lit(15), 0);
+            assert.ok(lit(7) > 0);
+
+            // Before textures: plain colours, darker in the dark
+            renderer.textureManager = null;
+            assert.notStrictEqual(renderer.getFaceColor(BLOCK.STONE, 2, 7), renderer.getFaceColor(BLOCK.STONE, 2, 15));
+        });
+
+        it('should stretch one texture repeat over each block of a quad', () => {
+            // A 4x2 quad projected to a 64x32 rectangle: 16px sprites come out at 16px a block
+            renderer.quadScreen.set([10, 20, 74, 20, 74, 52, 10, 52]);
+            const pattern = { setTransform(m) { this.m = Object.assign({}, m); } };
+            renderer.mapQuadPattern(pattern, { face: 2, du: 4, dv: 2, offset: 0 });
+            assert.deepStrictEqual(pattern.m, { a: 1, b: 0, c: 0, d: 1, e: 10, f: 20 });
+
+            // Side faces run v upwards, so the texture hangs from the top (v) corner
+            renderer.quadScreen.set([10, 52, 74, 52, 74, 20, 10, 20]);
+            renderer.mapQuadPattern(pattern, { face: 0, du: 4, dv: 2, offset: 0 });
+            assert.deepStrictEqual(pattern.m, { a: 1, b: 0, c: 0, d: 1, e: 10, f: 20 });
+        });
+
+        it('should fall back to plain colours before the atlas is ready', () => {
+            renderer.textureManager.getShadedSprite = () => null;
+            renderer.drawBlocks(renderer.getView());
+            assert.ok(fills.length > 0);
+            assert.ok(fills.every(f => typeof f === 'string'));
+            assert.strictEqual(patterns.length, 0);
+        });
+    });
+});
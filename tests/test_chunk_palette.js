@@ -0,0 +1,109 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('Compact Chunk Storage', () => {
+    let BLOCK, Chunk;
+
+    before(() => {
+        BLOCK = dom.window.BLOCK;
+        Chunk = dom.window.Chunk;
+    });
+
+    // Stone up to y=40 with some ores, dirt and grass on top, air above
+    const terrainChunk = () => {
+        const chunk = new Chunk(0, 0);
+        for (let x = 0; x < 16; x++) {
+            for (let z = 0; z < 16; z++) {
+                for (let y = 0; y < 40; y++) {
+                    const ore = (x * 7 + y * 3 + z * 5) % 23 === 0;
+                    chunk.setBlock(x, y, z, ore ? BLOCK.ORE_COAL : BLOCK.STONE);
+                }
+                chunk.setBlock(x, 40, z, BLOCK.DIRT);
+                chunk.setBlock(x, 41, z, BLOCK.GRASS);
+                for (let y = 42; y < 128; y++) chunk.setSkyLight(x, y, z, 15);
+            }
+        }
+        chunk.setMetadata(3, 41, 3, 5);
+        chunk.setLight(3, 42, 3, 14);
+        return chunk;
+    };
+
+    it('should read every value back unchanged from palette storage', () => {
+        const chunk = terrainChunk();
+        const arrays = chunk.copyArrays();
+        chunk.compact();
+        assert.strictEqual(chunk.isCompact(), true);
+
+        for (let i = 0; i < arrays.blocks.length; i++) {
+            const x = i & 15, z = (i >> 4) & 15, y = i >> 8;
+            if (chunk.getBlock(x, y, z) !== arrays.blocks[i] ||
+                chunk.getMetadata(x, y, z) !== arrays.metadata[i] ||
+                chunk.getLightByte(x, y, z) !== arrays.light[i]) {
+                assert.fail(`Mismatch at ${x},${y},${z}`);
+            }
+        }
+        assert.strictEqual(chunk.getLight(3, 42, 3), 14);
+        assert.strictEqual(chunk.getSkyLight(3, 42, 3), 15);
+        // Reads do not bring the dense arrays back
+        assert.strictEqual(chunk.isCompact(), true);
+    });
+
+    it('should use a fraction of the dense size and nothing for empty sections', () => {
+        const chunk = terrainChunk();
+        const dense = chunk.byteLength();
+        chunk.compact();
+        assert.ok(chunk.byteLength() * 3 < dense, `compact ${chunk.byteLength()} vs dense ${dense}`);
+
+        const empty = new Chunk(1, 0);
+        empty.compact();
+        assert.strictEqual(empty.byteLength(), 0);
+    });
+
+    it('should expand again on writes and direct array access', () => {
+        const chunk = terrainChunk();
+        chunk.compact();
+        chunk.setBlock(5, 60, 5, BLOCK.GLASS);
+        assert.strictEqual(chunk.isCompact(), false);
+        assert.strictEqual(chunk.getBlock(5, 60, 5), BLOCK.GLASS);
+        assert.strictEqual(chunk.getBlock(5, 10, 5), BLOCK.STONE);
+
+        chunk.compact();
+        assert.strictEqual(chunk.blocks[chunk.getIndex(5, 41, 5)], BLOCK.GRASS);
+        assert.strictEqual(chunk.isCompact(), false);
+    });
+
+    it('should compact chunks left alone since the previous sweep, except around the player', () => {
+        const world = new dom.window.World();
+        for (let cx = 0; cx < 4; cx++) {
+            const chunk = new Chunk(cx, 0);
+            chunk.blocks.fill(BLOCK.STONE, 0, 256 * 8);
+            world.addChunk(chunk);
+        }
+        world.chunks.forEach(chunk => { chunk.modified = false; }); // Meshes built
+
+        // Freshly added chunks get a second chance
+        assert.strictEqual(world.compactIdleChunks(0, 0), 0);
+        world.setBlock(50, 20, 3, BLOCK.DIRT); // Touches chunk 3
+        world.getChunk(3, 0).modified = false;
+        assert.strictEqual(world.compactIdleChunks(0, 0), 1);
+        assert.strictEqual(world.getChunk(2, 0).isCompact(), true);
+        assert.strictEqual(world.getChunk(1, 0).isCompact(), false);
+        assert.strictEqual(world.getChunk(3, 0).isCompact(), false);
+        assert.strictEqual(world.getBlock(40, 5, 3), BLOCK.STONE);
+    });
+});
@@ -946,6 +946,65 @@ describe('Minimap', () => {
         const color = minimap.getBlockColor(9999);
         assert.strictEqual(color, '#000');
     });
+
+    it('should cache chunk tiles offscreen and redraw only changed ones', () => {
+        // Recording 2D context for the map and its tile canvases
+        const calls = { putImageData: 0, drawImage: 0 };
+        const proto = dom.window.HTMLCanvasElement.prototype;
+        const getContext = proto.getContext;
+        proto.getContext = () => ({
+            clearRect: () => {}, save: () => {}, restore: () => {}, translate: () => {},
+            rotate: () => {}, scale: () => {}, beginPath: () => {}, moveTo: () => {},
+            lineTo: () => {}, fill: () => {},
+            drawImage: () => { calls.drawImage++; },
+            putImageData: () => { calls.putImageData++; },
+            createImageData: (w, h) => ({ data: new Uint8ClampedArray(w * h * 4) })
+        });
+        try {
+            const chunks = new Map();
+            for (let cx = -2; cx <= 1; cx++) {
+                for (let cz = -2; cz <= 1; cz++) {
+                    const chunk = new dom.window.Chunk(cx, cz);
+                    for (let x = 0; x < 16; x++) {
+                        for (let z = 0; z < 16; z++) chunk.setBlock(x, 10, z, dom.window.BLOCK.GRASS);
+                    }
+                    chunks.set(`${cx},${cz}`, chunk);
+                }
+            }
+            const mockGame = {
+                player: { x: 0, z: 0, yaw: 0 },
+                world: { getChunk: (cx, cz) => chunks.get(`${cx},${cz}`) || null, getChunkKey: (cx, cz) => `${cx},${cz}` }
+            };
+            const minimap = new dom.window.Minimap(mockGame);
+
+            // 32 blocks each way at zoom 2: the 4x4 chunks around the origin
+            minimap.update(16);
+            assert.strictEqual(calls.putImageData, 16);
+            assert.strictEqual(calls.drawImage, 16);
+
+            // Within the refresh interval nothing is drawn; after it, only compositing
+            minimap.update(16);
+            assert.strictEqual(calls.drawImage, 16);
+            minimap.update(minimap.refreshInterval);
+            assert.strictEqual(calls.drawImage, 32);
+            assert.strictEqual(calls.putImageData, 16);
+
+            // A surface change redraws that one tile; digging below the surface does not
+            chunks.get('0,0').setBlock(3, 11, 3, dom.window.BLOCK.STONE);
+            chunks.get('-1,0').setBlock(3, 5, 3, dom.window.BLOCK.STONE);
+            minimap.update(minimap.refreshInterval);
+            assert.strictEqual(calls.putImageData, 17);
+
+            // Zooming redraws straight away
+            minimap.cycleZoom();
+            assert.strictEqual(minimap.zoom, 4);
+            minimap.update(0);
+            assert.strictEqual(calls.drawImage, 48 + 16, 'Redrawn without waiting for the interval');
+            assert.strictEqual(calls.putImageData, 17, 'Tiles are reused at every zoom');
+        } finally {
+            proto.getContext = getContext;
+        }
+    });
 });
 
 describe('Mob System', function() {
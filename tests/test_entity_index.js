@@ -0,0 +1,92 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/entity.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/physics.js', 'utf8'));
+
+describe('Entity Index', () => {
+    let index, mobs, drops;
+
+    const mob = (x, z) => ({ x, y: 10, z, width: 0.6, height: 1.8, isDead: false });
+    const ids = (list) => list.map(e => e.id).sort((a, b) => a - b);
+
+    beforeEach(() => {
+        index = new dom.window.EntityIndex(4);
+        mobs = [];
+        drops = [];
+        for (let i = 0; i < 10; i++) {
+            const m = mob(i * 3, -i * 3);
+            m.id = i;
+            mobs.push(m);
+        }
+        index.sync({ mobs, drops });
+    });
+
+    it('should find entities within a radius', () => {
+        const found = index.queryRadius(0, 0, 5);
+        assert.strictEqual(JSON.stringify(ids(found)), JSON.stringify([0, 1]));
+        assert.strictEqual(index.queryRadius(100, 100, 5).length, 0);
+    });
+
+    it('should follow entities that move, die or leave their list', () => {
+        mobs[0].x = 50;
+        mobs[1].isDead = true;
+        mobs.splice(2, 1);
+        index.sync({ mobs, drops });
+
+        assert.strictEqual(index.queryRadius(0, 0, 8).length, 0);
+        assert.strictEqual(index.queryRadius(50, 0, 1)[0], mobs[0]);
+        assert.strictEqual(index.entries.size, 8);
+    });
+
+    it('should filter by list', () => {
+        const d = { x: 0.5, y: 10, z: 0.5, id: 100 };
+        drops.push(d);
+        index.sync({ mobs, drops });
+
+        assert.strictEqual(JSON.stringify(ids(index.queryRadius(0, 0, 1, 'drops'))), JSON.stringify([100]));
+        assert.strictEqual(JSON.stringify(ids(index.queryRadius(0, 0, 1, 'mobs'))), JSON.stringify([0]));
+    });
+
+    it('should keep cells consistent through many moves', () => {
+        for (let step = 0; step < 50; step++) {
+            mobs.forEach((m, i) => {
+                m.x += Math.sin(step + i) * 3;
+                m.z += Math.cos(step * i) * 3;
+            });
+            index.sync({ mobs, drops });
+        }
+        let total = 0;
+        index.cells.forEach(cell => { total += cell.length; });
+        assert.strictEqual(total, mobs.length);
+        mobs.forEach(m => {
+            const brute = mobs.filter(o => (o.x - m.x) ** 2 + (o.z - m.z) ** 2 <= 36);
+            assert.strictEqual(JSON.stringify(ids(index.queryRadius(m.x, m.z, 6))), JSON.stringify(ids(brute)));
+        });
+    });
+
+    it('should return ray candidates that include the first hit', () => {
+        const physics = new dom.window.Physics({});
+        const far = mob(40, 0.2);
+        far.id = 50;
+        mobs.push(far);
+        index.sync({ mobs, drops });
+
+        const origin = { x: 20, y: 10.5, z: 0 };
+        const dir = { x: 1, y: 0, z: 0 };
+        const candidates = index.queryRay(origin, dir, 30, 'mobs');
+        assert.ok(candidates.length < mobs.length);
+        const hit = physics.raycastEntities(origin, dir, candidates);
+        assert.strictEqual(hit.entity, far);
+
+        // Nothing within a short ray
+        assert.strictEqual(physics.raycastEntities(origin, dir, index.queryRay(origin, dir, 5, 'mobs')).entity, null);
+    });
+});
@@ -0,0 +1,110 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('Light Engine', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        // 3x3 chunks with a stone floor at y = 0
+        for (let cx = -1; cx <= 1; cx++) {
+            for (let cz = -1; cz <= 1; cz++) {
+                const chunk = new dom.window.Chunk(cx, cz);
+                for (let i = 0; i < 256; i++) chunk.blocks[i] = BLOCK.STONE;
+                world.addChunk(chunk);
+            }
+        }
+    });
+
+    it('should pack block and sky light into one byte', () => {
+        const chunk = new dom.window.Chunk(0, 0);
+        chunk.setLight(1, 2, 3, 9);
+        chunk.setSkyLight(1, 2, 3, 12);
+        assert.strictEqual(chunk.getLight(1, 2, 3), 9);
+        assert.strictEqual(chunk.getSkyLight(1, 2, 3), 12);
+        assert.strictEqual(chunk.light[chunk.getIndex(1, 2, 3)], (12 << 4) | 9);
+    });
+
+    it('should light open columns with full sky light', () => {
+        assert.strictEqual(world.getSkyLight(4, 1, 4), 15);
+        assert.strictEqual(world.getSkyLight(4, 0, 4), 0);
+        assert.strictEqual(world.getLight(4, 1, 4), 0);
+    });
+
+    it('should shade the space under a roof and light it from the side', () => {
+        for (let x = 0; x < 10; x++) {
+            for (let z = 0; z < 10; z++) world.setBlock(x, 5, z, BLOCK.STONE);
+        }
+        // Nearest open column is x = 10, four blocks from x = 6
+        assert.strictEqual(world.getSkyLight(6, 2, 5), 11);
+        assert.strictEqual(world.getSkyLight(10, 2, 5), 15);
+
+        world.setBlock(6, 5, 5, BLOCK.AIR);
+        assert.strictEqual(world.getSkyLight(6, 2, 5), 15);
+    });
+
+    it('should keep a placement under a roof cheap', () => {
+        for (let x = -12; x < 12; x++) {
+            for (let z = -12; z < 12; z++) world.setBlock(x, 5, z, BLOCK.STONE);
+        }
+        world.setBlock(0, 2, 0, BLOCK.STONE);
+        assert.ok(world.lightSteps < 1000, `took ${world.lightSteps} steps`);
+        assert.strictEqual(world.getSkyLight(0, 2, 0), 0);
+    });
+
+    it('should remove torch light and keep light from other sources', () => {
+        world.setBlock(0, 10, 0, BLOCK.TORCH);
+        world.setBlock(6, 10, 0, BLOCK.TORCH);
+        assert.strictEqual(world.getLight(3, 10, 0), 12);
+
+        world.setBlock(0, 10, 0, BLOCK.AIR);
+        assert.strictEqual(world.getLight(0, 10, 0), 9);
+        assert.strictEqual(world.getLight(-5, 10, 0), 4);
+        assert.strictEqual(world.getLight(-10, 10, 0), 0);
+    });
+
+    it('should carry block light across chunk borders', () => {
+        world.setBlock(15, 10, 3, BLOCK.GLOWSTONE);
+        assert.strictEqual(world.getLight(16, 10, 3), 14);
+        assert.strictEqual(world.getLight(20, 10, 3), 10);
+    });
+
+    it('should block light with opaque blocks and let it back in when removed', () => {
+        // Standing on the floor so the torch stays attached
+        world.setBlock(0, 1, 0, BLOCK.TORCH);
+        world.setBlock(1, 1, 0, BLOCK.STONE);
+        assert.strictEqual(world.getLight(1, 1, 0), 0);
+        // Light now has to go around the block
+        assert.strictEqual(world.getLight(2, 1, 0), 11);
+
+        world.setBlock(1, 1, 0, BLOCK.AIR);
+        assert.strictEqual(world.getLight(1, 1, 0), 14);
+        assert.strictEqual(world.getLight(2, 1, 0), 13);
+    });
+
+    it('should relight a transaction like individual edits', () => {
+        world.batchEdit(() => {
+            world.setBlock(2, 10, 2, BLOCK.TORCH);
+            for (let x = 0; x < 5; x++) world.setBlock(x, 12, 2, BLOCK.STONE);
+        });
+        assert.strictEqual(world.getLight(2, 10, 2), 15);
+        assert.strictEqual(world.getLight(2, 12, 2), 0);
+        assert.strictEqual(world.getSkyLight(2, 11, 2), 14);
+    });
+});
@@ -342,7 +342,7 @@ if (!document.getElementById('game-canvas')) {
         this.timeout(5000);
         // Setup simple world
         world.chunks.clear();
-        world.activeFluids.clear();
+        world.fluidTicks.clear();
 
         // Manually create a flat chunk to avoid expensive setBlock calls
         const chunk = new window.Chunk(0, 0);
@@ -352,13 +352,13 @@ if (!document.getElementById('game-canvas')) {
                 chunk.setBlock(x, 0, z, window.BLOCK.STONE);
             }
         }
-        world.chunks.set('0,0', chunk);
+        world.chunks.set(world.getChunkKey(0, 0), chunk);
 
         // Test 1: Basic Spread
         // Place Source
         world.setBlock(5, 1, 5, window.BLOCK.WATER);
         world.setMetadata(5, 1, 5, 8); // Source
-        world.activeFluids.add('5,1,5');
+        world.scheduleFluidTick(5, 1, 5);
 
         // Tick
         world.updateFluids();
@@ -382,7 +382,7 @@ if (!document.getElementById('game-canvas')) {
         world.setBlock(11, 1, 10, window.BLOCK.WATER);
         world.setMetadata(11, 1, 10, 7);
 
-        world.activeFluids.add('11,1,10'); // Activate middle block
+        world.scheduleFluidTick(11, 1, 10); // Activate middle block
 
         // Tick
         world.updateFluids();
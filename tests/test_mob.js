@@ -82,4 +82,70 @@ describe('Mob System', () => {
         // Hard to test random, but verify state changes or no crash
         assert.ok(cow.x !== undefined);
     });
+
+    describe('Scheduler', () => {
+        let scheduler;
+
+        // Cow at a distance from the player (10, 10, 10) that counts its AI ticks
+        const mobAt = (dx) => {
+            const mob = new dom.window.Mob(game, 10 + dx, 10, 10, dom.window.MOB_TYPE.COW);
+            mob.ticks = [];
+            mob.updateAI = (dt) => mob.ticks.push(dt);
+            game.mobs.push(mob);
+            return mob;
+        };
+
+        beforeEach(() => {
+            game.mobs = [];
+            scheduler = new dom.window.MobScheduler(game);
+        });
+
+        it('should think less often the farther a mob is', () => {
+            const near = mobAt(5);
+            const mid = mobAt(40);
+            const far = mobAt(100);
+            for (let i = 0; i < 20; i++) scheduler.update(0.05);
+
+            assert.strictEqual(near.ticks.length, 20);
+            assert.strictEqual(mid.ticks.length, 4);
+            assert.strictEqual(far.ticks.length, 1);
+            // Skipped time is handed to the AI when it does run
+            assert.ok(Math.abs(mid.ticks[0] - 0.25) < 1e-9);
+        });
+
+        it('should freeze mobs in unloaded chunks', () => {
+            game.world.getChunkAt = (x) => (x < 50 ? {} : null);
+            const away = mobAt(60);
+            away.vx = 3;
+            const x = away.x;
+            scheduler.update(0.05);
+            assert.strictEqual(away.ticks.length, 0);
+            assert.strictEqual(away.x, x, 'Not even moved');
+            assert.strictEqual(scheduler.stats.frozen, 1);
+            delete game.world.getChunkAt;
+        });
+
+        it('should defer far AI over budget and resume with the mobs that waited', () => {
+            const near = mobAt(5);
+            const a = mobAt(100);
+            const b = mobAt(100);
+            scheduler.budget = -1; // Always over
+            scheduler.update(2);
+            assert.strictEqual(near.ticks.length, 1, 'Nearby mobs always think');
+            assert.strictEqual(a.ticks.length + b.ticks.length, 0);
+            assert.strictEqual(scheduler.stats.deferred, 2);
+            assert.strictEqual(game.mobs[scheduler.cursor], a);
+
+            scheduler.budget = 1000;
+            scheduler.update(0.05);
+            assert.strictEqual(a.ticks.length, 1);
+            assert.ok(Math.abs(a.ticks[0] - 2.05) < 1e-9);
+        });
+
+        it('should drop dead mobs', () => {
+            mobAt(5).isDead = true;
+            scheduler.update(0.05);
+            assert.strictEqual(game.mobs.length, 0);
+        });
+    });
 });
@@ -0,0 +1,141 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    url: "http://localhost/",
+    runScripts: "dangerously"
+});
+global.window = dom.window;
+global.document = dom.window.document;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/physics.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/navigation.js', 'utf8'));
+
+// Sparse block store standing in for the world, reporting edits like World.setBlock
+class MockWorld {
+    constructor() {
+        this.blocks = new Map();
+        this.dimension = 'overworld';
+        this.game = null;
+    }
+    setBlock(x, y, z, type) {
+        this.blocks.set(`${x},${y},${z}`, type);
+        if (this.game && this.game.navigation) this.game.navigation.blockChanged(x, y, z);
+    }
+    getBlock(x, y, z) { return this.blocks.get(`${x},${y},${z}`) || dom.window.BLOCK.AIR; }
+    getMetadata() { return 0; }
+}
+
+describe('Flow Field', () => {
+    let BLOCK, world, game, nav;
+    const out = {};
+
+    // Steps a mob standing at (x, z) takes to reach the player, following the field
+    const walk = (x, z) => {
+        let steps = 0;
+        let pos = { x: x + 0.5, y: 10, z: z + 0.5 };
+        while (nav.sample(pos.x, pos.y, pos.z, out)) {
+            pos = { x: out.x, y: out.y, z: out.z };
+            if (++steps > 200) break;
+        }
+        return { steps, x: Math.floor(pos.x), z: Math.floor(pos.z) };
+    };
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new MockWorld();
+        // Stone floor, standing height y = 10
+        for (let x = -30; x <= 30; x++) {
+            for (let z = -30; z <= 30; z++) world.setBlock(x, 9, z, BLOCK.STONE);
+        }
+        // Wall at x = 5 from z = -10 to 10, two high
+        for (let z = -10; z <= 10; z++) {
+            world.setBlock(5, 10, z, BLOCK.STONE);
+            world.setBlock(5, 11, z, BLOCK.STONE);
+        }
+        game = { world, player: { x: 0.5, y: 10, z: 0.5 } };
+        world.game = game;
+        nav = new dom.window.FlowField(game);
+        game.navigation = nav;
+        nav.sample(0, 0, 0, out); // A mob is interested
+        nav.update(0.016);
+    });
+
+    it('should route around walls instead of straight at the player', () => {
+        // Straight line is 10 steps, but the wall forces a detour past one of its ends
+        const route = walk(10, 0);
+        assert.deepStrictEqual([route.x, route.z], [0, 0]);
+        assert.strictEqual(route.steps, 10 + 2 * 11);
+        assert.strictEqual(nav.dist[nav.cellIndex(10, 10, 0)], 32);
+
+        // First step from beside the wall heads along it
+        nav.sample(6.5, 10, 0.5, out);
+        assert.strictEqual(out.x, 6.5);
+        assert.notStrictEqual(out.z, 0.5);
+    });
+
+    it('should climb single steps but not walls', () => {
+        world.setBlock(5, 11, 0, BLOCK.AIR);
+        nav.update(0.016);
+        // One block high at z = 0: jump over it
+        assert.strictEqual(walk(10, 0).steps, 10);
+    });
+
+    it('should repair the field in place when blocks change', () => {
+        let rebuilds = 0;
+        const rebuild = nav.rebuild.bind(nav);
+        nav.rebuild = (...args) => { rebuilds++; return rebuild(...args); };
+
+        // Knock a doorway into the wall
+        world.setBlock(5, 10, 0, BLOCK.AIR);
+        world.setBlock(5, 11, 0, BLOCK.AIR);
+        nav.update(0.016);
+        assert.strictEqual(walk(10, 0).steps, 10);
+        assert.strictEqual(nav.dist[nav.cellIndex(10, 10, 0)], 10);
+
+        // Close it again: back to the detour
+        world.setBlock(5, 10, 0, BLOCK.STONE);
+        world.setBlock(5, 11, 0, BLOCK.STONE);
+        nav.update(0.016);
+        assert.strictEqual(nav.dist[nav.cellIndex(10, 10, 0)], 32);
+        assert.strictEqual(walk(10, 0).steps, 32);
+        assert.strictEqual(rebuilds, 0, 'No full search for block edits');
+
+        // Same answers as searching from scratch
+        const repaired = Array.from(nav.dist);
+        nav.rebuild(0, 10, 0);
+        assert.deepStrictEqual(repaired, Array.from(nav.dist));
+    });
+
+    it('should follow the player and idle when no mob asks', () => {
+        game.player.x = 3.5;
+        nav.update(0.016);
+        assert.strictEqual(nav.dist[nav.cellIndex(0, 10, 0)], 0, 'Searches at most twice a second');
+        nav.update(1); // Past the rebuild interval
+        assert.strictEqual(nav.dist[nav.cellIndex(3, 10, 0)], 0);
+
+        nav.update(5); // Nobody sampled for a while
+        game.player.x = -3.5;
+        nav.update(1);
+        assert.strictEqual(nav.dist[nav.cellIndex(3, 10, 0)], 0, 'Left alone while idle');
+
+        // Edits are not queued while idle; the field is searched again once a mob asks
+        world.setBlock(4, 10, 0, BLOCK.STONE);
+        assert.strictEqual(nav.pending.length, 0);
+        assert.strictEqual(nav.built, false);
+        nav.sample(0, 0, 0, out);
+        nav.update(0.016);
+        assert.strictEqual(nav.dist[nav.cellIndex(-4, 10, 0)], 0);
+    });
+
+    it('should only queue edits inside the field', () => {
+        world.setBlock(100, 10, 0, BLOCK.STONE);
+        world.setBlock(0, 60, 0, BLOCK.STONE);
+        assert.strictEqual(nav.pending.length, 0);
+        world.setBlock(2, 10, 2, BLOCK.STONE);
+        assert.strictEqual(nav.pending.length, 3);
+    });
+});
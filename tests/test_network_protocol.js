@@ -0,0 +1,194 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+const util = require('util');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+class MockWebSocket {
+    constructor() {
+        this.readyState = 1;
+        this.sent = [];
+    }
+    send(data) { this.sent.push(data); }
+    close() {}
+}
+MockWebSocket.OPEN = 1;
+dom.window.WebSocket = MockWebSocket;
+// Available in browsers, missing from jsdom
+dom.window.TextEncoder = util.TextEncoder;
+dom.window.TextDecoder = util.TextDecoder;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/protocol.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/network.js', 'utf8'));
+
+describe('Binary Network Protocol', () => {
+    let P, network, world, game;
+
+    const frame = (fn) => {
+        const w = new dom.window.ByteWriter();
+        fn(w);
+        return w.finish().buffer;
+    };
+
+    const records = (data) => {
+        const r = new dom.window.ByteReader(data);
+        const out = [];
+        while (r.remaining > 0) {
+            const op = r.u8();
+            if (op === P.OP.MOVE) out.push({ op, state: P.readState(r, {}) });
+            else if (op === P.OP.PROFILE) out.push({ op, name: r.string(), skinColor: r.string() });
+            else if (op === P.OP.BLOCKS) out.push({ op, blocks: P.readBlocks(r) });
+            else if (op === P.OP.CHAT) out.push({ op, sender: r.string(), message: r.string() });
+            else if (op === P.OP.SYNC) out.push({ op, seq: r.u32(), chunks: P.readChunkList(r) });
+            else if (op === P.OP.VIEW) out.push({ op, view: r.u8() });
+            else throw new Error('Unexpected record ' + op);
+        }
+        return out;
+    };
+
+    beforeEach(() => {
+        P = dom.window.NetProtocol;
+        world = {
+            edits: 0,
+            blocks: [],
+            batchEdit(fn) { this.edits++; fn(); },
+            setBlock(x, y, z, type) { this.blocks.push([x, y, z, type]); }
+        };
+        game = { world, player: { name: 'Steve', skinColor: '#00f' }, chat: null };
+        network = new dom.window.NetworkManager(game);
+        network.connected = true;
+        network.socket = new MockWebSocket();
+        network.handleFrame(frame(w => { w.u8(P.OP.HELLO); w.u32(7); w.u8(P.VERSION); }));
+        // Join handshake (SYNC, VIEW)
+        network.flush();
+        network.socket.sent.length = 0;
+    });
+
+    it('should switch to binary on the server greeting', () => {
+        assert.strictEqual(network.myId, 7);
+        assert.strictEqual(network.binary, true);
+    });
+
+    it('should only send position changes, quantised', () => {
+        network.sendPosition(10.5, 64, -3.25, 1, 0.2);
+        network.flush();
+        network.sendPosition(10.5, 64, -3.25, 1, 0.2);
+        network.flush();
+        assert.strictEqual(network.socket.sent.length, 1);
+
+        const first = records(network.socket.sent[0]);
+        assert.strictEqual(first[0].name, 'Steve');
+        const state = P.dequantize(first[1].state);
+        assert.strictEqual(state.x, 10.5);
+        assert.strictEqual(state.z, -3.25);
+        assert.ok(Math.abs(state.yaw - 1) < 0.001);
+
+        // Small moves go out as 16-bit deltas
+        network.sendPosition(10.75, 64, -3.25, 1, 0.2);
+        network.flush();
+        assert.strictEqual(network.socket.sent[1].length, 1 + 1 + 6);
+    });
+
+    it('should batch block changes and chat into one frame', () => {
+        for (let i = 0; i < 20; i++) network.sendBlockUpdate(100 + i, 30, -50, 0);
+        network.sendChat('boom');
+        assert.strictEqual(network.socket.sent.length, 0);
+        network.flush();
+
+        assert.strictEqual(network.socket.sent.length, 1);
+        const out = records(network.socket.sent[0]);
+        assert.strictEqual(out.length, 2);
+        assert.strictEqual(out[0].op, P.OP.CHAT);
+        assert.strictEqual(out[1].blocks.length, 20);
+        assert.strictEqual(out[1].blocks[19].x, 119);
+        assert.strictEqual(out[1].blocks[19].z, -50);
+    });
+
+    it('should not carry queued records over to the next connection', () => {
+        const hello = (id) => frame(w => { w.u8(P.OP.HELLO); w.u32(id); w.u8(P.VERSION); });
+        network.connect('ws://localhost:8080');
+        network.socket.onopen();
+        network.handleFrame(hello(7));
+        network.sendPosition(10, 64, 10, 0, 0);
+        network.flush();
+
+        // Queued after the last flush, then the connection drops
+        network.sendPosition(10.5, 64, 10, 0, 0);
+        network.sendBlockUpdate(1, 2, 3, 4);
+        network.socket.onclose();
+
+        network.connect('ws://localhost:8080');
+        network.socket.onopen();
+        network.handleFrame(hello(8));
+        network.flush();
+        const out = records(network.socket.sent[0]);
+        assert.deepStrictEqual(out.map(r => r.op), [P.OP.SYNC, P.OP.VIEW]);
+    });
+
+    it('should apply incoming player states, profiles and block batches', () => {
+        const remote = {};
+        network.handleFrame(frame(w => {
+            w.u8(P.OP.INFO); w.u32(3); w.string('Alex'); w.string('#f0f');
+            P.writeState(w, P.quantize(5, 70, 5, 0, 0), remote, () => { w.u8(P.OP.STATE); w.u32(3); });
+            P.writeBlocks(w, [{ x: 1, y: 2, z: 3, type: 4 }, { x: 2, y: 2, z: 3, type: 4 }]);
+        }));
+        const p = network.otherPlayers.get(3);
+        assert.strictEqual(p.name, 'Alex');
+        assert.strictEqual(p.x, 5);
+        assert.strictEqual(world.edits, 1);
+        assert.strictEqual(JSON.stringify(world.blocks), JSON.stringify([[1, 2, 3, 4], [2, 2, 3, 4]]));
+
+        // Delta update on top of the last state
+        network.handleFrame(frame(w => {
+            P.writeState(w, P.quantize(5, 70, 6, 0, 0), remote, () => { w.u8(P.OP.STATE); w.u32(3); });
+        }));
+        assert.strictEqual(p.target.z, 6);
+    });
+
+    it('should interpolate remote players between server-stamped snapshots', () => {
+        const remote = {};
+        const snapshot = (t, x, states = true) => frame(w => {
+            w.u8(P.OP.TIME); w.u32(t);
+            if (states) P.writeState(w, P.quantize(x, 70, 0, 0, 0), remote, () => { w.u8(P.OP.STATE); w.u32(3); });
+        });
+        network.handleFrame(snapshot(1000, 0));
+        network.handleFrame(snapshot(1100, 10));
+        network.handleFrame(snapshot(1200, 0, false)); // Nothing changed
+
+        const p = network.otherPlayers.get(3);
+        const at = (t) => p.snapshots.sample(t, {}).x;
+        assert.strictEqual(at(900), 0);
+        assert.strictEqual(at(1050), 5);
+        assert.strictEqual(at(1150), 10); // Held
+        assert.strictEqual(at(5000), 10);
+
+        // Drawn a fixed delay behind the server clock (local clock pinned so load cannot skew it)
+        const now = dom.window.performance.now;
+        dom.window.performance.now = () => 5000;
+        try {
+            network.clockOffset = 5000 - 1050 - dom.window.NetworkManager.INTERPOLATION_DELAY;
+            network.update(0);
+            assert.ok(Math.abs(p.x - 5) < 0.5, `x ${p.x}`);
+        } finally {
+            dom.window.performance.now = now;
+        }
+    });
+
+    it('should cap extrapolation and snap on teleports', () => {
+        const buffer = new dom.window.SnapshotBuffer();
+        buffer.push(0, { x: 0, y: 0, z: 0, yaw: 0, pitch: 0 });
+        buffer.push(100, { x: 1, y: 0, z: 0, yaw: 0, pitch: 0 });
+        assert.strictEqual(buffer.sample(150, {}).x, 1.5);
+        assert.strictEqual(buffer.sample(1000, {}).x, 1 + dom.window.SnapshotBuffer.MAX_EXTRAPOLATION / 100);
+
+        buffer.push(200, { x: 50, y: 0, z: 0, yaw: 0, pitch: 0 });
+        assert.strictEqual(buffer.sample(190, {}).x, 1);
+        assert.strictEqual(buffer.sample(200, {}).x, 50);
+        assert.strictEqual(buffer.sample(300, {}).x, 50);
+    });
+});
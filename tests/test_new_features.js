@@ -277,6 +277,27 @@ describe('New Features Verification', () => {
             assert.strictEqual(furnace.input, null, "Input should be consumed");
             assert.strictEqual(furnace.progress, 0, "Progress should reset");
         });
+
+        it('should sleep once idle and wake when a slot changes', () => {
+            const entity = {
+                type: 'furnace',
+                progress: 0, maxProgress: 100,
+                input: null, fuelItem: null, output: null,
+                burnTime: 0, maxBurnTime: 0
+            };
+            game.world.setBlockEntity(3, 60, 3, entity);
+            game.updateBlockEntities(0.05);
+            assert.ok(!game.world.activeBlockEntities.has(entity), "Empty furnace should sleep");
+
+            entity.input = { type: dom.window.BLOCK.ORE_IRON, count: 1 };
+            entity.fuelItem = { type: dom.window.BLOCK.ITEM_COAL, count: 1 };
+            game.world.wakeBlockEntity(entity);
+            game.updateBlockEntities(0.05);
+            assert.ok(entity.burnTime > 0, "Woken furnace should light up");
+            assert.ok(game.world.activeBlockEntities.has(entity), "Burning furnace stays awake");
+
+            game.world.removeBlockEntity(3, 60, 3);
+        });
     });
 
     describe('Farming', () => {
@@ -0,0 +1,71 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/particles.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/renderer.js', 'utf8'));
+
+describe('Particle Storage', () => {
+    let particles;
+
+    beforeEach(() => {
+        particles = new dom.window.ParticleSystem({}, 64);
+    });
+
+    it('should never grow past its capacity', () => {
+        for (let i = 0; i < 5; i++) particles.spawn(0, 10, 0, '#FFA500', 50);
+        assert.strictEqual(particles.count, 64);
+        assert.strictEqual(particles.x.length, 64);
+    });
+
+    it('should swap-remove dead particles and keep the live ones', () => {
+        particles.spawn(0, 10, 0, '#f00', 4);
+        particles.spawn(0, 10, 0, '#0f0', 4);
+        // Kill every other particle
+        for (let i = 0; i < 8; i += 2) particles.life[i] = 0.01;
+        const survivors = [1, 3, 5, 7].map(i => particles.size[i]).sort();
+
+        particles.update(0.05);
+        assert.strictEqual(particles.count, 4);
+        assert.strictEqual(JSON.stringify(Array.from(particles.size.subarray(0, 4)).sort()), JSON.stringify(survivors));
+    });
+
+    it('should share palette entries between spawns of the same colour', () => {
+        particles.spawn(0, 0, 0, '#f00', 2);
+        particles.spawn(0, 0, 0, '#0f0', 2);
+        particles.spawn(0, 0, 0, '#f00', 2);
+        assert.strictEqual(particles.palette.length, 2);
+        assert.strictEqual(particles.particles[5].color, '#f00');
+    });
+});
+
+describe('Particle Rendering', () => {
+    it('should fill each colour once', () => {
+        const calls = { fill: 0, rect: 0, styles: [] };
+        const ctx = {
+            set fillStyle(v) { calls.styles.push(v); },
+            beginPath() {},
+            rect() { calls.rect++; },
+            fill() { calls.fill++; }
+        };
+        const renderer = new dom.window.Renderer({ canvas: { width: 800, height: 600 }, ctx });
+        const particles = new dom.window.ParticleSystem({}, 256);
+        ['#f00', '#0f0', '#00f'].forEach(color => {
+            for (let i = 0; i < 20; i++) particles.spawn(0, 0, 5, color, 3);
+        });
+        // One particle behind the camera
+        particles.spawn(0, 0, -5, '#fff', 1);
+
+        renderer.drawParticles(particles, 0, 0, 0, 0, 1, 0, 1, 400, 800, 600);
+        assert.strictEqual(calls.fill, 3);
+        assert.strictEqual(calls.rect, 180);
+        assert.strictEqual(JSON.stringify(calls.styles), JSON.stringify(['#f00', '#0f0', '#00f']));
+    });
+});
@@ -0,0 +1,112 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    url: "http://localhost/",
+    runScripts: "dangerously"
+});
+global.window = dom.window;
+global.document = dom.window.document;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/physics.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/entity.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/mob.js', 'utf8'));
+
+// Sparse block store standing in for the world
+class MockWorld {
+    constructor() {
+        this.blocks = new Map();
+        this.meta = new Map();
+    }
+    setBlock(x, y, z, type, meta = 0) {
+        this.blocks.set(`${x},${y},${z}`, type);
+        this.meta.set(`${x},${y},${z}`, meta);
+    }
+    getBlock(x, y, z) { return this.blocks.get(`${x},${y},${z}`) || dom.window.BLOCK.AIR; }
+    getMetadata(x, y, z) { return this.meta.get(`${x},${y},${z}`) || 0; }
+}
+
+describe('Physics', () => {
+    let BLOCK, Physics, world, physics;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        Physics = dom.window.Physics;
+        world = new MockWorld();
+        physics = new Physics(world);
+        // Stone floor, top at y = 10
+        for (let x = -3; x <= 3; x++) {
+            for (let z = -3; z <= 3; z++) world.setBlock(x, 9, z, BLOCK.STONE);
+        }
+    });
+
+    it('should cache collision shapes per type and metadata', () => {
+        const stair = Physics.collisionBoxes(BLOCK.STAIRS_WOOD, 0);
+        assert.strictEqual(Physics.collisionBoxes(BLOCK.STAIRS_WOOD, 0), stair);
+        assert.deepStrictEqual(Array.from(stair), [0, 0, 0, 1, 0.5, 1, 0.5, 0.5, 0, 1, 1, 1]);
+        assert.deepStrictEqual(Array.from(Physics.collisionBoxes(BLOCK.SLAB_STONE, 0)), [0, 0, 0, 1, 0.5, 1]);
+        assert.strictEqual(Physics.collisionBoxes(BLOCK.AIR, 0).length, 0);
+        assert.strictEqual(Physics.collisionBoxes(BLOCK.TRAPDOOR, 4).length, 0, 'Open trapdoors are passable');
+        assert.strictEqual(Physics.collisionBoxes(BLOCK.FENCE, 0)[4], 1.5);
+    });
+
+    it('should land exactly on top of what it falls onto', () => {
+        world.setBlock(0, 10, 0, BLOCK.SLAB_STONE);
+        const box = { x: 0.5, y: 12, z: 0.5, width: 0.6, height: 1.8 };
+        const hit = physics.moveBox(box, 0, -2, 0);
+        assert.strictEqual(hit.y, 10.5);
+        assert.strictEqual(hit.hitY, true);
+        assert.strictEqual(hit.toi, 0.75);
+
+        // Resting on it: no further movement, still touching
+        const rest = physics.moveBox({ x: 0.5, y: 10.5, z: 0.5, width: 0.6, height: 1.8 }, 0, -0.05, 0);
+        assert.strictEqual(rest.y, 10.5);
+        assert.strictEqual(rest.toi, 0);
+    });
+
+    it('should not tunnel through thin floors at high speed', () => {
+        const box = { x: 0.5, y: 30, z: 0.5, width: 0.6, height: 1.8 };
+        const hit = physics.moveBox(box, 0, -40, 0);
+        assert.strictEqual(hit.y, 10);
+    });
+
+    it('should slide along walls', () => {
+        world.setBlock(2, 10, 0, BLOCK.STONE);
+        world.setBlock(2, 11, 0, BLOCK.STONE);
+        const box = { x: 1.5, y: 10, z: 0.5, width: 0.6, height: 1.8 };
+        const hit = physics.moveBox(box, 1, 0, 0.25);
+        assert.strictEqual(hit.hitX, true);
+        assert.ok(Math.abs(hit.x - 1.7) < 1e-9, `x ${hit.x}`);
+        assert.strictEqual(hit.z, 0.75, 'Keeps moving along the wall');
+    });
+
+    it('should stop entities and set onGround', () => {
+        const mob = { x: 0.5, y: 11, z: 0.5, vx: 0, vy: -20, vz: 0, width: 0.6, height: 1.8, onGround: false };
+        physics.moveEntity(mob, 0, -2, 0);
+        assert.strictEqual(mob.y, 10);
+        assert.strictEqual(mob.vy, 0);
+        assert.strictEqual(mob.onGround, true);
+
+        physics.moveEntity(mob, 0, 1, 0);
+        assert.strictEqual(mob.onGround, false);
+    });
+
+    it('should only push mobs up out of blocks at their feet', () => {
+        const game = { world, physics, player: { x: 100, y: 10, z: 100 } };
+        const zombie = new dom.window.Mob(game, 0.5, 10, 0.5, dom.window.MOB_TYPE.ZOMBIE);
+
+        // Built over at head height: it stays on the floor (and can walk out)
+        world.setBlock(0, 11, 0, BLOCK.STONE);
+        for (let i = 0; i < 3; i++) zombie.update(0.05, 0);
+        assert.strictEqual(zombie.y, 10);
+
+        // Buried to the knees: lifted onto the block
+        world.setBlock(0, 11, 0, BLOCK.AIR);
+        world.setBlock(0, 10, 0, BLOCK.STONE);
+        zombie.update(0.05, 0);
+        assert.strictEqual(zombie.y, 11);
+    });
+});
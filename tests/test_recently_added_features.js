@@ -255,18 +255,13 @@ describe('Recently Added Features Tests', () => {
             // Mock Physics
             game.physics.getFluidIntersection = () => false; // Not in water
 
-            // Mock collision to simulate hitting ground on Y axis
-            // moveBy checks X, Z, then Y.
-            // We want Y check to return true.
-            game.physics.checkCollision = (box) => {
-                // If box.y is below current y (falling check), return true
-                const isFallingCheck = box.y < player.y;
-                if (isFallingCheck) return true;
-                return false;
-            };
-
-            // Mock getCollidingBlocks to prevent interference from real world blocks
-            game.physics.getCollidingBlocks = () => [];
+            // Clear the column around the player and put a floor under it (top at y = 19)
+            for (let x = -1; x <= 0; x++) {
+                for (let z = -1; z <= 0; z++) {
+                    for (let y = 19; y <= 22; y++) game.world.setBlock(x, y, z, dom.window.BLOCK.AIR);
+                    game.world.setBlock(x, 18, z, dom.window.BLOCK.STONE);
+                }
+            }
 
             player.fallDistance = 10; // Fallen 10 blocks
 
@@ -279,8 +274,7 @@ describe('Recently Added Features Tests', () => {
             // Logic: if (fallDistance > 3) damage = floor(fallDistance - 3)
             // Player falls due to gravity in this frame.
             // vy = -10 - (25 * 0.1) = -12.5. dy = -1.25.
-            // y moves from 20 to 18.75.
-            // Snaps to floor(18.75) + 1 = 19.
+            // The sweep stops the feet on the floor at 19.
             // Total fall = 10 + (20 - 19) = 11.
             // Damage = 11 - 3 = 8.
             assert.strictEqual(damageTaken, 8, "Should take correct fall damage");
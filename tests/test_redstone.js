@@ -0,0 +1,134 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('Redstone Graph', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        for (let cx = -1; cx <= 1; cx++) {
+            for (let cz = -1; cz <= 1; cz++) {
+                world.chunks.set(world.getChunkKey(cx, cz), new dom.window.Chunk(cx, cz));
+            }
+        }
+        for (let x = -16; x < 32; x++) {
+            for (let z = -16; z < 32; z++) world.setBlock(x, 0, z, BLOCK.STONE);
+        }
+        world.redstoneTicks.clear();
+        world.redstone.clear();
+    });
+
+    const line = (from, to) => {
+        for (let x = from; x <= to; x++) world.setBlock(x, 1, 0, BLOCK.REDSTONE_WIRE);
+    };
+
+    it('should power a long wire line in a single tick', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 20);
+        world.tick();
+
+        for (let x = 1; x <= 15; x++) assert.strictEqual(world.getMetadata(x, 1, 0), 16 - x);
+        assert.strictEqual(world.getMetadata(16, 1, 0), 0);
+    });
+
+    it('should take the strongest of several sources', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        world.setBlock(11, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 10);
+        world.tick();
+
+        assert.strictEqual(world.getMetadata(1, 1, 0), 15);
+        assert.strictEqual(world.getMetadata(5, 1, 0), 11);
+        assert.strictEqual(world.getMetadata(6, 1, 0), 11);
+        assert.strictEqual(world.getMetadata(10, 1, 0), 15);
+    });
+
+    it('should depower everything past a cut in the same tick', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 10);
+        world.setBlock(11, 1, 0, BLOCK.REDSTONE_LAMP);
+        world.tick();
+        assert.strictEqual(world.getBlock(11, 1, 0), BLOCK.REDSTONE_LAMP_ACTIVE);
+
+        world.setBlock(3, 1, 0, BLOCK.AIR);
+        world.tick();
+        assert.strictEqual(world.getMetadata(2, 1, 0), 14);
+        for (let x = 4; x <= 10; x++) assert.strictEqual(world.getMetadata(x, 1, 0), 0);
+        assert.strictEqual(world.getBlock(11, 1, 0), BLOCK.REDSTONE_LAMP);
+    });
+
+    it('should invert a torch standing on a powered block one tick later', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 2);
+        world.setBlock(3, 1, 0, BLOCK.STONE);
+        world.setBlock(3, 2, 0, BLOCK.REDSTONE_TORCH);
+        world.setBlock(4, 1, 0, BLOCK.STONE);
+        world.setBlock(4, 2, 0, BLOCK.REDSTONE_WIRE);
+
+        world.tick();
+        assert.strictEqual(world.getBlock(3, 2, 0), BLOCK.REDSTONE_TORCH_OFF);
+        world.tick();
+        assert.strictEqual(world.getMetadata(4, 2, 0), 0);
+
+        // Unpower the block: the torch relights and powers its wire again
+        world.setBlock(2, 1, 0, BLOCK.AIR);
+        world.tick();
+        assert.strictEqual(world.getBlock(3, 2, 0), BLOCK.REDSTONE_TORCH);
+        world.tick();
+        assert.strictEqual(world.getMetadata(4, 2, 0), 15);
+    });
+
+    it('should drive pistons from the network', () => {
+        world.setBlock(5, 1, 2, BLOCK.PISTON);
+        world.setMetadata(5, 1, 2, 3); // Facing +z
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 5);
+        world.setBlock(5, 1, 1, BLOCK.REDSTONE_WIRE);
+        world.tick();
+        assert.strictEqual(world.getBlock(5, 1, 3), BLOCK.PISTON_HEAD);
+
+        world.setBlock(0, 1, 0, BLOCK.AIR);
+        world.tick();
+        assert.strictEqual(world.getBlock(5, 1, 3), BLOCK.AIR);
+        assert.strictEqual(world.getMetadata(5, 1, 2) & 8, 0);
+    });
+
+    it('should keep compiled nodes until a nearby component changes', () => {
+        world.setBlock(0, 1, 0, BLOCK.REDSTONE_TORCH);
+        line(1, 5);
+        world.tick();
+        const far = world.redstone.nodes.get(world.packBlockPos(5, 1, 0));
+        const farLinks = far.inputs;
+        const near = world.redstone.nodes.get(world.packBlockPos(2, 1, 0));
+        const nearLinks = near.inputs;
+        assert.ok(farLinks && nearLinks);
+
+        // Non-redstone blocks do not touch the graph
+        world.setBlock(8, 1, 8, BLOCK.DIRT);
+        assert.strictEqual(world.redstoneTicks.size, 0);
+
+        world.setBlock(2, 1, 1, BLOCK.REDSTONE_WIRE);
+        world.tick();
+        assert.strictEqual(world.redstone.nodes.get(world.packBlockPos(5, 1, 0)), far);
+        assert.strictEqual(far.inputs, farLinks);
+        assert.strictEqual(world.redstone.nodes.get(world.packBlockPos(2, 1, 0)), near);
+        assert.notStrictEqual(near.inputs, nearLinks);
+        assert.strictEqual(world.getMetadata(2, 1, 1), 13);
+    });
+});
@@ -0,0 +1,95 @@
+const assert = require('assert');
+const { NetProtocol, ByteReader } = require('../js/protocol.js');
+const { InterestGrid, createPlayer, writeFrame, HIGH_WATER, VIEW_DISTANCE } = require('../server/server.js');
+
+class MockSocket {
+    constructor() {
+        this.readyState = 1; // OPEN
+        this.bufferedAmount = 0;
+        this.sent = [];
+    }
+    send(data) { this.sent.push(data); }
+    terminate() { this.readyState = 3; }
+}
+
+describe('Server Broadcasting', () => {
+    const OP = NetProtocol.OP;
+    let grid, alice, bob, carol;
+
+    // Records in a frame sent to a client, as [op, id] pairs (id of the player it is about)
+    const records = (data) => {
+        const r = new ByteReader(data);
+        const out = [];
+        while (r.remaining > 0) {
+            const op = r.u8();
+            if (op === OP.LEAVE) out.push([op, r.u32()]);
+            else if (op === OP.INFO) { out.push([op, r.u32()]); r.string(); r.string(); }
+            else if (op === OP.STATE) { out.push([op, r.u32()]); NetProtocol.readState(r, {}); }
+            else if (op === OP.TIME) { r.u32(); out.push([op]); }
+            else if (op === OP.CHAT) { r.string(); r.string(); out.push([op]); }
+            else throw new Error('Unexpected record ' + op);
+        }
+        return out;
+    };
+
+    // State shared by every client's frame for one tick (no block edits, no chunks)
+    const tick = (fields = {}) => Object.assign({
+        world: null, grid, changes: [], changedChunks: new Map(), seq: 0,
+        leaves: [], chat: [], snapshot: true, time: 0, budget: { loads: 0 }
+    }, fields);
+
+    const moveTo = (player, x, z) => {
+        player.state = Object.assign(NetProtocol.quantize(x, 70, z, 0, 0), { known: false });
+        player.x = x;
+        player.z = z;
+        grid.update(player, x, z);
+    };
+
+    beforeEach(() => {
+        grid = new InterestGrid(64);
+        alice = createPlayer(1, new MockSocket());
+        bob = createPlayer(2, new MockSocket());
+        moveTo(alice, 0, 0);
+        moveTo(bob, 10, 10);
+        carol = createPlayer(3, new MockSocket()); // Not in the world yet
+    });
+
+    it('should drop players that leave the view and announce them again on return', () => {
+        writeFrame(alice, tick());
+        assert.deepStrictEqual(records(alice.ws.sent.pop()), [[OP.INFO, 2], [OP.TIME], [OP.STATE, 2]]);
+
+        moveTo(bob, VIEW_DISTANCE + 100, 0);
+        writeFrame(alice, tick());
+        assert.deepStrictEqual(records(alice.ws.sent.pop()), [[OP.LEAVE, 2]]);
+        assert.strictEqual(alice.known.has(2), false);
+
+        // Out of view: nothing about bob at all
+        moveTo(bob, VIEW_DISTANCE + 120, 0);
+        writeFrame(alice, tick());
+        assert.strictEqual(alice.ws.sent.length, 0);
+
+        moveTo(bob, 20, 0);
+        writeFrame(alice, tick());
+        assert.deepStrictEqual(records(alice.ws.sent.pop()), [[OP.INFO, 2], [OP.TIME], [OP.STATE, 2]]);
+    });
+
+    it('should skip positions but keep reliable records while the socket is backed up', () => {
+        writeFrame(alice, tick());
+        alice.ws.sent.length = 0;
+
+        alice.ws.bufferedAmount = HIGH_WATER + 1;
+        moveTo(bob, 12, 10);
+        writeFrame(alice, tick({ chat: [{ sender: 'bob', message: 'hi' }] }));
+        moveTo(carol, 5, 5);
+        writeFrame(alice, tick());
+        assert.strictEqual(alice.ws.sent.length, 0, 'Nothing sent while backed up');
+        assert.deepStrictEqual(records(alice.out.finish()), [[OP.CHAT], [OP.INFO, 3]], 'No STATE or TIME queued');
+
+        // Drained: the queued records go out, then the latest positions
+        alice.ws.bufferedAmount = 0;
+        writeFrame(alice, tick());
+        assert.deepStrictEqual(records(alice.ws.sent.pop()),
+            [[OP.CHAT], [OP.INFO, 3], [OP.TIME], [OP.STATE, 2], [OP.STATE, 3]]);
+        assert.strictEqual(alice.out.length, 0);
+    });
+});
@@ -0,0 +1,194 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const util = require('util');
+const { ServerWorld } = require('../server/world.js');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+class MockWebSocket {
+    constructor() {
+        this.readyState = 1;
+        this.sent = [];
+    }
+    send(data) { this.sent.push(data); }
+    close() {}
+}
+MockWebSocket.OPEN = 1;
+dom.window.WebSocket = MockWebSocket;
+// Available in browsers, missing from jsdom
+dom.window.TextEncoder = util.TextEncoder;
+dom.window.TextDecoder = util.TextDecoder;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/math.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/biome.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/structures.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/village.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/storage.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/protocol.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/network.js', 'utf8'));
+
+describe('Server World', () => {
+    let dir, BLOCK;
+
+    beforeEach(() => {
+        dir = fs.mkdtempSync(path.join(os.tmpdir(), 'voxel-world-'));
+        BLOCK = dom.window.BLOCK;
+    });
+
+    afterEach(() => {
+        fs.rmSync(dir, { recursive: true, force: true });
+    });
+
+    it('should keep generated and edited chunks on disk', () => {
+        const server = new ServerWorld(dir);
+        server.loadChunk(0, 0);
+        server.loadChunk(1, 0);
+        server.applyEdits([{ x: 3, y: 100, z: 4, type: BLOCK.GLASS }], 1);
+        const sample = server.world.getBlock(20, 10, 5);
+        server.save();
+
+        const reopened = new ServerWorld(dir);
+        assert.strictEqual(reopened.world.seed, server.world.seed);
+        assert.strictEqual(reopened.editSeq, server.editSeq);
+        assert.strictEqual(reopened.loadChunk(0, 0).editSeq, server.editSeq);
+        assert.strictEqual(reopened.world.getBlock(3, 100, 4), BLOCK.GLASS);
+        reopened.loadChunk(1, 0);
+        assert.strictEqual(reopened.world.getBlock(20, 10, 5), sample);
+    });
+
+    it('should number edits and replay them until the log is trimmed', () => {
+        const server = new ServerWorld(dir, { logSize: 4 });
+        server.loadChunk(0, 0);
+        server.takeChanges();
+        const start = server.editSeq;
+        const keys = new Set([server.chunkKey(0, 0)]);
+
+        server.applyEdits([{ x: 1, y: 100, z: 1, type: BLOCK.STONE }, { x: 2, y: 100, z: 1, type: BLOCK.DIRT }], 1);
+        assert.strictEqual(server.editSeq, start + 2);
+        assert.strictEqual(server.takeChanges().length, 2);
+        assert.deepStrictEqual(server.editsSince(start + 1, keys).map(e => e.type), [BLOCK.DIRT]);
+        assert.strictEqual(server.editsSince(start, new Set()).length, 0);
+
+        for (let i = 0; i < 10; i++) server.applyEdits([{ x: 3, y: 100 + i, z: 3, type: BLOCK.STONE }], 1);
+        assert.strictEqual(server.editsSince(start, keys), null);
+        assert.strictEqual(server.editsSince(server.editSeq + 5, keys), null);
+    });
+
+    it('should ignore edits with unknown types or in chunks that are not loaded', () => {
+        const server = new ServerWorld(dir);
+        server.loadChunk(0, 0);
+        server.takeChanges();
+        const start = server.editSeq;
+        const before = server.world.getBlock(5, 100, 5);
+
+        const applied = server.applyEdits([
+            { x: 5, y: 100, z: 5, type: 60000 }, // Would wrap to another block in the byte array
+            { x: 5, y: 100, z: 5, type: BLOCK.ITEM_REDSTONE_DUST }, // Item, 300 would be stored as 44
+            { x: 5000, y: 100, z: 5000, type: BLOCK.STONE }, // Far away
+            { x: 6, y: 100, z: 6, type: BLOCK.GLASS }
+        ], 1);
+        assert.strictEqual(applied, 1);
+        assert.strictEqual(server.editSeq, start + 1);
+        assert.strictEqual(server.world.getBlock(5, 100, 5), before);
+        assert.strictEqual(server.world.getBlock(6, 100, 6), BLOCK.GLASS);
+        assert.strictEqual(server.getChunk(312, 312), undefined);
+    });
+});
+
+describe('Client in a Server World', () => {
+    let P, game, network, server, dir;
+
+    const frame = (fn) => {
+        const w = new dom.window.ByteWriter();
+        fn(w);
+        return w.finish().buffer;
+    };
+
+    const chunkFrame = (chunks) => frame(w => {
+        chunks.forEach(([cx, cz]) => {
+            const data = server.encodeChunk(server.loadChunk(cx, cz));
+            w.u8(P.OP.CHUNK);
+            w.u32(data.length);
+            w.raw(data);
+        });
+        w.u8(P.OP.SEQ);
+        w.u32(server.editSeq);
+    });
+
+    const records = (data) => {
+        const r = new dom.window.ByteReader(data);
+        const out = {};
+        while (r.remaining > 0) {
+            const op = r.u8();
+            if (op === P.OP.SYNC) out.sync = { seq: r.u32(), chunks: P.readChunkList(r) };
+            else if (op === P.OP.VIEW) out.view = r.u8();
+            else if (op === P.OP.DROP) out.drop = P.readChunkList(r);
+            else throw new Error('Unexpected record ' + op);
+        }
+        return out;
+    };
+
+    beforeEach(() => {
+        P = dom.window.NetProtocol;
+        dir = fs.mkdtempSync(path.join(os.tmpdir(), 'voxel-world-'));
+        server = new ServerWorld(dir);
+
+        const world = new dom.window.World();
+        game = { world, player: { x: 8, y: 200, z: 8, name: 'Steve' }, chat: null, chunkWorkers: null };
+        world.game = game;
+        world.generateChunk(0, 0); // Local terrain from before joining
+        network = new dom.window.NetworkManager(game);
+        game.network = network;
+        network.connected = true;
+        network.socket = new MockWebSocket();
+        network.handleFrame(frame(w => { w.u8(P.OP.HELLO); w.u32(1); w.u8(P.VERSION); }));
+    });
+
+    afterEach(() => {
+        fs.rmSync(dir, { recursive: true, force: true });
+    });
+
+    it('should replace local terrain with chunks streamed by the server', () => {
+        assert.strictEqual(game.world.chunks.size, 0);
+        assert.strictEqual(network.streamsChunks(), true);
+        network.flush();
+        const join = records(network.socket.sent[0]);
+        assert.strictEqual(JSON.stringify(join.sync), JSON.stringify({ seq: 0, chunks: [] }));
+        assert.strictEqual(join.view, game.world.renderDistance);
+
+        network.handleFrame(chunkFrame([[0, 0], [1, 0]]));
+        assert.strictEqual(game.world.getBlock(20, 10, 5), server.world.getBlock(20, 10, 5));
+        assert.strictEqual(game.world.getChunk(0, 0).lightReady, true);
+        assert.strictEqual(network.editSeq, server.editSeq);
+        // Put on the server's ground
+        assert.strictEqual(network.awaitingSpawn, false);
+        assert.strictEqual(game.player.y, game.world.getSurfaceHeight(8, 8) + 1);
+    });
+
+    it('should report unloaded chunks and list the rest when reconnecting', () => {
+        network.handleFrame(chunkFrame([[0, 0], [5, 0]]));
+        network.flush();
+        network.socket.sent.length = 0;
+
+        game.world.unloadFarChunks(8, 8, 1);
+        network.flush();
+        assert.strictEqual(JSON.stringify(records(network.socket.sent[0]).drop), '[[5,0]]');
+
+        // Reconnect: the chunk we kept is listed with the last edit we saw
+        network.socket = new MockWebSocket();
+        network.handleFrame(frame(w => { w.u8(P.OP.HELLO); w.u32(2); w.u8(P.VERSION); }));
+        network.flush();
+        assert.strictEqual(JSON.stringify(records(network.socket.sent[0]).sync), JSON.stringify({ seq: server.editSeq, chunks: [[0, 0]] }));
+        assert.ok(game.world.getChunk(0, 0));
+    });
+});
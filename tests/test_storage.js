@@ -0,0 +1,159 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+const util = require('util');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+// Available in browsers and workers, missing from jsdom
+dom.window.TextEncoder = util.TextEncoder;
+dom.window.TextDecoder = util.TextDecoder;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/storage.js', 'utf8'));
+
+// In-memory stand-in for WorldStore (same calls, records kept encoded)
+class MemoryStore {
+    constructor() {
+        this.available = true;
+        this.slots = new Map(); // slot -> { meta, chunks: Map }
+        this.writes = 0;
+    }
+
+    slot(name) {
+        if (!this.slots.has(name)) this.slots.set(name, { meta: undefined, chunks: new Map() });
+        return this.slots.get(name);
+    }
+
+    open(name) {
+        const slot = this.slot(name);
+        const chunks = Array.from(slot.chunks.keys()).map(k => {
+            const [dimension, cx, cz] = k.split('/');
+            return [dimension, Number(cx), Number(cz)];
+        });
+        return Promise.resolve({ meta: slot.meta, chunks });
+    }
+
+    save(name, records, meta, options = {}) {
+        const slot = this.slot(name);
+        if (options.reset) slot.chunks = new Map(options.copyFrom ? this.slot(options.copyFrom).chunks : []);
+        records.forEach(r => {
+            slot.chunks.set(`${r.dimension}/${r.cx}/${r.cz}`, dom.window.ChunkCodec.encode(r));
+            this.writes++;
+        });
+        if (meta) slot.meta = meta;
+        return Promise.resolve(records.length);
+    }
+
+    load(name, dimension, cx, cz) {
+        const data = this.slot(name).chunks.get(`${dimension}/${cx}/${cz}`);
+        return Promise.resolve(data ? dom.window.ChunkCodec.decode(data) : null);
+    }
+}
+
+describe('Chunk Codec', () => {
+    it('should round-trip blocks, metadata, light and block entities', () => {
+        const chunk = new dom.window.Chunk(-3, 7);
+        for (let i = 0; i < 2000; i++) {
+            chunk.blocks[(i * 97) % chunk.blocks.length] = (i % 40) + 1;
+            chunk.metadata[(i * 31) % chunk.metadata.length] = i & 15;
+            chunk.light[(i * 13) % chunk.light.length] = i & 255;
+        }
+        const entities = [[-40, 12, 115, { type: 'chest', items: [null, { type: 4, count: 3 }] }]];
+
+        const buffer = dom.window.ChunkCodec.encode({
+            cx: chunk.cx, cz: chunk.cz,
+            blocks: chunk.blocks, metadata: chunk.metadata, light: chunk.light, entities
+        });
+        const record = dom.window.ChunkCodec.decode(buffer);
+
+        assert.strictEqual(record.cx, -3);
+        assert.strictEqual(record.cz, 7);
+        assert.ok(Buffer.from(record.blocks).equals(Buffer.from(chunk.blocks)));
+        assert.ok(Buffer.from(record.metadata).equals(Buffer.from(chunk.metadata)));
+        assert.ok(Buffer.from(record.light).equals(Buffer.from(chunk.light)));
+        assert.strictEqual(JSON.stringify(record.entities), JSON.stringify(entities));
+        // Mostly uniform chunks stay small
+        assert.ok(buffer.byteLength < chunk.blocks.length);
+    });
+
+    it('should reject data that is not a chunk record', () => {
+        assert.throws(() => dom.window.ChunkCodec.decode(new ArrayBuffer(64)));
+    });
+});
+
+describe('World Store Saves', () => {
+    let world, store, BLOCK;
+
+    const addChunks = (w) => {
+        for (let cx = 0; cx < 3; cx++) {
+            for (let cz = 0; cz < 3; cz++) {
+                const chunk = new dom.window.Chunk(cx, cz);
+                chunk.blocks.fill(BLOCK.STONE, 0, 256 * 4);
+                w.addChunk(chunk);
+            }
+        }
+    };
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        store = new MemoryStore();
+        world = new dom.window.World();
+        world.store = store;
+        addChunks(world);
+    });
+
+    it('should only write chunks changed since the last save', async () => {
+        await world.saveWorld('slot1');
+        assert.strictEqual(store.writes, 9);
+
+        await world.saveWorld('slot1');
+        assert.strictEqual(store.writes, 9);
+
+        world.setBlock(20, 10, 5, BLOCK.DIRT);
+        await world.saveWorld('slot1');
+        assert.strictEqual(store.writes, 10);
+        assert.strictEqual(world.getChunk(1, 0).unsaved, false);
+    });
+
+    it('should write unloaded chunks and load them back on demand', async () => {
+        await world.saveWorld('slot1');
+        world.setBlock(40, 6, 40, BLOCK.ORE_GOLD);
+        world.setBlockEntity(41, 6, 40, { type: 'chest', items: [] });
+        world.unloadFarChunks(0, 0, -2);
+        assert.strictEqual(world.getChunk(2, 2), undefined);
+        await Promise.resolve();
+
+        assert.strictEqual(world.loadStoredChunk(2, 2), true);
+        assert.strictEqual(world.loadStoredChunk(5, 5), false);
+        world.blockEntities.clear();
+        await new Promise(resolve => setTimeout(resolve, 0));
+
+        assert.strictEqual(world.getBlock(40, 6, 40), BLOCK.ORE_GOLD);
+        assert.strictEqual(world.getBlockEntity(41, 6, 40).type, 'chest');
+        assert.strictEqual(world.getChunk(2, 2).lightReady, true);
+    });
+
+    it('should load a slot into a fresh world', async () => {
+        world.setBlock(3, 8, 3, BLOCK.ORE_GOLD);
+        await world.saveWorld('slot1');
+
+        const other = new dom.window.World();
+        other.store = store;
+        await other.loadWorld('slot1');
+
+        assert.strictEqual(other.seed, world.seed);
+        assert.strictEqual(other.saveSlot, 'slot1');
+        assert.strictEqual(other.getBlock(3, 8, 3), BLOCK.ORE_GOLD);
+        assert.strictEqual(other.storedChunks.size, 9);
+    });
+});
@@ -351,4 +351,46 @@ describe('TextureManager', () => {
             }, 'drawImage should not throw with mob texture');
         });
     });
+
+    describe('Atlas', () => {
+        it('should pack every block and item texture into one canvas', () => {
+            const keys = Object.keys(tm.textures);
+            assert.ok(tm.atlas, 'Atlas should be built by init()');
+            assert.strictEqual(tm.atlas.width, dom.window.TextureManager.ATLAS_COLUMNS * 16);
+            assert.ok(tm.atlas.height >= Math.ceil(keys.length / dom.window.TextureManager.ATLAS_COLUMNS) * 16);
+            keys.forEach(key => assert.ok(tm.atlasSlots[key], `No atlas slot for ${key}`));
+            // Distinct cells
+            const cells = new Set(keys.map(key => tm.atlasSlots[key].x + ',' + tm.atlasSlots[key].y));
+            assert.strictEqual(cells.size, keys.length);
+        });
+
+        it('should cache one shaded sprite per type, face and light level', () => {
+            const lit = tm.getShadedSprite(BLOCK.STONE, 2, 15);
+            assert.ok(lit);
+            assert.strictEqual(lit.width, 16);
+            assert.strictEqual(tm.getShadedSprite(BLOCK.STONE, 2, 15), lit);
+            assert.notStrictEqual(tm.getShadedSprite(BLOCK.STONE, 2, 3), lit);
+            assert.notStrictEqual(tm.getShadedSprite(BLOCK.STONE, 0, 15), lit);
+            assert.strictEqual(tm.getShadedSprite(99999, 2, 15), null);
+        });
+
+        it('should restore textures from a cached atlas record', () => {
+            const record = {
+                signature: dom.window.TextureManager.atlasSignature(),
+                size: 16,
+                width: tm.atlas.width,
+                height: tm.atlas.height,
+                keys: tm.atlasKeys,
+                pixels: new ArrayBuffer(tm.atlas.width * tm.atlas.height * 4)
+            };
+            const cached = new dom.window.TextureManager();
+            assert.strictEqual(cached.restoreAtlas(Object.assign({}, record, { signature: 'old' })), false);
+            assert.strictEqual(cached.restoreAtlas(record), true);
+            const tex = cached.getBlockTexture(BLOCK.DIRT);
+            assert.ok(tex);
+            assert.strictEqual(tex.width, 16);
+            assert.strictEqual(cached.getBlockTexture(BLOCK.DIRT), tex);
+            assert.ok(cached.getShadedSprite(BLOCK.DIRT, 4, 8));
+        });
+    });
 });
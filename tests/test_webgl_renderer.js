@@ -0,0 +1,113 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html><canvas id="game-canvas"></canvas>`, {
+    url: "http://localhost/",
+    runScripts: "dangerously"
+});
+global.window = dom.window;
+global.document = dom.window.document;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/renderer.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/webglrenderer.js', 'utf8'));
+
+// Stand-in WebGL context: records calls, every shader compiles, constants are their names
+const fakeGL = () => {
+    const calls = [];
+    const target = {
+        canvas: dom.window.document.createElement('canvas'),
+        calls,
+        count: (name) => calls.filter(c => c[0] === name).length,
+        isContextLost: () => false,
+        getShaderParameter: () => true,
+        getProgramParameter: () => true,
+        getExtension: () => null
+    };
+    return new Proxy(target, {
+        get(t, k) {
+            if (k in t) return t[k];
+            if (typeof k === 'string' && k === k.toUpperCase()) return k;
+            return (...args) => { calls.push([k].concat(args)); return { id: calls.length }; };
+        }
+    });
+};
+
+describe('WebGL Renderer', () => {
+    let BLOCK, chunk, game;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        chunk = new dom.window.Chunk(0, 0);
+        for (let x = 0; x < 16; x++) {
+            for (let z = 0; z < 16; z++) chunk.setBlock(x, 10, z, BLOCK.STONE);
+        }
+        chunk.setBlock(3, 11, 3, BLOCK.TORCH);
+        const canvas = dom.window.document.getElementById('game-canvas');
+        game = {
+            canvas,
+            ctx: canvas.getContext('2d'),
+            world: {
+                weather: 'clear',
+                getChunk: (cx, cz) => (cx === 0 && cz === 0 ? chunk : null),
+                getBlock: () => BLOCK.AIR
+            },
+            player: { x: 8, y: 12, z: 8, height: 1.8, yaw: 0, pitch: 0 },
+            fov: 60, renderDistance: 50, gameTime: 0, dayLength: 120000, sunBrightness: 1,
+            mobs: [], vehicles: [], drops: [], projectiles: [], tntPrimed: [], network: null
+        };
+    });
+
+    it('should build section geometry from the chunk mesh', () => {
+        chunk.buildMesh(null);
+        const mesh = chunk.sectionMeshes[0];
+        const geometry = dom.window.WebGLRenderer.buildSectionGeometry(chunk, mesh, null);
+        const stride = dom.window.WebGLRenderer.VERTEX_FLOATS;
+        // Greedy quads plus one six-sided box for the torch, two triangles each
+        assert.strictEqual(geometry.solid.length, (mesh.quadCount + 6) * 6 * stride);
+        assert.strictEqual(geometry.liquid.length, 0);
+        assert.strictEqual(mesh.specialCount, 1);
+    });
+
+    it('should upload each section once and draw it with depth testing', () => {
+        const gl = fakeGL();
+        const renderer = new dom.window.WebGLRenderer(game, gl);
+        assert.strictEqual(renderer.mode, 'webgl');
+        renderer.render();
+        const uploads = gl.count('bufferData');
+        const draws = gl.count('drawArrays');
+        assert.ok(gl.calls.some(c => c[0] === 'enable' && c[1] === 'DEPTH_TEST'));
+        assert.strictEqual(draws, 2); // Sky, then the one section with blocks
+
+        renderer.render();
+        assert.strictEqual(gl.count('bufferData'), uploads, 'Unchanged sections are not uploaded again');
+        assert.strictEqual(gl.count('drawArrays'), draws * 2);
+
+        // An edit rebuilds the section mesh, which replaces its buffer
+        chunk.setBlock(5, 11, 5, BLOCK.STONE);
+        renderer.render();
+        assert.strictEqual(gl.count('bufferData'), uploads + 1);
+        assert.strictEqual(gl.count('deleteBuffer'), 1);
+    });
+
+    it('should free buffers of unloaded chunks', () => {
+        const gl = fakeGL();
+        const renderer = new dom.window.WebGLRenderer(game, gl);
+        renderer.render();
+        game.world.getChunk = () => null;
+        renderer.releaseStaleBuffers();
+        assert.strictEqual(renderer.chunkBuffers.size, 0);
+        assert.strictEqual(gl.count('deleteBuffer'), 1);
+    });
+
+    it('should give up when shaders cannot be built, leaving Canvas 2D in use', () => {
+        const gl = fakeGL();
+        const broken = new Proxy(gl, {
+            get(t, k) { return k === 'getShaderParameter' ? () => false : t[k]; }
+        });
+        assert.throws(() => new dom.window.WebGLRenderer(game, broken), /Shader compile failed/);
+    });
+});
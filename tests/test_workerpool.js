@@ -0,0 +1,121 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Mock Worker: records posted jobs, answers only when the test says so
+class MockWorker {
+    constructor(url) {
+        this.url = url;
+        this.messages = [];
+        MockWorker.instances.push(this);
+    }
+    postMessage(msg) {
+        this.messages.push(msg);
+    }
+    terminate() {
+        this.terminated = true;
+    }
+    reply(job) {
+        const blocks = new Uint8Array(16 * 16 * 128);
+        blocks[0] = dom.window.BLOCK.STONE;
+        this.onmessage({ data: {
+            type: 'chunk', id: job.id, cx: job.cx, cz: job.cz,
+            blocks, metadata: new Uint8Array(16 * 16 * 128),
+            overflow: [{ key: dom.window.World.prototype.getChunkKey(9, 9), blocks: [{ x: 1, y: 2, z: 3, type: dom.window.BLOCK.WOOD }] }],
+            spawns: []
+        } });
+    }
+}
+MockWorker.instances = [];
+dom.window.Worker = MockWorker;
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/workerpool.js', 'utf8'));
+
+describe('Chunk Worker Pool', () => {
+    let world, pool;
+
+    const jobs = () => MockWorker.instances.reduce((all, w) => all.concat(w.messages.filter(m => m.type === 'generate')), []);
+
+    beforeEach(() => {
+        MockWorker.instances = [];
+        world = new dom.window.World();
+        pool = new dom.window.ChunkWorkerPool(world, { size: 2, maxInFlight: 3 });
+    });
+
+    it('should start and initialise the workers', () => {
+        assert.strictEqual(pool.available, true);
+        assert.strictEqual(MockWorker.instances.length, 2);
+        assert.strictEqual(MockWorker.instances[0].messages[0].type, 'init');
+    });
+
+    it('should dispatch nearest chunks first and bound in-flight jobs', () => {
+        pool.request(5, 5, 50);
+        pool.request(1, 0, 1);
+        pool.request(3, 0, 9);
+        pool.request(2, 0, 4);
+        pool.pump();
+
+        const sent = jobs();
+        assert.strictEqual(sent.length, 3);
+        assert.deepStrictEqual(sent.map(j => j.cx).sort(), [1, 2, 3]);
+        assert.strictEqual(pool.heap.length, 1);
+    });
+
+    it('should add finished chunks to the world and keep pumping', () => {
+        pool.request(1, 0, 1);
+        pool.request(2, 0, 4);
+        pool.request(3, 0, 9);
+        pool.request(4, 0, 16);
+        pool.pump();
+
+        const first = jobs()[0];
+        const worker = MockWorker.instances.find(w => w.messages.includes(first));
+        worker.reply(first);
+
+        const chunk = world.getChunk(first.cx, first.cz);
+        assert.ok(chunk);
+        assert.strictEqual(chunk.getBlock(0, 0, 0), dom.window.BLOCK.STONE);
+        // Spilled structure blocks wait for their chunk
+        assert.strictEqual(world.pendingBlocks.get(world.getChunkKey(9, 9)).length, 1);
+        // A free slot was refilled with the last queued chunk
+        assert.strictEqual(jobs().length, 4);
+    });
+
+    it('should drop results that arrive after a reset', () => {
+        pool.request(1, 0, 1);
+        pool.pump();
+        const job = jobs()[0];
+        pool.reset();
+
+        MockWorker.instances.find(w => w.messages.includes(job)).reply(job);
+        assert.strictEqual(world.getChunk(1, 0), undefined);
+    });
+
+    it('should not queue chunks twice', () => {
+        pool.request(1, 0, 1);
+        pool.request(1, 0, 1);
+        assert.strictEqual(pool.heap.length, 1);
+        pool.pump();
+        pool.request(1, 0, 1);
+        assert.strictEqual(pool.heap.length, 0);
+    });
+
+    it('should fall back when a worker fails', () => {
+        MockWorker.instances[0].onerror(new Error('boom'));
+        assert.strictEqual(pool.available, false);
+        assert.ok(MockWorker.instances.every(w => w.terminated));
+    });
+});
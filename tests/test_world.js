@@ -42,7 +42,7 @@ describe('World Saving', () => {
 
     beforeEach(() => {
         world = new dom.window.World();
-        world.chunks.set("0,0", new dom.window.Chunk(0, 0));
+        world.chunks.set(world.getChunkKey(0, 0), new dom.window.Chunk(0, 0));
         dom.window.localStorage.clear();
     });
 
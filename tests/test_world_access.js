@@ -0,0 +1,124 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('World Chunk Access', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        for (let cx = -1; cx <= 0; cx++) {
+            for (let cz = -1; cz <= 0; cz++) {
+                world.chunks.set(world.getChunkKey(cx, cz), new dom.window.Chunk(cx, cz));
+            }
+        }
+    });
+
+    it('should pack chunk coordinates into integer keys', () => {
+        [[0, 0], [-1, 5], [300, -2000], [-32768, 32767]].forEach(([cx, cz]) => {
+            const key = world.getChunkKey(cx, cz);
+            assert.strictEqual(typeof key, 'number');
+            assert.strictEqual(world.chunkKeyX(key), cx);
+            assert.strictEqual(world.chunkKeyZ(key), cz);
+        });
+        assert.notStrictEqual(world.getChunkKey(1, 0), world.getChunkKey(0, 1));
+    });
+
+    it('should read and write across negative chunk borders', () => {
+        world.setBlock(-1, 5, -16, BLOCK.STONE);
+        assert.strictEqual(world.getChunk(-1, -1).getBlock(15, 5, 0), BLOCK.STONE);
+        assert.strictEqual(world.getBlock(-1, 5, -16), BLOCK.STONE);
+        assert.strictEqual(world.getBlock(0, 5, -16), BLOCK.AIR);
+    });
+
+    it('should not return a cached chunk after it was replaced', () => {
+        world.setBlock(3, 3, 3, BLOCK.DIRT);
+        assert.strictEqual(world.getBlock(3, 3, 3), BLOCK.DIRT);
+
+        world.chunks.set(world.getChunkKey(0, 0), new dom.window.Chunk(0, 0));
+        assert.strictEqual(world.getBlock(3, 3, 3), BLOCK.AIR);
+
+        world.chunks.clear();
+        assert.strictEqual(world.getChunk(0, 0), undefined);
+    });
+
+    it('should copy a box spanning several chunks', () => {
+        world.setBlock(-1, 10, -1, BLOCK.STONE);
+        world.setBlock(0, 10, 0, BLOCK.DIRT);
+        world.setBlock(1, 11, -2, BLOCK.GLASS);
+
+        const box = world.getBlocksInBox(-2, 10, -2, 1, 11, 1);
+        assert.strictEqual(box.length, 4 * 2 * 4);
+        const at = (x, y, z) => box[(x + 2) + (z + 2) * 4 + (y - 10) * 16];
+        assert.strictEqual(at(-1, 10, -1), BLOCK.STONE);
+        assert.strictEqual(at(0, 10, 0), BLOCK.DIRT);
+        assert.strictEqual(at(1, 11, -2), BLOCK.GLASS);
+        assert.strictEqual(Array.from(box).filter(b => b !== BLOCK.AIR).length, 3);
+    });
+
+    it('should read unloaded chunks and rows outside the world as air', () => {
+        world.setBlock(15, 0, 15, BLOCK.STONE);
+        const out = new dom.window.Uint8Array(64).fill(99);
+        const box = world.getBlocksInBox(15, -1, 15, 16, 0, 16, out);
+        assert.strictEqual(box, out);
+        assert.strictEqual(box[0 + 0 * 2 + 1 * 4], BLOCK.STONE);
+        assert.strictEqual(Array.from(box.subarray(0, 8)).filter(b => b !== BLOCK.AIR).length, 1);
+    });
+
+    it('should answer column heights from heightmaps kept current by setBlock', () => {
+        // Stone up to y = 10, water to 14, a leaf at 20 over x = 2
+        for (let y = 0; y <= 10; y++) world.setBlock(2, y, -3, BLOCK.STONE);
+        for (let y = 11; y <= 14; y++) world.setBlock(2, y, -3, BLOCK.WATER);
+        assert.strictEqual(world.getHighestBlockY(2, -3), 15);
+        assert.strictEqual(world.getSurfaceHeight(2, -3), 10, 'Ground under the water');
+
+        world.setBlock(2, 20, -3, BLOCK.LEAVES);
+        assert.strictEqual(world.getHighestBlockY(2, -3), 21);
+        assert.strictEqual(world.getSurfaceHeight(2, -3), 20);
+
+        // Clearing the top finds the next block down
+        world.setBlock(2, 20, -3, BLOCK.AIR);
+        assert.strictEqual(world.getHighestBlockY(2, -3), 15);
+        assert.strictEqual(world.getSurfaceHeight(2, -3), 10);
+        world.setBlock(2, 10, -3, BLOCK.AIR);
+        assert.strictEqual(world.getSurfaceHeight(2, -3), 9, 'Water over an air pocket');
+
+        // Matches a fresh scan of the blocks
+        const chunk = world.getChunk(0, -1);
+        const surface = Array.from(chunk.surfaceHeights);
+        const ground = Array.from(chunk.motionBlockingHeights);
+        chunk.buildHeightmaps();
+        assert.deepStrictEqual(Array.from(chunk.surfaceHeights), surface);
+        assert.deepStrictEqual(Array.from(chunk.motionBlockingHeights), ground);
+
+        // Empty and unloaded columns
+        assert.strictEqual(world.getHighestBlockY(5, 5), 0);
+        assert.strictEqual(world.getSurfaceHeight(5, 5), 20);
+        assert.strictEqual(world.getHighestBlockY(500, 5), 100);
+    });
+
+    it('should rebuild heightmaps when the block array is replaced', () => {
+        const chunk = world.getChunk(0, 0);
+        assert.strictEqual(chunk.getSurfaceHeight(1, 1), 0);
+        const blocks = new Uint8Array(chunk.blocks.length);
+        blocks[1 + 1 * 16 + 40 * 256] = BLOCK.STONE;
+        chunk.blocks = blocks;
+        assert.strictEqual(chunk.getSurfaceHeight(1, 1), 41);
+        assert.strictEqual(world.getSurfaceHeight(1, 1), 40);
+    });
+});
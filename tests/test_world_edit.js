@@ -0,0 +1,101 @@
+const assert = require('assert');
+const { JSDOM } = require('jsdom');
+const fs = require('fs');
+
+const dom = new JSDOM(`<!DOCTYPE html>`, {
+    runScripts: "dangerously",
+    url: "http://localhost/"
+});
+
+// Mock globals
+dom.window.BiomeManager = class BiomeManager { constructor() {} getBiome() { return {}; } };
+dom.window.StructureManager = class StructureManager { constructor() {} };
+
+// Load scripts
+dom.window.eval(fs.readFileSync('js/blocks.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/physics.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/chunk.js', 'utf8'));
+dom.window.eval(fs.readFileSync('js/world.js', 'utf8'));
+
+describe('World Edit Transactions', () => {
+    let world, BLOCK;
+
+    beforeEach(() => {
+        BLOCK = dom.window.BLOCK;
+        world = new dom.window.World();
+        for (let cx = -1; cx <= 1; cx++) {
+            for (let cz = -1; cz <= 1; cz++) {
+                const chunk = new dom.window.Chunk(cx, cz);
+                world.chunks.set(world.getChunkKey(cx, cz), chunk);
+            }
+        }
+        world.chunks.forEach(chunk => chunk.buildMesh(world));
+    });
+
+    it('should recalculate light once per touched section', () => {
+        let recalcs = 0;
+        const original = world.recalcLightBox.bind(world);
+        world.recalcLightBox = (...args) => { recalcs++; original(...args); };
+
+        world.beginEdit();
+        for (let x = 2; x < 6; x++) {
+            for (let y = 2; y < 6; y++) world.setBlock(x, y, 2, BLOCK.STONE);
+        }
+        assert.strictEqual(recalcs, 0);
+        const changes = world.endEdit();
+
+        assert.strictEqual(recalcs, 1);
+        assert.strictEqual(changes.length, 16);
+        assert.deepStrictEqual(JSON.parse(JSON.stringify(changes[0])), { x: 2, y: 2, z: 2, type: BLOCK.STONE });
+    });
+
+    it('should only finish the outermost transaction', () => {
+        let recalcs = 0;
+        world.recalcLightBox = () => { recalcs++; };
+
+        world.beginEdit();
+        world.beginEdit();
+        world.setBlock(1, 1, 1, BLOCK.STONE);
+        assert.strictEqual(world.endEdit().length, 0);
+        assert.strictEqual(recalcs, 0);
+        assert.strictEqual(world.endEdit().length, 1);
+        assert.strictEqual(recalcs, 1);
+    });
+
+    it('should return changes from batchEdit', () => {
+        const changes = world.batchEdit(() => {
+            world.setBlock(3, 20, 3, BLOCK.DIRT);
+            world.setBlock(3, 21, 3, BLOCK.DIRT);
+        });
+        assert.strictEqual(changes.length, 2);
+        assert.strictEqual(world.editDepth, 0);
+    });
+
+    it('should light a placed torch once the transaction ends', () => {
+        world.batchEdit(() => {
+            world.setBlock(4, 10, 4, BLOCK.TORCH);
+        });
+        assert.strictEqual(world.getLight(4, 10, 4), 15);
+        assert.strictEqual(world.getLight(5, 10, 4), 14);
+    });
+
+    it('should flag only the touched sections of neighbouring chunks', () => {
+        world.setBlock(0, 40, 5, BLOCK.STONE);
+        const west = world.getChunk(-1, 0);
+        assert.strictEqual(west.dirtySections, 1 << 2);
+        assert.strictEqual(world.getChunk(1, 0).dirtySections, 0);
+    });
+
+    it('should only tell the flow field about metadata that changes a collision shape', () => {
+        world.setBlock(1, 10, 1, BLOCK.WATER);
+        world.setBlock(2, 10, 1, BLOCK.REDSTONE_WIRE);
+        world.setBlock(3, 10, 1, BLOCK.DOOR_WOOD_BOTTOM);
+        const changed = [];
+        world.game = { navigation: { blockChanged: (x, y, z) => changed.push([x, y, z]) } };
+
+        world.setMetadata(1, 10, 1, 3); // Water level
+        world.setMetadata(2, 10, 1, 12); // Wire power
+        world.setMetadata(3, 10, 1, 4); // Door opens
+        assert.deepStrictEqual(changed, [[3, 10, 1]]);
+    });
+});